@@ -282,5 +282,34 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Africa/Abidjan' # A Ajustez selon votre fuseau horaire
 
+# Publication de la progression des tâches de parsing (files/progress.py)
+FILES_PROGRESS_INTERVAL_MS = 500
+FILES_PROGRESS_PERCENT_STEP = 5
+
+# Lignes TranslationString validées par transaction lors de l'ingestion (files/writers.py)
+FILES_INGEST_TRANSACTION_ROWS = 10000
+
+# Taille maximale d'un fichier envoyé, en octets (files/serializers.py)
+FILES_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+
+# Ingestion parallèle par plages au-delà de ce seuil en octets (None pour désactiver) ;
+# le seuil doit rester sous FILES_MAX_UPLOAD_SIZE, sinon aucun fichier envoyé ne l'atteint
+FILES_CHUNKED_INGESTION_THRESHOLD = 4 * 1024 * 1024
+FILES_INGEST_CHUNK_SIZE = 2 * 1024 * 1024
+
+# Chaînes lues et traduites par paquet par le moteur de traduction (translations/engine.py)
+TRANSLATIONS_ENGINE_CHUNK_SIZE = 2000
+
+# Mémoire approchée (translations/fuzzy.py) : similarité minimale des trigrammes,
+# pré-remplissage par défaut des services (config['fuzzy_prefill']) et cache par processus
+TRANSLATIONS_FUZZY_THRESHOLD = 0.7
+TRANSLATIONS_FUZZY_PREFILL = False
+TRANSLATIONS_FUZZY_CACHE_ITEMS = 200000
+TRANSLATIONS_FUZZY_CACHE_TTL = 300
+
+# Masquage des variables et du balisage avant l'envoi au service (translations/masking.py),
+# par défaut des services (config['mask_placeholders'])
+TRANSLATIONS_MASK_PLACEHOLDERS = True
+
 
 AUTH_USER_MODEL= 'accounts.User'
\ No newline at end of file
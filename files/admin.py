@@ -3,7 +3,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import TranslationFile, TranslationString
+from .models import TranslationFile, TranslationString, TranslationFileChunk
+from .stats import invalidate_statistics
 
 @admin.register(TranslationFile)
 class TranslationFileAdmin(admin.ModelAdmin):
@@ -14,6 +15,7 @@ class TranslationFileAdmin(admin.ModelAdmin):
         'uploaded_by', 
         'file_size_formatted',
         'total_strings',
+        'translated_count',
         'uploaded_at',
         'view_strings_link'
     ]
@@ -41,6 +43,9 @@ class TranslationFileAdmin(admin.ModelAdmin):
         'uploaded_at',
         'task_id',
         'total_strings',
+        'translated_count',
+        'fuzzy_count',
+        'plural_count',
         'file_info_display'
     ]
     
@@ -49,7 +54,8 @@ class TranslationFileAdmin(admin.ModelAdmin):
             'fields': ('original_filename', 'file_path', 'file_type', 'file_size')
         }),
         ('Statut et traitement', {
-            'fields': ('status', 'task_id', 'error_message', 'total_strings')
+            'fields': ('status', 'task_id', 'error_message', 'total_strings',
+                       'translated_count', 'fuzzy_count', 'plural_count')
         }),
         ('Métadonnées', {
             'fields': ('detected_framework', 'encoding', 'uploaded_by', 'uploaded_at')
@@ -97,7 +103,7 @@ class TranslationFileAdmin(admin.ModelAdmin):
     
     def view_strings_link(self, obj):
         """Lien vers les chaînes de traduction"""
-        count = obj.strings.count()
+        count = obj.total_strings
         if count > 0:
             url = reverse('admin:files_translationstring_changelist')
             return format_html(
@@ -124,12 +130,14 @@ class TranslationFileAdmin(admin.ModelAdmin):
     def mark_as_completed(self, request, queryset):
         """Action pour marquer comme terminé"""
         updated = queryset.update(status='completed')
+        invalidate_statistics(set(queryset.values_list('uploaded_by_id', flat=True)))
         self.message_user(request, f'{updated} fichier(s) marqué(s) comme terminé(s).')
     mark_as_completed.short_description = "Marquer comme terminé"
     
     def reset_status(self, request, queryset):
         """Action pour réinitialiser le statut"""
         updated = queryset.update(status='uploaded', error_message='')
+        invalidate_statistics(set(queryset.values_list('uploaded_by_id', flat=True)))
         self.message_user(request, f'{updated} fichier(s) réinitialisé(s).')
     reset_status.short_description = "Réinitialiser le statut"
     
@@ -278,3 +286,27 @@ class TranslationStringAdmin(admin.ModelAdmin):
         self.message_user(request, f'{updated} chaîne(s) sans flag fuzzy.')
     clear_fuzzy_flag.short_description = "Supprimer le flag fuzzy"
 
+
+
+
+@admin.register(TranslationFileChunk)
+class TranslationFileChunkAdmin(admin.ModelAdmin):
+    list_display = [
+        'file',
+        'index',
+        'byte_start',
+        'byte_end',
+        'status',
+        'entries_processed',
+        'strings_created',
+        'duplicates',
+        'committed_entries',
+        'checkpointed_at',
+        'updated_at'
+    ]
+    
+    list_filter = ['status']
+    
+    search_fields = ['file__original_filename', 'task_id', 'error_message']
+    
+    readonly_fields = [f.name for f in TranslationFileChunk._meta.fields]
@@ -1,6 +1,28 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+# Migration qui crée l'index ; avant elle (ou après son annulation), rien à réparer
+SEARCH_INDEX_MIGRATION = '0013_translationstring_search_index'
+
+
+def ensure_search_index(sender, using='default', **kwargs):
+    """
+    Réinstalle l'index de recherche s'il a disparu : sur SQLite, une
+    migration qui reconstruit la table des chaînes supprime ses triggers.
+    """
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+    from .search import install_index
+
+    connection = connections[using]
+    if ('files', SEARCH_INDEX_MIGRATION) in MigrationRecorder(connection).applied_migrations():
+        install_index(connection)
 
 
 class FilesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'files'
+
+    def ready(self):
+        post_migrate.connect(ensure_search_index, sender=self)
@@ -0,0 +1,182 @@
+# =============================================================================
+# files/checkpoints.py
+# =============================================================================
+
+"""
+Points de reprise de l'ingestion.
+
+Chaque plage (``TranslationFileChunk``) mémorise, dans la transaction même
+qui valide un lot de chaînes, où en est sa lecture : entrées traitées,
+octet et ligne où reprendre, chaînes créées. Une tâche relancée (``retry``
+Celery, worker tombé, ré-livraison) repart de ce point au lieu de relire et
+de réinsérer tout le fichier ; seul le lot non validé est refait.
+
+Un fichier traité en une seule tâche est vu comme une plage unique
+(index 0, fichier entier).
+
+- PO dans un encodage compatible ASCII : reprise exacte à l'octet, au début
+  de la première entrée non validée ;
+- JSON et encodages UTF-16/32 : l'analyseur ne peut pas repartir au milieu
+  du document, le flux est relu depuis le début de la plage et les entrées
+  déjà validées sont sautées sans accès à la base.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .chunking import is_ascii_compatible
+
+
+class TrackedLines:
+    """
+    Lignes d'un flux binaire, décodées une à une, avec leur position.
+
+    ``position`` vaut ``(octet, lignes_précédentes)`` du début de la
+    dernière ligne lue, puis de la fin du flux une fois celui-ci épuisé.
+    Le parser PO ne termine une entrée qu'en lisant la première ligne de la
+    suivante : au moment où une entrée est produite, ``position`` désigne
+    exactement le point de reprise qui la suit.
+    """
+
+    def __init__(self, binary, encoding, offset=0, lines=0):
+        self.binary = binary
+        self.encoding = encoding
+        self.offset = offset
+        self.lines = lines
+        self.position = (offset, lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.binary.close()
+        return False
+
+    def __iter__(self):
+        encoding = self.encoding
+        offset = self.offset
+        lines = self.lines
+        for raw in self.binary:
+            self.position = (offset, lines)
+            offset += len(raw)
+            lines += 1
+            yield raw.decode(encoding)
+        self.offset = offset
+        self.lines = lines
+        self.position = (offset, lines)
+
+
+class IngestionCheckpoint:
+    """
+    Point de reprise d'une plage, tenu à jour par le ``TranslationStringWriter``.
+
+        checkpoint = IngestionCheckpoint(chunk)
+        writer = TranslationStringWriter(file, checkpoint=checkpoint.save, **checkpoint.counters)
+        with checkpoint.open_po(source, encoding) as lines:
+            ingest_po_entries(lines, file, writer, progress,
+                              line_offset=checkpoint.line_offset, checkpoint=checkpoint)
+    """
+
+    def __init__(self, chunk):
+        self.chunk = chunk
+        # Entrées lues depuis le début de la plage, mis à jour par la boucle
+        # d'ingestion avant chaque ajout au writer
+        self.entries = chunk.committed_entries
+        # Index de la première entrée du flux ouvert, et entrées à sauter
+        self.first_entry = 0
+        self.skip = 0
+        self.line_offset = chunk.line_offset
+        self._lines = None
+
+    @property
+    def resumed(self):
+        return self.chunk.committed_entries > 0
+
+    @property
+    def counters(self):
+        """Compteurs à reprendre dans le writer"""
+        return {
+            'created': self.chunk.committed_strings,
+            'duplicates': self.chunk.committed_duplicates
+        }
+
+    def open_po(self, source, encoding):
+        """Lignes PO à partir du point de reprise"""
+        chunk = self.chunk
+        if is_ascii_compatible(encoding):
+            self._lines = TrackedLines(
+                source.open_binary(chunk.resume_offset, chunk.byte_end), encoding,
+                offset=chunk.resume_offset, lines=chunk.resume_lines
+            )
+            self.first_entry = chunk.committed_entries
+            self.line_offset = chunk.resume_lines
+            return self._lines
+        self.skip = chunk.committed_entries
+        return source.open_text(encoding, chunk.byte_start, chunk.byte_end)
+
+    def open_json(self, source, encoding, prefix=b'', suffix=b''):
+        """Flux JSON de la plage entière ; les entrées validées seront sautées"""
+        chunk = self.chunk
+        self.skip = chunk.committed_entries
+        return source.open_text(encoding, chunk.byte_start, chunk.byte_end,
+                                prefix=prefix, suffix=suffix)
+
+    def save(self, created, duplicates):
+        """Enregistre le point de reprise ; appelé dans la transaction du lot"""
+        from .models import TranslationFileChunk
+
+        fields = {
+            'committed_entries': self.entries,
+            'committed_strings': created,
+            'committed_duplicates': duplicates,
+            'checkpointed_at': timezone.now()
+        }
+        if self._lines is not None:
+            fields['committed_offset'], fields['committed_lines'] = self._lines.position
+        TranslationFileChunk.objects.filter(pk=self.chunk.pk).update(**fields)
+
+    def start(self, task_id):
+        """Marque la plage en cours pour la tâche ``task_id``"""
+        self.chunk.status = 'processing'
+        self.chunk.task_id = task_id
+        self.chunk.save(update_fields=['status', 'task_id', 'updated_at'])
+
+    def complete(self, entries, writer):
+        """Marque la plage terminée avec les compteurs finaux du writer"""
+        from .models import TranslationFileChunk
+
+        # update() et non save() : l'instance ignore les points de reprise
+        # enregistrés pendant l'ingestion
+        TranslationFileChunk.objects.filter(pk=self.chunk.pk).update(
+            status='completed',
+            bytes_processed=self.chunk.size,
+            entries_processed=entries,
+            strings_created=writer.created,
+            duplicates=writer.duplicates,
+            error_message='',
+            updated_at=timezone.now()
+        )
+        self.chunk.status = 'completed'
+
+    @classmethod
+    def for_file(cls, translation_file, size, resume=True):
+        """
+        Point de reprise d'un fichier traité en une seule tâche.
+
+        La plage unique d'une exécution interrompue est réutilisée ; toute
+        autre situation (premier passage, plages d'un découpage précédent,
+        fichier modifié, ``resume=False``) repart d'une plage neuve.
+        """
+        from .models import TranslationFileChunk
+
+        with transaction.atomic():
+            chunks = list(translation_file.chunks.select_for_update())
+            if (resume and len(chunks) == 1 and chunks[0].index == 0 and chunks[0].byte_start == 0
+                    and chunks[0].byte_end == size and chunks[0].status != 'completed'):
+                chunk = chunks[0]
+            else:
+                translation_file.chunks.all().delete()
+                chunk = TranslationFileChunk.objects.create(
+                    file=translation_file, index=0, byte_start=0, byte_end=size
+                )
+        return cls(chunk)
@@ -0,0 +1,209 @@
+# =============================================================================
+# files/chunking.py
+# =============================================================================
+
+"""
+Découpage des gros fichiers de traduction en plages d'octets alignées sur
+les entrées, pour une ingestion parallèle (une sous-tâche Celery par plage).
+
+- PO : une plage se termine sur une ligne vide, séparateur des entrées ;
+- JSON : une plage regroupe des membres consécutifs de l'objet racine ; elle
+  est relue encadrée par ``{`` et ``}`` pour former un objet valide.
+
+Seuls les encodages compatibles ASCII sont découpés : les octets recherchés
+(``\\n``, ``{``, ``,``...) doivent y avoir leur sens habituel.
+"""
+
+import codecs
+import re
+
+from django.conf import settings
+from django.db.models import Sum
+
+from .progress import ProgressReporter
+
+
+# Taille à partir de laquelle un fichier est ingéré par plages parallèles,
+# sous la taille maximale d'un envoi (FILES_MAX_UPLOAD_SIZE, 10 Mo)
+DEFAULT_CHUNKED_THRESHOLD = 4 * 1024 * 1024
+
+# Taille visée pour chaque plage
+DEFAULT_CHUNK_SIZE = 2 * 1024 * 1024
+
+# Jetons JSON du parcours de découpage : chaînes entières (sautées d'un
+# bloc), accolades, crochets, virgules et scalaires nus (nombres, littéraux)
+_JSON_TOKEN_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\],]|[^\s"{}\[\],:]+')
+
+
+def chunked_threshold():
+    """Seuil de découpage configuré, None si le mode par plages est désactivé"""
+    return getattr(settings, 'FILES_CHUNKED_INGESTION_THRESHOLD', DEFAULT_CHUNKED_THRESHOLD)
+
+
+def chunk_size():
+    return getattr(settings, 'FILES_INGEST_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def is_ascii_compatible(encoding):
+    """Les octets ASCII gardent-ils leur sens dans cet encodage ?"""
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return False
+    return not name.startswith(('utf-16', 'utf-32'))
+
+
+def should_chunk(source, file_type, encoding):
+    """Le fichier doit-il passer par l'ingestion parallèle par plages ?"""
+    threshold = chunked_threshold()
+    return (
+        threshold is not None
+        and source.size >= threshold
+        and file_type in ('po', 'json')
+        and is_ascii_compatible(encoding)
+    )
+
+
+def split_po_ranges(source, target_size):
+    """
+    Découpe un catalogue PO en plages d'environ ``target_size`` octets.
+
+    Chaque coupure est placée sur la première ligne vide qui suit la taille
+    visée : aucune entrée n'est à cheval sur deux plages. Retourne une liste
+    de ``(début, fin, lignes_précédentes)``.
+    """
+    buffer = source.buffer
+    ranges = []
+    start = 0
+    line_offset = 0
+    while start < source.size:
+        end = source.size
+        if start + target_size < source.size:
+            candidates = [
+                position for position in (
+                    buffer.find(b'\n\n', start + target_size),
+                    buffer.find(b'\n\r\n', start + target_size),
+                ) if position != -1
+            ]
+            if candidates:
+                # La plage garde le saut de ligne de fin d'entrée
+                end = min(candidates) + 1
+        ranges.append((start, end, line_offset))
+        line_offset += source.count_lines(start, end)
+        start = end
+    return ranges
+
+
+def split_json_ranges(source, target_size):
+    """
+    Découpe l'objet JSON racine en plages de membres consécutifs.
+
+    Les virgules de premier niveau sont repérées par un parcours des jetons
+    (les chaînes sont sautées d'un bloc) ; la coupure suit la première
+    virgule après la taille visée. Le même parcours compte les paires que
+    produira ``JSONStreamFlattener`` : chaque plage reçoit le nombre de
+    paires qui la précèdent, pour que les numéros d'entrée soient ceux d'une
+    ingestion en une seule tâche. Retourne ``(début, fin, entrées_précédentes)``
+    avec des plages sans les accolades racines ni les virgules séparatrices,
+    ou une liste vide si la racine n'est pas un objet.
+    """
+    tokens = _JSON_TOKEN_RE.finditer(source.buffer)
+    first = next(tokens, None)
+    if first is None or first.group() != b'{':
+        return []
+    # Rien d'autre qu'un espace ou un BOM ne doit précéder la racine
+    if source.buffer[:first.start()].strip(b' \t\r\n\xef\xbb\xbf'):
+        return []
+
+    boundaries = []
+    start = first.end()
+    next_cut = start + target_size
+    # Conteneurs ouverts sous la racine : (objet ?, paires comptées ?).
+    # Comme ``flatten_json``, une liste placée dans une liste ne produit rien.
+    stack = []
+    in_object = counted = expect_key = True
+    entries = 0
+    root_end = None
+    for match in tokens:
+        token = match.group()
+        if token == b',':
+            expect_key = in_object
+            if not stack and match.start() >= next_cut:
+                boundaries.append((match.start(), entries))
+                next_cut = match.end() + target_size
+        elif token in (b'{', b'['):
+            stack.append((in_object, counted))
+            counted = counted and (in_object or token == b'{')
+            in_object = expect_key = token == b'{'
+        elif token in (b'}', b']'):
+            if not stack:
+                root_end = match.start()
+                break
+            in_object, counted = stack.pop()
+            expect_key = False
+        elif in_object and expect_key:
+            expect_key = False
+        elif counted:
+            entries += 1
+    if root_end is None:
+        return []
+
+    ranges = []
+    entry_offset = 0
+    for comma, entries_before in boundaries:
+        ranges.append((start, comma, entry_offset))
+        entry_offset = entries_before
+        start = comma + 1
+    ranges.append((start, root_end, entry_offset))
+    return ranges
+
+
+def split_ranges(source, file_type, target_size=None):
+    """Plages d'ingestion du fichier selon son type"""
+    target_size = target_size or chunk_size()
+    if file_type == 'po':
+        return split_po_ranges(source, target_size)
+    if file_type == 'json':
+        return split_json_ranges(source, target_size)
+    return []
+
+
+class ChunkProgressReporter(ProgressReporter):
+    """
+    Progression d'une plage, publiée au niveau du fichier.
+
+    À chaque publication, l'avancement de la plage est enregistré sur sa
+    ligne ``TranslationFileChunk`` puis l'ensemble des plages est agrégé et
+    publié sous l'identifiant de la tâche de finalisation, celui que l'action
+    ``progress`` interroge : le client ne voit qu'une seule progression.
+    """
+
+    def __init__(self, task, chunk, file_size, file_task_id, **kwargs):
+        super().__init__(task, task_id=file_task_id, **kwargs)
+        self.chunk = chunk
+        self.file_size = max(file_size, 1)
+
+    def build_meta(self):
+        from .models import TranslationFileChunk
+
+        current, total, strings_created, chunk_progress = self._state
+        TranslationFileChunk.objects.filter(pk=self.chunk.pk).update(
+            bytes_processed=int(self.chunk.size * chunk_progress / 100),
+            entries_processed=current,
+            strings_created=strings_created
+        )
+        totals = TranslationFileChunk.objects.filter(file_id=self.chunk.file_id).aggregate(
+            bytes_processed=Sum('bytes_processed'),
+            entries_processed=Sum('entries_processed'),
+            strings_created=Sum('strings_created')
+        )
+        done = totals['bytes_processed'] or 0
+        entries = totals['entries_processed'] or 0
+        ratio = min(done / self.file_size, 1.0)
+        return {
+            'current': entries,
+            # Total d'entrées estimé d'après la part du fichier déjà lue
+            'total': max(int(entries / ratio), entries) if ratio else entries,
+            'strings_created': totals['strings_created'] or 0,
+            'progress': min(int(ratio * 100), 99)
+        }
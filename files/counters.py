@@ -0,0 +1,260 @@
+# =============================================================================
+# files/counters.py
+# =============================================================================
+
+"""
+Compteurs dénormalisés des chaînes d'un fichier.
+
+``TranslationFile`` porte ``total_strings``, ``translated_count``,
+``fuzzy_count`` et ``plural_count`` : les serializers et les filtres les
+lisent au lieu de compter la table des chaînes à chaque requête.
+
+Ils sont tenus à jour par des ``UPDATE ... SET x = x + delta`` (``F()``),
+dans la transaction même qui crée, modifie ou supprime les chaînes :
+
+- ``TranslationString.save()`` / ``delete()`` pour une ligne ;
+- ``TranslationStringQuerySet.update()`` / ``delete()`` (les actions
+  d'administration, ``file.strings.all().delete()``) et ``bulk_update()``,
+  en mémoire pour des chaînes lues en base, par recomptage sinon ;
+- ``TranslationStringWriter`` pour les INSERT en masse de l'ingestion.
+
+Un ``TranslationFile`` chargé avant ces écritures n'écrase aucun compteur
+en se sauvegardant (voir ``TranslationFile.save``). La commande
+``repair_file_counters`` recalcule les valeurs exactes en cas d'écart.
+
+Les mêmes chemins incrémentent ``TranslationFile.version`` à chaque écriture
+de chaînes, drapeaux ou non (``touch_files``) : c'est le marqueur des ETags
+de ``files/etags.py``.
+"""
+
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.db import models, router, transaction
+from django.db.models import Count, F, Q
+
+from .stats import invalidate_file_statistics, invalidate_statistics
+
+
+# Compteur du fichier -> drapeau de la chaîne
+FLAG_COUNTERS = {
+    'translated_count': 'is_translated',
+    'fuzzy_count': 'is_fuzzy',
+    'plural_count': 'is_plural',
+}
+
+COUNTER_FIELDS = ('total_strings',) + tuple(FLAG_COUNTERS)
+
+# Clés primaires par requête quand il faut relire des lignes précises
+PK_BATCH_SIZE = 500
+
+# Vrai pendant un bulk_update dont les deltas sont calculés en mémoire
+_counted_in_memory = ContextVar('files_counted_in_memory', default=False)
+
+
+def string_counters(strings, sign=1):
+    """Deltas des compteurs pour des chaînes en mémoire, par fichier"""
+    deltas = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for obj in strings:
+        counters = deltas[obj.file_id]
+        counters['total_strings'] += sign
+        for counter, flag in FLAG_COUNTERS.items():
+            if getattr(obj, flag):
+                counters[counter] += sign
+    return dict(deltas)
+
+
+def count_strings(queryset):
+    """Valeurs exactes des compteurs des chaînes de ``queryset``, par fichier"""
+    annotations = {'total_strings': Count('pk')}
+    for counter, flag in FLAG_COUNTERS.items():
+        annotations[counter] = Count('pk', filter=Q(**{flag: True}))
+    rows = queryset.order_by().values('file').annotate(**annotations)
+    return {row.pop('file'): row for row in rows}
+
+
+def subtract(after, before):
+    """Différence de deux comptages ``count_strings``"""
+    deltas = {}
+    for file_id in set(after) | set(before):
+        new, old = after.get(file_id, {}), before.get(file_id, {})
+        deltas[file_id] = {field: new.get(field, 0) - old.get(field, 0) for field in COUNTER_FIELDS}
+    return deltas
+
+
+def touch_files(file_ids, using=None, instance=None):
+    """Incrémente la version des fichiers ``file_ids`` (chaînes modifiées)"""
+    from .models import TranslationFile
+
+    file_ids = list(file_ids)
+    if not file_ids:
+        return
+    using = using or router.db_for_write(TranslationFile)
+    TranslationFile.objects.using(using).filter(pk__in=file_ids).update(version=F('version') + 1)
+    if instance is not None and instance.pk in file_ids:
+        instance.version += 1
+
+
+def touch_string_files(string_ids, using=None):
+    """``touch_files`` pour les fichiers des chaînes ``string_ids`` (traductions modifiées)"""
+    from .models import TranslationFile
+
+    using = using or router.db_for_write(TranslationFile)
+    TranslationFile.objects.using(using).filter(strings__in=list(string_ids)).update(version=F('version') + 1)
+
+
+def apply_counters(deltas, using=None, instance=None):
+    """
+    Applique des deltas ``{file_id: {compteur: delta}}`` par ``F()`` et
+    incrémente la version de chaque fichier cité, même sans delta.
+
+    ``instance``, le ``TranslationFile`` tenu par l'appelant, est mis à jour
+    en mémoire pour rester cohérent avec la base.
+    """
+    from .models import TranslationFile
+
+    using = using or router.db_for_write(TranslationFile)
+    manager = TranslationFile.objects.using(using)
+    changed = []
+    touched = []
+    for file_id, counters in deltas.items():
+        changes = {field: F(field) + delta for field, delta in counters.items() if delta}
+        if not changes:
+            touched.append(file_id)
+            continue
+        manager.filter(pk=file_id).update(version=F('version') + 1, **changes)
+        changed.append(file_id)
+        if instance is not None and instance.pk == file_id:
+            instance.version += 1
+            for field, delta in counters.items():
+                setattr(instance, field, getattr(instance, field) + delta)
+    touch_files(touched, using=using, instance=instance)
+
+    # Statistiques en cache des propriétaires (files/stats.py)
+    if instance is not None and changed == [instance.pk]:
+        invalidate_statistics([instance.uploaded_by_id], using=using)
+    else:
+        invalidate_file_statistics(changed, using=using)
+
+
+class TranslationStringQuerySet(models.QuerySet):
+    """``update()`` et ``delete()`` répercutés sur les compteurs des fichiers"""
+
+    def update(self, **kwargs):
+        if _counted_in_memory.get():
+            return super().update(**kwargs)
+        flags = [flag for flag in FLAG_COUNTERS.values() if flag in kwargs]
+        if not flags:
+            # Pas de compteur à changer : seule la version des fichiers touchés avance
+            with transaction.atomic(using=self.db):
+                file_ids = set(self.order_by().values_list('file_id', flat=True).distinct())
+                rows = super().update(**kwargs)
+                touch_files(file_ids, using=self.db)
+            return rows
+
+        with transaction.atomic(using=self.db):
+            if all(isinstance(kwargs[flag], bool) for flag in flags):
+                # Valeur fixe : l'état final se déduit du comptage initial
+                before = count_strings(self)
+                rows = super().update(**kwargs)
+                after = {}
+                for file_id, counters in before.items():
+                    after[file_id] = dict(counters)
+                    for counter, flag in FLAG_COUNTERS.items():
+                        if flag in kwargs:
+                            after[file_id][counter] = counters['total_strings'] if kwargs[flag] else 0
+            else:
+                # Expressions (Case de bulk_update, F()...) : recomptage des lignes touchées
+                pks = list(self.values_list('pk', flat=True))
+                before = self._count_pks(pks)
+                rows = super().update(**kwargs)
+                after = self._count_pks(pks)
+            apply_counters(subtract(after, before), using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        """
+        Chaînes chargées depuis la base (drapeaux d'origine connus, voir
+        ``TranslationString.from_db``) : deltas calculés en mémoire et
+        appliqués une fois par fichier, sans recomptage à chaque lot.
+        """
+        objs = list(objs)
+        flags = [flag for flag in FLAG_COUNTERS.values() if flag in fields]
+        if not flags or not all(set(flags) <= getattr(obj, '_stored_flags', {}).keys() for obj in objs):
+            return super().bulk_update(objs, fields, batch_size=batch_size)
+
+        deltas = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+        for obj in objs:
+            for counter, flag in FLAG_COUNTERS.items():
+                if flag in flags:
+                    deltas[obj.file_id][counter] += int(getattr(obj, flag)) - int(obj._stored_flags[flag])
+
+        with transaction.atomic(using=self.db):
+            token = _counted_in_memory.set(True)
+            try:
+                rows = super().bulk_update(objs, fields, batch_size=batch_size)
+            finally:
+                _counted_in_memory.reset(token)
+            apply_counters(dict(deltas), using=self.db)
+        for obj in objs:
+            obj._stored_flags.update({flag: getattr(obj, flag) for flag in flags})
+        return rows
+
+    bulk_update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            before = count_strings(self)
+            result = super().delete()
+            apply_counters(subtract({}, before), using=self.db)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def _count_pks(self, pks):
+        totals = {}
+        manager = self.model._default_manager.using(self.db)
+        for start in range(0, len(pks), PK_BATCH_SIZE):
+            counted = count_strings(manager.filter(pk__in=pks[start:start + PK_BATCH_SIZE]))
+            for file_id, counters in counted.items():
+                total = totals.setdefault(file_id, dict.fromkeys(COUNTER_FIELDS, 0))
+                for field, value in counters.items():
+                    total[field] += value
+        return totals
+
+
+def repair_counters(files, dry_run=False):
+    """
+    Recalcule les compteurs des fichiers de ``files`` (queryset) depuis leurs
+    chaînes. Retourne ``[(fichier, {compteur: (stocké, réel)})]`` pour les
+    fichiers en écart, corrigés sauf si ``dry_run``.
+    """
+    from .models import TranslationString
+
+    repaired = []
+    for translation_file in files.only('pk', 'original_filename', *COUNTER_FIELDS).iterator():
+        with transaction.atomic():
+            # Verrou : aucune écriture de chaînes du fichier pendant le recomptage
+            stored = type(translation_file).objects.select_for_update().filter(
+                pk=translation_file.pk
+            ).values(*COUNTER_FIELDS).first()
+            if stored is None:
+                continue
+            actual = count_strings(TranslationString.objects.filter(file=translation_file)).get(
+                translation_file.pk, dict.fromkeys(COUNTER_FIELDS, 0)
+            )
+            differences = {
+                field: (stored[field], actual[field])
+                for field in COUNTER_FIELDS if stored[field] != actual[field]
+            }
+            if differences:
+                if not dry_run:
+                    type(translation_file).objects.filter(pk=translation_file.pk).update(
+                        version=F('version') + 1, **actual
+                    )
+                    invalidate_file_statistics([translation_file.pk])
+                repaired.append((translation_file, differences))
+    return repaired
@@ -0,0 +1,82 @@
+# =============================================================================
+# files/etags.py
+# =============================================================================
+
+"""
+ETags faibles des lectures que les clients interrogent en boucle : détail
+d'un fichier, ``strings/by_file`` et les deux actions ``statistics``.
+
+L'ETag se calcule depuis des marqueurs de version, lus avant tout
+serializer et toute requête sur les chaînes :
+
+- ``TranslationFile.version``, incrémenté par chaque écriture du fichier,
+  de ses chaînes et de leurs traductions (``files/counters.py``) ;
+- la version du cache des statistiques du périmètre (``files/stats.py``),
+  et la période d'expiration de ce cache, qui borne l'écart quand le cache
+  n'est pas partagé avec les workers Celery.
+
+La représentation demandée (chemin et paramètres, type de rendu) entre dans
+l'empreinte. Un ``If-None-Match`` qui correspond reçoit une 304 sans corps.
+"""
+
+import hashlib
+import logging
+import time
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+from .stats import statistics_version, stats_timeout
+
+logger = logging.getLogger(__name__)
+
+
+def weak_etag(request, *markers):
+    """ETag faible de la réponse à ``request`` pour les marqueurs de version ``markers``"""
+    parts = [request.get_full_path(), getattr(request, 'accepted_media_type', None) or '']
+    parts.extend(str(marker) for marker in markers)
+    digest = hashlib.md5('\n'.join(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"'
+
+
+def statistics_etag(request, kind):
+    """ETag des statistiques ``kind`` de l'utilisateur, None si le cache est indisponible"""
+    try:
+        scope, version = statistics_version(request.user)
+    except Exception as e:
+        logger.warning(f"Version des statistiques indisponible: {e}")
+        return None
+    period = int(time.time() // max(stats_timeout(), 1))
+    return weak_etag(request, 'statistics', kind, scope, version, period)
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(request, etag):
+    """``If-None-Match`` de ``request`` correspond-il à ``etag`` (comparaison faible) ?"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or _opaque(etag) in {_opaque(tag) for tag in etags}
+
+
+def conditional_response(request, etag, render):
+    """
+    304 si ``If-None-Match`` correspond à ``etag``, sinon la réponse de
+    ``render()`` ; les réponses 2xx portent l'ETag. Sans ETag (None), la
+    réponse est rendue sans condition.
+    """
+    if etag is not None and etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = render()
+        if etag is None or not 200 <= response.status_code < 300:
+            return response
+    response['ETag'] = etag
+    # Réponses propres à l'utilisateur, revalidées à chaque lecture
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
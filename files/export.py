@@ -0,0 +1,82 @@
+# =============================================================================
+# files/export.py
+# =============================================================================
+
+"""
+Export en flux des chaînes d'un fichier (NDJSON ou CSV).
+
+Les lignes sont lues par ``values_list().iterator(chunk_size)`` (curseur
+côté serveur sur PostgreSQL, ``fetchmany`` sur SQLite) et écrites au fil de
+la lecture : la mémoire reste bornée par un paquet de lignes, quelle que
+soit la taille du fichier.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# Colonnes exportées, dans l'ordre du CSV
+EXPORT_FIELDS = (
+    'id', 'key', 'source_text', 'translated_text', 'context', 'comment',
+    'is_translated', 'is_fuzzy', 'is_plural', 'line_number', 'created_at',
+)
+
+# Lignes lues par aller-retour en base, et écrites par morceau de réponse
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+
+
+class _Echo:
+    """Pseudo-fichier pour ``csv.writer`` : retourne la ligne au lieu de l'écrire"""
+
+    def write(self, value):
+        return value
+
+
+def _ndjson_line(encoder, row):
+    return encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n'
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def export_rows(queryset, export_format='ndjson', chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Générateur des morceaux de l'export de ``queryset`` : ``chunk_size``
+    lignes par morceau, l'en-tête en premier pour le CSV.
+    """
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+
+        def format_row(row):
+            return writer.writerow([_csv_value(value) for value in row])
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, default=DjangoJSONEncoder().default)
+
+        def format_row(row):
+            return _ndjson_line(encoder, row)
+
+    buffer = []
+    for row in rows:
+        buffer.append(format_row(row))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
@@ -5,7 +5,9 @@
 
 import django_filters
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
 from .models import TranslationFile, TranslationString
+from .search import is_ranked, search_strings
 
 
 class TranslationFileFilter(filters.FilterSet):
@@ -64,6 +66,8 @@ class TranslationFileFilter(filters.FilterSet):
     has_strings = filters.BooleanFilter(method='filter_has_strings')
     strings_count_min = filters.NumberFilter(method='filter_strings_count_min')
     strings_count_max = filters.NumberFilter(method='filter_strings_count_max')
+    translated_count_min = filters.NumberFilter(field_name='translated_count', lookup_expr='gte')
+    fuzzy_count_min = filters.NumberFilter(field_name='fuzzy_count', lookup_expr='gte')
 
     class Meta:
         model = TranslationFile
@@ -78,23 +82,17 @@ class TranslationFileFilter(filters.FilterSet):
     def filter_has_strings(self, queryset, name, value):
         """Filtre les fichiers qui ont des chaînes ou non"""
         if value:
-            return queryset.filter(translationstring__isnull=False).distinct()
+            return queryset.filter(total_strings__gt=0)
         else:
-            return queryset.filter(translationstring__isnull=True)
+            return queryset.filter(total_strings=0)
 
     def filter_strings_count_min(self, queryset, name, value):
         """Filtre par nombre minimum de chaînes"""
-        from django.db.models import Count
-        return queryset.annotate(
-            strings_count=Count('translationstring')
-        ).filter(strings_count__gte=value)
+        return queryset.filter(total_strings__gte=value)
 
     def filter_strings_count_max(self, queryset, name, value):
         """Filtre par nombre maximum de chaînes"""
-        from django.db.models import Count
-        return queryset.annotate(
-            strings_count=Count('translationstring')
-        ).filter(strings_count__lte=value)
+        return queryset.filter(total_strings__lte=value)
 
 
 class TranslationStringFilter(filters.FilterSet):
@@ -167,11 +165,18 @@ class TranslationStringFilter(filters.FilterSet):
         ).filter(translations_count__gte=value)
 
     def filter_search(self, queryset, name, value):
-        """Recherche globale dans key, source_text et context"""
-        from django.db.models import Q
-        return queryset.filter(
-            Q(key__icontains=value) |
-            Q(source_text__icontains=value) |
-            Q(context__icontains=value)
-        )
+        """Recherche globale dans key, source_text et context (index plein texte, par préfixes)"""
+        return search_strings(queryset, value)
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """
+    ``OrderingFilter`` qui, sans ``?ordering=`` explicite, classe les
+    résultats d'une recherche indexée par pertinence avant l'ordre par défaut.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and is_ranked(queryset):
+            return ['search_rank'] + list(self.get_default_ordering(view) or [])
+        return super().get_ordering(request, queryset, view)
 
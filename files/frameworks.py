@@ -0,0 +1,280 @@
+# =============================================================================
+# files/frameworks.py
+# =============================================================================
+
+"""
+Registre des signatures de frameworks pour la détection automatique.
+
+Les signatures d'un type de fichier sont compilées une seule fois en une
+expression unique : un seul parcours de l'échantillon relève toutes les
+signatures présentes, pour tous les frameworks. Les applications tierces
+peuvent ajouter leurs propres signatures sans modifier ce module :
+
+    from files.frameworks import register_framework
+
+    register_framework('po', 'rails', keywords=['app/views/'], extensions=['rb'])
+
+Trois sortes de signatures :
+    - ``keywords`` : littéraux cherchés en début de mot (``django``,
+      ``templates/``, ``@angular``, ``msgid "Login"``...) ;
+    - ``extensions`` : extensions de fichiers référencés (``.py``, ``.vue``...) ;
+    - ``patterns`` : expressions régulières libres, pour le reste.
+
+Mots-clés et extensions forment une seule alternance factorisée (un automate
+préfixe). Chaque recherche reprend au caractère qui suit le début de la
+correspondance précédente, pas à sa fin : des signatures qui se chevauchent
+(``src/``, ``components/`` et ``.vue`` dans ``src/components/Foo.vue``) sont
+toutes relevées. Chaque
+signature compte indépendamment des autres, une fois, comme le faisait
+l'ancienne série de ``re.search``. Les expressions libres coûtent un parcours
+chacune : elles sont à réserver aux cas qui l'exigent.
+"""
+
+import re
+import threading
+
+
+class FrameworkRegistry:
+    """Signatures de frameworks par type de fichier, compilées à la demande"""
+
+    def __init__(self):
+        # file_type -> {'keywords': {mot: [crédits]}, 'extensions': {...}, 'patterns': {...}}
+        # où un crédit est un tuple (framework, poids, secours)
+        self._signatures = {}
+        # file_type -> (regex compilée, {littéral: [signatures]}, [(regex, crédits)])
+        self._compiled = {}
+        # framework -> rang d'enregistrement, pour départager les égalités
+        self._order = {}
+        self._lock = threading.Lock()
+
+    def register(self, file_type, framework, keywords=(), extensions=(), patterns=(),
+                 weight=1, fallback=False):
+        """
+        Ajoute des signatures pour ``framework``.
+
+        Chaque signature présente rapporte ``weight`` points, quel que soit
+        son nombre d'occurrences ; la casse est ignorée. Une signature de
+        secours (``fallback``) n'est prise en compte que si aucun framework
+        principal n'a été trouvé. Une même signature peut créditer plusieurs
+        frameworks.
+        """
+        credit = (framework, weight, fallback)
+        for pattern in patterns:
+            re.compile(pattern)  # Valider tout de suite, pas au premier scan
+
+        with self._lock:
+            self._order.setdefault(framework, len(self._order))
+            signatures = self._signatures.setdefault(
+                file_type, {'keywords': {}, 'extensions': {}, 'patterns': {}}
+            )
+            for keyword in keywords:
+                signatures['keywords'].setdefault(keyword.lower(), []).append(credit)
+            for extension in extensions:
+                signatures['extensions'].setdefault(extension.lower().lstrip('.'), []).append(credit)
+            for pattern in patterns:
+                signatures['patterns'].setdefault(pattern, []).append(credit)
+            self._compiled.pop(file_type, None)
+
+    def _compile(self, file_type):
+        compiled = self._compiled.get(file_type)
+        if compiled is not None:
+            return compiled
+        with self._lock:
+            compiled = self._compiled.get(file_type)
+            if compiled is None:
+                compiled = self._build(self._signatures.get(file_type, {}))
+                self._compiled[file_type] = compiled
+        return compiled
+
+    @classmethod
+    def _trie(cls, literals):
+        """
+        Alternance factorisée par préfixe commun : à chaque position, un seul
+        caractère est comparé par première lettre possible au lieu d'essayer
+        chaque littéral. Les suites plus longues sont tentées en premier : la
+        correspondance est le plus long littéral ('vue-i18n' plutôt que 'vue').
+        """
+        children = {}
+        for literal in literals:
+            children.setdefault(literal[0], []).append(literal[1:])
+        branches = []
+        for char, suffixes in sorted(children.items()):
+            rest = [suffix for suffix in suffixes if suffix]
+            if not rest:
+                branches.append(re.escape(char))
+            else:
+                optional = '?' if len(rest) < len(suffixes) else ''
+                branches.append(f'{re.escape(char)}(?:{cls._trie(rest)}){optional}')
+        return '|'.join(branches)
+
+    @classmethod
+    def _build(cls, signatures):
+        # Littéral cherché -> signatures (sorte, littéral, crédits) ; une
+        # extension « py » est cherchée sous la forme « .py »
+        literals = {}
+        for keyword, credits in signatures.get('keywords', {}).items():
+            literals.setdefault(keyword, []).append(('keyword', keyword, credits))
+        for extension, credits in signatures.get('extensions', {}).items():
+            literals.setdefault(f'.{extension}', []).append(('extension', f'.{extension}', credits))
+
+        # Le plus long littéral trouvé à une position implique ses préfixes
+        # ('wp-content/' implique 'wp-') : ils sont résolus d'avance
+        targets = {
+            literal: [
+                signature
+                for prefix, prefix_signatures in literals.items() if literal.startswith(prefix)
+                for signature in prefix_signatures
+            ]
+            for literal in literals
+        }
+        regex = re.compile(cls._trie(literals)) if literals else None
+        patterns = [
+            (re.compile(pattern, re.IGNORECASE), credits)
+            for pattern, credits in signatures.get('patterns', {}).items()
+        ]
+        return regex, targets, patterns
+
+    def scan(self, content, file_type):
+        """
+        Parcourt ``content`` une seule fois (plus une fois par expression libre).
+
+        Retourne ``(scores, scores_de_secours)`` : la somme des poids des
+        signatures présentes, par framework.
+        """
+        regex, targets, patterns = self._compile(file_type)
+        # Le texte est mis en minuscules une fois pour toutes : l'expression
+        # compilée sans IGNORECASE garde ses optimisations de préfixe.
+        text = content.lower()
+        size = len(text)
+
+        found = []
+        seen = set()
+        if regex is not None:
+            pos = 0
+            while True:
+                match = regex.search(text, pos)
+                if match is None:
+                    break
+                start = match.start()
+                # Reprise au caractère suivant : les signatures qui se chevauchent comptent
+                pos = start + 1
+                for signature in targets[match.group()]:
+                    kind, literal, credits = signature
+                    if (kind, literal) in seen:
+                        continue
+                    if kind == 'keyword':
+                        # Début de mot : ni lettre, ni chiffre, ni « _ @ - » juste avant
+                        matched = start == 0 or not (text[start - 1].isalnum() or text[start - 1] in '_@-')
+                    else:
+                        end = start + len(literal)
+                        matched = end == size or not (text[end].isalnum() or text[end] == '_')
+                    if matched:
+                        seen.add((kind, literal))
+                        found.append(credits)
+        for pattern, credits in patterns:
+            if pattern.search(text):
+                found.append(credits)
+
+        scores = {}
+        fallback_scores = {}
+        for credits in found:
+            for framework, weight, fallback in credits:
+                bucket = fallback_scores if fallback else scores
+                bucket[framework] = bucket.get(framework, 0) + weight
+        return scores, fallback_scores
+
+    def detect(self, content, file_type):
+        """Retourne ``(framework, scores)`` ; framework vaut None sans aucune signature"""
+        scores, fallback_scores = self.scan(content, file_type)
+        for candidates in (scores, fallback_scores):
+            if candidates:
+                # Égalité : le premier framework enregistré l'emporte, comme
+                # l'ordre du dictionnaire de motifs d'origine
+                framework = max(candidates, key=lambda name: (candidates[name], -self._order[name]))
+                return framework, scores
+        return None, scores
+
+
+registry = FrameworkRegistry()
+
+
+def register_framework(file_type, framework, keywords=(), extensions=(), patterns=(),
+                       weight=1, fallback=False):
+    """Enregistre des signatures de framework dans le registre global"""
+    registry.register(
+        file_type, framework, keywords=keywords, extensions=extensions,
+        patterns=patterns, weight=weight, fallback=fallback
+    )
+
+
+# -----------------------------------------------------------------------------
+# Signatures intégrées : fichiers PO
+# -----------------------------------------------------------------------------
+
+HEADER_FRAMEWORKS = (
+    'django', 'flask', 'vue', 'react', 'angular', 'laravel',
+    'symfony', 'wordpress', 'joomla', 'drupal',
+)
+
+for _framework in HEADER_FRAMEWORKS:
+    register_framework('po', _framework, keywords=[f'Project-Id-Version: {_framework}'], weight=3)
+    register_framework('po', _framework, keywords=[f'msgid "{_framework}"', f'msgstr "{_framework}"'])
+
+register_framework('po', 'flask', keywords=['from flask_babel'], weight=3)
+
+register_framework('po', 'django', keywords=[
+    'django', 'admin.py', 'models.py', 'views.py', 'forms.py', 'urls.py', 'settings.py',
+    'templates/', 'static/',
+    'msgid "Welcome to Django"', 'msgid "User"', 'msgid "Home"', 'msgid "Submit"',
+    'msgid "Logout"', 'msgid "Login"', 'msgid "Register"', 'msgid "Password"',
+    'msgid "Email"', 'msgid "Username"',
+], extensions=['py'])
+register_framework('po', 'flask', keywords=['flask', 'app.py', 'routes.py', '__init__.py'],
+                   extensions=['py'])
+register_framework('po', 'wordpress', keywords=['wp-content/', 'wp-includes/'], weight=2)
+register_framework('po', 'wordpress', keywords=['wordpress', 'wp-'])
+register_framework('po', 'vue', keywords=['vue', 'components/', 'pages/', 'store/'],
+                   extensions=['vue'])
+register_framework('po', 'react', keywords=['react', 'components/', 'pages/', 'src/'],
+                   extensions=['jsx', 'tsx'])
+register_framework('po', 'angular', keywords=['angular', 'components/', 'services/', 'modules/'],
+                   extensions=['ts'])
+register_framework('po', 'laravel', keywords=['laravel', 'resources/', 'app/', 'routes/'],
+                   extensions=['php'])
+register_framework('po', 'symfony', keywords=['symfony', 'src/', 'templates/', 'translations/'])
+register_framework('po', 'joomla', keywords=['joomla', 'components/', 'modules/', 'plugins/'])
+register_framework('po', 'drupal', keywords=['drupal', 'modules/', 'themes/', 'sites/'])
+
+# Secours : références à des sources sans framework identifié
+register_framework('po', 'javascript', extensions=['js'], fallback=True)
+
+
+# -----------------------------------------------------------------------------
+# Signatures intégrées : fichiers JSON
+# -----------------------------------------------------------------------------
+# 'next' seul n'est pas une signature : c'est aussi un libellé d'interface
+# courant (« Next »), qui faisait passer n'importe quel catalogue pour Next.js.
+
+register_framework('json', 'react-native', keywords=['react-native', 'react_native', '@react-native'],
+                   weight=2)
+register_framework('json', 'react', keywords=['create-react-app'], weight=2)
+register_framework('json', 'react', keywords=['react', 'jsx', 'tsx'])
+register_framework('json', 'vue', keywords=['vue-i18n'], weight=2)
+register_framework('json', 'vue', keywords=['vuex', 'vue'])
+register_framework('json', 'angular', keywords=['@angular', 'ngx-translate'], weight=2)
+register_framework('json', 'angular', keywords=['angular'])
+register_framework('json', 'flutter', keywords=['flutter_localizations', '@flutter'], weight=2)
+register_framework('json', 'flutter', keywords=['flutter'])
+register_framework('json', 'nextjs', keywords=['next-i18next', '@next/', 'nextjs', 'next.js'],
+                   weight=2)
+register_framework('json', 'nuxt', keywords=['@nuxt'], weight=2)
+register_framework('json', 'nuxt', keywords=['nuxt'])
+register_framework('json', 'svelte', keywords=['@svelte'], weight=2)
+register_framework('json', 'svelte', keywords=['svelte'])
+register_framework('json', 'ember', keywords=['@ember'], weight=2)
+register_framework('json', 'ember', keywords=['ember'])
+
+# Secours : structure des clés quand aucun framework n'est mentionné
+register_framework('json', 'i18n', patterns=[r'"(?:locale|language)"\s*:'], fallback=True)
+register_framework('json', 'translation', patterns=[r'"(?:messages|translations)"\s*:'], fallback=True)
+register_framework('json', 'application', patterns=[r'"(?:app|application)"\s*:'], fallback=True)
@@ -0,0 +1,243 @@
+# =============================================================================
+# files/ingestion.py
+# =============================================================================
+
+"""
+Contexte d'ingestion partagé par la détection d'encodage, la détection de
+framework et le parsing.
+
+Le fichier est ouvert et projeté en mémoire (mmap) une seule fois : les
+détecteurs reçoivent des tranches sans copie du même tampon, puis le parser
+lit ce tampon en flux.
+"""
+
+import codecs
+import io
+import mmap
+
+import chardet
+
+
+# Taille des échantillons utilisés par les détecteurs
+ENCODING_SAMPLE_SIZE = 10000
+FRAMEWORK_SAMPLE_SIZE = 5000
+
+# Confiance minimale exigée de chardet, sinon UTF-8 par défaut
+MIN_ENCODING_CONFIDENCE = 0.7
+
+# BOM reconnus, du plus long au plus court (UTF-32 LE commence comme UTF-16 LE)
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Taille du tampon de lecture des parsers au-dessus du mmap
+READ_BUFFER_SIZE = 1024 * 1024
+
+
+class _MappedRawIO(io.RawIOBase):
+    """
+    Expose un mmap (ou une plage du mmap) comme un flux binaire brut, sans
+    copie intermédiaire. ``prefix`` et ``suffix`` encadrent la plage, par
+    exemple pour refermer un fragment d'objet JSON.
+    """
+
+    def __init__(self, mapping, start=0, end=None, prefix=b'', suffix=b''):
+        super().__init__()
+        view = memoryview(mapping)
+        self._views = [view]
+        self._segments = [
+            segment for segment in (memoryview(prefix), view[start:end], memoryview(suffix))
+            if len(segment)
+        ]
+        self._size = sum(len(segment) for segment in self._segments)
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, min(offset, self._size))
+        return self._pos
+
+    def readinto(self, buffer):
+        written = 0
+        segment_start = 0
+        for segment in self._segments:
+            segment_end = segment_start + len(segment)
+            if self._pos < segment_end and written < len(buffer):
+                offset = self._pos - segment_start
+                size = min(len(segment) - offset, len(buffer) - written)
+                buffer[written:written + size] = segment[offset:offset + size]
+                written += size
+                self._pos += size
+            segment_start = segment_end
+        return written
+
+    def close(self):
+        if not self.closed:
+            for segment in self._segments:
+                segment.release()
+            for view in self._views:
+                view.release()
+        super().close()
+
+
+class IngestionSource:
+    """
+    Fichier de traduction ouvert une seule fois pour toute l'ingestion.
+
+    S'utilise comme gestionnaire de contexte :
+
+        with IngestionSource(path) as source:
+            encoding = source.detect_encoding()
+            sample = source.text_sample(FRAMEWORK_SAMPLE_SIZE, encoding)
+            with source.open_text(encoding) as lines:
+                ...
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = None
+        self.buffer = None
+        self.size = 0
+
+    def __enter__(self):
+        self._file = open(self.file_path, 'rb')
+        try:
+            self.size = self._file.seek(0, io.SEEK_END)
+            # mmap refuse les fichiers vides : on expose alors un tampon vide
+            self.buffer = (
+                mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                if self.size else b''
+            )
+        except Exception:
+            self._file.close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            try:
+                self.buffer.close()
+            except BufferError:
+                # Une vue est encore exportée : le mmap sera libéré avec elle
+                pass
+        self.buffer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def head(self, size):
+        """Tranche sans copie des ``size`` premiers octets"""
+        return memoryview(self.buffer)[:size]
+
+    def detect_encoding(self, sample_size=ENCODING_SAMPLE_SIZE):
+        """
+        Détecte l'encodage du fichier.
+
+        Chemin rapide : un BOM ou un échantillon UTF-8 strictement valide
+        suffit, sans appeler chardet. Retourne ``(encodage, confiance)``.
+        """
+        sample = self.head(sample_size)
+        try:
+            start = bytes(sample[:4])
+            for bom, encoding in BOMS:
+                if start.startswith(bom):
+                    return encoding, 1.0
+
+            try:
+                # Décodage incrémental : un caractère multi-octets coupé en fin
+                # d'échantillon n'est pas une erreur.
+                codecs.getincrementaldecoder('utf-8')('strict').decode(sample, final=False)
+                return 'utf-8', 1.0
+            except UnicodeDecodeError:
+                pass
+
+            result = chardet.detect(bytes(sample))
+        finally:
+            sample.release()
+
+        encoding = result.get('encoding') or 'utf-8'
+        confidence = result.get('confidence') or 0
+        if confidence < MIN_ENCODING_CONFIDENCE:
+            encoding = 'utf-8'
+        return encoding, confidence
+
+    def text_sample(self, size, encoding):
+        """Décode les ``size`` premiers octets (caractère coupé ignoré)"""
+        sample = self.head(size)
+        try:
+            return codecs.getincrementaldecoder(encoding)('ignore').decode(sample, final=False)
+        except LookupError:
+            return codecs.getincrementaldecoder('utf-8')('ignore').decode(sample, final=False)
+        finally:
+            sample.release()
+
+    def open_binary(self, start=0, end=None, prefix=b'', suffix=b''):
+        """
+        Flux binaire tamponné lisant directement le mmap, éventuellement
+        limité à la plage ``[start, end)``
+        """
+        raw = _MappedRawIO(self.buffer, start, end, prefix=prefix, suffix=suffix)
+        return io.BufferedReader(raw, buffer_size=READ_BUFFER_SIZE)
+
+    def open_text(self, encoding, start=0, end=None, prefix=b'', suffix=b''):
+        """Flux texte lisant directement le mmap, pour les parsers"""
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            encoding = 'utf-8'
+        return io.TextIOWrapper(
+            self.open_binary(start, end, prefix=prefix, suffix=suffix), encoding=encoding
+        )
+
+    def count_po_entries(self, chunk_size=1024 * 1024, start=0, end=None):
+        """
+        Estime le nombre d'entrées PO d'après les lignes ``msgid``.
+
+        Parcourt le tampon (ou la plage ``[start, end)``) par blocs : seul un
+        bloc est copié à la fois.
+        """
+        end = self.size if end is None else min(end, self.size)
+        count = 0
+        overlap = len(b'\n#~ msgid ')
+        for block in range(start, end, chunk_size):
+            # Reprendre quelques octets du bloc précédent pour ne pas rater
+            # un motif à cheval ; le début de plage compte comme un saut de ligne.
+            data = self.buffer[max(block - overlap, start):min(block + chunk_size, end)]
+            if block == start:
+                data = b'\n' + data
+            count += data.count(b'\nmsgid ') + data.count(b'\n#~ msgid ')
+            if block != start:
+                head = data[:overlap]
+                count -= head.count(b'\nmsgid ') + head.count(b'\n#~ msgid ')
+        # L'en-tête (msgid "") n'est pas une entrée ; il est en début de fichier
+        if start == 0:
+            count -= 1
+        return max(count, 0)
+
+    def count_lines(self, start=0, end=None, chunk_size=8 * 1024 * 1024):
+        """Nombre de sauts de ligne dans la plage ``[start, end)``"""
+        end = self.size if end is None else min(end, self.size)
+        return sum(
+            self.buffer[block:min(block + chunk_size, end)].count(b'\n')
+            for block in range(start, end, chunk_size)
+        )
@@ -0,0 +1,819 @@
+# =============================================================================
+# files/management/commands/benchmark_api.py
+# =============================================================================
+
+"""
+Benchmarks des endpoints de l'API des fichiers de traduction.
+
+Usage :
+    python manage.py benchmark_api --suite list --sizes 10,50,100
+    python manage.py benchmark_api --suite strings --sizes 10000,200000
+    python manage.py benchmark_api --suite search --sizes 1000000,3000000
+    python manage.py benchmark_api --suite stats --sizes 100000,1000000
+    python manage.py benchmark_api --suite export --sizes 10000,100000
+    python manage.py benchmark_api --suite bulk --sizes 100,1000
+    python manage.py benchmark_api --suite render --sizes 50,200,2000
+    python manage.py benchmark_api --suite etag --sizes 1000,100000
+
+Écrit réellement dans la base et le backend de résultats Celery configurés :
+à lancer avec des réglages pointant vers une base jetable. Les lignes créées
+sont supprimées à la fin.
+"""
+
+import itertools
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class BackendReads:
+    """Compte les lectures faites sur le backend de résultats Celery"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.gets = 0
+        self.mgets = 0
+
+    def __enter__(self):
+        backend = self.backend
+        get, mget = getattr(backend, 'get', None), getattr(backend, 'mget', None)
+
+        def counted_get(*args, **kwargs):
+            self.gets += 1
+            return get(*args, **kwargs)
+
+        def counted_mget(*args, **kwargs):
+            self.mgets += 1
+            return mget(*args, **kwargs)
+
+        if get is not None:
+            backend.get = counted_get
+        if mget is not None:
+            backend.mget = counted_mget
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for name in ('get', 'mget'):
+            self.backend.__dict__.pop(name, None)
+        return False
+
+    @property
+    def total(self):
+        return self.gets + self.mgets
+
+
+class Command(BaseCommand):
+    help = "Mesure le nombre de requêtes et la latence des endpoints de l'API des fichiers"
+
+    suites = ('list', 'strings', 'search', 'stats', 'export', 'bulk', 'render', 'etag')
+    default_sizes = {
+        'list': '10,50,100', 'strings': '10000,100000', 'search': '100000,1000000',
+        'stats': '100000,500000', 'export': '10000,50000', 'bulk': '100,1000', 'render': '50,200,2000',
+        'etag': '1000,100000',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--suite', choices=self.suites, action='append',
+            help="Suite(s) à exécuter (par défaut : toutes)"
+        )
+        parser.add_argument(
+            '--sizes',
+            help="Tailles mesurées, séparées par des virgules : taille de page (list, "
+                 "100 au plus, défaut 10,50,100 ; render, défaut 50,200,2000) ou nombre de chaînes (strings, défaut 10000,100000 ; "
+                 "search, défaut 100000,1000000 ; stats, défaut 100000,500000 ; "
+                 "export, défaut 10000,50000 ; etag, défaut 1000,100000) ou nombre de modifications "
+                 "(bulk, défaut 100,1000)"
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help="Nombre de requêtes par mesure (la latence retenue est la médiane)"
+        )
+
+    def handle(self, *args, **options):
+        for suite in options['suite'] or self.suites:
+            try:
+                sizes = [int(size) for size in (options['sizes'] or self.default_sizes[suite]).split(',') if size]
+            except ValueError:
+                raise CommandError("--sizes doit être une liste d'entiers")
+            getattr(self, f'bench_{suite}')(sizes, options)
+
+    def bench_list(self, sizes, options):
+        """
+        Page de ``GET /files/`` : lecture de l'état Celery ligne par ligne
+        (``AsyncResult``) contre la lecture groupée de la liste.
+        """
+        from celery import current_app
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from files.models import TranslationFile
+        from files.serializers import TranslationFileListSerializer
+        from files.views import TranslationFileViewSet
+
+        backend = current_app.backend
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Liste des fichiers ({connection.vendor}, {type(backend).__name__}) : "
+            f"lecture par ligne contre lecture groupée"
+        ))
+
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        task_ids = []
+        try:
+            # Un fichier sur quatre en cours de traitement, avec un état PROGRESS publié
+            files = []
+            for i in range(max(sizes)):
+                processing = i % 4 == 0
+                task_id = str(uuid.uuid4()) if processing else None
+                files.append(TranslationFile(
+                    original_filename=f'benchmark-{i}.po', file_path=f'benchmark-{i}.po',
+                    file_type='po', file_size=0, uploaded_by=user, task_id=task_id,
+                    status='processing' if processing else 'completed'
+                ))
+                if task_id:
+                    task_ids.append(task_id)
+            TranslationFile.objects.bulk_create(files)
+            try:
+                for i, task_id in enumerate(task_ids):
+                    backend.store_result(task_id, {'current': i, 'total': 100}, 'PROGRESS')
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(
+                    f"  États PROGRESS non publiés ({e}) : lectures Celery sans résultat"
+                ))
+
+            factory = APIRequestFactory()
+            view = TranslationFileViewSet.as_view({'get': 'list'})
+
+            def run_per_row(size):
+                queryset = TranslationFile.objects.select_related('uploaded_by').filter(
+                    uploaded_by=user
+                ).order_by('-uploaded_at')[:size]
+                return [TranslationFileListSerializer(obj).data for obj in queryset]
+
+            def run_batched(size):
+                request = factory.get('/api/files/', {'page_size': size})
+                force_authenticate(request, user=user)
+                response = view(request)
+                if response.status_code != 200:
+                    raise CommandError(f"GET /files/ a répondu {response.status_code}")
+                return response.data['results']
+
+            queries_by_label = {}
+            for size in sizes:
+                self.stdout.write(f"Page de {size:,} fichiers")
+                for label, func in (('par ligne', run_per_row), ('liste groupée', run_batched)):
+                    with CaptureQueriesContext(connection) as queries, BackendReads(backend) as reads:
+                        rows = func(size)
+                    timings = []
+                    for _ in range(max(options['repeat'], 1)):
+                        start = time.perf_counter()
+                        func(size)
+                        timings.append(time.perf_counter() - start)
+                    elapsed = sorted(timings)[len(timings) // 2]
+                    queries_by_label.setdefault(label, set()).add(len(queries))
+                    self.stdout.write(
+                        f"  {label:<28} {elapsed * 1000:8.1f} ms  {len(queries):5d} requêtes SQL  "
+                        f"{reads.total:5d} lectures Celery  ({len(rows)} lignes)"
+                    )
+
+            for label, counts in queries_by_label.items():
+                verdict = 'constant' if len(counts) == 1 else 'croît avec la page'
+                style = self.style.SUCCESS if len(counts) == 1 else self.style.WARNING
+                self.stdout.write(style(
+                    f"  {label:<28} nombre de requêtes {verdict} ({', '.join(map(str, sorted(counts)))})"
+                ))
+        finally:
+            for task_id in task_ids:
+                try:
+                    backend.forget(task_id)
+                except Exception:
+                    pass
+            TranslationFile.objects.filter(uploaded_by=user).delete()
+            user.delete()
+
+    def bench_strings(self, sizes, options):
+        """
+        Pagination des chaînes d'un fichier à différentes profondeurs : numéro
+        de page (``COUNT`` + ``OFFSET``) contre curseur. Seule la pagination
+        est mesurée, sans la sérialisation des lignes.
+        """
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from files.models import TranslationFile, TranslationString
+        from files.pagination import TranslationStringCursorPagination, TranslationStringPagination
+        from files.writers import TranslationStringWriter
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Pagination des chaînes d'un fichier ({connection.vendor}) : numéro de page contre curseur"
+        ))
+
+        page_size = TranslationStringPagination.max_page_size
+        factory = APIRequestFactory()
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        try:
+            for size in sizes:
+                translation_file = TranslationFile.objects.create(
+                    original_filename='benchmark.po', file_path='benchmark.po',
+                    file_type='po', file_size=0, uploaded_by=user
+                )
+                with TranslationStringWriter(translation_file) as writer:
+                    for i in range(size):
+                        writer.add(TranslationString(
+                            file=translation_file, key=f'module.key{i}', source_text=f'Texte {i}',
+                            line_number=i + 1
+                        ))
+                queryset = TranslationString.objects.filter(file=translation_file)
+                ordered = queryset.order_by(*TranslationStringCursorPagination.ordering)
+
+                def paginate(paginator_class, params):
+                    request = Request(factory.get('/api/strings/by_file/', {'page_size': page_size, **params}))
+                    return paginator_class().paginate_queryset(queryset.order_by('line_number', 'key'), request)
+
+                self.stdout.write(f"{size:,} chaînes, pages de {page_size}")
+                pages = max(size // page_size, 1)
+                for depth in sorted({1, pages // 2 or 1, pages}):
+                    offset = (depth - 1) * page_size
+                    cursor = ''
+                    if offset:
+                        # Curseur de la dernière ligne de la page précédente
+                        paginator = TranslationStringCursorPagination()
+                        paginator.request = factory.get('/')
+                        link = paginator.encode_cursor(ordered[offset - 1], reverse=False)
+                        cursor = link.split('cursor=')[1]
+                    for label, paginator_class, params in (
+                            (f'page={depth}', TranslationStringPagination, {'page': depth}),
+                            ('curseur', TranslationStringCursorPagination, {'cursor': cursor})):
+                        with CaptureQueriesContext(connection) as queries:
+                            rows = len(paginate(paginator_class, params))
+                        timings = []
+                        for _ in range(max(options['repeat'], 1)):
+                            start = time.perf_counter()
+                            paginate(paginator_class, params)
+                            timings.append(time.perf_counter() - start)
+                        elapsed = sorted(timings)[len(timings) // 2]
+                        self.stdout.write(
+                            f"  {label:<28} {elapsed * 1000:8.2f} ms  {len(queries):5d} requêtes SQL  ({rows} lignes)"
+                        )
+                translation_file.delete()
+        finally:
+            TranslationFile.objects.filter(uploaded_by=user).delete()
+            user.delete()
+
+    def bench_search(self, sizes, options):
+        """
+        Recherche ``?search=`` : ``icontains`` sur trois colonnes (parcours de
+        table) contre l'index plein texte (``files/search.py``). Mesure le
+        comptage et la première page, classée pour l'index, comme la
+        pagination de l'API (``TranslationStringSearchPagination``).
+        """
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from files.models import TranslationFile, TranslationString
+        from files.search import get_backend, icontains_search, search_page, search_strings
+        from files.writers import TranslationStringWriter
+
+        backend = get_backend(connection.alias)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Recherche des chaînes ({connection.vendor}, "
+            f"{type(backend).__name__ if backend else 'sans index'}) : icontains contre index"
+        ))
+
+        # Vocabulaire synthétique, fréquences en loi de Zipf comme un vrai catalogue
+        rng = random.Random(42)
+        syllables = ['ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ru', 'sa', 'te', 'vi', 'zo', 'ka']
+        vocabulary = sorted({
+            ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(20000)
+        })
+        rng.shuffle(vocabulary)
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+        rare, common = vocabulary[5000], vocabulary[3]
+        queries = [
+            ('mot rare', rare),
+            ('mot fréquent', common),
+            ('préfixe (3 lettres)', vocabulary[200][:3]),
+            ('deux mots', f'{vocabulary[40]} {vocabulary[90]}'),
+        ]
+        per_file = 50000
+
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        try:
+            created = 0
+            for size in sorted(sizes):
+                start = time.perf_counter()
+                while created < size:
+                    translation_file = TranslationFile.objects.create(
+                        original_filename=f'benchmark-{created}.po', file_path='benchmark.po',
+                        file_type='po', file_size=0, uploaded_by=user
+                    )
+                    with TranslationStringWriter(translation_file) as writer:
+                        for i in range(min(per_file, size - created)):
+                            words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(3, 9))
+                            writer.add(TranslationString(
+                                file=translation_file, key=f'{words[0]}.{words[1]}.k{created + i}',
+                                source_text=' '.join(words).capitalize(), line_number=i + 1
+                            ))
+                    created += writer.created
+                self.stdout.write(
+                    f"{created:,} chaînes (insertion et indexation {time.perf_counter() - start:.1f} s)"
+                )
+
+                base = TranslationString.objects.filter(file__uploaded_by=user)
+                for label, query in queries:
+                    for method, search in (('icontains', icontains_search), ('index', search_strings)):
+                        def run():
+                            queryset = search(base, query)
+                            if method == 'icontains' or backend is None:
+                                count = queryset.count()
+                                list(queryset.order_by('line_number', 'key')[:50])
+                                return count
+                            # Une ligne de plus que la page, comme la pagination de l'API
+                            ranked = queryset.order_by('search_rank', 'line_number', 'key')
+                            rows, count = search_page(ranked, 0, 51)
+                            return count if len(rows) > 50 else len(rows)
+
+                        # Le parcours de table se mesure une fois, l'index sur plusieurs essais
+                        repeat = 1 if method == 'icontains' else max(options['repeat'], 1)
+                        timings = []
+                        for _ in range(repeat):
+                            start = time.perf_counter()
+                            count = run()
+                            timings.append(time.perf_counter() - start)
+                        elapsed = sorted(timings)[len(timings) // 2]
+                        # None : au-delà de FILES_SEARCH_RANK_WINDOW, non compté
+                        count = f'{count:10,}' if count is not None else f'{"non compté":>10}'
+                        self.stdout.write(
+                            f"  {label + ' ' + method:<34} {elapsed * 1000:9.1f} ms  {count} résultats  "
+                            f"« {query} »"
+                        )
+        finally:
+            TranslationFile.objects.filter(uploaded_by=user).delete()
+            user.delete()
+
+    def bench_stats(self, sizes, options):
+        """
+        ``GET /strings/statistics/`` : un ``COUNT`` par chiffre sur la table
+        des chaînes (ancienne version) contre l'agrégat unique sur les
+        compteurs des fichiers, puis la lecture depuis le cache.
+        """
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from django.db.models import Count
+        from django.test.utils import CaptureQueriesContext
+        from files.models import TranslationFile, TranslationString
+        from files.stats import cached_statistics, invalidate_statistics, string_statistics
+        from files.writers import TranslationStringWriter
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Statistiques des chaînes ({connection.vendor}) : comptages séparés contre agrégat unique"
+        ))
+
+        per_file = 50000
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        try:
+            created = 0
+            for size in sorted(sizes):
+                while created < size:
+                    translation_file = TranslationFile.objects.create(
+                        original_filename=f'benchmark-{created}.po', file_path='benchmark.po',
+                        file_type='po', file_size=0, uploaded_by=user
+                    )
+                    with TranslationStringWriter(translation_file) as writer:
+                        for i in range(min(per_file, size - created)):
+                            writer.add(TranslationString(
+                                file=translation_file, key=f'module.key{created + i}',
+                                source_text=f'Texte {i}', line_number=i + 1,
+                                is_translated=i % 3 == 0, is_fuzzy=i % 7 == 0, is_plural=i % 11 == 0
+                            ))
+                    created += writer.created
+                self.stdout.write(f"{created:,} chaînes")
+
+                strings = TranslationString.objects.filter(file__uploaded_by=user)
+                files = TranslationFile.objects.filter(uploaded_by=user)
+
+                def run_counts():
+                    return {
+                        'total_strings': strings.count(),
+                        'translated': strings.filter(is_translated=True).count(),
+                        'untranslated': strings.filter(is_translated=False).count(),
+                        'fuzzy': strings.filter(is_fuzzy=True).count(),
+                        'plural': strings.filter(is_plural=True).count(),
+                        'by_file': dict(strings.values_list('file__original_filename').annotate(Count('id'))),
+                    }
+
+                def run_aggregate():
+                    return string_statistics(files)
+
+                def run_cached():
+                    return cached_statistics('strings', user, run_aggregate)
+
+                # Version du cache neuve pour cette taille
+                invalidate_statistics([user.pk])
+                for label, func in (('comptages séparés', run_counts),
+                                    ('agrégat unique', run_aggregate),
+                                    ('agrégat en cache', run_cached)):
+                    func()
+                    with CaptureQueriesContext(connection) as queries:
+                        stats = func()
+                    timings = []
+                    for _ in range(max(options['repeat'], 1)):
+                        start = time.perf_counter()
+                        func()
+                        timings.append(time.perf_counter() - start)
+                    elapsed = sorted(timings)[len(timings) // 2]
+                    self.stdout.write(
+                        f"  {label:<28} {elapsed * 1000:8.2f} ms  {len(queries):5d} requêtes SQL  "
+                        f"({stats['translated']:,} traduites)"
+                    )
+        finally:
+            TranslationFile.objects.filter(uploaded_by=user).delete()
+            user.delete()
+
+    def bench_export(self, sizes, options):
+        """
+        Récupération de toutes les chaînes d'un fichier : pages successives de
+        ``by_file`` (``page_size`` maximal) contre l'export en flux, avec le
+        pic de mémoire Python de chaque méthode.
+        """
+        import tracemalloc
+
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from files.models import TranslationFile, TranslationString
+        from files.pagination import TranslationStringPagination
+        from files.views import TranslationStringViewSet
+        from files.writers import TranslationStringWriter
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Export des chaînes d'un fichier ({connection.vendor}) : pages de by_file contre flux"
+        ))
+
+        factory = APIRequestFactory()
+        by_file = TranslationStringViewSet.as_view({'get': 'by_file'})
+        export = TranslationStringViewSet.as_view({'get': 'export'})
+        page_size = TranslationStringPagination.max_page_size
+
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        try:
+            for size in sizes:
+                translation_file = TranslationFile.objects.create(
+                    original_filename='benchmark.po', file_path='benchmark.po',
+                    file_type='po', file_size=0, uploaded_by=user
+                )
+                with TranslationStringWriter(translation_file) as writer:
+                    for i in range(size):
+                        writer.add(TranslationString(
+                            file=translation_file, key=f'module.key{i}', source_text=f'Texte {i}',
+                            line_number=i + 1
+                        ))
+                file_id = str(translation_file.pk)
+
+                def run_pages():
+                    rows, requests, page = 0, 0, 1
+                    while True:
+                        request = factory.get('/api/strings/by_file/', {
+                            'file_id': file_id, 'page_size': page_size, 'page': page
+                        })
+                        force_authenticate(request, user=user)
+                        response = by_file(request)
+                        requests += 1
+                        rows += len(response.data['results'])
+                        if not response.data['pagination']['has_next']:
+                            return rows, requests
+                        page += 1
+
+                def run_export(export_format):
+                    request = factory.get('/api/strings/export/', {
+                        'file_id': file_id, 'export_format': export_format
+                    })
+                    force_authenticate(request, user=user)
+                    response = export(request)
+                    lines = sum(chunk.count(b'\n') for chunk in response.streaming_content)
+                    return lines - (export_format == 'csv'), 1
+
+                self.stdout.write(f"{size:,} chaînes")
+                for label, func, traced in ((f'pages de {page_size}', run_pages, False),
+                                            ('export ndjson', lambda: run_export('ndjson'), True),
+                                            ('export csv', lambda: run_export('csv'), True)):
+                    # Compteur sans limite (CaptureQueriesContext plafonne à 9000 requêtes)
+                    queries = []
+
+                    def count_query(execute, sql, params, many, context):
+                        queries.append(sql)
+                        return execute(sql, params, many, context)
+
+                    start = time.perf_counter()
+                    with connection.execute_wrapper(count_query):
+                        rows, requests = func()
+                    elapsed = time.perf_counter() - start
+                    memory = ''
+                    if traced:
+                        # Passe séparée : tracemalloc ralentit fortement l'exécution
+                        tracemalloc.start()
+                        func()
+                        memory = f"  pic {tracemalloc.get_traced_memory()[1] / 1024 / 1024:5.1f} Mo"
+                        tracemalloc.stop()
+                    self.stdout.write(
+                        f"  {label:<28} {elapsed * 1000:9.1f} ms  {requests:5d} requêtes HTTP  "
+                        f"{len(queries):7d} requêtes SQL  ({rows:,} lignes){memory}"
+                    )
+                translation_file.delete()
+        finally:
+            TranslationFile.objects.filter(uploaded_by=user).delete()
+            user.delete()
+
+    def bench_bulk(self, sizes, options):
+        """
+        Enregistrement de N modifications : un ``PATCH`` par chaîne contre
+        un seul ``POST /strings/bulk_update/``.
+        """
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from files.models import TranslationFile, TranslationString
+        from files.views import TranslationStringViewSet
+        from files.writers import TranslationStringWriter
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Modifications de chaînes ({connection.vendor}) : PATCH par chaîne contre bulk_update"
+        ))
+
+        factory = APIRequestFactory()
+        partial_update = TranslationStringViewSet.as_view({'patch': 'partial_update'})
+        bulk_update = TranslationStringViewSet.as_view({'post': 'bulk_update'})
+
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        try:
+            translation_file = TranslationFile.objects.create(
+                original_filename='benchmark.po', file_path='benchmark.po',
+                file_type='po', file_size=0, uploaded_by=user
+            )
+            with TranslationStringWriter(translation_file) as writer:
+                for i in range(max(sizes)):
+                    writer.add(TranslationString(
+                        file=translation_file, key=f'module.key{i}', source_text=f'Texte {i}',
+                        line_number=i + 1
+                    ))
+            pks = [str(pk) for pk in TranslationString.objects.filter(
+                file=translation_file
+            ).order_by('line_number').values_list('pk', flat=True)]
+
+            def run_patch(ids, value):
+                for pk in ids:
+                    request = factory.patch(f'/api/strings/{pk}/', {'is_translated': value}, format='json')
+                    force_authenticate(request, user=user)
+                    response = partial_update(request, pk=pk)
+                    if response.status_code != 200:
+                        raise CommandError(f"PATCH /strings/{pk}/ a répondu {response.status_code}")
+                return len(ids)
+
+            def run_bulk(ids, value):
+                request = factory.post(
+                    '/api/strings/bulk_update/',
+                    [{'id': pk, 'is_translated': value, 'translated_text': f'Traduction {value}'} for pk in ids],
+                    format='json'
+                )
+                force_authenticate(request, user=user)
+                response = bulk_update(request)
+                if response.status_code != 200:
+                    raise CommandError(f"POST /strings/bulk_update/ a répondu {response.status_code}")
+                return len(ids)
+
+            for size in sizes:
+                self.stdout.write(f"{size:,} modifications")
+                ids = pks[:size]
+                for label, func, requests in (('PATCH par chaîne', run_patch, size),
+                                              ('bulk_update', run_bulk, 1)):
+                    queries = []
+
+                    def count_query(execute, sql, params, many, context):
+                        queries.append(sql)
+                        return execute(sql, params, many, context)
+
+                    timings = []
+                    for attempt in range(max(options['repeat'], 1)):
+                        # Alterne les valeurs : chaque passe modifie réellement les drapeaux
+                        value = attempt % 2 == 0
+                        queries.clear()
+                        start = time.perf_counter()
+                        with connection.execute_wrapper(count_query):
+                            func(ids, value)
+                        timings.append(time.perf_counter() - start)
+                    elapsed = sorted(timings)[len(timings) // 2]
+                    self.stdout.write(
+                        f"  {label:<28} {elapsed * 1000:9.1f} ms  {requests:5d} requêtes HTTP  "
+                        f"{len(queries):6d} requêtes SQL"
+                    )
+                translation_file.refresh_from_db()
+                self.stdout.write(
+                    f"  {'compteurs du fichier':<28} {translation_file.translated_count:,} traduites "
+                    f"sur {translation_file.total_strings:,}"
+                )
+        finally:
+            TranslationFile.objects.filter(uploaded_by=user).delete()
+            user.delete()
+
+    def bench_render(self, sizes, options):
+        """
+        Rendu d'une page de la liste des chaînes : ``TranslationStringListSerializer``
+        (instances, champs DRF, un ``COUNT`` de traductions par ligne) contre
+        ``TranslationStringListValuesSerializer`` (``.values()`` et comptage
+        annoté). Vérifie que les deux JSON sont identiques.
+        """
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from rest_framework.renderers import JSONRenderer
+        from files.models import TranslationFile, TranslationString
+        from files.serializers import TranslationStringListSerializer, TranslationStringListValuesSerializer
+        from files.writers import TranslationStringWriter
+        from translations.models import Language, Translation
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Rendu de la liste des chaînes ({connection.vendor}) : ModelSerializer contre .values()"
+        ))
+
+        renderer = JSONRenderer()
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        language = Language.objects.create(code=f'b{suffix}'[:10], name='Benchmark', native_name='Benchmark')
+        try:
+            translation_file = TranslationFile.objects.create(
+                original_filename='benchmark.po', file_path='benchmark.po',
+                file_type='po', file_size=0, uploaded_by=user
+            )
+            with TranslationStringWriter(translation_file) as writer:
+                for i in range(max(sizes)):
+                    writer.add(TranslationString(
+                        file=translation_file, key=f'module.key{i}', source_text=f'Texte {i}',
+                        context='benchmark', line_number=i + 1, is_translated=i % 4 == 0
+                    ))
+            queryset = TranslationString.objects.select_related('file', 'file__uploaded_by').filter(
+                file=translation_file
+            ).order_by('line_number', 'key')
+            # Une chaîne sur quatre traduite
+            Translation.objects.bulk_create([
+                Translation(string_id=pk, target_language=language, translated_text='Traduction',
+                            translation_method='manual')
+                for pk in queryset.filter(is_translated=True).values_list('pk', flat=True)
+            ])
+
+            def run_serializer(size):
+                return renderer.render(TranslationStringListSerializer(queryset[:size], many=True).data)
+
+            def run_values(size, fields=None):
+                rows = TranslationStringListValuesSerializer.prepare(queryset, fields)[:size]
+                return renderer.render(TranslationStringListValuesSerializer(rows, fields).data)
+
+            # Sélection d'un client mobile (?fields=id,key,is_translated)
+            sparse = ('id', 'key', 'is_translated')
+
+            for size in sizes:
+                self.stdout.write(f"Page de {size:,} chaînes")
+                rendered = {}
+                for label, func in (('ModelSerializer', run_serializer), ('values()', run_values),
+                                    ('values() 3 champs', lambda size: run_values(size, sparse))):
+                    queries = []
+
+                    def count_query(execute, sql, params, many, context):
+                        queries.append(sql)
+                        return execute(sql, params, many, context)
+
+                    with connection.execute_wrapper(count_query):
+                        rendered[label] = func(size)
+                    timings = []
+                    for _ in range(max(options['repeat'], 1)):
+                        start = time.perf_counter()
+                        func(size)
+                        timings.append(time.perf_counter() - start)
+                    elapsed = sorted(timings)[len(timings) // 2]
+                    self.stdout.write(
+                        f"  {label:<28} {elapsed * 1000:9.1f} ms  {size / elapsed:10,.0f} lignes/s  "
+                        f"{len(queries):5d} requêtes SQL  {len(rendered[label]):9,} octets"
+                    )
+                same = rendered['ModelSerializer'] == rendered['values()']
+                style = self.style.SUCCESS if same else self.style.ERROR
+                self.stdout.write(style(f"  {'JSON identique':<28} {'oui' if same else 'NON'}"))
+        finally:
+            TranslationFile.objects.filter(uploaded_by=user).delete()
+            language.delete()
+            user.delete()
+
+    def bench_etag(self, sizes, options):
+        """
+        Clients qui interrogent en boucle un fichier inchangé : temps CPU du
+        serveur (``time.process_time``) par lecture complète contre une
+        lecture conditionnelle (``If-None-Match``, réponse 304), pour le
+        détail du fichier, ``strings/by_file`` et les statistiques.
+        """
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from files.models import TranslationFile, TranslationString
+        from files.views import TranslationFileViewSet, TranslationStringViewSet
+        from files.writers import TranslationStringWriter
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Lectures conditionnelles ({connection.vendor}) : réponse complète contre 304"
+        ))
+
+        factory = APIRequestFactory()
+        views = {
+            'retrieve': TranslationFileViewSet.as_view({'get': 'retrieve'}),
+            'by_file': TranslationStringViewSet.as_view({'get': 'by_file'}),
+            'files/statistics': TranslationFileViewSet.as_view({'get': 'statistics'}),
+            'strings/statistics': TranslationStringViewSet.as_view({'get': 'statistics'}),
+        }
+        polls = max(options['repeat'], 1) * 20
+
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        try:
+            for size in sizes:
+                translation_file = TranslationFile.objects.create(
+                    original_filename='benchmark.po', file_path='benchmark.po',
+                    file_type='po', file_size=0, uploaded_by=user
+                )
+                with TranslationStringWriter(translation_file) as writer:
+                    for i in range(size):
+                        writer.add(TranslationString(
+                            file=translation_file, key=f'module.key{i}', source_text=f'Texte {i}',
+                            line_number=i + 1, is_translated=i % 3 == 0
+                        ))
+                self.stdout.write(f"{size:,} chaînes, {polls} lectures par mesure")
+
+                endpoints = (
+                    ('retrieve', f'/api/files/{translation_file.pk}/', {'pk': str(translation_file.pk)}),
+                    ('by_file', f'/api/strings/by_file/?file_id={translation_file.pk}', {}),
+                    ('files/statistics', '/api/files/statistics/', {}),
+                    ('strings/statistics', '/api/strings/statistics/', {}),
+                )
+
+                def poll(name, url, kwargs, etag=None):
+                    headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+                    request = factory.get(url, **headers)
+                    force_authenticate(request, user=user)
+                    response = views[name](request, **kwargs)
+                    if hasattr(response, 'render'):
+                        response.render()
+                    return response
+
+                saved = []
+                for name, url, kwargs in endpoints:
+                    etag = poll(name, url, kwargs)['ETag']
+                    for label, header, expected in (('complet', None, 200), ('304', etag, 304)):
+                        queries = []
+
+                        def count_query(execute, sql, params, many, context):
+                            queries.append(sql)
+                            return execute(sql, params, many, context)
+
+                        with connection.execute_wrapper(count_query):
+                            response = poll(name, url, kwargs, header)
+                        if response.status_code != expected:
+                            raise CommandError(f"GET {url} a répondu {response.status_code} (attendu {expected})")
+                        start = time.process_time()
+                        for _ in range(polls):
+                            poll(name, url, kwargs, header)
+                        cpu = (time.process_time() - start) / polls
+                        saved.append(cpu)
+                        self.stdout.write(
+                            f"  {name + ' ' + label:<28} {cpu * 1000:8.3f} ms CPU  {len(queries):3d} requêtes SQL  "
+                            f"{len(response.content):7,} octets"
+                        )
+                full, conditional = sum(saved[0::2]), sum(saved[1::2])
+                self.stdout.write(self.style.SUCCESS(
+                    f"  {'CPU économisé par tour':<28} {(full - conditional) * 1000:8.3f} ms "
+                    f"({(1 - conditional / full) * 100:.0f} %)"
+                ))
+                translation_file.delete()
+        finally:
+            TranslationFile.objects.filter(uploaded_by=user).delete()
+            user.delete()
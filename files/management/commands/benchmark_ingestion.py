@@ -0,0 +1,424 @@
+# =============================================================================
+# files/management/commands/benchmark_ingestion.py
+# =============================================================================
+
+"""
+Benchmarks du pipeline d'ingestion des fichiers de traduction.
+
+Usage :
+    python manage.py benchmark_ingestion --suite po --sizes 10000,100000
+"""
+
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def generate_po_catalog(path, entries):
+    """Écrit un catalogue PO synthétique de ``entries`` entrées"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('msgid ""\nmsgstr ""\n'
+                '"Project-Id-Version: Benchmark\\n"\n'
+                '"Content-Type: text/plain; charset=UTF-8\\n"\n\n')
+        for i in range(entries):
+            f.write(f'#. Commentaire {i}\n')
+            f.write(f'#: app/views.py:{i} app/models.py:{i + 1}\n')
+            if i % 7 == 0:
+                f.write('#, fuzzy, python-format\n')
+            if i % 11 == 0:
+                f.write(f'msgctxt "ctx {i}"\n')
+            if i % 13 == 0:
+                f.write(f'msgid "%(count)d item {i}"\n')
+                f.write(f'msgid_plural "%(count)d items {i}"\n')
+                f.write(f'msgstr[0] "%(count)d élément {i}"\n')
+                f.write(f'msgstr[1] "%(count)d éléments {i}"\n\n')
+            else:
+                f.write(f'msgid "Source string number {i} with \\"quotes\\""\n')
+                f.write(f'"and a continuation line {i}"\n')
+                f.write(f'msgstr "Chaîne traduite numéro {i}"\n\n')
+
+
+def generate_json_catalog(path, entries):
+    """Écrit un catalogue JSON imbriqué (style i18next / vue-i18n) de ``entries`` valeurs"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for i in range(0, entries, 10):
+            if i:
+                f.write(',')
+            f.write(f'"module{i}": {{"title": "Titre {i}", "actions": {{')
+            f.write(', '.join(f'"action{j}": "Action {i}-{j}"' for j in range(5)))
+            f.write('}, "errors": [')
+            f.write(', '.join(f'{{"message": "Erreur {i}-{j}"}}' for j in range(3)))
+            f.write('], "count": "{count} éléments"}')
+        f.write('}')
+
+
+def read_syscalls():
+    """Nombre d'appels système de lecture du processus (Linux), sinon None"""
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('syscr:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def measure(func):
+    """Retourne (durée en secondes, pic mémoire Python en octets, résultat)"""
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+class Command(BaseCommand):
+    help = "Mesure les performances des étapes d'ingestion des fichiers de traduction"
+
+    suites = ('po', 'json', 'source', 'frameworks', 'progress', 'writer')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--suite', choices=self.suites, action='append',
+            help="Suite(s) à exécuter (par défaut : toutes)"
+        )
+        parser.add_argument(
+            '--sizes', default='10000,100000,1000000',
+            help="Nombres d'entrées des catalogues synthétiques, séparés par des virgules"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size]
+        except ValueError:
+            raise CommandError("--sizes doit être une liste d'entiers")
+
+        with tempfile.TemporaryDirectory() as workdir:
+            for suite in options['suite'] or self.suites:
+                getattr(self, f'bench_{suite}')(workdir, sizes)
+
+    def report(self, label, entries, elapsed, peak):
+        rate = entries / elapsed if elapsed else 0
+        self.stdout.write(
+            f"  {label:<28} {elapsed:8.3f} s  {rate:12,.0f} entrées/s  "
+            f"pic mémoire {peak / (1024 * 1024):9.2f} Mo"
+        )
+
+    def bench_po(self, workdir, sizes):
+        """polib.pofile (chargement complet) contre le lecteur en flux"""
+        import polib
+        from files.parsers import iter_po_entries, open_text_stream
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Lecture PO : polib contre flux"))
+        for size in sizes:
+            path = os.path.join(workdir, f'catalog_{size}.po')
+            generate_po_catalog(path, size)
+            self.stdout.write(
+                f"{size:,} entrées ({os.path.getsize(path) / (1024 * 1024):.1f} Mo)"
+            )
+
+            def run_polib():
+                count = 0
+                for entry in polib.pofile(path, encoding='utf-8'):
+                    count += 1
+                return count
+
+            def run_stream():
+                count = 0
+                with open_text_stream(path, 'utf-8') as lines:
+                    for entry in iter_po_entries(lines):
+                        count += 1
+                return count
+
+            for label, func in (('polib.pofile', run_polib), ('iter_po_entries', run_stream)):
+                elapsed, peak, count = measure(func)
+                self.report(label, count, elapsed, peak)
+            os.remove(path)
+
+    def bench_json(self, workdir, sizes):
+        """json.load + flatten_json contre l'aplatissement en flux"""
+        import json
+        from files.parsers import JSONStreamFlattener, open_text_stream
+        from files.tasks import flatten_json
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Lecture JSON : json.load contre flux"))
+        for size in sizes:
+            path = os.path.join(workdir, f'catalog_{size}.json')
+            generate_json_catalog(path, size)
+            self.stdout.write(
+                f"{size:,} valeurs ({os.path.getsize(path) / (1024 * 1024):.1f} Mo)"
+            )
+
+            def run_load():
+                with open(path, encoding='utf-8') as f:
+                    return len(flatten_json(json.load(f)))
+
+            def run_stream():
+                count = 0
+                with open_text_stream(path, 'utf-8') as f:
+                    for item in JSONStreamFlattener(f):
+                        count += 1
+                return count
+
+            for label, func in (('json.load + flatten_json', run_load),
+                                ('JSONStreamFlattener', run_stream)):
+                elapsed, peak, count = measure(func)
+                self.report(label, count, elapsed, peak)
+            os.remove(path)
+
+    def bench_source(self, workdir, sizes):
+        """Trois ouvertures + chardet contre une IngestionSource unique (mmap)"""
+        import chardet
+        from files.ingestion import IngestionSource, FRAMEWORK_SAMPLE_SIZE
+        from files.parsers import count_po_entries, iter_po_entries, open_text_stream
+        from files.tasks import detect_framework_from_content, detect_framework_from_sample
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            "Ouverture du fichier : lectures multiples contre mmap partagé"
+        ))
+
+        def run_legacy(path):
+            with open(path, 'rb') as f:
+                result = chardet.detect(f.read(10000))
+            encoding = result.get('encoding') or 'utf-8'
+            if (result.get('confidence') or 0) < 0.7:
+                encoding = 'utf-8'
+            detect_framework_from_content(path, 'po', encoding)
+            count_po_entries(path)
+            with open_text_stream(path, encoding) as lines:
+                return sum(1 for _ in iter_po_entries(lines))
+
+        def run_shared(path):
+            with IngestionSource(path) as source:
+                encoding, _ = source.detect_encoding()
+                detect_framework_from_sample(
+                    source.text_sample(FRAMEWORK_SAMPLE_SIZE, encoding), 'po'
+                )
+                source.count_po_entries()
+                with source.open_text(encoding) as lines:
+                    return sum(1 for _ in iter_po_entries(lines))
+
+        for size in sizes:
+            path = os.path.join(workdir, f'catalog_{size}.po')
+            generate_po_catalog(path, size)
+            repeat = max(1, min(50, 200000 // max(size, 1)))
+            self.stdout.write(f"{size:,} entrées, {repeat} passe(s)")
+            for label, func in (('chardet + 3 ouvertures', run_legacy),
+                                ('IngestionSource (mmap)', run_shared)):
+                gc.collect()
+                syscalls_before = read_syscalls()
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    func(path)
+                elapsed = (time.perf_counter() - start) / repeat
+                syscalls_after = read_syscalls()
+                syscalls = (
+                    f"{(syscalls_after - syscalls_before) / repeat:8.0f} lectures système"
+                    if syscalls_before is not None else ''
+                )
+                self.stdout.write(f"  {label:<28} {elapsed * 1000:9.2f} ms/fichier  {syscalls}")
+            os.remove(path)
+
+    def bench_frameworks(self, workdir, sizes):
+        """Un re.search par motif contre l'alternance compilée du registre"""
+        import json
+        import re
+        from files.frameworks import registry
+        from files.ingestion import IngestionSource, FRAMEWORK_SAMPLE_SIZE
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            "Détection de framework : motif par motif contre passe unique"
+        ))
+
+        def run_legacy(sample, file_type):
+            # Reproduit l'ancienne approche : dictionnaire de motifs reconstruit
+            # à chaque appel, un re.search par motif, json.dumps pour le JSON
+            signatures = registry._signatures[file_type]
+            patterns = {}
+            for kind, template in (('keywords', '{}'), ('extensions', r'\.{}\b'), ('patterns', None)):
+                for signature, credits in signatures[kind].items():
+                    pattern = signature if template is None else template.format(re.escape(signature))
+                    for framework, _, _ in credits:
+                        patterns.setdefault(framework, []).append(pattern)
+            if file_type == 'json':
+                try:
+                    sample = json.dumps(json.loads(sample), ensure_ascii=False)
+                except json.JSONDecodeError:
+                    pass
+            scores = {}
+            for framework, pattern_list in patterns.items():
+                score = sum(1 for pattern in pattern_list
+                            if re.search(pattern, sample, re.IGNORECASE))
+                if score:
+                    scores[framework] = score
+            return max(scores, key=scores.get) if scores else None
+
+        def run_registry(sample, file_type):
+            return registry.detect(sample, file_type)[0]
+
+        generators = (('po', generate_po_catalog), ('json', generate_json_catalog))
+        repeat = 2000
+        for file_type, generate in generators:
+            path = os.path.join(workdir, f'detect.{file_type}')
+            generate(path, min(sizes))
+            with IngestionSource(path) as source:
+                sample = source.text_sample(FRAMEWORK_SAMPLE_SIZE, 'utf-8')
+            self.stdout.write(f"Échantillon {file_type.upper()} de {len(sample):,} caractères")
+            for label, func in (('re.search par motif', run_legacy),
+                                ('registre compilé', run_registry)):
+                func(sample, file_type)  # Compilation / cache re hors mesure
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    func(sample, file_type)
+                elapsed = (time.perf_counter() - start) / repeat
+                self.stdout.write(f"  {label:<28} {elapsed * 1e6:9.1f} µs/fichier")
+            os.remove(path)
+
+    def bench_progress(self, workdir, sizes):
+        """Une publication toutes les 10 entrées contre le ProgressReporter"""
+        from files.progress import ProgressReporter
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            "Progression : écritures dans le backend de résultats"
+        ))
+
+        class RecordingTask:
+            """Tâche factice : compte les écritures et simule leur latence"""
+
+            latency = 0.0002  # Aller-retour Redis local typique
+
+            def __init__(self):
+                self.writes = 0
+
+            def update_state(self, state=None, meta=None):
+                self.writes += 1
+                time.sleep(self.latency)
+
+        def run_every_ten(size):
+            task = RecordingTask()
+            for i in range(size):
+                if i % 10 == 0:
+                    task.update_state(state='PROGRESS', meta={
+                        'current': i, 'total': size, 'strings_created': i,
+                        'progress': min(int(i / size * 100), 99)
+                    })
+            return task.writes
+
+        def run_reporter(size):
+            task = RecordingTask()
+            progress = ProgressReporter(task, total=size)
+            for i in range(size):
+                progress.update(i, strings_created=i)
+            progress.flush()
+            return task.writes
+
+        for size in sizes:
+            self.stdout.write(f"{size:,} entrées")
+            for label, func in (('update_state / 10 entrées', run_every_ten),
+                                ('ProgressReporter', run_reporter)):
+                start = time.perf_counter()
+                writes = func(size)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"  {label:<28} {elapsed:8.3f} s  {writes:10,} écritures")
+
+    def bench_writer(self, workdir, sizes):
+        """
+        Lots de 100 avec ignore_conflicts contre TranslationStringWriter.
+
+        Écrit réellement dans la base configurée (``connection.vendor``) :
+        à lancer avec des réglages pointant vers une base jetable, SQLite
+        ou PostgreSQL. Les lignes créées sont supprimées à la fin.
+        """
+        import uuid
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from files.models import TranslationFile, TranslationString
+        from files.tasks import bulk_create_strings
+        from files.writers import TranslationStringWriter
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Insertion des chaînes ({connection.vendor}) : lots de 100 contre writer"
+        ))
+
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        try:
+            for size in sizes:
+                # 1 % de clés en double, comme dans les catalogues réels
+                keys = [f'module.section{i // 50}.key{i}' for i in range(size)]
+                keys += keys[:size // 100]
+
+                def make_file():
+                    return TranslationFile.objects.create(
+                        original_filename='benchmark.po', file_path='benchmark.po',
+                        file_type='po', file_size=0, uploaded_by=user
+                    )
+
+                def strings(translation_file):
+                    for i, key in enumerate(keys):
+                        yield TranslationString(
+                            file=translation_file, key=key, source_text=f'Texte {i}',
+                            line_number=i + 1
+                        )
+
+                def run_batches():
+                    translation_file = make_file()
+                    created = 0
+                    batch = []
+                    for string_obj in strings(translation_file):
+                        batch.append(string_obj)
+                        if len(batch) >= 100:
+                            # Ancien comportement : ignore_conflicts, retour inexact
+                            created += len(TranslationString.objects.bulk_create(
+                                batch, ignore_conflicts=True, batch_size=100
+                            ))
+                            batch = []
+                    if batch:
+                        created += len(TranslationString.objects.bulk_create(
+                            batch, ignore_conflicts=True, batch_size=100
+                        ))
+                    return translation_file, created, None
+
+                def run_writer():
+                    translation_file = make_file()
+                    with TranslationStringWriter(translation_file) as writer:
+                        for string_obj in strings(translation_file):
+                            writer.add(string_obj)
+                    return translation_file, writer.created, writer
+
+                self.stdout.write(
+                    f"{len(keys):,} chaînes dont {size // 100:,} doublons "
+                    f"(lot automatique : {TranslationStringWriter.default_batch_size()} lignes)"
+                )
+                for label, func in (('bulk_create par 100', run_batches),
+                                    ('TranslationStringWriter', run_writer)):
+                    gc.collect()
+                    start = time.perf_counter()
+                    translation_file, created, writer = func()
+                    elapsed = time.perf_counter() - start
+                    rows = translation_file.strings.count()
+                    details = (
+                        f"{writer.duplicates:,} doublons, {writer.transactions} transaction(s)"
+                        if writer else ''
+                    )
+                    self.stdout.write(
+                        f"  {label:<28} {elapsed:8.3f} s  {rows / elapsed:12,.0f} lignes/s  "
+                        f"créées annoncées {created:,} / en base {rows:,}  {details}"
+                    )
+                    translation_file.delete()
+        finally:
+            user.delete()
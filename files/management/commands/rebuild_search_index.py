@@ -0,0 +1,38 @@
+# =============================================================================
+# files/management/commands/rebuild_search_index.py
+# =============================================================================
+
+"""
+Installe ou reconstruit l'index de recherche plein texte des chaînes.
+
+Usage :
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --database default
+
+À lancer après une restauration partielle de la base ou une écriture des
+chaînes hors de Django qui aurait contourné les triggers de l'index.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = "Installe ou reconstruit l'index de recherche plein texte des chaînes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help="Base à réindexer (par défaut : default)"
+        )
+
+    def handle(self, *args, **options):
+        from files.search import rebuild_index
+
+        connection = connections[options['database']]
+        if rebuild_index(connection):
+            self.stdout.write(self.style.SUCCESS(f"Index de recherche reconstruit ({connection.vendor})"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"Pas d'index de recherche pour {connection.vendor} : recherche en icontains"
+            ))
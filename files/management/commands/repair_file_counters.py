@@ -0,0 +1,50 @@
+# =============================================================================
+# files/management/commands/repair_file_counters.py
+# =============================================================================
+
+"""
+Recalcule les compteurs dénormalisés des fichiers de traduction.
+
+Usage :
+    python manage.py repair_file_counters
+    python manage.py repair_file_counters --file <uuid> --dry-run
+"""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Vérifie et corrige total_strings, translated_count, fuzzy_count et plural_count"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file', action='append', dest='files',
+            help="Identifiant du fichier à vérifier (répétable ; par défaut : tous)"
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Affiche les écarts sans les corriger"
+        )
+
+    def handle(self, *args, **options):
+        from files.counters import repair_counters
+        from files.models import TranslationFile
+
+        files = TranslationFile.objects.all()
+        if options['files']:
+            try:
+                files = files.filter(pk__in=options['files'])
+            except ValidationError:
+                raise CommandError("--file doit être un UUID")
+
+        repaired = repair_counters(files, dry_run=options['dry_run'])
+        for translation_file, differences in repaired:
+            details = ', '.join(
+                f"{field} {stored} -> {actual}" for field, (stored, actual) in differences.items()
+            )
+            self.stdout.write(f"  {translation_file.original_filename} ({translation_file.pk}) : {details}")
+
+        verb = 'à corriger' if options['dry_run'] else 'corrigé(s)'
+        style = self.style.WARNING if repaired and options['dry_run'] else self.style.SUCCESS
+        self.stdout.write(style(f"{len(repaired)} fichier(s) {verb}"))
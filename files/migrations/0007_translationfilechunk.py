@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:52
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0006_alter_translationfile_file_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationFileChunk',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('index', models.IntegerField()),
+                ('byte_start', models.BigIntegerField()),
+                ('byte_end', models.BigIntegerField()),
+                ('line_offset', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('error', 'Error')], default='pending', max_length=20)),
+                ('task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('bytes_processed', models.BigIntegerField(default=0)),
+                ('entries_processed', models.IntegerField(default=0)),
+                ('strings_created', models.IntegerField(default=0)),
+                ('duplicates', models.IntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='files.translationfile')),
+            ],
+            options={
+                'ordering': ['file', 'index'],
+                'unique_together': {('file', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0007_translationfilechunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translationfilechunk',
+            name='checkpointed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='translationfilechunk',
+            name='committed_duplicates',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='translationfilechunk',
+            name='committed_entries',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='translationfilechunk',
+            name='committed_lines',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='translationfilechunk',
+            name='committed_offset',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='translationfilechunk',
+            name='committed_strings',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0008_translationfilechunk_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translationfile',
+            name='last_diff',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='translationstring',
+            name='entry_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0009_entry_hash_last_diff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translationfile',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='translationfile',
+            name='deduplicated_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deduplicated_uploads', to='files.translationfile'),
+        ),
+    ]
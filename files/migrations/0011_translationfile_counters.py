@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:16
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counters(apps, schema_editor):
+    """Compteurs initiaux des fichiers existants"""
+    TranslationFile = apps.get_model('files', 'TranslationFile')
+    TranslationString = apps.get_model('files', 'TranslationString')
+    rows = TranslationString.objects.order_by().values('file').annotate(
+        total=Count('pk'),
+        translated=Count('pk', filter=Q(is_translated=True)),
+        fuzzy=Count('pk', filter=Q(is_fuzzy=True)),
+        plural=Count('pk', filter=Q(is_plural=True)),
+    )
+    for row in rows.iterator():
+        TranslationFile.objects.filter(pk=row['file']).update(
+            total_strings=row['total'], translated_count=row['translated'],
+            fuzzy_count=row['fuzzy'], plural_count=row['plural']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0010_content_hash_deduplication'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translationfile',
+            name='fuzzy_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='translationfile',
+            name='plural_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='translationfile',
+            name='translated_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0011_translationfile_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='translationstring',
+            index=models.Index(fields=['line_number', 'key', 'id'], name='files_string_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='translationstring',
+            index=models.Index(fields=['file', 'line_number', 'key', 'id'], name='files_string_file_keyset_idx'),
+        ),
+    ]
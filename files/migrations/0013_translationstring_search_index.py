@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def install_search_index(apps, schema_editor):
+    """Index plein texte des chaînes (FTS5 sur SQLite, GIN tsvector sur PostgreSQL)"""
+    from files.search import install_index
+    install_index(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from files.search import uninstall_index
+    uninstall_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0012_translationstring_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translationstring',
+            name='search_id',
+            field=models.BigIntegerField(editable=False, null=True, unique=True),
+        ),
+        # Table FTS5 de l'index (files/search.py), jointe par l'ORM : non gérée
+        migrations.CreateModel(
+            name='TranslationStringSearchMatch',
+            fields=[
+                ('string', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_match', serialize=False, to='files.translationstring', to_field='search_id')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'files_translationstring_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
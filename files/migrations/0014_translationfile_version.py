@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0013_translationstring_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translationfile',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -3,11 +3,14 @@
 # =============================================================================
 
 # files/models.py
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
 import os
 import uuid
 
+from .counters import COUNTER_FIELDS, FLAG_COUNTERS, TranslationStringQuerySet, apply_counters, string_counters, touch_files
+from .stats import invalidate_statistics
+
 class TranslationFile(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     """Fichiers uploadés pour traduction"""
@@ -43,9 +46,56 @@ class TranslationFile(models.Model):
     encoding = models.CharField(max_length=50, default='utf-8')
     total_strings = models.IntegerField(default=0)
     
+    # Compteurs dénormalisés, tenus à jour par files/counters.py
+    translated_count = models.IntegerField(default=0)
+    fuzzy_count = models.IntegerField(default=0)
+    plural_count = models.IntegerField(default=0)
+    last_diff = models.JSONField(default=dict, blank=True)  # Résumé du dernier retraitement incrémental
+    
+    # Incrémenté à chaque écriture du fichier ou de ses chaînes : marqueur des ETags (files/etags.py)
+    version = models.PositiveIntegerField(default=0)
+    
+    # Déduplication : empreinte du contenu et upload identique dont les chaînes ont été copiées
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    deduplicated_from = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='deduplicated_uploads'
+    )
+    
+    def save(self, *args, **kwargs):
+        # Les compteurs (total_strings compris) et la version ne sont écrits que
+        # par des F() : une instance chargée avant des modifications de chaînes
+        # ne les écrase pas
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in COUNTER_FIELDS and field.name != 'version'
+            ]
+        super().save(*args, **kwargs)
+        if not adding:
+            touch_files([self.pk], using=self._state.db, instance=self)
+        invalidate_statistics([self.uploaded_by_id], using=self._state.db)
+    
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(TranslationFile, instance=self)
+        result = super().delete(*args, **kwargs)
+        invalidate_statistics([self.uploaded_by_id], using=using)
+        return result
+    
+    @property
+    def translation_progress(self):
+        """Pourcentage de chaînes traduites"""
+        if not self.total_strings:
+            return 0
+        return round((self.translated_count / self.total_strings) * 100, 2)
+    
+    def is_blob_shared(self):
+        """Le fichier physique est-il aussi référencé par un autre upload ?"""
+        return TranslationFile.objects.filter(file_path=self.file_path.name).exclude(pk=self.pk).exists()
+    
     def delete_temp_file(self):
-        """Supprime le fichier physique"""
-        if self.file_path and os.path.exists(self.file_path.path):
+        """Supprime le fichier physique, sauf s'il est partagé avec un autre upload"""
+        if self.file_path and not self.is_blob_shared() and os.path.exists(self.file_path.path):
             os.remove(self.file_path.path)
     
     def get_file_extension(self):
@@ -74,8 +124,55 @@ class TranslationString(models.Model):
     line_number = models.IntegerField(blank=True, null=True)
     is_fuzzy = models.BooleanField(default=False)  # Pour les fichiers PO
     is_plural = models.BooleanField(default=False)
+    entry_hash = models.CharField(max_length=64, blank=True)  # Empreinte (clé, source, pluriel, contexte)
+    # rowid de la chaîne dans l'index FTS5 SQLite, attribué par ses triggers (files/search.py)
+    search_id = models.BigIntegerField(unique=True, null=True, editable=False)
+    
+    objects = TranslationStringQuerySet.as_manager()
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Drapeaux tels qu'en base, pour calculer les deltas des compteurs au save()
+        instance._stored_flags = {
+            flag: getattr(instance, flag) for flag in FLAG_COUNTERS.values() if flag in field_names
+        }
+        return instance
     
+    def save(self, *args, **kwargs):
+        """Sauvegarde et répercute les changements de drapeaux sur le fichier"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & set(FLAG_COUNTERS.values()):
+            super().save(*args, **kwargs)
+            touch_files([self.file_id], using=self._state.db)
+            return
+        
+        using = kwargs.get('using') or router.db_for_write(TranslationString, instance=self)
+        with transaction.atomic(using=using):
+            if self._state.adding:
+                deltas = string_counters([self])
+            else:
+                stored = getattr(self, '_stored_flags', {})
+                if len(stored) < len(FLAG_COUNTERS):
+                    stored = TranslationString.objects.using(using).filter(pk=self.pk).values(
+                        *FLAG_COUNTERS.values()
+                    ).first() or {}
+                deltas = {self.file_id: {
+                    counter: int(getattr(self, flag)) - int(stored[flag])
+                    for counter, flag in FLAG_COUNTERS.items() if flag in stored
+                }}
+            super().save(*args, **kwargs)
+            apply_counters(deltas, using=using)
+        self._stored_flags = {flag: getattr(self, flag) for flag in FLAG_COUNTERS.values()}
+    
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(TranslationString, instance=self)
+        stored = getattr(self, '_stored_flags', {})
+        flags = {flag: stored[flag] if flag in stored else getattr(self, flag) for flag in FLAG_COUNTERS.values()}
+        with transaction.atomic(using=using):
+            result = super().delete(*args, **kwargs)
+            apply_counters(string_counters([TranslationString(file_id=self.file_id, **flags)], sign=-1), using=using)
+        return result
     
     def get_translations(self):
         """Retourne toutes les traductions de cette chaîne"""
@@ -86,4 +183,82 @@ class TranslationString(models.Model):
     
     class Meta:
         unique_together = ['file', 'key']
-        ordering = ['line_number', 'key']
\ No newline at end of file
+        ordering = ['line_number', 'key']
+        indexes = [
+            # Ordre de la pagination par curseur, sur tous les fichiers et par fichier
+            models.Index(fields=['line_number', 'key', 'id'], name='files_string_keyset_idx'),
+            models.Index(fields=['file', 'line_number', 'key', 'id'], name='files_string_file_keyset_idx'),
+        ]
+
+class TranslationStringSearchMatch(models.Model):
+    """
+    Ligne de l'index FTS5 SQLite (``files/search.py``), de ``rowid`` égal au
+    ``search_id`` de sa chaîne ; ``rank`` est le score bm25 de la recherche
+    en cours. Table créée et tenue à jour par l'index lui-même.
+    """
+    string = models.OneToOneField(
+        TranslationString, on_delete=models.DO_NOTHING, primary_key=True, to_field='search_id',
+        db_column='rowid', db_constraint=False, related_name='search_match'
+    )
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = 'files_translationstring_fts'
+
+
+class TranslationFileChunk(models.Model):
+    """Plage d'octets d'un gros fichier, ingérée par une sous-tâche dédiée"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('error', 'Error'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file = models.ForeignKey(TranslationFile, on_delete=models.CASCADE, related_name='chunks')
+    index = models.IntegerField()
+    byte_start = models.BigIntegerField()
+    byte_end = models.BigIntegerField()
+    line_offset = models.IntegerField(default=0)  # Lignes (PO) ou entrées (JSON) qui précèdent la plage
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    task_id = models.CharField(max_length=255, blank=True, null=True)
+    
+    # Avancement, mis à jour au rythme des publications de progression
+    bytes_processed = models.BigIntegerField(default=0)
+    entries_processed = models.IntegerField(default=0)
+    strings_created = models.IntegerField(default=0)
+    duplicates = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    
+    # Point de reprise, écrit dans la transaction de chaque lot validé
+    committed_entries = models.IntegerField(default=0)  # Entrées déjà traitées
+    committed_offset = models.BigIntegerField(null=True, blank=True)  # Octet où reprendre la lecture
+    committed_lines = models.IntegerField(null=True, blank=True)  # Lignes qui précèdent cet octet
+    committed_strings = models.IntegerField(default=0)
+    committed_duplicates = models.IntegerField(default=0)
+    checkpointed_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    @property
+    def size(self):
+        return self.byte_end - self.byte_start
+    
+    @property
+    def resume_offset(self):
+        """Octet où reprendre la lecture : début de plage sans point de reprise"""
+        return self.byte_start if self.committed_offset is None else self.committed_offset
+    
+    @property
+    def resume_lines(self):
+        return self.line_offset if self.committed_lines is None else self.committed_lines
+    
+    def __str__(self):
+        return f"{self.file.original_filename} [{self.index}] {self.byte_start}-{self.byte_end}"
+    
+    class Meta:
+        unique_together = ['file', 'index']
+        ordering = ['file', 'index']
@@ -3,8 +3,19 @@
 # files/pagination.py
 # =============================================================================
 
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+import math
+import uuid
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .search import search_page
 
 
 class TranslationFilePagination(PageNumberPagination):
@@ -49,3 +60,198 @@ class TranslationStringPagination(PageNumberPagination):
         })
 
 
+class TranslationStringSearchPagination(TranslationStringPagination):
+    """
+    Pagination par numéro de page d'une recherche classée par pertinence
+    (``files/search.py``).
+
+    La page est lue par ``search_page``, qui ne classe qu'une fenêtre des
+    correspondances et ne les compte que jusqu'à ``FILES_SEARCH_RANK_WINDOW`` :
+    au-delà, ``count`` et ``total_pages`` valent null, comme pour la
+    pagination par curseur, et ``has_next`` vient de la ligne lue en plus de
+    la page.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        offset = (self.number - 1) * self.page_size
+        rows, count = search_page(queryset, offset, self.page_size + 1) if self.number > 0 else ([], None)
+        if not rows and self.number != 1:
+            raise NotFound(self.invalid_page_message)
+
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        # Dernière page atteinte : le total se déduit de la page
+        self.count = count if self.has_next else offset + len(self.page)
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def get_paginated_response(self, data):
+        total_pages = None
+        if self.count is not None:
+            total_pages = max(math.ceil(self.count / self.page_size), 1)
+        return Response({
+            'pagination': {
+                'count': self.count,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'current_page': self.number,
+                'total_pages': total_pages,
+                'page_size': self.page_size,
+                'has_next': self.has_next,
+                'has_previous': self.number > 1
+            },
+            'results': data
+        })
+
+
+class TranslationStringCursorPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) des chaînes, ordonnées par
+    ``(line_number, key, id)``.
+
+    Chaque page reprend après la dernière ligne de la précédente au lieu de
+    compter la table et de sauter ``OFFSET`` lignes : le coût d'une page ne
+    dépend pas de sa profondeur. Activée par ``?cursor=`` (vide pour la
+    première page) ou ``?pagination=cursor`` ; l'enveloppe est celle de
+    ``TranslationStringPagination``, sans les champs qui demandent un
+    ``COUNT`` (``count``, ``current_page``, ``total_pages`` à null).
+    """
+    page_size = TranslationStringPagination.page_size
+    page_size_query_param = TranslationStringPagination.page_size_query_param
+    max_page_size = TranslationStringPagination.max_page_size
+    cursor_query_param = 'cursor'
+    ordering = ('line_number', 'key', 'id')
+    invalid_cursor_message = 'Curseur invalide'
+
+    @classmethod
+    def is_requested(cls, request):
+        params = request.query_params
+        return cls.cursor_query_param in params or params.get('pagination') == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        nulls_largest = connections[queryset.db].features.nulls_order_largest
+        if position is not None:
+            queryset = queryset.filter(
+                self._before(*position, nulls_largest) if reverse else self._after(*position, nulls_largest)
+            )
+        ordering = ['-' + field for field in self.ordering] if reverse else list(self.ordering)
+        # Une ligne de plus pour savoir s'il reste une page dans ce sens
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next, self.has_previous = position is not None, more
+        else:
+            self.has_next, self.has_previous = more, position is not None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def decode_cursor(self, request):
+        """Retourne ``((line_number, key, id), reverse)`` ou ``(None, False)``"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padding = '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(encoded + padding).decode('utf-8'))
+            line_number, key, pk = data['p']
+            if line_number is not None:
+                line_number = int(line_number)
+            return (line_number, str(key), str(uuid.UUID(pk))), bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        # Instance ou ligne .values() (TranslationStringListValuesSerializer)
+        if isinstance(obj, dict):
+            position = [obj['line_number'], obj['key'], str(obj['id'])]
+        else:
+            position = [obj.line_number, obj.key, str(obj.pk)]
+        data = {'p': position}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded.decode('ascii').rstrip('='))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def _after(line_number, key, pk, nulls_largest):
+        """Lignes strictement après la position, dans l'ordre croissant"""
+        tail = Q(key__gt=key) | Q(key=key, id__gt=pk)
+        if line_number is None:
+            same = Q(line_number__isnull=True) & tail
+            return same if nulls_largest else same | Q(line_number__isnull=False)
+        # Borne redondante : permet un parcours d'index à partir de line_number
+        after = Q(line_number__gte=line_number) & (
+            Q(line_number__gt=line_number) | Q(line_number=line_number) & tail
+        )
+        return after | Q(line_number__isnull=True) if nulls_largest else after
+
+    @staticmethod
+    def _before(line_number, key, pk, nulls_largest):
+        """Lignes strictement avant la position, dans l'ordre croissant"""
+        tail = Q(key__lt=key) | Q(key=key, id__lt=pk)
+        if line_number is None:
+            same = Q(line_number__isnull=True) & tail
+            return same | Q(line_number__isnull=False) if nulls_largest else same
+        before = Q(line_number__lte=line_number) & (
+            Q(line_number__lt=line_number) | Q(line_number=line_number) & tail
+        )
+        return before if nulls_largest else before | Q(line_number__isnull=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'pagination': {
+                'count': None,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'current_page': None,
+                'total_pages': None,
+                'page_size': self.page_size,
+                'has_next': self.has_next,
+                'has_previous': self.has_previous
+            },
+            'results': data
+        })
@@ -0,0 +1,443 @@
+# =============================================================================
+# files/parsers.py
+# =============================================================================
+
+"""
+Lecteurs en flux (streaming) pour les fichiers de traduction.
+
+Contrairement à ``polib.pofile`` qui charge tout le catalogue en mémoire avant
+de rendre la main, ces lecteurs produisent les entrées une par une : la
+mémoire consommée reste constante quelle que soit la taille du fichier.
+"""
+
+import codecs
+import json
+import re
+
+from polib import unescape
+
+
+class POStreamEntry:
+    """
+    Entrée PO minimale produite par le lecteur en flux.
+
+    Les noms d'attributs reprennent ceux de ``polib.POEntry`` afin que la
+    boucle d'ingestion fonctionne indifféremment avec l'un ou l'autre.
+    """
+
+    __slots__ = (
+        'msgctxt', 'msgid', 'msgid_plural', 'msgstr', 'msgstr_plural',
+        'flags', 'occurrences', 'comment', 'linenum', 'obsolete',
+    )
+
+    def __init__(self, linenum=0):
+        self.msgctxt = None
+        self.msgid = None
+        self.msgid_plural = ''
+        self.msgstr = ''
+        self.msgstr_plural = {}
+        self.flags = []
+        self.occurrences = []
+        self.comment = ''
+        self.linenum = linenum
+        self.obsolete = False
+
+    @property
+    def fuzzy(self):
+        return 'fuzzy' in self.flags
+
+    def __repr__(self):
+        return f"<POStreamEntry line={self.linenum} msgid={self.msgid!r}>"
+
+
+def _unquote(token):
+    """Retire les guillemets d'une chaîne PO et décode les échappements"""
+    value = token[1:-1]
+    return unescape(value) if '\\' in value else value
+
+
+def iter_po_entries(lines, include_header=False):
+    """
+    Parcourt un flux de lignes PO et produit des ``POStreamEntry``.
+
+    ``lines`` est n'importe quel itérable de lignes texte (fichier ouvert en
+    mode texte, liste, générateur...). L'entrée d'en-tête (``msgid ""``) est
+    ignorée sauf si ``include_header`` est vrai, comme le fait polib.
+    Lève ``IOError`` en cas d'erreur de syntaxe.
+    """
+    entry = POStreamEntry()
+    # Champ auquel s'ajoutent les lignes de continuation "..."
+    target = None
+    plural_index = 0
+    # Vrai dès qu'un msgstr a été lu : la prochaine ligne de commentaire ou
+    # de mot-clé ouvre alors une nouvelle entrée.
+    in_msgstr = False
+    header_seen = include_header
+    linenum = 0
+
+    def finish(current):
+        nonlocal header_seen
+        if current.msgid is None:
+            return None
+        if not header_seen and current.msgid == '' and not current.obsolete:
+            header_seen = True
+            return None
+        return current
+
+    for raw_line in lines:
+        linenum += 1
+        if linenum == 1 and raw_line.startswith(codecs.BOM_UTF8.decode('utf-8')):
+            raw_line = raw_line[1:]
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        obsolete = False
+        if line.startswith('#~'):
+            if line.startswith('#~|'):
+                continue
+            line = line[2:].strip()
+            if not line:
+                continue
+            obsolete = True
+
+        if line[0] == '"':
+            if target is None:
+                raise IOError(f'Syntax error in po file (line {linenum})')
+            if target == '_previous':
+                continue
+            value = _unquote(line)
+            if target == 'msgstr_plural':
+                entry.msgstr_plural[plural_index] += value
+            else:
+                setattr(entry, target, (getattr(entry, target) or '') + value)
+            continue
+
+        if line[0] == '#':
+            if in_msgstr:
+                done = finish(entry)
+                if done is not None:
+                    yield done
+                entry = POStreamEntry(linenum=linenum)
+                in_msgstr = False
+            if entry.linenum == 0:
+                entry.linenum = linenum
+            target = None
+            marker = line[:2]
+            if marker == '#:':
+                for occurrence in line[2:].split():
+                    fil, sep, lineno = occurrence.rpartition(':')
+                    if sep and lineno.isdigit():
+                        entry.occurrences.append((fil, lineno))
+                    else:
+                        entry.occurrences.append((occurrence, ''))
+            elif marker == '#,':
+                entry.flags.extend(
+                    flag.strip() for flag in line[2:].split(',') if flag.strip()
+                )
+            elif marker == '#.':
+                text = line[3:]
+                entry.comment = f"{entry.comment}\n{text}" if entry.comment else text
+            elif marker == '#|':
+                # Valeurs précédentes (msgid/msgctxt) : non conservées mais
+                # leurs lignes de continuation ne doivent pas polluer l'entrée.
+                target = '_previous'
+            continue
+
+        keyword, _, token = line.partition(' ')
+        token = token.strip()
+        if not token.startswith('"') or not token.endswith('"') or len(token) < 2:
+            raise IOError(f'Syntax error in po file (line {linenum})')
+
+        if keyword in ('msgctxt', 'msgid'):
+            if in_msgstr or (keyword == 'msgid' and entry.msgid is not None):
+                done = finish(entry)
+                if done is not None:
+                    yield done
+                entry = POStreamEntry(linenum=linenum)
+                in_msgstr = False
+            if entry.linenum == 0:
+                entry.linenum = linenum
+            setattr(entry, keyword, _unquote(token))
+            if keyword == 'msgid':
+                entry.obsolete = obsolete
+            target = keyword
+        elif keyword == 'msgid_plural':
+            entry.msgid_plural = _unquote(token)
+            target = 'msgid_plural'
+        elif keyword == 'msgstr':
+            entry.msgstr = _unquote(token)
+            target = 'msgstr'
+            in_msgstr = True
+        elif keyword.startswith('msgstr[') and keyword.endswith(']'):
+            try:
+                plural_index = int(keyword[7:-1])
+            except ValueError:
+                raise IOError(f'Syntax error in po file (line {linenum})')
+            entry.msgstr_plural[plural_index] = _unquote(token)
+            target = 'msgstr_plural'
+            in_msgstr = True
+        else:
+            raise IOError(f'Syntax error in po file (line {linenum})')
+
+    done = finish(entry)
+    if done is not None:
+        yield done
+
+
+def count_po_entries(file_path, chunk_size=1024 * 1024):
+    """
+    Estime le nombre d'entrées d'un fichier PO sans le parser.
+
+    Compte les lignes ``msgid`` par blocs binaires : la mémoire utilisée est
+    bornée par ``chunk_size``. Sert uniquement au calcul de la progression.
+    """
+    count = 0
+    tail = b'\n'
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            data = tail + chunk
+            count += data.count(b'\nmsgid ') + data.count(b'\n#~ msgid ')
+            # Conserver la fin du bloc pour ne pas rater un motif à cheval :
+            # elle sera recomptée avec le bloc suivant.
+            tail = data[-16:]
+            count -= tail.count(b'\nmsgid ') + tail.count(b'\n#~ msgid ')
+    count += tail.count(b'\nmsgid ') + tail.count(b'\n#~ msgid ')
+    # L'en-tête (msgid "") n'est pas une entrée
+    return max(count - 1, 0)
+
+
+def open_text_stream(file_path, encoding):
+    """
+    Ouvre un fichier en mode texte pour une lecture ligne par ligne.
+
+    Retombe sur UTF-8 si l'encodage détecté n'est pas connu de Python,
+    comme le fait polib.
+    """
+    try:
+        return open(file_path, 'r', encoding=encoding or 'utf-8')
+    except LookupError:
+        return open(file_path, 'r', encoding='utf-8')
+
+
+class JSONStructureError(ValueError):
+    """Le document JSON n'a pas la structure attendue (objet à la racine)"""
+
+
+_JSON_WHITESPACE = ' \t\n\r'
+_JSON_LITERALS = {
+    'true': True,
+    'false': False,
+    'null': None,
+    'NaN': float('nan'),
+    'Infinity': float('inf'),
+    '-Infinity': float('-inf'),
+}
+
+
+_JSON_SCALAR_RE = re.compile(
+    r'(?P<int>-?(?:0|[1-9]\d*))(?P<frac>\.\d+)?(?P<exp>[eE][-+]?\d+)?'
+    r'|true|false|null|NaN|-?Infinity'
+)
+
+
+class JSONStreamFlattener:
+    """
+    Aplatit un document JSON en flux, sans le charger en mémoire.
+
+    Produit les paires ``(clé_pointée, valeur)`` dans l'ordre du document avec
+    exactement la même sémantique que ``flatten_json`` (indices ``[i]`` pour
+    les listes, valeurs scalaires des listes converties en ``str``). La
+    mémoire utilisée est bornée par la profondeur d'imbrication et la taille
+    du plus grand jeton, pas par la taille du fichier.
+
+    ``position`` donne le nombre de caractères déjà consommés, utile pour
+    estimer la progression.
+    """
+
+    def __init__(self, stream, separator='.', chunk_size=64 * 1024):
+        self.stream = stream
+        self.separator = separator
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.offset = 0  # caractères déjà retirés du tampon
+        self.eof = False
+
+    @property
+    def position(self):
+        return self.offset + self.pos
+
+    # -- Lecture du flux ------------------------------------------------------
+
+    def _fill(self):
+        """Ajoute un bloc au tampon ; retourne False en fin de flux"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > self.chunk_size:
+            # Compacter le tampon pour garder une mémoire bornée
+            self.offset += self.pos
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        self.buffer += chunk
+        return True
+
+    def _peek(self):
+        """Retourne le prochain caractère significatif sans le consommer"""
+        while True:
+            buffer, pos = self.buffer, self.pos
+            length = len(buffer)
+            while pos < length and buffer[pos] in _JSON_WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < length:
+                return buffer[pos]
+            if not self._fill():
+                return ''
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise self._error(f"'{char}' attendu")
+        self.pos += 1
+
+    def _read_string(self):
+        # self.buffer[self.pos] == '"'
+        while True:
+            try:
+                value, end = json.decoder.scanstring(self.buffer, self.pos + 1)
+            except json.JSONDecodeError as e:
+                # Chaîne coupée en fin de tampon : lire la suite et réessayer
+                if (e.msg.startswith('Unterminated') or e.pos >= len(self.buffer) - 6) \
+                        and self._fill():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+    def _read_scalar(self):
+        """Lit un nombre ou un littéral (true, false, null...)"""
+        while True:
+            match = _JSON_SCALAR_RE.match(self.buffer, self.pos)
+            # Un jeton proche de la fin du tampon peut être incomplet
+            # ("1." ou "1e+" en attente de leurs chiffres, "tru"...)
+            end = match.end() if match else self.pos
+            if len(self.buffer) - end < 10 and self._fill():
+                continue
+            if match is None:
+                raise self._error('Valeur JSON attendue')
+            token = match.group(0)
+            self.pos = match.end()
+            if token in _JSON_LITERALS:
+                return _JSON_LITERALS[token]
+            integer, frac, exp = match.group('int', 'frac', 'exp')
+            if integer is None:
+                raise self._error('Valeur JSON attendue')
+            if frac or exp:
+                return float(token)
+            return int(token)
+
+    def _skip_value(self):
+        """Consomme une valeur sans rien produire (listes imbriquées dans une liste)"""
+        char = self._peek()
+        if char in '{[':
+            closing = '}' if char == '{' else ']'
+            self.pos += 1
+            if self._peek() == closing:
+                self.pos += 1
+                return
+            while True:
+                if char == '{':
+                    self._read_key()
+                self._skip_value()
+                separator = self._peek()
+                self.pos += 1
+                if separator == closing:
+                    return
+                if separator != ',':
+                    raise self._error(f"',' ou '{closing}' attendu")
+        elif char == '"':
+            self._read_string()
+        else:
+            self._read_scalar()
+
+    def _read_key(self):
+        if self._peek() != '"':
+            raise self._error('Clé de propriété attendue')
+        key = self._read_string()
+        self._expect(':')
+        return key
+
+    # -- Aplatissement -------------------------------------------------------
+
+    def __iter__(self):
+        char = self._peek()
+        if char == '':
+            raise self._error('Document JSON vide')
+        if char != '{':
+            raise JSONStructureError('Format JSON invalide: doit être un objet')
+        yield from self._iter_object('')
+        if self._peek() != '':
+            raise self._error('Données supplémentaires après le document')
+
+    def _iter_object(self, parent_key):
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        separator = self.separator
+        while True:
+            key = self._read_key()
+            new_key = f"{parent_key}{separator}{key}" if parent_key else key
+            char = self._peek()
+            if char == '{':
+                yield from self._iter_object(new_key)
+            elif char == '[':
+                yield from self._iter_list(new_key)
+            elif char == '"':
+                yield new_key, self._read_string()
+            else:
+                yield new_key, self._read_scalar()
+
+            char = self._peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise self._error("',' ou '}' attendu")
+
+    def _iter_list(self, parent_key):
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        index = 0
+        while True:
+            item_key = f"{parent_key}[{index}]"
+            char = self._peek()
+            if char == '{':
+                yield from self._iter_object(item_key)
+            elif char == '[':
+                # flatten_json ne produit rien pour une liste dans une liste
+                self._skip_value()
+            elif char == '"':
+                yield item_key, self._read_string()
+            else:
+                yield item_key, str(self._read_scalar())
+
+            char = self._peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise self._error("',' ou ']' attendu")
+            index += 1
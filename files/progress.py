@@ -0,0 +1,166 @@
+# =============================================================================
+# files/progress.py
+# =============================================================================
+
+"""
+Publication limitée de la progression des tâches Celery.
+
+Chaque ``update_state`` est une écriture dans le backend de résultats
+(Redis) : les parsers signalent leur avancement à chaque entrée, le
+``ProgressReporter`` ne transmet qu'un état de temps en temps. Côté lecture,
+``fetch_task_meta`` interroge plusieurs tâches en un seul aller-retour.
+"""
+
+import time
+
+from celery.utils.log import get_task_logger
+from django.conf import settings
+
+logger = get_task_logger(__name__)
+
+
+# Intervalle minimal entre deux publications, en millisecondes
+DEFAULT_INTERVAL_MS = 500
+
+# Avancement (en points de pourcentage) qui déclenche une publication anticipée
+DEFAULT_PERCENT_STEP = 5
+
+
+class ProgressReporter:
+    """
+    Regroupe les mises à jour de progression d'une tâche.
+
+    Un état est publié au premier appel, puis dès que ``interval_ms``
+    millisecondes se sont écoulées ou que la progression a gagné
+    ``percent_step`` points depuis la dernière publication. ``flush()``
+    publie toujours le dernier état connu.
+
+    Les clés publiées sont celles attendues par l'action ``progress`` de
+    ``TranslationFileViewSet`` : ``current``, ``total``, ``strings_created``
+    et ``progress``.
+
+        reporter = ProgressReporter(task, total=total_entries)
+        for i, entry in enumerate(entries):
+            reporter.update(i, strings_created=created)
+        reporter.flush()
+    """
+
+    def __init__(self, task, total=0, interval_ms=None, percent_step=None, clock=time.monotonic,
+                 task_id=None):
+        self.task = task
+        # Identifiant sous lequel publier, par défaut celui de la tâche courante
+        self.task_id = task_id
+        self.total = total
+        if interval_ms is None:
+            interval_ms = getattr(settings, 'FILES_PROGRESS_INTERVAL_MS', DEFAULT_INTERVAL_MS)
+        if percent_step is None:
+            percent_step = getattr(settings, 'FILES_PROGRESS_PERCENT_STEP', DEFAULT_PERCENT_STEP)
+        self.interval = interval_ms / 1000
+        self.percent_step = percent_step
+        self.clock = clock
+
+        self._state = None
+        self.published = 0
+        self._dirty = False
+        self._last_time = None
+        self._last_progress = None
+
+    def update(self, current, total=None, strings_created=0, progress=None):
+        """
+        Enregistre l'avancement ; ne publie que si un seuil est atteint.
+
+        ``progress`` est calculé d'après ``current``/``total`` s'il n'est pas
+        fourni, plafonné à 99 : 100 est réservé à la fin de la tâche.
+        """
+        if total is not None:
+            self.total = total
+        total = max(self.total, current)
+        if progress is None:
+            progress = int((current / max(total, 1)) * 100)
+        progress = min(progress, 99)
+
+        self._state = (current, total, strings_created, progress)
+        self._dirty = True
+
+        now = self.clock()
+        if (self._last_time is None
+                or now - self._last_time >= self.interval
+                or progress - self._last_progress >= self.percent_step):
+            self._publish(now, progress)
+
+    def flush(self):
+        """Publie le dernier état s'il ne l'a pas encore été"""
+        if self._dirty:
+            self._publish(self.clock(), self._state[3])
+
+    @property
+    def meta(self):
+        """Dernier état enregistré, au format publié"""
+        if self._state is None:
+            return None
+        current, total, strings_created, progress = self._state
+        return {
+            'current': current,
+            'total': total,
+            'strings_created': strings_created,
+            'progress': progress
+        }
+
+    def build_meta(self):
+        """État à publier ; surchargé pour agréger plusieurs sources"""
+        return self.meta
+
+    def _publish(self, now, progress):
+        self._last_time = now
+        self._last_progress = progress
+        self._dirty = False
+        try:
+            self.task.update_state(task_id=self.task_id, state='PROGRESS', meta=self.build_meta())
+            self.published += 1
+        except Exception as e:
+            # Une progression perdue ne doit pas interrompre le traitement
+            logger.warning(f"Impossible de publier la progression: {e}")
+
+
+def fetch_task_meta(task_ids, app=None):
+    """
+    États de plusieurs tâches Celery en une seule lecture du backend.
+
+    Les backends clé-valeur (Redis, cache) sont lus par un unique ``MGET`` ;
+    les autres retombent sur un ``AsyncResult`` par tâche. Retourne
+    ``{task_id: {'status': ..., 'result': ...}}`` pour les tâches connues du
+    backend.
+    """
+    if app is None:
+        from celery import current_app as app
+
+    task_ids = list(dict.fromkeys(str(task_id) for task_id in task_ids if task_id))
+    if not task_ids:
+        return {}
+
+    backend = app.backend
+    try:
+        try:
+            keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+            values = backend.mget(keys)
+        except (AttributeError, NotImplementedError):
+            values = None
+        if values is not None:
+            if hasattr(values, 'items'):
+                # Certains clients (cache, couchbase) renvoient un dict par clé
+                values = [values.get(key) for key in keys]
+            return {
+                task_id: backend.decode_result(value)
+                for task_id, value in zip(task_ids, values) if value is not None
+            }
+
+        from celery.result import AsyncResult
+        metas = {}
+        for task_id in task_ids:
+            result = AsyncResult(task_id, app=app)
+            metas[task_id] = {'status': result.state, 'result': result.info}
+        return metas
+    except Exception as e:
+        # Une progression illisible ne doit pas faire échouer la liste
+        logger.warning(f"Impossible de lire l'état des tâches: {e}")
+        return {}
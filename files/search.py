@@ -0,0 +1,490 @@
+# =============================================================================
+# files/search.py
+# =============================================================================
+
+"""
+Index de recherche plein texte des chaînes de traduction.
+
+Le paramètre ``search`` de ``/api/strings/`` passe par ``search_strings``.
+Une recherche faite de mots (lettres et chiffres) passe par l'index :
+chaque mot est un préfixe (``sauv`` trouve « sauvegarder »), tous doivent
+être présents dans ``key``, ``source_text`` ou ``context``, et les résultats
+sont classés par pertinence (``search_rank``, la clé pesant plus que le
+texte source, lui-même plus que le contexte). Une recherche qui contient
+de la ponctuation (``app.title``, ``%(name)s``, ``{count}``) garde la
+sémantique historique : sous-chaîne ``icontains``.
+
+- SQLite : table FTS5 à contenu externe ``files_translationstring_fts``,
+  synchronisée par des triggers (INSERT du writer, modifications, bulk
+  update, suppressions en cascade comprises), de ``rowid`` égal à la
+  colonne ``search_id`` des chaînes ;
+- PostgreSQL : index GIN sur l'expression ``tsvector`` de la chaîne,
+  toujours à jour par construction, et index trigrammes (``pg_trgm``) sur
+  l'expression des ``icontains`` : une recherche par mots trouve aussi les
+  sous-chaînes, comme avant l'index ;
+- autres bases, ou ``FILES_SEARCH_BACKEND = 'none'`` : ``icontains``.
+
+Une page classée par pertinence se lit par ``search_page``, avec son total
+tant qu'il ne dépasse pas ``FILES_SEARCH_RANK_WINDOW`` : un mot présent
+dans des centaines de milliers de chaînes n'est ni compté ni classé en
+entier (``TranslationStringSearchPagination``).
+"""
+
+import logging
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+
+# Mots de la recherche : lettres et chiffres, le reste sépare (comme les index)
+TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+# Recherche faite uniquement de mots séparés par des espaces
+WORDS_RE = re.compile(r'\s*(?:[^\W_]+\s*)+', re.UNICODE)
+
+# Au-delà, les mots suivants sont ignorés
+MAX_TERMS = 8
+
+# Correspondances classées et comptées par page de recherche, les plus récentes d'abord
+RANK_WINDOW = 1000
+
+# Paramètres de bm25, ceux de FTS5
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def search_terms(query):
+    """Mots de recherche normalisés de ``query``"""
+    return [term.lower() for term in TOKEN_RE.findall(query or '')][:MAX_TERMS]
+
+
+def is_word_query(query):
+    """La recherche n'est-elle faite que de mots (pas de ponctuation) ?"""
+    return bool(query) and WORDS_RE.fullmatch(query) is not None
+
+
+def rank_window():
+    return getattr(settings, 'FILES_SEARCH_RANK_WINDOW', RANK_WINDOW)
+
+
+def fold(text):
+    """Minuscules sans diacritiques, comme le tokenizer ``unicode61 remove_diacritics 2``"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def bm25_ranks(documents, terms, weights):
+    """
+    Rang bm25 de ``documents`` (tuples de colonnes pondérées par ``weights``),
+    négatif comme le ``rank`` de FTS5 : plus petit = plus pertinent.
+
+    Chaque mot est un préfixe. Les documents sont des correspondances, qui
+    contiennent donc tous les mots : l'IDF, le même pour tous, est omis et
+    la longueur moyenne est celle des documents classés.
+    """
+    terms = [fold(term) for term in terms]
+    documents = [[TOKEN_RE.findall(fold(text or '')) for text in document] for document in documents]
+    lengths = [sum(len(tokens) for tokens in document) for document in documents]
+    average = sum(lengths) / len(lengths) if lengths else 0
+    ranks = []
+    for document, length in zip(documents, lengths):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average) if average else BM25_K1
+        score = 0.0
+        for term in terms:
+            frequency = sum(
+                weight * sum(token.startswith(term) for token in tokens)
+                for weight, tokens in zip(weights, document)
+            )
+            score += frequency * (BM25_K1 + 1) / (frequency + norm)
+        ranks.append(-score)
+    return ranks
+
+
+def icontains_filter(query):
+    return Q(key__icontains=query) | Q(source_text__icontains=query) | Q(context__icontains=query)
+
+
+def icontains_search(queryset, query):
+    """Recherche sans index, comportement historique de l'API"""
+    return queryset.filter(icontains_filter(query))
+
+
+class SearchBackend:
+    """Index de recherche d'une base : installation et requêtes"""
+    vendor = None
+
+    def __init__(self, table):
+        self.table = table
+
+    def install(self, cursor):
+        raise NotImplementedError
+
+    def uninstall(self, cursor):
+        raise NotImplementedError
+
+    def is_installed(self, cursor):
+        raise NotImplementedError
+
+    def rebuild(self, cursor):
+        """Réindexe toutes les chaînes existantes"""
+
+    def search(self, queryset, terms, query):
+        raise NotImplementedError
+
+    def page(self, queryset, offset, limit):
+        """
+        Lignes ``[offset, offset + limit)`` du queryset classé par ``search``
+        et leur total, None au-delà de ``rank_window()``.
+        """
+        return list(queryset[offset:offset + limit]), count_matches(queryset, rank_window())
+
+
+class SearchRank(ExpressionWrapper):
+    """Expression ``search_rank`` ; garde les mots cherchés (``SQLiteFTS5Backend.page``)"""
+
+    def __init__(self, expression, terms):
+        super().__init__(expression, output_field=FloatField())
+        self.terms = terms
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Table FTS5 à contenu externe : l'index ne stocke que les jetons et relit
+    le texte dans la table des chaînes.
+
+    FTS5 exige une clé entière ; celle des chaînes est un UUID et leur
+    ``rowid`` implicite peut changer (``VACUUM``, reconstruction de la table
+    par une migration). Le ``rowid`` de l'index est donc la colonne
+    ``search_id`` des chaînes, attribuée à l'insertion par un trigger puis
+    jamais modifiée : la jointure chaîne -> index passe par son index unique.
+
+    ``rank`` (bm25) coûte un parcours de toutes les correspondances de
+    chaque mot, ne serait-ce que pour son IDF : ``page`` n'en lit que les
+    ``rank_window()`` plus récentes du queryset filtré, dans l'ordre de
+    l'index et sans tri, et les classe en Python (``bm25_ranks``) ; les
+    suivantes viennent après, des plus récentes aux plus anciennes.
+    """
+    vendor = 'sqlite'
+
+    # Poids bm25 des colonnes key, source_text, context
+    WEIGHTS = (4.0, 1.0, 0.5)
+
+    COLUMNS = 'key, source_text, context'
+
+    TRIGGERS = ('ai', 'ad', 'au', 'ak')
+
+    @property
+    def fts(self):
+        return f'{self.table}_fts'
+
+    def install(self, cursor):
+        table, fts, columns = self.table, self.fts, self.COLUMNS
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{columns}, content='{table}', content_rowid='search_id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+        cursor.execute(f"INSERT INTO {fts}({fts}, rank) VALUES('rank', 'bm25({weights})')")
+        # search_id suivant : MAX() sur l'index unique, sûr car SQLite sérialise les écritures
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"UPDATE {table} SET search_id = (SELECT IFNULL(MAX(search_id), 0) + 1 FROM {table}) "
+            f"WHERE rowid = new.rowid AND search_id IS NULL; "
+            f"INSERT INTO {fts}(rowid, {columns}) "
+            f"SELECT search_id, key, source_text, context FROM {table} WHERE rowid = new.rowid; "
+            f"END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+            f"WHEN old.search_id IS NOT NULL BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.search_id, old.key, old.source_text, old.context); "
+            f"END"
+        )
+        # Seules les colonnes indexées déclenchent une réindexation (pas line_number)
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} "
+            f"WHEN old.search_id IS NOT NULL BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {columns}) "
+            f"VALUES ('delete', old.search_id, old.key, old.source_text, old.context); "
+            f"INSERT INTO {fts}(rowid, {columns}) VALUES (old.search_id, new.key, new.source_text, new.context); "
+            f"END"
+        )
+        # save() d'une instance créée dans le processus réécrit search_id à NULL : valeur rétablie
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ak AFTER UPDATE OF search_id ON {table} "
+            f"WHEN old.search_id IS NOT NULL AND new.search_id IS NOT old.search_id BEGIN "
+            f"UPDATE {table} SET search_id = old.search_id WHERE rowid = new.rowid; "
+            f"END"
+        )
+
+    def uninstall(self, cursor):
+        for suffix in self.TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {self.fts}_{suffix}")
+        cursor.execute(f"DROP TABLE IF EXISTS {self.fts}")
+
+    def is_installed(self, cursor):
+        names = [self.fts] + [f'{self.fts}_{suffix}' for suffix in self.TRIGGERS]
+        cursor.execute(
+            f"SELECT COUNT(*) FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})", names
+        )
+        return cursor.fetchone()[0] == len(names)
+
+    def rebuild(self, cursor):
+        # Chaînes sans search_id (antérieures à l'index) : numérotées après les autres
+        cursor.execute(
+            f"UPDATE {self.table} SET search_id = "
+            f"(SELECT IFNULL(MAX(search_id), 0) FROM {self.table}) + rowid WHERE search_id IS NULL"
+        )
+        cursor.execute(f"INSERT INTO {self.fts}({self.fts}) VALUES('rebuild')")
+
+    def match_query(self, terms):
+        # Chaque mot entre guillemets : aucun caractère de la syntaxe FTS5 n'est interprété
+        return ' AND '.join(f'"{term}"*' for term in terms)
+
+    def search(self, queryset, terms, query):
+        # Jointure search_id -> rowid de l'index (modèle non géré de files/models.py) :
+        # le rang bm25 n'est calculé que s'il est lu (tri), pas pour un count()
+        return queryset.filter(search_match__isnull=False).filter(
+            RawSQL(f"{self.fts} MATCH %s", [self.match_query(terms)], output_field=BooleanField())
+        ).annotate(search_rank=SearchRank(F('search_match__rank'), terms))
+
+    def without_match(self, queryset):
+        """``queryset`` sans la condition MATCH, qui ferait parcourir l'index"""
+        queryset = queryset.all()
+        queryset.query.where.children = [
+            child for child in queryset.query.where.children
+            # filter(RawSQL(...)) : lookup Exact(RawSQL, True)
+            if not (isinstance(getattr(child, 'lhs', None), RawSQL) and child.lhs.sql.startswith(f'{self.fts} MATCH'))
+        ]
+        return queryset
+
+    def page(self, queryset, offset, limit):
+        window = rank_window()
+        ordering = list(queryset.query.order_by[1:])
+        terms = queryset.query.annotations['search_rank'].terms
+
+        # L'index parcourt ses correspondances par rowid décroissant, sans les
+        # trier ni calculer bm25 tant que le rang n'est pas lu
+        newest = queryset.order_by('-search_match')
+        newest.query.annotations['search_rank'] = Value(None, output_field=FloatField())
+        candidates = list(newest.values_list(
+            'pk', 'search_id', 'key', 'source_text', 'context', *(name.lstrip('-') for name in ordering)
+        )[:window + 1])
+        more = len(candidates) > window
+        candidates = candidates[:window]
+
+        ranked = list(zip(bm25_ranks([row[2:5] for row in candidates], terms, self.WEIGHTS), candidates))
+        # Ex æquo : ordre demandé après search_rank (NULL en premier, comme SQLite)
+        for i, name in reversed(list(enumerate(ordering, start=5))):
+            ranked.sort(key=lambda pair: (pair[1][i] is not None, pair[1][i]), reverse=name.startswith('-'))
+        ranked.sort(key=lambda pair: pair[0])
+        ranks = {row[0]: rank for rank, row in ranked[offset:offset + limit]}
+
+        # Lignes de la page relues par clé primaire, avec la forme du queryset (values(), select_related)
+        fetched = {}
+        if ranks:
+            for row in self.without_match(newest).filter(pk__in=ranks).annotate(rank_pk=F('pk')):
+                if isinstance(row, dict):
+                    pk = row.pop('rank_pk')
+                    if 'search_rank' in row:
+                        row['search_rank'] = ranks[pk]
+                else:
+                    pk = row.rank_pk
+                    del row.rank_pk
+                    row.search_rank = ranks[pk]
+                fetched[pk] = row
+        rows = [fetched[pk] for pk in ranks if pk in fetched]
+
+        if more and len(rows) < limit:
+            start = max(offset - window, 0)
+            rows += list(newest.filter(search_match__pk__lt=candidates[-1][1])[start:start + limit - len(rows)])
+        return rows, None if more else len(candidates)
+
+
+class PostgresFullTextBackend(SearchBackend):
+    """
+    Index GIN sur l'expression ``tsvector`` (configuration ``simple`` : pas
+    de racinisation, les chaînes sont dans toutes les langues). La requête
+    reprend l'expression exacte de l'index pour pouvoir l'utiliser.
+
+    Les index trigrammes portent sur ``UPPER(colonne::text)``, l'expression
+    que Django génère pour ``icontains`` : la recherche par mots y ajoute les
+    sous-chaînes, et les filtres ``key``, ``source_text`` et ``context`` de
+    l'API en profitent aussi. Sans droit de créer l'extension ``pg_trgm``,
+    ces index sont simplement omis.
+    """
+    vendor = 'postgresql'
+
+    TRIGRAM_COLUMNS = ('key', 'source_text', 'context')
+
+    @property
+    def index(self):
+        return f'{self.table}_search_idx'
+
+    def trigram_index(self, column):
+        return f'{self.table}_{column}_trgm_idx'
+
+    def vector(self, prefix=''):
+        # Les séparateurs des clés (module.section_key) deviennent des espaces
+        return (
+            f"setweight(to_tsvector('simple', translate({prefix}key, '._-/:', '     ')), 'A') || "
+            f"setweight(to_tsvector('simple', coalesce({prefix}source_text, '')), 'B') || "
+            f"setweight(to_tsvector('simple', coalesce({prefix}context, '')), 'C')"
+        )
+
+    def install(self, cursor):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.index} ON {self.table} USING gin (({self.vector()}))")
+        try:
+            with transaction.atomic(using=cursor.db.alias):
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                for column in self.TRIGRAM_COLUMNS:
+                    cursor.execute(
+                        f"CREATE INDEX IF NOT EXISTS {self.trigram_index(column)} ON {self.table} "
+                        f"USING gin ((UPPER({column}::text)) gin_trgm_ops)"
+                    )
+        except DatabaseError as e:
+            logger.warning(f"Index trigrammes non installés, sous-chaînes sans index: {e}")
+
+    def uninstall(self, cursor):
+        for column in self.TRIGRAM_COLUMNS:
+            cursor.execute(f"DROP INDEX IF EXISTS {self.trigram_index(column)}")
+        cursor.execute(f"DROP INDEX IF EXISTS {self.index}")
+
+    def is_installed(self, cursor):
+        cursor.execute("SELECT COUNT(*) FROM pg_indexes WHERE indexname = %s", [self.index])
+        return cursor.fetchone()[0] == 1
+
+    def search(self, queryset, terms, query):
+        tsquery = ' & '.join(f"'{term}':*" for term in terms)
+        vector = f'({self.vector(prefix=self.table + ".")})'
+        matches = RawSQL(f"{vector} @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField())
+        return queryset.filter(Q(matches) | icontains_filter(query)).annotate(
+            # ts_rank croît avec la pertinence : négatif pour un tri croissant.
+            # Les sous-chaînes trouvées par les seuls trigrammes ont un rang nul.
+            search_rank=RawSQL(
+                f"-ts_rank({vector}, to_tsquery('simple', %s))", [tsquery], output_field=FloatField()
+            )
+        )
+
+
+BACKENDS = {backend.vendor: backend for backend in (SQLiteFTS5Backend, PostgresFullTextBackend)}
+
+# Index installé par base (alias), vérifié une fois par processus
+_available = {}
+
+
+def _backend_for(connection):
+    from .models import TranslationString
+
+    backend = BACKENDS.get(connection.vendor)
+    return backend(TranslationString._meta.db_table) if backend else None
+
+
+def get_backend(using='default'):
+    """Index de recherche de la base ``using``, ou None (recherche sans index)"""
+    if getattr(settings, 'FILES_SEARCH_BACKEND', 'auto') == 'none':
+        return None
+    if using not in _available:
+        connection = connections[using]
+        backend = _backend_for(connection)
+        if backend is not None:
+            with connection.cursor() as cursor:
+                if not backend.is_installed(cursor):
+                    backend = None
+        _available[using] = backend
+    return _available[using]
+
+
+def search_strings(queryset, query):
+    """
+    Filtre ``queryset`` sur ``query`` et annote ``search_rank`` (plus petit =
+    plus pertinent) quand l'index est disponible.
+    """
+    terms = search_terms(query)
+    backend = get_backend(queryset.db)
+    if backend is None or not terms or not is_word_query(query):
+        return icontains_search(queryset, query)
+    return backend.search(queryset, terms, query)
+
+
+def is_ranked(queryset):
+    """Le queryset vient-il d'une recherche indexée ?"""
+    return 'search_rank' in queryset.query.annotations
+
+
+def is_ordered_by_rank(queryset):
+    """Recherche indexée triée d'abord par pertinence (``RankedOrderingFilter``)"""
+    return is_ranked(queryset) and queryset.query.order_by[:1] == ('search_rank',)
+
+
+def search_page(queryset, offset, limit):
+    """
+    Lignes ``[offset, offset + limit)`` d'une recherche triée par pertinence
+    et leur total, None s'il dépasse ``FILES_SEARCH_RANK_WINDOW`` ; la page
+    est lue par l'index de la base (voir ``SQLiteFTS5Backend.page``).
+    """
+    backend = get_backend(queryset.db) if is_ordered_by_rank(queryset) else None
+    if backend is None:
+        return list(queryset[offset:offset + limit]), count_matches(queryset, rank_window())
+    return backend.page(queryset, offset, limit)
+
+
+def count_matches(queryset, limit):
+    """Nombre de lignes de ``queryset``, ou None s'il dépasse ``limit``"""
+    # Sans tri ni annotation : l'index énumère ses correspondances sans calculer de rang
+    count = queryset.order_by().values('pk')[:limit + 1].count()
+    return count if count <= limit else None
+
+
+def install_index(connection, rebuild=True):
+    """Crée l'index de la base ``connection`` s'il manque ; retourne True s'il a été créé"""
+    backend = _backend_for(connection)
+    if backend is None:
+        return False
+    _available.pop(connection.alias, None)
+    with connection.cursor() as cursor:
+        if backend.is_installed(cursor):
+            return False
+        try:
+            # Restes d'une installation incomplète ou d'une version précédente
+            backend.uninstall(cursor)
+            backend.install(cursor)
+        except Exception as e:
+            # SQLite compilé sans FTS5 : la recherche reste en icontains
+            logger.warning(f"Index de recherche non installé ({connection.vendor}): {e}")
+            return False
+        if rebuild:
+            backend.rebuild(cursor)
+    return True
+
+
+def uninstall_index(connection):
+    backend = _backend_for(connection)
+    if backend is None:
+        return
+    _available.pop(connection.alias, None)
+    with connection.cursor() as cursor:
+        backend.uninstall(cursor)
+
+
+def rebuild_index(connection):
+    """Réindexe toutes les chaînes (restauration partielle de la base, index endommagé)"""
+    backend = _backend_for(connection)
+    if backend is None:
+        return False
+    with connection.cursor() as cursor:
+        if not backend.is_installed(cursor):
+            return install_index(connection)
+        backend.rebuild(cursor)
+    return True
@@ -3,13 +3,111 @@
 # =============================================================================
 
 
-from rest_framework import serializers
+from rest_framework import permissions, serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+import uuid
 from .models import TranslationFile, TranslationString
+from .progress import fetch_task_meta
+from .storage import content_hash, store_content
 from translations.serializers import TranslationSerializer
 User = get_user_model()
 
 
+def requested_fields(request, available):
+    """
+    Champs retenus par ``?fields=a,b`` et ``?exclude=c`` sur une lecture,
+    dans l'ordre de ``available`` ; None sans sélection. Les noms inconnus
+    sont ignorés.
+    """
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    only, exclude = params.get('fields'), params.get('exclude')
+    if not only and not exclude:
+        return None
+    names = list(available)
+    if only:
+        wanted = {name.strip() for name in only.split(',')}
+        names = [name for name in names if name in wanted]
+    if exclude:
+        unwanted = {name.strip() for name in exclude.split(',')}
+        names = [name for name in names if name not in unwanted]
+    return tuple(names)
+
+
+class SparseFieldsetMixin:
+    """
+    ``?fields=`` / ``?exclude=`` pour un ``ModelSerializer`` : les champs
+    non demandés sont retirés (leurs méthodes ne s'exécutent pas) et
+    ``restrict_queryset`` ne lit que les colonnes et les jointures utiles.
+    """
+
+    # Colonnes lues par les champs calculés (méthodes, propriétés du modèle)
+    field_columns = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = requested_fields(self.context.get('request'), self.fields)
+        if selected is not None:
+            for name in [name for name in self.fields if name not in selected]:
+                self.fields.pop(name)
+
+    @classmethod
+    def restrict_queryset(cls, queryset, request):
+        """``queryset`` limité par ``.only()`` aux colonnes des champs demandés"""
+        if requested_fields(request, ()) is None:
+            return queryset
+        model = queryset.model
+        columns = {model._meta.pk.name}
+        # Jointures traversées par un chemin (file.original_filename) et
+        # relations rendues en entier par un serializer imbriqué (avec leurs propres jointures)
+        traversed, nested = set(), set()
+        for name, field in cls(context={'request': request}).fields.items():
+            if name in cls.field_columns:
+                columns.update(cls.field_columns[name])
+                continue
+            if field.source == '*' or isinstance(field, serializers.SerializerMethodField):
+                # Besoins inconnus : toutes les colonnes
+                return queryset
+            path = field.source.replace('.', '__')
+            parts = path.split('__')
+            try:
+                model_field = model._meta.get_field(parts[0])
+            except FieldDoesNotExist:
+                return queryset
+            if not model_field.concrete:
+                continue
+            columns.add(path)
+            traversed.update('__'.join(parts[:depth]) for depth in range(1, len(parts)))
+            if isinstance(field, serializers.BaseSerializer) and model_field.is_relation:
+                nested.add(path)
+
+        related = [
+            relation for relation in _select_related_paths(queryset.query.select_related)
+            if relation in traversed or any(
+                relation == path or relation.startswith(path + '__') for path in nested
+            )
+        ]
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+
+def _select_related_paths(select_related, prefix=''):
+    if not isinstance(select_related, dict):
+        return []
+    paths = []
+    for name, nested in select_related.items():
+        paths.append(prefix + name)
+        paths.extend(_select_related_paths(nested, prefix + name + '__'))
+    return paths
+
+
 class UserMinimalSerializer(serializers.ModelSerializer):
     """Serializer minimal pour l'utilisateur"""
     class Meta:
@@ -17,13 +115,34 @@ class UserMinimalSerializer(serializers.ModelSerializer):
         fields = ('id', 'email', 'first_name', 'last_name')
 
 
-class TranslationFileListSerializer(serializers.ModelSerializer):
+class TranslationFileBatchListSerializer(serializers.ListSerializer):
+    """
+    Liste de fichiers : l'état Celery de toutes les lignes en cours de
+    traitement est lu en une seule requête au backend de résultats.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        items = list(iterable)
+        if 'processing_progress' in self.child.fields:
+            task_ids = [obj.task_id for obj in items if obj.status == 'processing' and obj.task_id]
+            self.child.context['task_meta'] = fetch_task_meta(task_ids) if task_ids else {}
+        return [self.child.to_representation(item) for item in items]
+
+
+class TranslationFileListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer pour la liste des fichiers de traduction"""
     uploaded_by = UserMinimalSerializer(read_only=True)
     file_extension = serializers.SerializerMethodField()
     strings_count = serializers.SerializerMethodField()
     processing_progress = serializers.SerializerMethodField()
     
+    field_columns = {
+        'file_extension': ('original_filename',),
+        'strings_count': ('total_strings',),
+        'processing_progress': ('status', 'task_id'),
+    }
+    
     class Meta:
         model = TranslationFile
         fields = (
@@ -31,6 +150,7 @@ class TranslationFileListSerializer(serializers.ModelSerializer):
             'uploaded_by', 'uploaded_at', 'status', 'total_strings',
             'file_extension', 'strings_count', 'processing_progress'
         )
+        list_serializer_class = TranslationFileBatchListSerializer
 
     def get_file_extension(self, obj):
         """Retourne l'extension du fichier"""
@@ -38,10 +158,16 @@ class TranslationFileListSerializer(serializers.ModelSerializer):
 
     def get_strings_count(self, obj):
         """Retourne le nombre de chaînes traduites"""
-        return obj.strings.count()
+        return obj.total_strings
 
     def get_processing_progress(self, obj):
         """Retourne le progrès de traitement si en cours"""
+        task_meta = self.context.get('task_meta')
+        if task_meta is not None:
+            meta = task_meta.get(obj.task_id) if obj.status == 'processing' else None
+            if meta and meta.get('status') == 'PROGRESS' and isinstance(meta.get('result'), dict):
+                return meta['result'].get('current', 0)
+            return None
         if obj.status == 'processing' and hasattr(obj, 'task_id'):
             from celery.result import AsyncResult
             result = AsyncResult(obj.task_id)
@@ -51,42 +177,39 @@ class TranslationFileListSerializer(serializers.ModelSerializer):
     
 
 
-class TranslationFileDetailSerializer(serializers.ModelSerializer):
+class TranslationFileDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer détaillé pour un fichier de traduction"""
     uploaded_by = UserMinimalSerializer(read_only=True)
     file_extension = serializers.SerializerMethodField()
-    strings_count = serializers.SerializerMethodField()
-    translated_count = serializers.SerializerMethodField()
-    translation_progress = serializers.SerializerMethodField()
+    strings_count = serializers.IntegerField(source='total_strings', read_only=True)
+    translation_progress = serializers.FloatField(read_only=True)
     file_metadata = serializers.SerializerMethodField()
     
+    field_columns = {
+        'file_extension': ('original_filename',),
+        'translation_progress': ('total_strings', 'translated_count'),
+        'file_metadata': ('total_strings', 'encoding', 'detected_framework', 'file_size'),
+    }
+    
     class Meta:
         model = TranslationFile
         fields = (
             'id', 'original_filename', 'file_path', 'file_type', 'file_size',
             'uploaded_by', 'uploaded_at', 'status', 'error_message','task_id',
-            'detected_framework', 'encoding', 'total_strings',
-            'file_extension', 'strings_count', 'translated_count',
-            'translation_progress', 'file_metadata'
+            'detected_framework', 'encoding', 'total_strings', 'last_diff',
+            'content_hash', 'deduplicated_from', 'file_extension', 'strings_count', 'translated_count',
+            'fuzzy_count', 'plural_count', 'translation_progress', 'file_metadata'
+        )
+        # Le fichier stocké n'est écrit que par store_content, avec son
+        # empreinte : un chemin modifié ici contournerait la déduplication
+        read_only_fields = (
+            'file_path', 'content_hash', 'deduplicated_from',
+            'total_strings', 'translated_count', 'fuzzy_count', 'plural_count'
         )
 
     def get_file_extension(self, obj):
         return obj.original_filename.split('.')[-1].lower() if '.' in obj.original_filename else ''
 
-    def get_strings_count(self, obj):
-        return obj.strings.count()
-
-    def get_translated_count(self, obj):
-        return obj.strings.filter(is_translated=True).count()
-
-
-    def get_translation_progress(self, obj):
-        total = self.get_strings_count(obj)
-        if total == 0:
-            return 0
-        translated = self.get_translated_count(obj)
-        return round((translated / total) * 100, 2)
-
     def get_file_metadata(self, obj):
         """Retourne les métadonnées du fichier"""
         return {
@@ -131,30 +254,54 @@ class TranslationFileCreateSerializer(serializers.ModelSerializer):
         # Vérifier que le fichier n'est pas vide
         if value.size == 0:
             raise serializers.ValidationError("Le fichier ne peut pas être vide")
-        # Vérifier la taille (max 10MB)
-        if value.size > 10 * 1024 * 1024:
-            raise serializers.ValidationError("Le fichier ne peut pas dépasser 10MB")
+        # Vérifier la taille (10MB par défaut)
+        max_size = getattr(settings, 'FILES_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+        if value.size > max_size:
+            raise serializers.ValidationError(
+                f"Le fichier ne peut pas dépasser {max_size // (1024 * 1024)}MB"
+            )
         
         return value
 
     def create(self, validated_data):
         file_obj = validated_data.pop('file')
+        user = self.context['request'].user
+        file_type = file_obj.name.split('.')[-1].lower()
     
         try:
+            # Empreinte calculée pendant la réception (HashingUploadHandler),
+            # sinon en relisant le fichier
+            digest = self.context.get('content_hashes', {}).get('file') or content_hash(file_obj)
+            storage = TranslationFile._meta.get_field('file_path').storage
+            
             translation_file = TranslationFile.objects.create(
                 original_filename=file_obj.name,
-                file_path=file_obj,
-                file_type=file_obj.name.split('.')[-1].lower(),
+                file_path=store_content(storage, file_obj, digest, file_type),
+                file_type=file_type,
                 file_size=file_obj.size,
-                uploaded_by=self.context['request'].user,
-                status='uploaded'
+                uploaded_by=user,
+                status='uploaded',
+                content_hash=digest
             )
 
-            from .tasks import process_translation_file
-            task = process_translation_file.delay(translation_file.id)
-            translation_file.task_id = task.id
+            # Contenu identique déjà analysé pour cet utilisateur : copie des chaînes
+            source = TranslationFile.objects.filter(
+                uploaded_by=user, content_hash=digest, file_type=file_type, status='completed'
+            ).exclude(pk=translation_file.pk).order_by('-uploaded_at').first()
+
+            from .tasks import process_translation_file, clone_translation_file
+            if source is not None:
+                translation_file.deduplicated_from = source
+                task, args = clone_translation_file, [translation_file.id, source.id]
+            else:
+                task, args = process_translation_file, [translation_file.id]
+            
+            # Statut et task_id enregistrés avant l'envoi : un petit fichier
+            # peut être traité avant le retour de delay()
+            translation_file.task_id = str(uuid.uuid4())
             translation_file.status = 'processing'
             translation_file.save()
+            transaction.on_commit(lambda: task.apply_async(args=args, task_id=translation_file.task_id))
         
             return translation_file
         except Exception as e:
@@ -163,11 +310,14 @@ class TranslationFileCreateSerializer(serializers.ModelSerializer):
                 translation_file.delete()
             raise serializers.ValidationError(f"Erreur lors de la création du fichier: {str(e)}")
 
-class TranslationStringListSerializer(serializers.ModelSerializer):
+class TranslationStringListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer pour la liste des chaînes de traduction"""
     file_name = serializers.CharField(source='file.original_filename', read_only=True)
     translations_count = serializers.SerializerMethodField()
     
+    # Comptage par la relation inverse : aucune colonne de la chaîne
+    field_columns = {'translations_count': ()}
+    
     class Meta:
         model = TranslationString
         fields = (
@@ -180,6 +330,60 @@ class TranslationStringListSerializer(serializers.ModelSerializer):
         return obj.translations.count() if hasattr(obj, 'translations') else 0
 
 
+def translations_count_subquery():
+    """Nombre de traductions d'une chaîne, en sous-requête corrélée (0 si aucune)"""
+    translations = TranslationString._meta.get_field('translations').related_model
+    counts = translations.objects.filter(string=models.OuterRef('pk')).order_by().values('string').annotate(
+        count=models.Count('pk')
+    ).values('count')
+    return Coalesce(models.Subquery(counts, output_field=models.IntegerField()), 0)
+
+
+class TranslationStringListValuesSerializer:
+    """
+    Rendu rapide des listes de chaînes, même JSON que
+    ``TranslationStringListSerializer`` : les lignes sont lues par
+    ``.values()`` (ni instances de modèle ni champs DRF par ligne) et le
+    nombre de traductions est annoté en SQL au lieu d'un ``COUNT`` par ligne.
+    Avec ``fields``, seules ces colonnes sont lues et rendues.
+    """
+    fields = TranslationStringListSerializer.Meta.fields
+
+    # Colonnes .values() des champs qui ne sont pas des colonnes de la chaîne
+    sources = {'file': 'file_id', 'file_name': 'file__original_filename'}
+
+    # Position de la pagination par curseur, toujours lue
+    cursor_columns = ('id', 'line_number', 'key')
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        if fields is not None:
+            self.fields = fields
+
+    @classmethod
+    def prepare(cls, queryset, fields=None):
+        """``queryset`` réduit aux colonnes de la liste, à paginer puis rendre"""
+        fields = cls.fields if fields is None else fields
+        if 'translations_count' in fields and 'translations_count' not in queryset.query.annotations:
+            queryset = queryset.annotate(translations_count=translations_count_subquery())
+        columns = [cls.sources.get(field, field) for field in fields]
+        columns += [column for column in cls.cursor_columns if column not in columns]
+        return queryset.values(*columns)
+
+    @property
+    def data(self):
+        # Mêmes conversions que les champs du ModelSerializer (UUID, date en fuseau courant)
+        converters = {'id': str, 'created_at': serializers.DateTimeField().to_representation}
+        columns = [(field, self.sources.get(field, field), converters.get(field)) for field in self.fields]
+        return [
+            {
+                field: convert(row[column]) if convert and row[column] is not None else row[column]
+                for field, column, convert in columns
+            }
+            for row in self.rows
+        ]
+
+
 class TranslationStringDetailSerializer(TranslationStringListSerializer):
     """Serializer détaillé pour une chaîne avec ses traductions"""
     translations = TranslationSerializer(many=True, read_only=True)
@@ -190,3 +394,21 @@ class TranslationStringDetailSerializer(TranslationStringListSerializer):
             'translations', 'file_details'
         )
 
+
+
+class TranslationStringBulkUpdateItemSerializer(serializers.Serializer):
+    """Une modification de ``POST /strings/bulk_update/``"""
+    id = serializers.UUIDField()
+    translated_text = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False)
+    is_translated = serializers.BooleanField(required=False)
+    is_fuzzy = serializers.BooleanField(required=False)
+
+    # Champs modifiables, dans l'ordre du bulk_update
+    EDITABLE_FIELDS = ('translated_text', 'is_translated', 'is_fuzzy')
+
+    def validate(self, attrs):
+        if not any(field in attrs for field in self.EDITABLE_FIELDS):
+            raise serializers.ValidationError(
+                f"Au moins un champ à modifier : {', '.join(self.EDITABLE_FIELDS)}"
+            )
+        return attrs
@@ -0,0 +1,186 @@
+# =============================================================================
+# files/stats.py
+# =============================================================================
+
+"""
+Statistiques des actions ``statistics`` des fichiers et des chaînes.
+
+Chaque action est calculée par une seule requête d'agrégats conditionnels
+sur la table des fichiers : les statistiques des chaînes se lisent dans les
+compteurs dénormalisés (``files/counters.py``), sans parcourir la table des
+chaînes.
+
+Le résultat est mis en cache par périmètre (l'utilisateur, ou ``all`` pour
+le staff qui voit tout). Les clés portent un numéro de version par
+périmètre, incrémenté à chaque écriture qui change les chiffres
+(``invalidate_statistics``) : le propriétaire et le staff relisent des
+valeurs fraîches au prochain appel, les autres utilisateurs gardent leur
+cache.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+logger = logging.getLogger(__name__)
+
+STATS_KINDS = ('files', 'strings')
+
+# Périmètre du staff : toutes les données
+ALL_SCOPE = 'all'
+
+
+def stats_timeout():
+    return getattr(settings, 'FILES_STATS_CACHE_TIMEOUT', 60 * 5)
+
+
+def _version_key(scope):
+    return f'files:stats:version:{scope}'
+
+
+def stats_scope(user):
+    """Périmètre de cache des statistiques visibles par ``user``"""
+    return ALL_SCOPE if user.is_staff else str(user.pk)
+
+
+def file_statistics(queryset):
+    """Statistiques des fichiers de ``queryset`` en une requête"""
+    from .models import TranslationFile
+
+    aggregates = {
+        'total_files': Count('id'),
+        'total_size': Sum('file_size'),
+        'total_strings': Sum('total_strings'),
+        'hits': Count('id', filter=Q(deduplicated_from__isnull=False)),
+        'stored_blobs': Count('file_path', distinct=True),
+    }
+    for value, _label in TranslationFile.STATUS_CHOICES:
+        aggregates[f'status_{value}'] = Count('id', filter=Q(status=value))
+    for value, _label in TranslationFile.FILE_TYPES:
+        aggregates[f'type_{value}'] = Count('id', filter=Q(file_type=value))
+
+    row = queryset.order_by().aggregate(**aggregates)
+    total_files = row['total_files']
+    hits = row['hits']
+    return {
+        'total_files': total_files,
+        'by_status': {
+            value: row[f'status_{value}']
+            for value, _label in TranslationFile.STATUS_CHOICES if row[f'status_{value}']
+        },
+        'by_type': {
+            value: row[f'type_{value}']
+            for value, _label in TranslationFile.FILE_TYPES if row[f'type_{value}']
+        },
+        'total_size': row['total_size'] or 0,
+        'total_strings': row['total_strings'] or 0,
+        'deduplication': {
+            'uploads': total_files,
+            'hits': hits,
+            'hit_rate': round(hits / total_files * 100, 2) if total_files else 0,
+            'stored_blobs': row['stored_blobs'],
+        },
+    }
+
+
+def string_statistics(files):
+    """
+    Statistiques des chaînes des fichiers de ``files``, en une requête
+    groupée par nom de fichier sur les compteurs dénormalisés.
+    """
+    rows = files.order_by().values('original_filename').annotate(
+        total=Sum('total_strings'),
+        translated=Sum('translated_count'),
+        fuzzy=Sum('fuzzy_count'),
+        plural=Sum('plural_count'),
+    )
+
+    total_strings = translated = fuzzy = plural = 0
+    by_file = {}
+    for row in rows:
+        total_strings += row['total'] or 0
+        translated += row['translated'] or 0
+        fuzzy += row['fuzzy'] or 0
+        plural += row['plural'] or 0
+        if row['original_filename'] and row['total']:
+            by_file[row['original_filename']] = row['total']
+
+    return {
+        'total_strings': total_strings,
+        'translated': translated,
+        'untranslated': total_strings - translated,
+        'fuzzy': fuzzy,
+        'plural': plural,
+        'by_file': by_file,
+        'progress_percentage': round(translated / total_strings * 100, 2) if total_strings else 0,
+    }
+
+
+def statistics_version(user):
+    """``(périmètre, version)`` des statistiques de ``user`` (lève si le cache est indisponible)"""
+    scope = stats_scope(user)
+    return scope, cache.get_or_set(_version_key(scope), 1, timeout=None)
+
+
+def cached_statistics(kind, user, compute):
+    """
+    Statistiques ``kind`` de ``user`` depuis le cache, calculées par
+    ``compute()`` si la version courante du périmètre n'y est pas encore.
+    """
+    try:
+        scope, version = statistics_version(user)
+        key = f'files:stats:{kind}:{scope}:{version}'
+        stats = cache.get(key)
+        if stats is not None:
+            return stats
+    except Exception as e:
+        logger.warning(f"Cache des statistiques indisponible: {e}")
+        return compute()
+
+    stats = compute()
+    try:
+        cache.set(key, stats, timeout=stats_timeout())
+    except Exception as e:
+        logger.warning(f"Impossible de mettre en cache les statistiques: {e}")
+    return stats
+
+
+def _bump(scopes):
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            if not cache.add(key, 2, timeout=None):
+                cache.incr(key)
+        except ValueError:
+            # Clé expirée entre add() et incr()
+            cache.add(key, 2, timeout=None)
+        except Exception as e:
+            logger.warning(f"Invalidation des statistiques impossible ({scope}): {e}")
+
+
+def invalidate_statistics(user_ids, using=None):
+    """
+    Périme les statistiques des propriétaires ``user_ids`` et du staff, après
+    le commit de la transaction en cours (un lecteur ne remet pas en cache
+    l'état d'avant l'écriture).
+    """
+    scopes = {str(user_id) for user_id in user_ids if user_id is not None}
+    if not scopes:
+        return
+    scopes.add(ALL_SCOPE)
+    transaction.on_commit(lambda: _bump(scopes), using=using)
+
+
+def invalidate_file_statistics(file_ids, using=None):
+    """``invalidate_statistics`` pour les propriétaires des fichiers ``file_ids``"""
+    from .models import TranslationFile
+
+    if not file_ids:
+        return
+    owners = TranslationFile.objects.using(using).filter(pk__in=list(file_ids)).values_list(
+        'uploaded_by_id', flat=True
+    ).distinct()
+    invalidate_statistics(set(owners), using=using)
@@ -0,0 +1,92 @@
+# =============================================================================
+# files/storage.py
+# =============================================================================
+
+"""
+Stockage adressé par contenu des fichiers uploadés.
+
+L'empreinte SHA-256 est calculée pendant la réception de la requête par
+``HashingUploadHandler``, sans relire le fichier. Le fichier est rangé sous
+son empreinte : deux uploads identiques partagent un seul fichier physique,
+qui n'est supprimé qu'avec sa dernière référence.
+"""
+
+import hashlib
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+# Répertoire des fichiers, celui du ``upload_to`` de ``TranslationFile.file_path``
+UPLOAD_DIR = 'translation_files'
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Calcule l'empreinte de chaque fichier au fil des morceaux reçus puis les
+    transmet tels quels aux gestionnaires suivants, qui les stockent.
+
+    Les empreintes sont disponibles par nom de champ dans ``digests``.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.digests = {}
+        self._hash = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._hash.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        self.digests[self.field_name] = self._hash.hexdigest()
+        return None
+
+
+def attach_hashing_handler(request):
+    """
+    Place un ``HashingUploadHandler`` en tête des gestionnaires d'upload.
+
+    Retourne None si le corps de la requête a déjà été lu : l'empreinte sera
+    alors calculée par ``content_hash``.
+    """
+    handler = HashingUploadHandler(request)
+    try:
+        request.upload_handlers.insert(0, handler)
+    except AttributeError:
+        # Django fige la liste (tuple) une fois le corps analysé
+        return None
+    return handler
+
+
+def content_hash(uploaded_file, chunk_size=1024 * 1024):
+    """Empreinte SHA-256 d'un fichier, en le relisant par morceaux"""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks(chunk_size):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def content_address(digest, extension):
+    """Chemin de stockage d'un contenu : ``translation_files/ab/<sha256>.<ext>``"""
+    return f'{UPLOAD_DIR}/{digest[:2]}/{digest}.{extension}'
+
+
+def store_content(storage, uploaded_file, digest, extension):
+    """
+    Enregistre ``uploaded_file`` sous son adresse de contenu, sauf si un
+    fichier identique y est déjà. Retourne le nom stocké.
+    """
+    name = content_address(digest, extension)
+    if storage.exists(name):
+        return name
+    stored = storage.save(name, uploaded_file)
+    if stored != name and storage.exists(name):
+        # Même contenu enregistré en parallèle : garder un seul exemplaire
+        storage.delete(stored)
+        return name
+    return stored
@@ -11,14 +11,21 @@ from celery import shared_task
 from celery.utils.log import get_task_logger
 from celery.exceptions import Retry, WorkerLostError
 from django.core.files.storage import default_storage
-from django.db import transaction, IntegrityError
+from django.db import transaction, IntegrityError, DatabaseError
 from django.core.exceptions import ObjectDoesNotExist
 import os
 import chardet
 import time
 import json
 import re
+from contextlib import nullcontext
 from .models import TranslationFile
+from .ingestion import IngestionSource, FRAMEWORK_SAMPLE_SIZE
+from .frameworks import registry as framework_registry
+from .progress import ProgressReporter
+from .writers import TranslationStringWriter, TranslationStringDiffWriter
+from .chunking import ChunkProgressReporter, should_chunk, split_ranges
+from .checkpoints import IngestionCheckpoint
 from django.db import transaction
 from django.utils import timezone
 
@@ -32,7 +39,18 @@ def detect_framework_from_content(file_path, file_type, encoding='utf-8'):
     try:
         with open(file_path, 'r', encoding=encoding) as f:
             content = f.read(5000)  # Lire les premiers 5KB pour l'analyse
+        return detect_framework_from_sample(content, file_type)
             
+    except Exception as e:
+        logger.warning(f"Erreur lors de la détection de framework: {e}")
+        return 'unknown'
+
+
+def detect_framework_from_sample(content, file_type):
+    """
+    Détecte le framework à partir d'un échantillon déjà décodé du fichier
+    """
+    try:
         if file_type == 'po':
             return detect_framework_from_po(content)
         elif file_type == 'json':
@@ -48,271 +66,35 @@ def detect_framework_from_content(file_path, file_type, encoding='utf-8'):
 def detect_framework_from_po(content):
     """
     Détecte le framework basé sur le contenu d'un fichier PO
+    (signatures du registre ``files.frameworks``, un seul parcours)
     """
-    # Patterns pour détecter différents frameworks
-    patterns = {
-        'django': [
-            r'#: .*\.py',
-            r'msgid "django"',
-            r'msgstr "Django"',
-            r'#: .*django.*',
-            r'Project-Id-Version: Django',
-            r'#: .*admin\.py',
-            r'#: .*models\.py',
-            r'#: .*views\.py',
-            r'#: .*forms\.py',
-            r'#: .*urls\.py',
-            r'#: .*settings\.py',
-            r'#: .*templates/',
-            r'#: .*static/',
-            r'msgid "Welcome to Django"',
-            r'msgid "User"',
-            r'msgid "Home"',
-            r'msgid "Submit"',
-            r'msgid "Logout"',
-            r'msgid "Login"',
-            r'msgid "Register"',
-            r'msgid "Password"',
-            r'msgid "Email"',
-            r'msgid "Username"',
-        ],
-        'flask': [
-            r'#: .*\.py',
-            r'msgid "flask"',
-            r'msgstr "Flask"',
-            r'from flask_babel',
-            r'Project-Id-Version: Flask',
-            r'#: .*app\.py',
-            r'#: .*routes\.py',
-            r'#: .*__init__\.py',
-        ],
-        'vue': [
-            r'msgid "vue"',
-            r'msgstr "Vue"',
-            r'#: .*\.vue',
-            r'#: .*vue.*',
-            r'Project-Id-Version: Vue',
-            r'#: .*components/',
-            r'#: .*pages/',
-            r'#: .*store/',
-        ],
-        'react': [
-            r'msgid "react"',
-            r'msgstr "React"',
-            r'#: .*\.jsx',
-            r'#: .*\.tsx',
-            r'#: .*react.*',
-            r'Project-Id-Version: React',
-            r'#: .*components/',
-            r'#: .*pages/',
-            r'#: .*src/',
-        ],
-        'angular': [
-            r'msgid "angular"',
-            r'msgstr "Angular"',
-            r'#: .*\.ts',
-            r'#: .*angular.*',
-            r'Project-Id-Version: Angular',
-            r'#: .*components/',
-            r'#: .*services/',
-            r'#: .*modules/',
-        ],
-        'laravel': [
-            r'msgid "laravel"',
-            r'msgstr "Laravel"',
-            r'#: .*\.php',
-            r'#: .*laravel.*',
-            r'Project-Id-Version: Laravel',
-            r'#: .*resources/',
-            r'#: .*app/',
-            r'#: .*routes/',
-        ],
-        'symfony': [
-            r'msgid "symfony"',
-            r'msgstr "Symfony"',
-            r'#: .*symfony.*',
-            r'Project-Id-Version: Symfony',
-            r'#: .*src/',
-            r'#: .*templates/',
-            r'#: .*translations/',
-        ],
-        'wordpress': [
-            r'msgid "wordpress"',
-            r'msgstr "WordPress"',
-            r'#: .*wordpress.*',
-            r'#: .*wp-.*',
-            r'Project-Id-Version: WordPress',
-            r'#: .*wp-content/',
-            r'#: .*wp-includes/',
-            r'msgid "WordPress"',
-        ],
-        'joomla': [
-            r'msgid "joomla"',
-            r'msgstr "Joomla"',
-            r'#: .*joomla.*',
-            r'Project-Id-Version: Joomla',
-            r'#: .*components/',
-            r'#: .*modules/',
-            r'#: .*plugins/',
-        ],
-        'drupal': [
-            r'msgid "drupal"',
-            r'msgstr "Drupal"',
-            r'#: .*drupal.*',
-            r'Project-Id-Version: Drupal',
-            r'#: .*modules/',
-            r'#: .*themes/',
-            r'#: .*sites/',
-        ],
-    }
-    
-    # Compter les correspondances pour chaque framework
-    framework_scores = {}
-    
-    for framework, pattern_list in patterns.items():
-        score = 0
-        for pattern in pattern_list:
-            if re.search(pattern, content, re.IGNORECASE):
-                score += 1
-        if score > 0:
-            framework_scores[framework] = score
-    
-    # Debug: afficher les scores pour le diagnostic
+    framework, framework_scores = framework_registry.detect(content, 'po')
     if framework_scores:
-        print(f"DEBUG - Scores des frameworks: {framework_scores}")
-    
-    # Retourner le framework avec le score le plus élevé
-    if framework_scores:
-        detected_framework = max(framework_scores, key=framework_scores.get)
-        if framework_scores[detected_framework] >= 1:
-            return detected_framework
-    
-    # Si aucun pattern spécifique n'est trouvé, essayer de détecter par contexte
-    if re.search(r'#: .*\.py', content):
-        # Si on a des références Python, c'est probablement Django ou Flask
-        if re.search(r'Project-Id-Version: Django', content, re.IGNORECASE):
-            return 'django'
-        elif re.search(r'Project-Id-Version: Flask', content, re.IGNORECASE):
-            return 'flask'
-        else:
-            # Par défaut, si on a des .py, c'est probablement Django
-            return 'django'
-    elif re.search(r'#: .*\.php', content):
-        return 'php'
-    elif re.search(r'#: .*\.js', content):
-        return 'javascript'
-    elif re.search(r'#: .*\.vue', content):
-        return 'vue'
-    elif re.search(r'#: .*\.ts', content):
-        return 'typescript'
-    
-    return 'generic'
+        logger.debug(f"Scores des frameworks: {framework_scores}")
+    return framework or 'generic'
 
 
 def detect_framework_from_json(content):
     """
-    Détecte le framework basé sur le contenu d'un fichier JSON
+    Détecte le framework basé sur le contenu d'un fichier JSON.
+
+    L'échantillon brut est analysé directement, sans json.loads/json.dumps :
+    il est souvent tronqué et n'a pas besoin d'être un document valide.
     """
-    try:
-        # Essayer de parser le JSON
-        data = json.loads(content)
-        
-        # Patterns pour détecter différents frameworks
-        patterns = {
-            'react': [
-                r'react',
-                r'jsx',
-                r'tsx',
-                r'create-react-app',
-            ],
-            'vue': [
-                r'vue',
-                r'vue-i18n',
-                r'vuex',
-            ],
-            'angular': [
-                r'angular',
-                r'@angular',
-                r'ngx-translate',
-            ],
-            'flutter': [
-                r'flutter',
-                r'flutter_localizations',
-                r'@flutter',
-            ],
-            'react-native': [
-                r'react-native',
-                r'react_native',
-                r'@react-native',
-            ],
-            'nextjs': [
-                r'next',
-                r'nextjs',
-                r'@next',
-            ],
-            'nuxt': [
-                r'nuxt',
-                r'@nuxt',
-            ],
-            'svelte': [
-                r'svelte',
-                r'@svelte',
-            ],
-            'ember': [
-                r'ember',
-                r'@ember',
-            ],
-        }
-        
-        # Convertir le contenu en string pour la recherche
-        content_str = json.dumps(data, ensure_ascii=False)
-        
-        # Compter les correspondances pour chaque framework
-        framework_scores = {}
-        
-        for framework, pattern_list in patterns.items():
-            score = 0
-            for pattern in pattern_list:
-                if re.search(pattern, content_str, re.IGNORECASE):
-                    score += 1
-            if score > 0:
-                framework_scores[framework] = score
-        
-        # Retourner le framework avec le score le plus élevé
-        if framework_scores:
-            detected_framework = max(framework_scores, key=framework_scores.get)
-            if framework_scores[detected_framework] >= 1:
-                return detected_framework
-        
-        # Détection par structure de données
-        if isinstance(data, dict):
-            # Vérifier les clés communes
-            if 'locale' in data or 'language' in data:
-                return 'i18n'
-            elif 'messages' in data or 'translations' in data:
-                return 'translation'
-            elif 'app' in data or 'application' in data:
-                return 'application'
-        
-        return 'generic'
-        
-    except json.JSONDecodeError:
-        # Si ce n'est pas du JSON valide, essayer de détecter par contenu brut
-        if re.search(r'react', content, re.IGNORECASE):
-            return 'react'
-        elif re.search(r'vue', content, re.IGNORECASE):
-            return 'vue'
-        elif re.search(r'angular', content, re.IGNORECASE):
-            return 'angular'
-        elif re.search(r'flutter', content, re.IGNORECASE):
-            return 'flutter'
-        
-        return 'unknown'
+    framework, framework_scores = framework_registry.detect(content, 'json')
+    if framework_scores:
+        logger.debug(f"Scores des frameworks: {framework_scores}")
+    return framework or 'generic'
 
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_kwargs={'max_retries': 3, 'countdown': 60})
-def process_translation_file(self, file_id):
-    """Traite un fichier de traduction de manière asynchrone"""
+def process_translation_file(self, file_id, incremental=False):
+    """
+    Traite un fichier de traduction de manière asynchrone.
+    
+    ``incremental`` compare le fichier aux chaînes déjà en base et n'applique
+    que la différence (retraitement) au lieu d'une ingestion complète.
+    """
     
     translation_file = None
     
@@ -399,48 +181,57 @@ def process_translation_file(self, file_id):
             translation_file.save()
             return {'status': 'error', 'message': 'Erreur lors de la vérification du fichier'}
         
-        # Détection de l'encodage du fichier
-        try:
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(10000)  # Lire les premiers 10KB pour détecter l'encodage
-                encoding_result = chardet.detect(raw_data)
-                encoding = encoding_result.get('encoding', 'utf-8')
-                confidence = encoding_result.get('confidence', 0)
-                
-                # Si la confiance est trop faible, utiliser utf-8 par défaut
-                if confidence < 0.7:
-                    encoding = 'utf-8'
-                    logger.warning(f"Encodage détecté avec faible confiance, utilisation d'UTF-8 par défaut")
-                
-                logger.info(f"Encodage détecté: {encoding} (confiance: {confidence})")
-                
-        except Exception as e:
-            logger.warning(f"Erreur lors de la détection d'encodage, utilisation d'UTF-8: {e}")
-            encoding = 'utf-8'
-        
-        # Lecture et analyse du fichier selon son type
+        # Ouvrir le fichier une seule fois : encodage, framework et parsing
+        # partagent le même tampon projeté en mémoire
         try:
             file_type = translation_file.file_type.lower()
             
-            # Détection automatique du framework
-            detected_framework = detect_framework_from_content(file_path, file_type, encoding)
-            translation_file.detected_framework = detected_framework
-            translation_file.save()
-            
-            logger.info(f"Framework détecté: {detected_framework} pour le fichier {file_id}")
-            
-            if file_type == 'po':
-                result = process_po_file(translation_file, file_path, encoding, self)
-            elif file_type == 'json':
-                result = process_json_file(translation_file, file_path, encoding, self)
-            else:
-                logger.error(f"Type de fichier non supporté: {file_type}")
-                translation_file.status = 'error'
-                translation_file.error_message = f'Type de fichier non supporté: {file_type}. Seuls les formats .po et .json sont autorisés.'
+            with IngestionSource(file_path) as source:
+                # Détection de l'encodage (BOM / UTF-8 strict sans chardet)
+                try:
+                    encoding, confidence = source.detect_encoding()
+                    logger.info(f"Encodage détecté: {encoding} (confiance: {confidence})")
+                except Exception as e:
+                    logger.warning(f"Erreur lors de la détection d'encodage, utilisation d'UTF-8: {e}")
+                    encoding = 'utf-8'
+                
+                # Détection automatique du framework
+                detected_framework = detect_framework_from_sample(
+                    source.text_sample(FRAMEWORK_SAMPLE_SIZE, encoding), file_type
+                )
+                translation_file.detected_framework = detected_framework
+                translation_file.encoding = encoding
                 translation_file.save()
-                return {'status': 'error', 'message': f'Type de fichier non supporté: {file_type}. Seuls les formats .po et .json sont autorisés.'}
+                
+                logger.info(f"Framework détecté: {detected_framework} pour le fichier {file_id}")
+                
+                # Gros fichiers : plages parallèles, fusionnées par un chord.
+                # La différence incrémentale exige une vue du fichier entier.
+                if not incremental and should_chunk(source, file_type, encoding):
+                    ranges = split_ranges(source, file_type)
+                    if len(ranges) > 1:
+                        return dispatch_chunked_ingestion(translation_file, ranges)
+                    logger.info(f"Fichier {file_id} non découpable, traitement en une seule tâche")
+                
+                if file_type == 'po':
+                    result = process_po_file(translation_file, file_path, encoding, self, source=source,
+                                             incremental=incremental)
+                elif file_type == 'json':
+                    result = process_json_file(translation_file, file_path, encoding, self, source=source,
+                                               incremental=incremental)
+                else:
+                    logger.error(f"Type de fichier non supporté: {file_type}")
+                    translation_file.status = 'error'
+                    translation_file.error_message = f'Type de fichier non supporté: {file_type}. Seuls les formats .po et .json sont autorisés.'
+                    translation_file.save()
+                    return {'status': 'error', 'message': f'Type de fichier non supporté: {file_type}. Seuls les formats .po et .json sont autorisés.'}
             
             return result
+        
+        except DatabaseError:
+            # Erreur de base passagère : nouvelle tentative Celery, qui reprend
+            # au dernier point de reprise
+            raise
             
         except Exception as e:
             logger.error(f"Erreur lors du traitement du fichier {file_id}: {e}")
@@ -468,88 +259,74 @@ def process_translation_file(self, file_id):
         return {'status': 'error', 'message': f'Erreur critique après {self.max_retries + 1} tentatives'}
 
 
-def process_po_file(translation_file, file_path, encoding, task):
-    """Traite un fichier PO (gettext)"""
-    from .models import TranslationString
-    import polib
+def process_po_file(translation_file, file_path, encoding, task, source=None, incremental=False):
+    """
+    Traite un fichier PO (gettext) en flux, entrée par entrée.
     
+    ``source`` est l'``IngestionSource`` déjà ouverte par l'appelant ; à défaut
+    le fichier est ouvert ici. ``incremental`` : voir ``process_translation_file``.
+    """
     try:
-        # Charger le fichier PO
-        po = polib.pofile(file_path, encoding=encoding)
+        with _ingestion_source(file_path, source) as source:
+            # Estimer le nombre d'entrées pour la progression sans charger le catalogue
+            total_entries = source.count_po_entries()
+            
+            logger.info(f"Traitement d'environ {total_entries} entrées PO")
+            
+            # Point de reprise enregistré avec chaque lot validé
+            checkpoint = IngestionCheckpoint.for_file(translation_file, source.size, resume=not incremental)
+            checkpoint.start(task.request.id)
+            _resume_log(checkpoint, translation_file)
+            
+            # Insertion par lots, doublons écartés en mémoire
+            writer = _open_writer(translation_file, checkpoint, incremental)
+            progress = ProgressReporter(task, total=total_entries)
+            
+            with checkpoint.open_po(source, encoding) as po_lines:
+                entries_seen = ingest_po_entries(
+                    po_lines, translation_file, writer, progress,
+                    line_offset=checkpoint.line_offset, checkpoint=checkpoint
+                )
         
-        total_entries = len(po)
-        if total_entries == 0:
+        if entries_seen == 0:
             translation_file.status = 'error'
             translation_file.error_message = 'Fichier PO vide ou invalide'
             translation_file.save()
             return {'status': 'error', 'message': 'Fichier PO vide ou invalide'}
         
-        logger.info(f"Traitement de {total_entries} entrées PO")
-        created_strings = 0
+        # Créer les dernières chaînes restantes (et supprimer les disparues)
+        writer.finish()
+        created_strings = writer.created
         
-        # Traitement par lots pour optimiser les performances
-        batch_size = 100
-        strings_to_create = []
-        
-        for i, entry in enumerate(po):
-            try:
-                # Mise à jour du progrès
-                if i % 10 == 0:
-                    progress = int((i / total_entries) * 100)
-                    task.update_state(
-                        state='PROGRESS',
-                        meta={
-                            'current': i,
-                            'total': total_entries,
-                            'strings_created': created_strings,
-                            'progress': progress
-                        }
-                    )
-                
-                # Créer l'objet TranslationString avec les bons noms de champs
-                translation_string = TranslationString(
-                    file=translation_file,
-                    key=entry.msgid[:500] if entry.msgid else '',  # Limiter la taille
-                    source_text=entry.msgid,
-                    context=entry.msgstr or '',
-                    line_number=entry.linenum,
-                    is_translated=bool(entry.msgstr and not entry.fuzzy),
-                    is_fuzzy=entry.fuzzy,
-                    is_plural=bool(entry.msgid_plural),
-                    comment='\n'.join(entry.comment.split('\n')[:5]) if entry.comment else ''
-                )
-                
-                strings_to_create.append(translation_string)
-                
-                # Créer par lots
-                if len(strings_to_create) >= batch_size:
-                    created_count = bulk_create_strings(strings_to_create, translation_file)
-                    created_strings += created_count
-                    strings_to_create = []
-                
-            except Exception as e:
-                logger.warning(f"Erreur lors du traitement de l'entrée {i}: {e}")
-                continue
-        
-        # Créer les dernières chaînes restantes
-        if strings_to_create:
-            created_count = bulk_create_strings(strings_to_create, translation_file)
-            created_strings += created_count
+        # Toujours publier l'état final, même entre deux seuils
+        progress.update(entries_seen, total=entries_seen, strings_created=created_strings)
+        progress.flush()
         
         # Finaliser le traitement
         with transaction.atomic():
             translation_file.status = 'completed'
-            translation_file.total_strings = created_strings
             translation_file.error_message = ''
+            translation_file.last_diff = writer.summary if incremental else {}
             translation_file.save()
-        
-        logger.info(f"Traitement PO terminé: {created_strings} chaînes créées")
+            checkpoint.complete(entries_seen, writer)
+        
+        logger.info(
+            f"Traitement PO terminé: {created_strings} chaînes créées, "
+            f"{writer.duplicates} doublons ignorés en {writer.transactions} transaction(s)"
+        )
+        if incremental:
+            return _incremental_result(writer)
         return {
             'status': 'success',
             'message': f'{created_strings} chaînes de traduction créées',
-            'total_strings': created_strings
+            'total_strings': writer.total,
+            'duplicates': writer.duplicates
         }
         
+    except DatabaseError:
+        # Remontée à process_translation_file pour une nouvelle tentative
+        raise
+    
     except ImportError:
         error_msg = 'Bibliothèque polib non disponible'
         logger.error(error_msg)
@@ -567,97 +344,234 @@ def process_po_file(translation_file, file_path, encoding, task):
         return {'status': 'error', 'message': error_msg}
 
 
-def process_json_file(translation_file, file_path, encoding, task):
-    """Traite un fichier JSON de traduction"""
+def ingest_po_entries(lines, translation_file, writer, progress, line_offset=0, checkpoint=None):
+    """
+    Lit les entrées PO de ``lines`` et les confie au ``writer``.
+    
+    ``line_offset`` décale les numéros de ligne quand ``lines`` ne couvre
+    qu'une plage du fichier. Avec un ``checkpoint``, la lecture reprend
+    après les entrées déjà validées. Retourne le nombre d'entrées lues
+    depuis le début de la plage.
+    """
     from .models import TranslationString
-    import json
+    from .parsers import iter_po_entries
     
-    try:
-        # Charger le fichier JSON
-        with open(file_path, 'r', encoding=encoding) as f:
-            data = json.load(f)
+    first_entry = checkpoint.first_entry if checkpoint else 0
+    skip = checkpoint.skip if checkpoint else 0
+    entries_seen = first_entry
+    for i, entry in enumerate(iter_po_entries(lines), first_entry):
+        entries_seen = i + 1
+        if i < skip:
+            continue
+        if checkpoint is not None:
+            checkpoint.entries = entries_seen
+        try:
+            # Mise à jour du progrès (publication limitée par le reporter)
+            progress.update(i, strings_created=writer.created)
+            
+            # Créer l'objet TranslationString avec les bons noms de champs
+            translation_string = TranslationString(
+                file=translation_file,
+                key=entry.msgid[:500] if entry.msgid else '',  # Limiter la taille
+                source_text=entry.msgid,
+                context=entry.msgstr or '',
+                line_number=line_offset + entry.linenum,
+                is_translated=bool(entry.msgstr and not entry.fuzzy),
+                is_fuzzy=entry.fuzzy,
+                is_plural=bool(entry.msgid_plural),
+                comment='\n'.join(entry.comment.split('\n')[:5]) if entry.comment else ''
+            )
+            
+            writer.add(translation_string)
         
-        if not isinstance(data, dict):
-            translation_file.status = 'error'
-            translation_file.error_message = 'Format JSON invalide: doit être un objet'
-            translation_file.save()
-            return {'status': 'error', 'message': 'Format JSON invalide'}
+        except DatabaseError:
+            # Lot non validé : seule l'entrée fautive peut être ignorée, pas
+            # les lignes en attente dans le writer
+            raise
+            
+        except Exception as e:
+            logger.warning(f"Erreur lors du traitement de l'entrée {i}: {e}")
+            continue
+    
+    return entries_seen
+
+
+def ingest_json_pairs(stream, size, translation_file, writer, progress, line_offset=0,
+                      checkpoint=None):
+    """
+    Aplatit l'objet JSON lu dans ``stream`` et confie les valeurs texte au
+    ``writer``.
+    
+    ``size`` (taille en octets du flux) sert à estimer la progression ;
+    ``line_offset`` décale les numéros d'entrée quand le flux ne couvre
+    qu'une plage du fichier. Avec un ``checkpoint``, les paires déjà
+    validées sont sautées. Retourne le nombre de paires lues.
+    """
+    from .models import TranslationString
+    from .parsers import JSONStreamFlattener
+    
+    size = max(size, 1)
+    skip = checkpoint.skip if checkpoint else 0
+    entries_seen = 0
+    flattener = JSONStreamFlattener(stream)
+    for i, (key, value) in enumerate(flattener):
+        entries_seen += 1
+        if i < skip:
+            continue
+        if checkpoint is not None:
+            checkpoint.entries = entries_seen
+        try:
+            # Mise à jour du progrès (total estimé d'après la position lue)
+            ratio = min(flattener.position / size, 1.0)
+            progress.update(
+                i,
+                total=max(int(i / ratio), i) if ratio else i,
+                strings_created=writer.created,
+                progress=int(ratio * 100)
+            )
+            
+            # Traiter seulement les valeurs string
+            if isinstance(value, str):
+                translation_string = TranslationString(
+                    file=translation_file,
+                    key=key[:500],
+                    source_text=value,
+                    context='',  # Vide par défaut pour JSON
+                    line_number=line_offset + i + 1,
+                    is_translated=False,
+                    is_fuzzy=False,
+                    is_plural=False
+                )
+                
+                # Clé répétée : la dernière valeur l'emporte, comme avec json.load
+                writer.replace(translation_string)
         
-        # Aplatir la structure JSON si nécessaire
-        flat_data = flatten_json(data)
-        total_entries = len(flat_data)
+        except DatabaseError:
+            raise
+            
+        except Exception as e:
+            logger.warning(f"Erreur lors du traitement de la clé {key}: {e}")
+            continue
+    
+    return entries_seen
+
+
+def _open_writer(translation_file, checkpoint, incremental=False):
+    """
+    Writer de l'ingestion. Le writer différentiel n'enregistre pas de point
+    de reprise : sa comparaison, idempotente, est refaite à chaque tentative.
+    """
+    if incremental:
+        return TranslationStringDiffWriter(translation_file)
+    return TranslationStringWriter(translation_file, checkpoint=checkpoint.save, **checkpoint.counters)
+
+
+def _incremental_result(writer):
+    """Résultat d'un retraitement incrémental, avec le résumé de la différence"""
+    summary = writer.summary
+    logger.info(f"Retraitement incrémental: {summary}")
+    return {
+        'status': 'success',
+        'message': (
+            f"{summary['created']} chaînes créées, {summary['updated']} modifiées, "
+            f"{summary['deleted']} supprimées, {summary['unchanged']} inchangées"
+        ),
+        'total_strings': writer.total,
+        'duplicates': writer.duplicates,
+        'diff': summary
+    }
+
+
+def _resume_log(checkpoint, translation_file):
+    if checkpoint.resumed:
+        chunk = checkpoint.chunk
+        logger.info(
+            f"Reprise du fichier {translation_file.id} (plage {chunk.index}) après "
+            f"{chunk.committed_entries} entrées et {chunk.committed_strings} chaînes validées"
+        )
+
+
+def _ingestion_source(file_path, source=None):
+    """Réutilise la source déjà ouverte par l'appelant, sinon en ouvre une"""
+    if source is not None:
+        return nullcontext(source)
+    return IngestionSource(file_path)
+
+
+def process_json_file(translation_file, file_path, encoding, task, source=None, incremental=False):
+    """
+    Traite un fichier JSON de traduction en flux, sans le charger en mémoire.
+    
+    ``source`` est l'``IngestionSource`` déjà ouverte par l'appelant ; à défaut
+    le fichier est ouvert ici. ``incremental`` : voir ``process_translation_file``.
+    """
+    from .parsers import JSONStructureError
+    import json
+    
+    try:
+        # Les paires (clé pointée, valeur) sont produites au fil de la lecture
+        with _ingestion_source(file_path, source) as source:
+            # Point de reprise enregistré avec chaque lot validé
+            checkpoint = IngestionCheckpoint.for_file(translation_file, source.size, resume=not incremental)
+            checkpoint.start(task.request.id)
+            _resume_log(checkpoint, translation_file)
+            
+            # Insertion par lots, doublons écartés en mémoire
+            writer = _open_writer(translation_file, checkpoint, incremental)
+            progress = ProgressReporter(task)
+            
+            with checkpoint.open_json(source, encoding) as f:
+                entries_seen = ingest_json_pairs(
+                    f, source.size, translation_file, writer, progress, checkpoint=checkpoint
+                )
         
-        if total_entries == 0:
+        if entries_seen == 0:
             translation_file.status = 'error'
             translation_file.error_message = 'Fichier JSON vide'
             translation_file.save()
             return {'status': 'error', 'message': 'Fichier JSON vide'}
         
-        logger.info(f"Traitement de {total_entries} entrées JSON")
-        created_strings = 0
+        logger.info(f"{entries_seen} entrées JSON lues")
         
-        batch_size = 100
-        strings_to_create = []
+        # Créer les dernières chaînes restantes (et supprimer les disparues)
+        writer.finish()
+        created_strings = writer.created
         
-        for i, (key, value) in enumerate(flat_data.items()):
-            try:
-                # Mise à jour du progrès
-                if i % 10 == 0:
-                    progress = int((i / total_entries) * 100)
-                    task.update_state(
-                        state='PROGRESS',
-                        meta={
-                            'current': i,
-                            'total': total_entries,
-                            'strings_created': created_strings,
-                            'progress': progress
-                        }
-                    )
-                
-                # Traiter seulement les valeurs string
-                if isinstance(value, str):
-                    translation_string = TranslationString(
-                        file=translation_file,
-                        key=key[:500],
-                        source_text=value,
-                        context='',  # Vide par défaut pour JSON
-                        line_number=i + 1,
-                        is_translated=False,
-                        is_fuzzy=False,
-                        is_plural=False
-                    )
-                    
-                    strings_to_create.append(translation_string)
-                
-                # Créer par lots
-                if len(strings_to_create) >= batch_size:
-                    created_count = bulk_create_strings(strings_to_create, translation_file)
-                    created_strings += created_count
-                    strings_to_create = []
-                
-            except Exception as e:
-                logger.warning(f"Erreur lors du traitement de la clé {key}: {e}")
-                continue
-        
-        # Créer les dernières chaînes restantes
-        if strings_to_create:
-            created_count = bulk_create_strings(strings_to_create, translation_file)
-            created_strings += created_count
+        # Toujours publier l'état final, même entre deux seuils
+        progress.update(entries_seen, total=entries_seen, strings_created=created_strings)
+        progress.flush()
         
         # Finaliser le traitement
         with transaction.atomic():
             translation_file.status = 'completed'
-            translation_file.total_strings = created_strings
             translation_file.error_message = ''
+            translation_file.last_diff = writer.summary if incremental else {}
             translation_file.save()
-        
-        logger.info(f"Traitement JSON terminé: {created_strings} chaînes créées")
+            checkpoint.complete(entries_seen, writer)
+        
+        logger.info(
+            f"Traitement JSON terminé: {created_strings} chaînes créées, "
+            f"{writer.duplicates} doublons ignorés en {writer.transactions} transaction(s)"
+        )
+        if incremental:
+            return _incremental_result(writer)
         return {
             'status': 'success',  
             'message': f'{created_strings} chaînes de traduction créées',
-            'total_strings': created_strings
+            'total_strings': writer.total,
+            'duplicates': writer.duplicates
         }
         
+    except DatabaseError:
+        # Remontée à process_translation_file pour une nouvelle tentative
+        raise
+    
+    except JSONStructureError:
+        translation_file.status = 'error'
+        translation_file.error_message = 'Format JSON invalide: doit être un objet'
+        translation_file.save()
+        return {'status': 'error', 'message': 'Format JSON invalide'}
+    
     except json.JSONDecodeError as e:
         error_msg = f'Erreur de format JSON: {str(e)}'
         logger.error(error_msg)
@@ -675,31 +589,269 @@ def process_json_file(translation_file, file_path, encoding, task):
         return {'status': 'error', 'message': error_msg}
 
 
-def bulk_create_strings(strings_to_create, translation_file):
-    """Crée les chaînes de traduction par lots avec gestion d'erreurs"""
-    from .models import TranslationString
+def dispatch_chunked_ingestion(translation_file, ranges):
+    """
+    Crée une ``TranslationFileChunk`` par plage et lance leur ingestion en
+    parallèle, suivie de ``finalize_chunked_ingestion`` (chord Celery).
+    
+    Le ``task_id`` du fichier devient celui de la tâche de finalisation :
+    les plages y publient la progression agrégée, puis son résultat final.
+    """
+    from celery import chord
+    from .models import TranslationFileChunk
+    import uuid
+    
+    with transaction.atomic():
+        translation_file.chunks.all().delete()
+        chunks = TranslationFileChunk.objects.bulk_create([
+            TranslationFileChunk(
+                file=translation_file,
+                index=index,
+                byte_start=start,
+                byte_end=end,
+                line_offset=line_offset
+            )
+            for index, (start, end, line_offset) in enumerate(ranges)
+        ])
+        
+        finalize_task_id = str(uuid.uuid4())
+        translation_file.task_id = finalize_task_id
+        translation_file.save()
+    
+    logger.info(f"Fichier {translation_file.id} découpé en {len(chunks)} plages")
+    
+    callback = finalize_chunked_ingestion.s(str(translation_file.id)).set(task_id=finalize_task_id)
+    chord(
+        process_translation_chunk.s(str(chunk.id), finalize_task_id) for chunk in chunks
+    )(callback)
+    
+    return {
+        'status': 'dispatched',
+        'message': f'{len(chunks)} plages en cours de traitement',
+        'chunks': len(chunks),
+        'task_id': finalize_task_id
+    }
+
+
+@shared_task(bind=True, max_retries=3)
+def process_translation_chunk(self, chunk_id, file_task_id):
+    """
+    Ingère une plage d'un gros fichier, à partir de son dernier point de
+    reprise.
+    
+    Une erreur relance la tâche, qui reprend après le dernier lot validé ;
+    une fois les tentatives épuisées, l'erreur est retournée et non levée :
+    le chord doit toujours atteindre ``finalize_chunked_ingestion``.
+    """
+    from .models import TranslationFileChunk
     
     try:
-        with transaction.atomic():
-            created_objects = TranslationString.objects.bulk_create(
-                strings_to_create,
-                ignore_conflicts=True,  # Ignorer les doublons
-                batch_size=100
+        chunk = TranslationFileChunk.objects.select_related('file').get(id=chunk_id)
+    except TranslationFileChunk.DoesNotExist:
+        logger.error(f"Plage {chunk_id} introuvable")
+        return {'status': 'error', 'message': 'Plage introuvable'}
+    
+    translation_file = chunk.file
+    try:
+        checkpoint = IngestionCheckpoint(chunk)
+        checkpoint.start(self.request.id)
+        _resume_log(checkpoint, translation_file)
+        
+        file_type = translation_file.file_type.lower()
+        encoding = translation_file.encoding
+        
+        with IngestionSource(translation_file.file_path.path) as source:
+            writer = TranslationStringWriter(
+                translation_file, checkpoint=checkpoint.save, **checkpoint.counters
             )
-            return len(created_objects)
+            
+            if file_type == 'po':
+                progress = ChunkProgressReporter(
+                    self, chunk, source.size, file_task_id,
+                    total=source.count_po_entries(start=chunk.byte_start, end=chunk.byte_end)
+                )
+                with checkpoint.open_po(source, encoding) as lines:
+                    entries_seen = ingest_po_entries(
+                        lines, translation_file, writer, progress,
+                        line_offset=checkpoint.line_offset, checkpoint=checkpoint
+                    )
+            else:
+                # Les membres de la plage, encadrés, forment un objet JSON valide
+                progress = ChunkProgressReporter(self, chunk, source.size, file_task_id)
+                with checkpoint.open_json(source, encoding, prefix=b'{', suffix=b'}') as f:
+                    entries_seen = ingest_json_pairs(
+                        f, chunk.size, translation_file, writer, progress,
+                        line_offset=chunk.line_offset, checkpoint=checkpoint
+                    )
+            
+            writer.finish()
+        
+        progress.update(entries_seen, total=entries_seen, strings_created=writer.created)
+        progress.flush()
+        
+        checkpoint.complete(entries_seen, writer)
+        
+        logger.info(
+            f"Plage {chunk.index} du fichier {translation_file.id}: "
+            f"{writer.created} chaînes créées, {writer.duplicates} doublons ignorés"
+        )
+        return {
+            'status': 'success',
+            'chunk': chunk.index,
+            'entries': entries_seen,
+            'strings_created': writer.created,
+            'duplicates': writer.duplicates
+        }
+        
+    except Exception as e:
+        error_msg = f'Erreur lors du traitement de la plage {chunk.index}: {str(e)}'
+        logger.error(error_msg)
+        chunk.status = 'error'
+        chunk.error_message = error_msg
+        chunk.save(update_fields=['status', 'error_message', 'updated_at'])
+        
+        # Le point de reprise est conservé : la tentative suivante repart
+        # du dernier lot validé
+        if self.request.retries < self.max_retries:
+            logger.info(f"Tentative {self.request.retries + 1}/{self.max_retries + 1} pour la plage {chunk.index}")
+            raise self.retry(countdown=10)
+        
+        return {'status': 'error', 'chunk': chunk.index, 'message': error_msg}
+
+
+@shared_task(bind=True)
+def finalize_chunked_ingestion(self, results, file_id):
+    """Fusionne les résultats des plages et termine le fichier (callback du chord)"""
+    from .models import TranslationFile
+    
+    try:
+        translation_file = TranslationFile.objects.get(id=file_id)
+    except TranslationFile.DoesNotExist:
+        logger.error(f"Fichier {file_id} introuvable")
+        return {'status': 'error', 'message': 'Fichier introuvable'}
     
-    except IntegrityError as e:
-        logger.error(f"Erreur d'intégrité lors de la création en lot: {e}")
-        # Tenter de créer un par un en cas d'erreur
-        created_count = 0
+    try:
+        errors = [result.get('message', '') for result in results if result.get('status') != 'success']
+        entries = sum(result.get('entries', 0) for result in results)
+        created_strings = sum(result.get('strings_created', 0) for result in results)
+        duplicates = sum(result.get('duplicates', 0) for result in results)
+        
+        with transaction.atomic():
+            # total_strings a été incrémenté par F() dans chaque lot des plages
+            if errors:
+                translation_file.status = 'error'
+                translation_file.error_message = '\n'.join(errors[:5])
+            elif entries == 0:
+                translation_file.status = 'error'
+                translation_file.error_message = 'Fichier vide ou invalide'
+            else:
+                translation_file.status = 'completed'
+                translation_file.error_message = ''
+            translation_file.save()
+        
+        if translation_file.status == 'error':
+            logger.error(f"Ingestion par plages du fichier {file_id} en erreur: {translation_file.error_message}")
+            return {'status': 'error', 'message': translation_file.error_message}
+        
+        logger.info(
+            f"Ingestion par plages terminée: {created_strings} chaînes créées, "
+            f"{duplicates} doublons ignorés, {len(results)} plages"
+        )
+        return {
+            'status': 'success',
+            'message': f'{created_strings} chaînes de traduction créées',
+            'total_strings': translation_file.total_strings,
+            'duplicates': duplicates,
+            'chunks': len(results)
+        }
+        
+    except Exception as e:
+        error_msg = f'Erreur lors de la finalisation: {str(e)}'
+        logger.error(error_msg)
+        translation_file.status = 'error'
+        translation_file.error_message = error_msg
+        translation_file.save()
+        return {'status': 'error', 'message': error_msg}
+
+
+# Champs produits par le parsing, copiés tels quels par la déduplication
+CLONED_STRING_FIELDS = (
+    'key', 'source_text', 'context', 'comment', 'line_number',
+    'is_translated', 'is_fuzzy', 'is_plural', 'entry_hash',
+)
+
+
+@shared_task(bind=True)
+def clone_translation_file(self, file_id, source_id):
+    """
+    Copie les chaînes d'un upload identique déjà analysé au lieu de reparser
+    le fichier (même utilisateur, même empreinte de contenu).
+    
+    Seul le résultat du parsing est copié : les traductions restent
+    attachées aux chaînes de l'upload d'origine.
+    """
+    from .models import TranslationFile, TranslationString
+    
+    try:
+        translation_file = TranslationFile.objects.get(id=file_id)
+        source = TranslationFile.objects.get(id=source_id)
+    except TranslationFile.DoesNotExist:
+        logger.error(f"Fichier {file_id} ou {source_id} introuvable")
+        return {'status': 'error', 'message': 'Fichier introuvable'}
+    
+    try:
+        writer = TranslationStringWriter(translation_file)
+        progress = ProgressReporter(self, total=source.total_strings)
+        
+        rows = source.strings.order_by().values_list(*CLONED_STRING_FIELDS).iterator(chunk_size=writer.batch_size)
+        entries_seen = 0
+        for i, values in enumerate(rows):
+            entries_seen += 1
+            progress.update(i, strings_created=writer.created)
+            writer.add(TranslationString(file=translation_file, **dict(zip(CLONED_STRING_FIELDS, values))))
+        
+        writer.finish()
+        progress.update(entries_seen, total=entries_seen, strings_created=writer.created)
+        progress.flush()
+        
+        with transaction.atomic():
+            translation_file.status = 'completed'
+            translation_file.detected_framework = source.detected_framework
+            translation_file.encoding = source.encoding
+            translation_file.error_message = ''
+            translation_file.save()
+        
+        logger.info(
+            f"Upload {file_id} dédupliqué: {writer.created} chaînes copiées depuis {source_id}"
+        )
+        return {
+            'status': 'success',
+            'message': f'{writer.created} chaînes de traduction copiées',
+            'total_strings': writer.total,
+            'duplicates': writer.duplicates,
+            'deduplicated_from': str(source_id)
+        }
+    
+    except Exception as e:
+        error_msg = f'Erreur lors de la copie des chaînes: {str(e)}'
+        logger.error(error_msg)
+        translation_file.status = 'error'
+        translation_file.error_message = error_msg
+        translation_file.save()
+        return {'status': 'error', 'message': error_msg}
+
+
+def bulk_create_strings(strings_to_create, translation_file):
+    """
+    Crée des chaînes de traduction en une fois et retourne le nombre exact
+    de lignes insérées (les doublons sont écartés avant l'insertion)
+    """
+    try:
+        writer = TranslationStringWriter(translation_file)
         for string_obj in strings_to_create:
-            try:
-                string_obj.save()
-                created_count += 1
-            except Exception as individual_error:
-                logger.warning(f"Impossible de créer la chaîne {string_obj.key}: {individual_error}")
-                continue
-        return created_count
+            writer.add(string_obj)
+        writer.flush()
+        return writer.created
     
     except Exception as e:
         logger.error(f"Erreur lors de la création en lot: {e}")
@@ -743,8 +895,8 @@ def cleanup_old_files(self):
         deleted_count = 0
         for file_obj in old_files:
             try:
-                # Supprimer le fichier physique
-                if file_obj.file_path:
+                # Supprimer le fichier physique, sauf s'il sert encore à un autre upload
+                if file_obj.file_path and not file_obj.is_blob_shared():
                     file_obj.file_path.delete(save=False)
                 
                 # Supprimer l'enregistrement
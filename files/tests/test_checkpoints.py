@@ -0,0 +1,122 @@
+# =============================================================================
+# files/tests/test_checkpoints.py
+# =============================================================================
+
+"""Reprise de l'ingestion après une erreur au milieu d'un lot (files/checkpoints.py)"""
+
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from files import checkpoints
+from files.tasks import process_json_file, process_po_file
+from files.writers import TranslationStringWriter
+
+from .test_chunking import json_catalog
+from .test_ingestion import po_catalog
+from .utils import create_file, create_user
+
+
+def fake_task(task_id='task-1'):
+    return SimpleNamespace(request=SimpleNamespace(id=task_id), update_state=lambda **kwargs: None)
+
+
+@override_settings(FILES_INGEST_TRANSACTION_ROWS=10)
+class CheckpointResumeTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.user = create_user()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def run_with_failure(self, process, path, translation_file, fail_at):
+        """Première exécution : le ``fail_at``-ième lot échoue dans sa transaction"""
+        insert = TranslationStringWriter._insert
+        calls = []
+
+        def failing_insert(writer, objs):
+            calls.append(len(objs))
+            if len(calls) == fail_at:
+                raise OperationalError('connexion perdue')
+            return insert(writer, objs)
+
+        with mock.patch.object(TranslationStringWriter, '_insert', failing_insert):
+            with self.assertRaises(OperationalError):
+                process(translation_file, path, 'utf-8', fake_task())
+
+    def run_and_count_inserts(self, process, path, translation_file):
+        insert = TranslationStringWriter._insert
+        inserted = []
+
+        def counting_insert(writer, objs):
+            inserted.extend(obj.key for obj in objs)
+            return insert(writer, objs)
+
+        with mock.patch.object(TranslationStringWriter, '_insert', counting_insert):
+            result = process(translation_file, path, 'utf-8', fake_task('task-2'))
+        return result, inserted
+
+    def assert_resumed(self, process, name, content, file_type):
+        reference = create_file(self.user, name=f'reference.{file_type}', file_type=file_type)
+        process(reference, self.write(f'reference.{file_type}', content), 'utf-8', fake_task())
+        reference.refresh_from_db()
+
+        path = self.write(name, content)
+        translation_file = create_file(self.user, name=name, file_type=file_type)
+        self.run_with_failure(process, path, translation_file, fail_at=3)
+
+        # Seuls les deux lots validés sont en base, point de reprise compris
+        chunk = translation_file.chunks.get()
+        translation_file.refresh_from_db()
+        self.assertEqual(translation_file.strings.count(), 20)
+        self.assertEqual(translation_file.total_strings, 20)
+        self.assertEqual(chunk.committed_strings, 20)
+        self.assertGreaterEqual(chunk.committed_entries, 20)
+        self.assertNotEqual(chunk.status, 'completed')
+
+        result, inserted = self.run_and_count_inserts(process, path, translation_file)
+        translation_file.refresh_from_db()
+
+        # La reprise n'insère que ce qui manquait, sans doublon
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(len(inserted), reference.total_strings - 20)
+        self.assertEqual(result['total_strings'], reference.total_strings)
+        self.assertEqual(result['duplicates'], 0)
+        self.assertEqual(translation_file.total_strings, reference.total_strings)
+        self.assertEqual(translation_file.chunks.get().status, 'completed')
+        self.assertEqual(
+            list(translation_file.strings.values_list('key', 'source_text', 'line_number')),
+            list(reference.strings.values_list('key', 'source_text', 'line_number'))
+        )
+
+    def test_po_resumes_at_the_first_uncommitted_entry(self):
+        self.assert_resumed(process_po_file, 'messages.po', po_catalog(45), 'po')
+
+    def test_json_resumes_by_skipping_committed_pairs(self):
+        self.assert_resumed(process_json_file, 'messages.json', json_catalog(5), 'json')
+
+    def test_po_resume_reads_from_the_checkpoint_offset(self):
+        path = self.write('messages.po', po_catalog(45))
+        translation_file = create_file(self.user, name='messages.po')
+        self.run_with_failure(process_po_file, path, translation_file, fail_at=2)
+        chunk = translation_file.chunks.get()
+        self.assertIsNotNone(chunk.committed_offset)
+
+        with open(path, 'rb') as f:
+            f.seek(chunk.committed_offset)
+            # La lecture reprend au début d'une entrée, après la dernière validée
+            self.assertTrue(f.readline().startswith(b'#: app/views.py:'))
+        with mock.patch.object(checkpoints, 'TrackedLines', wraps=checkpoints.TrackedLines) as tracked:
+            process_po_file(translation_file, path, 'utf-8', fake_task('task-2'))
+        self.assertEqual(tracked.call_args.kwargs['offset'], chunk.committed_offset)
@@ -0,0 +1,158 @@
+# =============================================================================
+# files/tests/test_chunking.py
+# =============================================================================
+
+"""Ingestion parallèle par plages (files/chunking.py, files/tasks.py)"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from files.chunking import chunked_threshold, split_json_ranges
+from files.ingestion import IngestionSource
+from files.parsers import JSONStreamFlattener
+from files.serializers import TranslationFileCreateSerializer
+from files.tasks import (
+    finalize_chunked_ingestion, flatten_json, process_translation_chunk, process_translation_file,
+)
+
+from .test_ingestion import po_catalog
+from .utils import create_file, create_user
+
+
+# Objet racine mêlant listes imbriquées (ignorées dans une liste), objets
+# vides, scalaires nus et chaînes contenant des jetons JSON
+JSON_DOCUMENT = {
+    'title': 'Accueil, {bienvenue}',
+    'count': 3,
+    'flags': [True, None, [1, 2], {'inner': 'x'}],
+    'empty': {},
+    'nav': {'home': 'Maison', 'items': ['Un', 'Deux "]"', []], 'deep': {'a': 1.5, 'b': 'Texte'}},
+    'list': [],
+}
+
+
+def json_catalog(count):
+    return json.dumps(
+        {f'section{i}': {**JSON_DOCUMENT, 'index': f'Valeur {i} é'} for i in range(count)},
+        ensure_ascii=False, indent=2
+    )
+
+
+def run_chord(header):
+    """Remplace ``celery.chord`` : plages puis finalisation, dans le processus"""
+    def launch(callback):
+        results = [signature.apply().get() for signature in header]
+        return callback.apply(args=(results,))
+    return launch
+
+
+class SplitJSONRangesTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_entry_offsets_follow_flattener(self):
+        text = json_catalog(30)
+        path = os.path.join(self.directory, 'catalog.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        expected = [i + 1 for i, _pair in enumerate(JSONStreamFlattener(io.StringIO(text)))]
+
+        for target_size in (1, 50, 400, 5000):
+            with self.subTest(target_size=target_size), IngestionSource(path) as source:
+                ranges = split_json_ranges(source, target_size)
+                numbers = []
+                for start, end, entry_offset in ranges:
+                    part = '{' + source.buffer[start:end].decode('utf-8') + '}'
+                    numbers.extend(
+                        entry_offset + i + 1 for i, _pair in enumerate(JSONStreamFlattener(io.StringIO(part)))
+                    )
+                self.assertGreater(len(ranges), 1)
+                self.assertEqual(numbers, expected)
+
+
+class ChunkedIngestionTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        os.makedirs(os.path.join(self.media_root, 'translation_files'))
+        self.user = create_user()
+        # Progression publiée dans le backend de résultats : hors du test
+        for task in (process_translation_file, process_translation_chunk):
+            patcher = mock.patch.object(task, 'update_state')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ingest(self, name, content, file_type, **overrides):
+        with open(os.path.join(self.media_root, 'translation_files', name), 'w', encoding='utf-8') as f:
+            f.write(content)
+        translation_file = create_file(self.user, name=name, file_type=file_type)
+        with override_settings(**overrides), mock.patch('celery.chord', run_chord):
+            result = process_translation_file.apply(args=(str(translation_file.id),)).get()
+        translation_file.refresh_from_db()
+        return translation_file, result
+
+    def compare(self, content, file_type):
+        single, single_result = self.ingest(
+            f'single.{file_type}', content, file_type, FILES_CHUNKED_INGESTION_THRESHOLD=None
+        )
+        chunked, chunked_result = self.ingest(
+            f'chunked.{file_type}', content, file_type,
+            FILES_CHUNKED_INGESTION_THRESHOLD=1024, FILES_INGEST_CHUNK_SIZE=1024
+        )
+        self.assertNotIn('chunks', single_result)
+        self.assertGreater(chunked_result['chunks'], 1)
+        self.assertEqual(chunked.status, 'completed')
+        self.assertEqual(chunked.total_strings, single.total_strings)
+        self.assertEqual(
+            list(chunked.strings.values_list('key', 'context', 'source_text', 'line_number')),
+            list(single.strings.values_list('key', 'context', 'source_text', 'line_number'))
+        )
+
+    def test_po_chunks_store_the_same_line_numbers(self):
+        self.compare(po_catalog(200), 'po')
+
+    def test_json_chunks_store_the_same_entry_numbers(self):
+        self.compare(json_catalog(40), 'json')
+
+    def test_json_duplicate_keys_keep_the_last_value(self):
+        content = '{"a": "first", "b": {"c": "x"}, "a": "second", "d": "y", "b": {"c": "z"}}'
+        # Une transaction par chaîne : les doublons arrivent après l'écriture de la première
+        for rows in (1, 100):
+            with self.subTest(transaction_rows=rows):
+                translation_file, _result = self.ingest(
+                    f'duplicates{rows}.json', content, 'json', FILES_INGEST_TRANSACTION_ROWS=rows
+                )
+                self.assertEqual(
+                    list(translation_file.strings.order_by('line_number').values_list('key', 'source_text')),
+                    list(flatten_json(json.loads(content)).items())
+                )
+                self.assertEqual(translation_file.total_strings, 3)
+
+
+class UploadLimitTests(SimpleTestCase):
+
+    def test_default_threshold_is_reachable_by_uploads(self):
+        self.assertLess(chunked_threshold(), settings.FILES_MAX_UPLOAD_SIZE)
+
+    @override_settings(FILES_MAX_UPLOAD_SIZE=1024 * 1024)
+    def test_upload_size_setting(self):
+        serializer = TranslationFileCreateSerializer()
+        small = SimpleUploadedFile('messages.po', b'msgid "a"\nmsgstr ""\n')
+        self.assertIs(serializer.validate_file(small), small)
+        large = SimpleUploadedFile('messages.po', b'#' * (1024 * 1024 + 1))
+        with self.assertRaisesMessage(Exception, 'Le fichier ne peut pas dépasser 1MB'):
+            serializer.validate_file(large)
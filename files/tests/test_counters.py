@@ -0,0 +1,77 @@
+# =============================================================================
+# files/tests/test_counters.py
+# =============================================================================
+
+"""Compteurs dénormalisés des fichiers (files/counters.py)"""
+
+from django.test import TestCase
+
+from files.counters import COUNTER_FIELDS, repair_counters
+from files.models import TranslationFile, TranslationString
+
+from .utils import create_file, create_strings, create_user
+
+
+class FileCountersTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.translation_file = create_file(self.user)
+
+    def counters(self):
+        return TranslationFile.objects.filter(pk=self.translation_file.pk).values(*COUNTER_FIELDS).get()
+
+    def test_stale_instance_does_not_overwrite_counters(self):
+        stale = TranslationFile.objects.get(pk=self.translation_file.pk)
+        create_strings(self.translation_file, 4, is_translated=True)
+
+        stale.status = 'completed'
+        stale.total_strings = 0
+        stale.save()
+
+        self.assertEqual(self.counters(), {
+            'total_strings': 4, 'translated_count': 4, 'fuzzy_count': 0, 'plural_count': 0,
+        })
+        self.assertEqual(TranslationFile.objects.get(pk=stale.pk).status, 'completed')
+
+    def test_writer_updates_the_instance_it_holds(self):
+        create_strings(self.translation_file, 3, is_plural=True)
+        self.assertEqual(self.translation_file.total_strings, 3)
+        self.assertEqual(self.counters()['plural_count'], 3)
+
+    def test_queryset_update_and_delete(self):
+        create_strings(self.translation_file, 6)
+        strings = self.translation_file.strings.all()
+
+        strings.filter(key__in=['key0', 'key1', 'key2']).update(is_translated=True)
+        self.assertEqual(self.counters()['translated_count'], 3)
+
+        strings.filter(key='key0').delete()
+        self.assertEqual(self.counters(), {
+            'total_strings': 5, 'translated_count': 2, 'fuzzy_count': 0, 'plural_count': 0,
+        })
+
+        strings.delete()
+        self.assertEqual(set(self.counters().values()), {0})
+
+    def test_single_string_save_and_bulk_update(self):
+        create_strings(self.translation_file, 4)
+        string = TranslationString.objects.get(file=self.translation_file, key='key0')
+        string.is_fuzzy = True
+        string.save()
+        self.assertEqual(self.counters()['fuzzy_count'], 1)
+
+        strings = list(self.translation_file.strings.all())
+        for obj in strings:
+            obj.is_translated = True
+        TranslationString.objects.bulk_update(strings, ['is_translated'])
+        self.assertEqual(self.counters()['translated_count'], 4)
+
+    def test_repair_counters(self):
+        create_strings(self.translation_file, 3, is_translated=True)
+        TranslationFile.objects.filter(pk=self.translation_file.pk).update(total_strings=10, translated_count=0)
+
+        repaired = repair_counters(TranslationFile.objects.all())
+        self.assertEqual(repaired[0][1], {'total_strings': (10, 3), 'translated_count': (0, 3)})
+        self.assertEqual(self.counters()['total_strings'], 3)
+        self.assertEqual(repair_counters(TranslationFile.objects.all()), [])
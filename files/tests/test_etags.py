@@ -0,0 +1,101 @@
+# =============================================================================
+# files/tests/test_etags.py
+# =============================================================================
+
+"""Réponses 304 des lectures interrogées en boucle (files/etags.py)"""
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from files.models import TranslationString
+from translations.models import Language, Translation
+
+from .test_views import FileAPITestCase
+from .utils import create_file, create_strings, create_user
+
+
+class ConditionalReadTests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.translation_file = create_file(self.user, status='completed')
+        create_strings(self.translation_file, 4)
+        self.detail_url = reverse('translationfile-detail', args=[self.translation_file.id])
+        self.by_file_url = f"{reverse('translationstring-by-file')}?file_id={self.translation_file.id}"
+
+    def get(self, url, etag=None, client=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                response = (client or self.client).get(url, **headers)
+        return response, len(queries)
+
+    def assert_not_modified(self, url):
+        response, _queries = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('private', response['Cache-Control'])
+
+        response, queries = self.get(url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        return etag, queries
+
+    def test_file_detail(self):
+        etag, queries = self.assert_not_modified(self.detail_url)
+        # Lecture de la version seulement
+        self.assertEqual(queries, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.translation_file.strings.filter(key='key0').update(translated_text='Bonjour')
+        response, _queries = self.get(self.detail_url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_by_file_follows_string_and_translation_writes(self):
+        etag, queries = self.assert_not_modified(self.by_file_url)
+        self.assertEqual(queries, 1)
+
+        string = TranslationString.objects.get(file=self.translation_file, key='key2')
+        language = Language.objects.create(code='en', name='English', native_name='English')
+        Translation.objects.create(
+            string=string, target_language=language, translated_text='Text', translation_method='manual'
+        )
+        response, _queries = self.get(self.by_file_url, etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        string.is_fuzzy = True
+        string.save()
+        response, _queries = self.get(self.by_file_url, etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_representation_is_part_of_the_etag(self):
+        response, _queries = self.get(self.by_file_url)
+        response, _queries = self.get(f'{self.by_file_url}&fields=id,key', response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        response, _queries = self.get(self.detail_url, f'W/"autre", {response["ETag"]}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_statistics(self):
+        for name in ('translationfile-statistics', 'translationstring-statistics'):
+            with self.subTest(name=name):
+                etag, _queries = self.assert_not_modified(reverse(name))
+                with self.captureOnCommitCallbacks(execute=True):
+                    create_strings(create_file(self.user, name=f'{name}.po'), 1)
+                response, _queries = self.get(reverse(name), etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_foreign_files_keep_their_errors(self):
+        client = self.client_for(create_user('bob'))
+        response, _queries = self.get(self.detail_url, '*', client)
+        self.assertEqual(response.status_code, 404)
+        response, _queries = self.get(self.by_file_url, '*', client)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,77 @@
+# =============================================================================
+# files/tests/test_export.py
+# =============================================================================
+
+"""Export en flux des chaînes d'un fichier (files/export.py)"""
+
+import csv
+import io
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from files.export import EXPORT_FIELDS, export_rows
+from files.models import TranslationString
+
+from .test_views import FileAPITestCase
+from .utils import create_file, create_strings, create_user
+
+
+class ExportTests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.translation_file = create_file(self.user, name='messages.po')
+        create_strings(self.translation_file, 7)
+        self.translation_file.strings.filter(key__in=['key1', 'key4']).update(
+            is_translated=True, translated_text='Traduit « é »'
+        )
+        create_strings(create_file(self.user, name='other.po'), 3)
+        self.url = reverse('translationstring-export')
+
+    def export(self, client=None, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = (client or self.client).get(self.url, {'file_id': self.translation_file.id, **params})
+            content = b''.join(response.streaming_content).decode('utf-8') if response.streaming else None
+        return response, content, len(queries)
+
+    def test_ndjson_streams_every_string(self):
+        response, content, queries = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="messages.ndjson"')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['key'] for row in rows], [f'key{i}' for i in range(7)])
+        self.assertEqual(list(rows[0]), list(EXPORT_FIELDS))
+        self.assertEqual(rows[1]['translated_text'], 'Traduit « é »')
+        self.assertIs(rows[1]['is_translated'], True)
+        # Fichier, puis les lignes : pas de requête par chaîne
+        self.assertLessEqual(queries, 3)
+
+    def test_csv_with_list_filters(self):
+        response, content, _queries = self.export(export_format='csv', is_translated='true')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="messages.csv"')
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], list(EXPORT_FIELDS))
+        self.assertEqual([row[1] for row in rows[1:]], ['key1', 'key4'])
+        self.assertEqual(rows[1][EXPORT_FIELDS.index('is_translated')], 'true')
+        self.assertEqual(rows[1][EXPORT_FIELDS.index('comment')], '')
+
+    def test_rows_are_written_in_chunks(self):
+        queryset = TranslationString.objects.filter(file=self.translation_file).order_by('line_number')
+        chunks = list(export_rows(queryset, 'csv', chunk_size=3))
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [1, 3, 3, 1])
+
+    def test_invalid_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {'file_id': 'pas-un-uuid'})
+        self.assertEqual(response.status_code, 400)
+        response, _content, _queries = self.export(export_format='xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_cannot_export(self):
+        response, _content, _queries = self.export(self.client_for(create_user('bob')))
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,156 @@
+# =============================================================================
+# files/tests/test_frameworks.py
+# =============================================================================
+
+"""Registre de signatures de frameworks (files/frameworks.py)"""
+
+import json
+import re
+
+from django.test import SimpleTestCase
+
+from files.frameworks import FrameworkRegistry, registry
+from files.tasks import detect_framework_from_json, detect_framework_from_po
+
+from . import legacy_frameworks
+
+
+def po_catalog(references, header=''):
+    parts = ['msgid ""\nmsgstr ""\n']
+    if header:
+        parts.append(f'"Project-Id-Version: {header}\\n"\n')
+    parts.append('\n')
+    for i, reference in enumerate(references):
+        parts.append(f'#: {reference}\nmsgid "Texte {i}"\nmsgstr ""\n\n')
+    return ''.join(parts)
+
+
+# Références PO typiques : (attendu, références, en-tête)
+PO_CASES = (
+    ('django', ['accounts/views.py:12', 'accounts/forms.py:3', 'templates/base.html:5'], ''),
+    ('django', ['app/views.py:3'], ''),
+    ('django', ['src/accounts/forms.py:8'], ''),
+    ('django', ['shop/views.py:1'], 'Django 5.0'),
+    ('django', ['blog/admin.py:10', 'blog/urls.py:2', 'blog/settings.py:1'], ''),
+    ('flask', ['app.py:10', 'routes.py:4', '__init__.py:1'], 'Flask App'),
+    ('vue', ['src/components/Foo.vue:3', 'src/components/Bar.vue:9'], ''),
+    ('vue', ['pages/index.vue:1', 'store/index.js:4'], ''),
+    ('react', ['src/App.jsx:10', 'src/components/Header.tsx:3'], ''),
+    ('angular', ['src/app/services/auth.service.ts:12', 'src/app/modules/core.module.ts:4'], ''),
+    ('laravel', ['resources/views/welcome.blade.php:3', 'app/Http/Controllers/Home.php:10',
+                 'routes/web.php:1'], ''),
+    ('symfony', ['templates/base.html.twig:3', 'translations/messages.xlf:1',
+                 'src/Controller/Home.php:9'], 'Symfony'),
+    ('wordpress', ['wp-content/themes/x/functions.php:3', 'wp-includes/y.php:4'], ''),
+    ('joomla', ['components/com_x/x.php:1', 'plugins/system/y.php:2'], 'Joomla 4'),
+    ('drupal', ['modules/custom/x.module:3', 'themes/custom/y.theme:1', 'sites/all/z.inc:2'], 'Drupal'),
+    ('javascript', ['lib/util.js:3'], ''),
+    ('generic', ['README:3'], ''),
+)
+
+# Structures JSON typiques : (attendu, document)
+JSON_CASES = (
+    ('react', {'app': {'title': 'React app'}, 'home': 'Bienvenue'}),
+    ('vue', {'message': {'hello': 'vue-i18n bonjour'}}),
+    ('angular', {'HOME': {'TITLE': 'ngx-translate demo'}}),
+    ('flutter', {'@@locale': 'fr', 'title': 'Flutter demo'}),
+    ('nuxt', {'nuxt': {'title': 'Accueil'}}),
+    ('svelte', {'svelte': {'title': 'Accueil'}}),
+    ('ember', {'ember': {'title': 'Accueil'}}),
+    ('i18n', {'locale': 'fr', 'greeting': 'Bonjour'}),
+    ('translation', {'messages': {'greeting': 'Bonjour'}}),
+    ('application', {'app': {'greeting': 'Bonjour'}}),
+    ('generic', {'greeting': 'Bonjour', 'farewell': 'Au revoir'}),
+)
+
+
+class BuiltinSignaturesTests(SimpleTestCase):
+    """Non-régression par rapport à la détection d'origine"""
+
+    def test_po_references_match_legacy_detection(self):
+        for expected, references, header in PO_CASES:
+            content = po_catalog(references, header)
+            with self.subTest(references=references):
+                self.assertEqual(legacy_frameworks.detect_framework_from_po(content), expected)
+                self.assertEqual(detect_framework_from_po(content), expected)
+
+    def test_json_structures_match_legacy_detection(self):
+        for expected, document in JSON_CASES:
+            content = json.dumps(document, ensure_ascii=False, indent=2)
+            with self.subTest(document=document):
+                self.assertEqual(legacy_frameworks.detect_framework_from_json(content), expected)
+                self.assertEqual(detect_framework_from_json(content), expected)
+
+    def test_overlapping_signatures_all_count(self):
+        # « src/ » et « components/ » ne masquent pas « .vue » ni le mot « vue »
+        framework, scores = registry.detect('#: src/components/Foo.vue', 'po')
+        self.assertEqual(framework, 'vue')
+        self.assertEqual(scores['vue'], 3)
+        self.assertEqual(scores['react'], 2)
+
+    def test_intended_differences(self):
+        # « Next » est un libellé courant, pas une signature de Next.js
+        labels = json.dumps({'buttons': {'next': 'Next', 'previous': 'Précédent'}})
+        self.assertEqual(legacy_frameworks.detect_framework_from_json(labels), 'nextjs')
+        self.assertEqual(detect_framework_from_json(labels), 'generic')
+        # « react-native » n'est plus pris pour React
+        native = json.dumps({'title': 'react-native demo'})
+        self.assertEqual(legacy_frameworks.detect_framework_from_json(native), 'react')
+        self.assertEqual(detect_framework_from_json(native), 'react-native')
+        # Un échantillon tronqué reste analysé
+        self.assertEqual(detect_framework_from_json('{"title": "vue-i18n demo", "cut'), 'vue')
+
+
+class FrameworkRegistryTests(SimpleTestCase):
+
+    def setUp(self):
+        self.registry = FrameworkRegistry()
+
+    def test_each_signature_counts_once(self):
+        self.registry.register('po', 'rails', keywords=['app/views/'], extensions=['rb', 'erb'])
+        self.registry.register('po', 'sinatra', extensions=['rb'])
+        content = '#: app/views/a.erb\n#: app/views/b.erb\n#: lib/c.rb\n'
+        framework, scores = self.registry.detect(content, 'po')
+        self.assertEqual(framework, 'rails')
+        self.assertEqual(scores, {'rails': 3, 'sinatra': 1})
+
+    def test_prefix_keywords_both_match(self):
+        self.registry.register('json', 'vue', keywords=['vue'])
+        self.registry.register('json', 'vue-i18n', keywords=['vue-i18n'], weight=2)
+        self.assertEqual(
+            self.registry.scan('"vue-i18n"', 'json'),
+            ({'vue': 1, 'vue-i18n': 2}, {}),
+        )
+
+    def test_keywords_start_a_word_and_extensions_end_one(self):
+        self.registry.register('po', 'vue', keywords=['vue'], extensions=['vue'])
+        self.registry.register('po', 'typescript', extensions=['ts'])
+        self.assertEqual(self.registry.scan('#: revue.tsx', 'po'), ({}, {}))
+        self.assertEqual(self.registry.scan('#: Foo.VUE', 'po'), ({'vue': 2}, {}))
+
+    def test_ties_go_to_the_first_registered_framework(self):
+        self.registry.register('po', 'first', keywords=['shared/'])
+        self.registry.register('po', 'second', keywords=['other/', 'shared/'])
+        self.assertEqual(self.registry.detect('#: other/a.py', 'po')[0], 'second')
+        self.assertEqual(self.registry.detect('#: other/a.py shared/b.py', 'po')[0], 'second')
+        self.assertEqual(self.registry.detect('#: shared/b.py', 'po')[0], 'first')
+
+    def test_fallback_only_without_main_framework(self):
+        self.registry.register('json', 'i18n', patterns=[r'"locale"\s*:'], fallback=True)
+        self.registry.register('json', 'vue', keywords=['vue'])
+        self.assertEqual(self.registry.detect('{"locale": "fr"}', 'json')[0], 'i18n')
+        self.assertEqual(self.registry.detect('{"locale": "fr", "vue": 1}', 'json')[0], 'vue')
+
+    def test_registration_invalidates_compiled_signatures(self):
+        self.registry.register('po', 'django', extensions=['py'])
+        self.assertEqual(self.registry.detect('#: a.rb', 'po')[0], None)
+        self.registry.register('po', 'rails', extensions=['rb'])
+        self.assertEqual(self.registry.detect('#: a.rb', 'po')[0], 'rails')
+
+    def test_invalid_pattern_is_rejected_at_registration(self):
+        with self.assertRaises(re.error):
+            self.registry.register('po', 'broken', patterns=['('])
+
+    def test_accented_letter_does_not_start_a_word(self):
+        self.registry.register('po', 'vue', keywords=['vue'])
+        self.assertEqual(self.registry.scan('msgid "Date prévue"', 'po'), ({}, {}))
@@ -0,0 +1,89 @@
+# =============================================================================
+# files/tests/test_ingestion.py
+# =============================================================================
+
+"""Source d'ingestion projetée en mémoire (files/ingestion.py)"""
+
+import codecs
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from files.ingestion import IngestionSource
+from files.parsers import iter_po_entries
+
+
+def po_catalog(count):
+    lines = ['msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=UTF-8\\n"\n\n']
+    for i in range(count):
+        lines.append(f'#: app/views.py:{i}\nmsgid "Texte {i} é"\nmsgstr ""\n\n')
+    lines.append('#~ msgid "Ancien"\n#~ msgstr "Old"\n')
+    return ''.join(lines)
+
+
+class IngestionSourceTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, data, name='catalog.po'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_detect_encoding(self):
+        cases = (
+            (codecs.BOM_UTF8 + b'msgid "a"', 'utf-8-sig'),
+            (codecs.BOM_UTF16_LE + 'msgid'.encode('utf-16-le'), 'utf-16'),
+            ('msgid "Été"'.encode('utf-8'), 'utf-8'),
+        )
+        for data, expected in cases:
+            with self.subTest(expected=expected), IngestionSource(self.write(data)) as source:
+                self.assertEqual(source.detect_encoding(), (expected, 1.0))
+
+    def test_truncated_utf8_sample_is_still_utf8(self):
+        # « é » coupé en fin d'échantillon : pas une erreur de décodage
+        data = ('a' * 9 + 'é').encode('utf-8')
+        with IngestionSource(self.write(data)) as source:
+            self.assertEqual(source.detect_encoding(sample_size=10)[0], 'utf-8')
+            self.assertEqual(source.text_sample(10, 'utf-8'), 'a' * 9)
+
+    def test_empty_file(self):
+        with IngestionSource(self.write(b'')) as source:
+            self.assertEqual(source.size, 0)
+            self.assertEqual(source.detect_encoding()[0], 'utf-8')
+            with source.open_text('utf-8') as stream:
+                self.assertEqual(stream.read(), '')
+            self.assertEqual(source.count_po_entries(), 0)
+
+    def test_open_text_reads_range_with_prefix_and_suffix(self):
+        data = b'{"a": "1", "b": "2", "c": "3"}'
+        with IngestionSource(self.write(data, 'catalog.json')) as source:
+            start = data.index(b'"b"')
+            end = data.index(b', "c"')
+            with source.open_text('utf-8', start, end, prefix=b'{', suffix=b'}') as stream:
+                self.assertEqual(stream.read(), '{"b": "2"}')
+            with source.open_text('unknown-encoding') as stream:
+                self.assertEqual(stream.read(), data.decode())
+
+    def test_counts_match_parser(self):
+        text = po_catalog(500)
+        with IngestionSource(self.write(text.encode('utf-8'))) as source:
+            with source.open_text('utf-8') as stream:
+                entries = list(iter_po_entries(stream))
+            # Blocs minuscules : motifs « \nmsgid » à cheval sur deux blocs
+            for chunk_size in (7, 64, 1024 * 1024):
+                with self.subTest(chunk_size=chunk_size):
+                    self.assertEqual(source.count_po_entries(chunk_size=chunk_size), len(entries))
+                    self.assertEqual(source.count_lines(chunk_size=chunk_size), text.count('\n'))
+
+    def test_buffer_released_on_close(self):
+        source = IngestionSource(self.write(po_catalog(3).encode('utf-8')))
+        with source:
+            sample = source.text_sample(100, 'utf-8')
+        self.assertTrue(sample.startswith('msgid ""'))
+        self.assertIsNone(source.buffer)
@@ -0,0 +1,158 @@
+# =============================================================================
+# files/tests/test_parsers.py
+# =============================================================================
+
+"""Lecteurs en flux de files/parsers.py, comparés à polib et à flatten_json"""
+
+import glob
+import io
+import json
+import os
+
+import django
+import polib
+from django.test import SimpleTestCase
+
+from files.parsers import JSONStreamFlattener, JSONStructureError, iter_po_entries
+from files.tasks import flatten_json
+
+
+# Commence par un BOM UTF-8, ignoré par les deux lecteurs
+PO_SAMPLE = '\ufeff' + '''# Traductions de test
+msgid ""
+msgstr ""
+"Project-Id-Version: Test 1.0\\n"
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=2; plural=(n > 1);\\n"
+
+#. Commentaire extrait
+#. sur deux lignes
+#: accounts/views.py:12 accounts/forms.py:3
+#: templates/base.html
+#, fuzzy, python-format
+#| msgid "Old %(name)s"
+msgid "Hello %(name)s"
+msgstr "Bonjour %(name)s"
+
+msgctxt "menu"
+msgid "Open"
+msgstr "Ouvrir"
+
+msgid ""
+"Multi-line "
+"source with \\"quotes\\"\\n"
+"and a \\\\ backslash"
+msgstr ""
+"Texte sur "
+"plusieurs lignes"
+
+msgid "%d file"
+msgid_plural "%d files"
+msgstr[0] "%d fichier"
+msgstr[1] "%d fichiers"
+
+msgid "Untranslated"
+msgstr ""
+
+#~ msgid "Obsolete"
+#~ msgstr "Obsolète"
+'''
+
+# Attributs communs à polib.POEntry et POStreamEntry
+FIELDS = (
+    'msgctxt', 'msgid', 'msgid_plural', 'msgstr', 'msgstr_plural',
+    'flags', 'occurrences', 'comment', 'obsolete', 'linenum',
+)
+
+
+class IterPOEntriesTests(SimpleTestCase):
+
+    def assertSameEntries(self, expected, entries):
+        self.assertEqual(len(entries), len(expected))
+        for reference, entry in zip(expected, entries):
+            for field in FIELDS:
+                self.assertEqual(getattr(entry, field), getattr(reference, field), f'{field} de {reference.msgid!r}')
+
+    def test_matches_polib_on_sample(self):
+        entries = list(iter_po_entries(PO_SAMPLE.splitlines(keepends=True)))
+        self.assertSameEntries(list(polib.pofile(PO_SAMPLE)), entries)
+
+    def test_sample_fields(self):
+        entries = {(entry.msgctxt, entry.msgid): entry for entry in iter_po_entries(PO_SAMPLE.splitlines())}
+        hello = entries[(None, 'Hello %(name)s')]
+        self.assertTrue(hello.fuzzy)
+        self.assertEqual(hello.occurrences, [
+            ('accounts/views.py', '12'), ('accounts/forms.py', '3'), ('templates/base.html', ''),
+        ])
+        self.assertEqual(hello.comment, 'Commentaire extrait\nsur deux lignes')
+        self.assertEqual(entries[('menu', 'Open')].msgstr, 'Ouvrir')
+        self.assertEqual(entries[(None, 'Multi-line source with "quotes"\nand a \\ backslash')].msgstr,
+                         'Texte sur plusieurs lignes')
+        self.assertEqual(entries[(None, '%d file')].msgstr_plural, {0: '%d fichier', 1: '%d fichiers'})
+        self.assertTrue(entries[(None, 'Obsolete')].obsolete)
+
+    def test_header_only_on_request(self):
+        entries = list(iter_po_entries(PO_SAMPLE.splitlines(), include_header=True))
+        self.assertEqual(entries[0].msgid, '')
+        self.assertIn('Project-Id-Version: Test 1.0', entries[0].msgstr)
+        self.assertNotIn('', [entry.msgid for entry in iter_po_entries(PO_SAMPLE.splitlines())])
+
+    def test_syntax_error(self):
+        with self.assertRaises(IOError):
+            list(iter_po_entries(['msgid "a"\n', 'garbage\n']))
+        with self.assertRaises(IOError):
+            list(iter_po_entries(['"orphan continuation"\n']))
+
+    def test_matches_polib_on_django_catalogs(self):
+        # Catalogues réels livrés avec Django : contextes, pluriels, formats
+        root = os.path.dirname(django.__file__)
+        paths = sorted(glob.glob(os.path.join(root, 'contrib', '*', 'locale', 'fr', 'LC_MESSAGES', '*.po')))
+        self.assertTrue(paths)
+        for path in paths:
+            with self.subTest(path=os.path.relpath(path, root)), open(path, encoding='utf-8') as stream:
+                self.assertSameEntries(list(polib.pofile(path)), list(iter_po_entries(stream)))
+
+
+JSON_SAMPLE = '''{
+    "app": {"title": "Mon application", "version": 2, "beta": true, "empty": {}},
+    "menu": ["Accueil", {"label": "Profil", "items": ["Voir", "Modifier"]}, 3.5, null],
+    "escapes": "Guillemets \\" barre \\\\ saut\\n unicode \\u00e9\\ud83d\\ude00",
+    "nested": {"deep": {"deeper": {"key": "Valeur profonde"}}},
+    "numbers": [-1, 0, 1e3, 2.5E-2],
+    "nothing": null,
+    "list": [],
+    "clé accentuée": "Été"
+}'''
+
+
+class JSONStreamFlattenerTests(SimpleTestCase):
+
+    def flatten(self, text, **kwargs):
+        return list(JSONStreamFlattener(io.StringIO(text), **kwargs))
+
+    def test_matches_flatten_json(self):
+        expected = list(flatten_json(json.loads(JSON_SAMPLE)).items())
+        # Petits blocs : jetons coupés à cheval sur deux lectures
+        for chunk_size in (1, 7, 64 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.flatten(JSON_SAMPLE, chunk_size=chunk_size), expected)
+
+    def test_separator(self):
+        self.assertEqual(
+            self.flatten(JSON_SAMPLE, separator='/'),
+            list(flatten_json(json.loads(JSON_SAMPLE), separator='/').items()),
+        )
+
+    def test_position_reaches_end(self):
+        flattener = JSONStreamFlattener(io.StringIO(JSON_SAMPLE), chunk_size=16)
+        list(flattener)
+        self.assertEqual(flattener.position, len(JSON_SAMPLE))
+
+    def test_root_must_be_an_object(self):
+        with self.assertRaises(JSONStructureError):
+            self.flatten('["a", "b"]')
+
+    def test_malformed_documents(self):
+        for text in ('', '{"a": }', '{"a": "b"', '{"a": "b"} trailing', '{"a" "b"}'):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                self.flatten(text)
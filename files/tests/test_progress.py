@@ -0,0 +1,113 @@
+# =============================================================================
+# files/tests/test_progress.py
+# =============================================================================
+
+"""Publication limitée de la progression (files/progress.py)"""
+
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from files.progress import ProgressReporter, fetch_task_meta
+
+
+class RecordingTask:
+    def __init__(self, fail=False):
+        self.states = []
+        self.fail = fail
+
+    def update_state(self, task_id=None, state=None, meta=None):
+        if self.fail:
+            raise ConnectionError('backend indisponible')
+        self.states.append((task_id, state, meta))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ProgressReporterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.task = RecordingTask()
+        self.clock = Clock()
+        self.reporter = ProgressReporter(self.task, total=1000, interval_ms=500, percent_step=5, clock=self.clock)
+
+    def test_first_update_is_published(self):
+        self.reporter.update(1, strings_created=1)
+        self.assertEqual(self.task.states, [(None, 'PROGRESS', {
+            'current': 1, 'total': 1000, 'strings_created': 1, 'progress': 0,
+        })])
+
+    def test_updates_are_throttled(self):
+        for i in range(1, 41):
+            self.reporter.update(i)
+        # 4 % seulement en 0 s : rien de plus que la première publication
+        self.assertEqual(self.reporter.published, 1)
+        self.clock.now = 0.5
+        self.reporter.update(41)
+        self.assertEqual(self.reporter.published, 2)
+
+    def test_percent_step_publishes_early(self):
+        self.reporter.update(0)
+        self.reporter.update(49)
+        self.assertEqual(self.reporter.published, 1)
+        self.reporter.update(50)
+        self.assertEqual(self.reporter.published, 2)
+        self.assertEqual(self.task.states[-1][2]['progress'], 5)
+
+    def test_flush_publishes_last_state_once(self):
+        self.reporter.update(0)
+        self.reporter.update(10)
+        self.reporter.flush()
+        self.reporter.flush()
+        self.assertEqual(self.reporter.published, 2)
+        self.assertEqual(self.task.states[-1][2]['current'], 10)
+
+    def test_progress_capped_below_100(self):
+        self.reporter.update(1000)
+        self.assertEqual(self.reporter.meta['progress'], 99)
+        # Un total sous-estimé suit l'avancement
+        self.reporter.update(1500)
+        self.assertEqual(self.reporter.meta['total'], 1500)
+
+    def test_task_id_and_backend_errors(self):
+        reporter = ProgressReporter(RecordingTask(fail=True), total=10, task_id='parent')
+        with self.assertLogs('files.progress', level='WARNING'):
+            reporter.update(1)
+        self.assertEqual(reporter.published, 0)
+
+        task = RecordingTask()
+        ProgressReporter(task, total=10, task_id='parent').update(1)
+        self.assertEqual(task.states[0][0], 'parent')
+
+
+class KeyValueBackend:
+    def __init__(self, values):
+        self.values = values
+
+    def get_key_for_task(self, task_id):
+        return f'celery-task-meta-{task_id}'
+
+    def mget(self, keys):
+        self.calls = getattr(self, 'calls', 0) + 1
+        return [self.values.get(key) for key in keys]
+
+    def decode_result(self, value):
+        return {'status': 'PROGRESS', 'result': value}
+
+
+class FetchTaskMetaTests(SimpleTestCase):
+
+    def test_single_mget_for_all_tasks(self):
+        backend = KeyValueBackend({'celery-task-meta-a': {'progress': 10}})
+        metas = fetch_task_meta(['a', 'b', 'a', None], app=SimpleNamespace(backend=backend))
+        self.assertEqual(metas, {'a': {'status': 'PROGRESS', 'result': {'progress': 10}}})
+        self.assertEqual(backend.calls, 1)
+
+    def test_no_task_ids(self):
+        self.assertEqual(fetch_task_meta([None, ''], app=SimpleNamespace(backend=None)), {})
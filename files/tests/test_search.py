@@ -0,0 +1,201 @@
+# =============================================================================
+# files/tests/test_search.py
+# =============================================================================
+
+"""Recherche plein texte des chaînes (files/search.py)"""
+
+import unittest
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from files import search
+from files.models import TranslationString
+
+from .test_views import FileAPITestCase
+from .utils import create_file, create_user
+
+
+STRINGS = [
+    ('file.save', 'Sauvegarder le fichier', ''),
+    ('file.open', 'Ouvrir un fichier', 'menu'),
+    ('app.title', 'Titre de l’application', ''),
+    ('greeting', 'Bonjour %(name)s', ''),
+    ('items.count', '{count} éléments sauvegardés', 'liste'),
+]
+
+
+def create_search_strings(translation_file):
+    return {
+        key: TranslationString.objects.create(
+            file=translation_file, key=key, source_text=source_text, context=context, line_number=i + 1
+        )
+        for i, (key, source_text, context) in enumerate(STRINGS)
+    }
+
+
+def keys(queryset):
+    return sorted(queryset.values_list('key', flat=True))
+
+
+class SearchQueryTests(SimpleTestCase):
+
+    def test_is_word_query(self):
+        for query in ('sauv', 'Sauvegarder fichier', '  éléments  ', 'v2'):
+            with self.subTest(query=query):
+                self.assertTrue(search.is_word_query(query))
+        for query in ('', 'app.title', '%(name)s', '{count}', 'file_save', 'l’application'):
+            with self.subTest(query=query):
+                self.assertFalse(search.is_word_query(query))
+
+    def test_search_terms(self):
+        self.assertEqual(search.search_terms('Sauv  FICHIER'), ['sauv', 'fichier'])
+        self.assertEqual(len(search.search_terms(' '.join('mot' for _i in range(20)))), search.MAX_TERMS)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "index FTS5 propre à SQLite")
+class SQLiteSearchTests(TestCase):
+
+    def setUp(self):
+        search._available.clear()
+        self.addCleanup(search._available.clear)
+        self.translation_file = create_file(create_user())
+        self.strings = create_search_strings(self.translation_file)
+        self.queryset = TranslationString.objects.all()
+
+    def test_index_is_installed_by_migrations(self):
+        self.assertIsInstance(search.get_backend(), search.SQLiteFTS5Backend)
+
+    def test_word_queries_match_prefixes_of_every_term(self):
+        results = search.search_strings(self.queryset, 'sauv')
+        self.assertTrue(search.is_ranked(results))
+        self.assertEqual(keys(results), ['file.save', 'items.count'])
+        self.assertEqual(keys(search.search_strings(self.queryset, 'fich sauv')), ['file.save'])
+        self.assertEqual(keys(search.search_strings(self.queryset, 'MENU')), ['file.open'])
+        self.assertEqual(keys(search.search_strings(self.queryset, 'fichier absent')), [])
+
+    def test_punctuation_keeps_icontains(self):
+        for query, expected in (('app.title', ['app.title']), ('%(name)s', ['greeting']),
+                                ('{count}', ['items.count']), ('e.sa', ['file.save'])):
+            with self.subTest(query=query):
+                results = search.search_strings(self.queryset, query)
+                self.assertFalse(search.is_ranked(results))
+                self.assertEqual(keys(results), expected)
+
+    def check_index(self):
+        fts = search.get_backend().fts
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {fts}({fts}, rank) VALUES ('integrity-check', 1)")
+
+    def test_index_follows_updates_and_deletes(self):
+        string = self.strings['file.open']
+        search_id = TranslationString.objects.get(pk=string.pk).search_id
+        self.assertIsNotNone(search_id)
+        string.source_text = 'Exporter le catalogue'
+        # L'instance créée ici a search_id à None : save() ne le perd pas
+        string.save()
+        self.assertEqual(TranslationString.objects.get(pk=string.pk).search_id, search_id)
+        self.assertEqual(keys(search.search_strings(self.queryset, 'ouvrir')), [])
+        self.assertEqual(keys(search.search_strings(self.queryset, 'export')), ['file.open'])
+
+        TranslationString.objects.filter(key='file.save').update(source_text='Enregistrer')
+        self.assertEqual(keys(search.search_strings(self.queryset, 'sauv')), ['items.count'])
+
+        self.strings['items.count'].delete()
+        self.assertEqual(keys(search.search_strings(self.queryset, 'sauv')), [])
+        self.translation_file.delete()
+        self.check_index()
+
+    def test_rank_prefers_key_matches(self):
+        other = create_file(self.translation_file.uploaded_by, name='other.po')
+        TranslationString.objects.create(file=other, key='menu.help', source_text='Aide', line_number=1)
+        results = search.search_strings(self.queryset, 'menu').order_by('search_rank')
+        self.assertEqual(list(results.values_list('key', flat=True)), ['menu.help', 'file.open'])
+
+    def test_window_is_ranked_like_the_index(self):
+        other = create_file(self.translation_file.uploaded_by, name='other.po')
+        TranslationString.objects.create(file=other, key='menu.help', source_text='Aide', line_number=1)
+        for query in ('sauv', 'menu', 'fich', 'fichier sauv'):
+            with self.subTest(query=query):
+                ranked = search.search_strings(self.queryset, query).order_by('search_rank', 'line_number', 'key')
+                rows, count = search.search_page(ranked, 0, 10)
+                self.assertEqual([row.key for row in rows], list(ranked.values_list('key', flat=True)))
+                self.assertEqual(count, len(rows))
+
+    def test_rows_beyond_the_window_follow_newest_first(self):
+        ranked = search.search_strings(self.queryset, 'sauv fich').order_by('search_rank')
+        extra = create_file(self.translation_file.uploaded_by, name='extra.po')
+        for i in range(5):
+            TranslationString.objects.create(
+                file=extra, key=f'extra{i}', source_text='Sauvegarder les fichiers', line_number=i
+            )
+        with override_settings(FILES_SEARCH_RANK_WINDOW=3):
+            pages = [search.search_page(ranked.values('key'), offset, 2) for offset in range(0, 8, 2)]
+        # Fenêtre des trois plus récentes (ex æquo : ordre de l'index), puis les suivantes
+        self.assertEqual([count for _rows, count in pages], [None] * 4)
+        self.assertEqual([row['key'] for rows, _count in pages for row in rows], [
+            'extra4', 'extra3', 'extra2', 'extra1', 'extra0', 'file.save'
+        ])
+
+    def test_rebuild_index(self):
+        backend = search.get_backend()
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {backend.fts}({backend.fts}) VALUES ('delete-all')")
+        self.assertEqual(keys(search.search_strings(self.queryset, 'sauv')), [])
+        self.assertTrue(search.rebuild_index(connection))
+        self.assertEqual(keys(search.search_strings(self.queryset, 'sauv')), ['file.save', 'items.count'])
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "index FTS5 propre à SQLite")
+class SQLiteVacuumTests(TransactionTestCase):
+    """VACUUM renumérote les rowid implicites : l'index est lié à search_id"""
+
+    def test_search_survives_vacuum(self):
+        search._available.clear()
+        self.addCleanup(search._available.clear)
+        translation_file = create_file(create_user())
+        strings = create_search_strings(translation_file)
+        # Des trous dans les rowid, que VACUUM referme
+        strings['file.open'].delete()
+        strings['app.title'].delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
+        results = search.search_strings(TranslationString.objects.all(), 'sauv')
+        self.assertEqual(keys(results), ['file.save', 'items.count'])
+        self.assertEqual(
+            set(results.values_list('id', flat=True)), {strings['file.save'].id, strings['items.count'].id}
+        )
+
+
+class SearchAPITests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        search._available.clear()
+        self.addCleanup(search._available.clear)
+        create_search_strings(create_file(self.user))
+        create_search_strings(create_file(create_user('bob'), name='bob.po'))
+
+    def get_keys(self, query, **params):
+        response = self.client.get(reverse('translationstring-list'), {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['key'] for row in response.data['results']]
+
+    def test_search_is_limited_to_own_strings(self):
+        self.assertCountEqual(self.get_keys('sauv'), ['file.save', 'items.count'])
+        self.assertEqual(self.get_keys('%(name)s'), ['greeting'])
+
+    @override_settings(FILES_SEARCH_RANK_WINDOW=1)
+    def test_large_results_are_not_counted(self):
+        response = self.client.get(reverse('translationstring-list'), {'search': 'sauv', 'page_size': 1})
+        self.assertEqual(response.data['pagination']['count'], None)
+        self.assertTrue(response.data['pagination']['has_next'])
+        last = self.client.get(response.data['pagination']['next'])
+        self.assertEqual(len(last.data['results']), 1)
+        self.assertEqual((last.data['pagination']['count'], last.data['pagination']['total_pages']), (2, 2))
+        self.assertEqual(self.client.get(reverse('translationstring-list'), {'search': 'sauv', 'page': 3}).status_code, 404)
+
+    def test_explicit_ordering_overrides_rank(self):
+        self.assertEqual(self.get_keys('sauv', ordering='-key'), ['items.count', 'file.save'])
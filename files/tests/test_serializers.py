@@ -0,0 +1,88 @@
+# =============================================================================
+# files/tests/test_serializers.py
+# =============================================================================
+
+"""Sélection des champs ``?fields=`` / ``?exclude=`` (files/serializers.py)"""
+
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+
+from files.serializers import requested_fields
+
+from .test_views import FileAPITestCase
+from .utils import create_file, create_strings
+
+
+class RequestedFieldsTests(SimpleTestCase):
+    available = ('id', 'key', 'source_text', 'context')
+
+    def fields_for(self, method='get', **params):
+        request = getattr(APIRequestFactory(), method)('/', params)
+        return requested_fields(request, self.available)
+
+    def test_selection(self):
+        self.assertIsNone(self.fields_for())
+        self.assertEqual(self.fields_for(fields='context, id,inconnu'), ('id', 'context'))
+        self.assertEqual(self.fields_for(exclude='source_text'), ('id', 'key', 'context'))
+        self.assertEqual(self.fields_for(fields='id,key', exclude='key'), ('id',))
+
+    def test_writes_ignore_the_selection(self):
+        self.assertIsNone(self.fields_for('post', fields='id'))
+        self.assertIsNone(requested_fields(None, self.available))
+
+
+class SparseFieldsetAPITests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.translation_file = create_file(self.user, status='completed')
+        create_strings(self.translation_file, 3)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, queries
+
+    def test_file_list_skips_unrequested_fields(self):
+        create_file(self.user, name='processing.po', status='processing', task_id='task-1')
+        with mock.patch('files.serializers.fetch_task_meta', return_value={}) as fetch:
+            response, _queries = self.get(reverse('translationfile-list'), fields='id,status')
+            self.assertEqual(list(response.data['results'][0]), ['id', 'status'])
+            fetch.assert_not_called()
+
+            response, _queries = self.get(reverse('translationfile-list'), exclude='uploaded_by')
+            self.assertNotIn('uploaded_by', response.data['results'][0])
+            self.assertIn('processing_progress', response.data['results'][0])
+            fetch.assert_called_once()
+
+    def test_string_list_reads_only_requested_columns(self):
+        response, queries = self.get(reverse('translationstring-list'), fields='id,key')
+        self.assertEqual([list(row) for row in response.data['results']], [['id', 'key']] * 3)
+        select = queries.captured_queries[-1]['sql']
+        self.assertNotIn('source_text', select)
+        self.assertNotIn('files_translation"', select)
+
+    def test_string_detail_drops_nested_serializers(self):
+        string = self.translation_file.strings.get(key='key0')
+        url = reverse('translationstring-detail', args=[string.id])
+        full, full_queries = self.get(url)
+        self.assertIn('file_details', full.data)
+
+        response, queries = self.get(url, fields='id,key,is_translated')
+        self.assertEqual(response.data, {'id': str(string.id), 'key': 'key0', 'is_translated': False})
+        self.assertLess(len(queries), len(full_queries))
+
+    def test_writes_return_every_field(self):
+        response = self.client.patch(
+            f"{reverse('translationfile-detail', args=[self.translation_file.id])}?fields=id",
+            {'original_filename': 'renomme.po'}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIn('original_filename', response.data)
+        self.assertIn('status', response.data)
@@ -0,0 +1,86 @@
+# =============================================================================
+# files/tests/test_stats.py
+# =============================================================================
+
+"""Statistiques des fichiers et des chaînes (files/stats.py)"""
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from files.models import TranslationFile, TranslationString
+
+from .test_views import FileAPITestCase
+from .utils import create_file, create_strings, create_user
+
+
+class StatisticsTests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.bob = create_user('bob')
+        first = create_file(self.user, name='a.po', status='completed')
+        create_strings(first, 4, is_translated=True)
+        create_strings(create_file(self.user, name='b.json', file_type='json'), 2, is_fuzzy=True)
+        create_strings(create_file(self.bob, name='bob.po', status='error'), 5)
+
+    def get(self, kind, client=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                response = (client or self.client).get(reverse(f'{kind}-statistics'))
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_file_statistics_in_one_query(self):
+        stats, queries = self.get('translationfile')
+        self.assertEqual(queries, 1)
+        self.assertEqual(stats['total_files'], 2)
+        self.assertEqual(stats['by_status'], {'uploaded': 1, 'completed': 1})
+        self.assertEqual(stats['by_type'], {'po': 1, 'json': 1})
+        self.assertEqual(stats['total_strings'], 6)
+
+    def test_string_statistics_read_counters(self):
+        stats, queries = self.get('translationstring')
+        self.assertEqual(queries, 1)
+        self.assertEqual(stats, {
+            'total_strings': 6, 'translated': 4, 'untranslated': 2, 'fuzzy': 2, 'plural': 0,
+            'by_file': {'a.po': 4, 'b.json': 2}, 'progress_percentage': 66.67,
+        })
+
+    def test_staff_sees_every_file(self):
+        staff = create_user('admin')
+        staff.is_staff = True
+        staff.save()
+        stats, _queries = self.get('translationstring', self.client_for(staff))
+        self.assertEqual(stats['total_strings'], 11)
+        self.assertEqual(stats['by_file']['bob.po'], 5)
+
+    def test_cache_is_per_user(self):
+        self.get('translationstring')
+        stats, queries = self.get('translationstring')
+        self.assertEqual(queries, 0)
+        self.assertEqual(stats['total_strings'], 6)
+
+        bob_stats, queries = self.get('translationstring', self.client_for(self.bob))
+        self.assertEqual(queries, 1)
+        self.assertEqual(bob_stats['total_strings'], 5)
+
+    def test_writes_refresh_only_the_owner(self):
+        self.get('translationstring')
+        self.get('translationstring', self.client_for(self.bob))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TranslationString.objects.filter(file__uploaded_by=self.user, is_fuzzy=True).update(is_translated=True)
+        stats, queries = self.get('translationstring')
+        self.assertEqual(queries, 1)
+        self.assertEqual(stats['translated'], 6)
+        _stats, queries = self.get('translationstring', self.client_for(self.bob))
+        self.assertEqual(queries, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TranslationFile.objects.get(original_filename='b.json').delete()
+        stats, _queries = self.get('translationfile')
+        self.assertEqual(stats['total_files'], 1)
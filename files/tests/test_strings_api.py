@@ -0,0 +1,199 @@
+# =============================================================================
+# files/tests/test_strings_api.py
+# =============================================================================
+
+"""API des chaînes de traduction (files/views.py : TranslationStringViewSet)"""
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from files.models import TranslationString
+from files.serializers import TranslationStringListSerializer
+from translations.models import Language, Translation
+
+from .test_views import FileAPITestCase
+from .utils import create_file, create_strings, create_user
+
+
+class CursorPaginationTests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.translation_file = create_file(self.user)
+        # Lignes nulles, ex æquo sur la ligne et sur la clé (autre fichier)
+        for i, line_number in enumerate([None, 3, None, 1, 3, 2, None, 3, 1, None, 2]):
+            TranslationString.objects.create(
+                file=self.translation_file, key=f'k{i % 4}-{i}', source_text=f'Texte {i}', line_number=line_number
+            )
+        other = create_file(self.user, name='other.po')
+        for key, line_number in (('k3-3', 1), ('k1-1', 3)):
+            TranslationString.objects.create(file=other, key=key, source_text='Autre', line_number=line_number)
+        self.url = reverse('translationstring-list')
+
+    def expected(self):
+        return [str(pk) for pk in TranslationString.objects.order_by('line_number', 'key', 'id')
+                .values_list('id', flat=True)]
+
+    def walk(self, url, direction='next'):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([str(row['id']) for row in response.data['results']])
+            url = response.data['pagination'][direction]
+        return pages
+
+    def test_forward_pages_cover_every_row_once(self):
+        pages = self.walk(f'{self.url}?cursor=&page_size=4')
+        self.assertEqual([len(page) for page in pages], [4, 4, 4, 1])
+        self.assertEqual([pk for page in pages for pk in page], self.expected())
+
+    def test_backward_pages_match_forward_pages(self):
+        forward = self.walk(f'{self.url}?cursor=&page_size=3')
+        response = self.client.get(f'{self.url}?cursor=&page_size=3')
+        # Dernière page, puis retour par les liens « previous »
+        url = response.data['pagination']['next']
+        while True:
+            response = self.client.get(url)
+            if not response.data['pagination']['next']:
+                break
+            url = response.data['pagination']['next']
+        backward = self.walk(url, direction='previous')
+        self.assertEqual(list(reversed(backward)), forward)
+        self.assertIsNone(response.data['pagination']['count'])
+
+    def test_rows_inserted_before_the_cursor_do_not_shift_pages(self):
+        response = self.client.get(f'{self.url}?cursor=&page_size=5')
+        first = [str(row['id']) for row in response.data['results']]
+        TranslationString.objects.create(file=self.translation_file, key='a', source_text='Nouveau', line_number=None)
+
+        rest = self.walk(response.data['pagination']['next'])
+        seen = first + [pk for page in rest for pk in page]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), TranslationString.objects.count() - 1)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'{self.url}?cursor=pas-un-curseur')
+        self.assertEqual(response.status_code, 404)
+
+
+class BulkUpdateTests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.translation_file = create_file(self.user)
+        create_strings(self.translation_file, 6)
+        self.bob = create_user('bob')
+        self.bob_file = create_file(self.bob, name='bob.po')
+        create_strings(self.bob_file, 2)
+        self.url = reverse('translationstring-bulk-update')
+
+    def string_id(self, translation_file, key):
+        return str(translation_file.strings.get(key=key).id)
+
+    def post(self, items, client=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = (client or self.client).post(self.url, items, format='json')
+        return response, len(queries)
+
+    def test_mixed_results_in_request_order(self):
+        own = self.string_id(self.translation_file, 'key0')
+        foreign = self.string_id(self.bob_file, 'key0')
+        response, _queries = self.post([
+            {'id': own, 'translated_text': 'Bonjour', 'is_translated': True},
+            {'id': foreign, 'translated_text': 'Volé', 'is_translated': True},
+            {'id': 'pas-un-uuid', 'is_fuzzy': True},
+            {'id': own, 'is_fuzzy': True},
+            {'id': self.string_id(self.translation_file, 'key1')},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['updated', 'not_found', 'invalid', 'invalid', 'invalid']
+        )
+        self.assertEqual((response.data['updated'], response.data['failed']), (1, 4))
+        self.assertEqual(TranslationString.objects.get(id=own).translated_text, 'Bonjour')
+        # Les chaînes d'un autre utilisateur ne sont ni modifiées ni révélées
+        self.assertEqual(TranslationString.objects.get(id=foreign).translated_text, '')
+        self.assertEqual(self.bob_file.strings.filter(is_translated=True).count(), 0)
+
+    def test_staff_can_edit_every_file(self):
+        staff = create_user('admin')
+        staff.is_staff = True
+        staff.save()
+        response, _queries = self.post(
+            [{'id': self.string_id(self.bob_file, 'key1'), 'is_translated': True}], self.client_for(staff)
+        )
+        self.assertEqual(response.data['results'][0]['status'], 'updated')
+        self.bob_file.refresh_from_db()
+        self.assertEqual(self.bob_file.translated_count, 1)
+
+    def test_query_count_and_counters(self):
+        ids = list(self.translation_file.strings.values_list('id', flat=True))
+        _response, few = self.post([{'id': str(pk), 'is_fuzzy': True} for pk in ids[:2]])
+        response, many = self.post([{'id': str(pk), 'is_translated': True} for pk in ids])
+        self.assertEqual(response.data['updated'], 6)
+        self.assertEqual(many, few)
+        self.translation_file.refresh_from_db()
+        self.assertEqual((self.translation_file.translated_count, self.translation_file.fuzzy_count), (6, 2))
+
+    @override_settings(FILES_BULK_UPDATE_MAX_ITEMS=2)
+    def test_invalid_payloads(self):
+        response, _queries = self.post({'id': self.string_id(self.translation_file, 'key0')})
+        self.assertEqual(response.status_code, 400)
+        response, _queries = self.post([])
+        self.assertEqual(response.status_code, 400)
+        response, _queries = self.post([{'id': self.string_id(self.translation_file, 'key0'), 'is_fuzzy': True}] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.translation_file.strings.filter(is_fuzzy=True).exists())
+
+
+class ValuesRenderingTests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.translation_file = create_file(self.user)
+        create_strings(self.translation_file, 5)
+        language = Language.objects.create(code='en', name='English', native_name='English')
+        for string in self.translation_file.strings.filter(key__in=['key1', 'key3']):
+            Translation.objects.create(
+                string=string, target_language=language, translated_text='Text', translation_method='manual'
+            )
+        self.url = reverse('translationstring-list')
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_same_json_as_the_model_serializer(self):
+        response, _queries = self.get(self.url, ordering='line_number')
+        strings = TranslationString.objects.select_related('file').order_by('line_number')
+        expected = TranslationStringListSerializer(strings, many=True, context={'request': response.wsgi_request}).data
+        self.assertEqual(response.content, JSONRenderer().render({
+            'pagination': response.data['pagination'], 'results': expected
+        }))
+        self.assertEqual([row['translations_count'] for row in response.data['results']], [0, 1, 0, 1, 0])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        _response, few = self.get(self.url, page_size=2)
+        response, many = self.get(self.url, page_size=5)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(many, few)
+
+        url = reverse('translationstring-by-file')
+        _response, few = self.get(url, file_id=self.translation_file.id, page_size=2)
+        response, many = self.get(url, file_id=self.translation_file.id, page_size=5)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(many, few)
+
+    def test_translations_count_filter_annotation_is_reused(self):
+        response, _queries = self.get(self.url, translations_count_min=1)
+        self.assertEqual(
+            sorted((row['key'], row['translations_count']) for row in response.data['results']),
+            [('key1', 1), ('key3', 1)]
+        )
@@ -0,0 +1,170 @@
+# =============================================================================
+# files/tests/test_views.py
+# =============================================================================
+
+"""API des fichiers de traduction (files/views.py : TranslationFileViewSet)"""
+
+import hashlib
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from files.models import TranslationFile
+
+from .utils import create_file, create_strings, create_user
+
+
+class FileAPITestCase(APITestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = self.client_for(self.user)
+
+    def client_for(self, user):
+        # Agent navigateur : le middleware ClientKey n'exige pas de clé client
+        client = APIClient(HTTP_USER_AGENT='Mozilla/5.0')
+        client.force_authenticate(user)
+        return client
+
+
+class FileListTests(FileAPITestCase):
+
+    def list_files(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('translationfile-list'))
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        return rows, len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for i in range(2):
+            create_strings(create_file(self.user, name=f'small{i}.po'), 3)
+        rows, small = self.list_files()
+        self.assertEqual(len(rows), 2)
+
+        for i in range(6):
+            create_strings(create_file(self.user, name=f'more{i}.po'), 3)
+        rows, large = self.list_files()
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(large, small)
+        self.assertEqual({row['strings_count'] for row in rows}, {3})
+
+    def test_task_states_are_read_in_one_call(self):
+        create_file(self.user, name='a.po', status='processing', task_id='task-a')
+        create_file(self.user, name='b.po', status='processing', task_id='task-b')
+        create_file(self.user, name='c.po', status='completed', task_id='task-c')
+        meta = {'task-a': {'status': 'PROGRESS', 'result': {'current': 7}}, 'task-b': {'status': 'PENDING'}}
+        with mock.patch('files.serializers.fetch_task_meta', return_value=meta) as fetch:
+            rows, _queries = self.list_files()
+
+        fetch.assert_called_once()
+        self.assertCountEqual(fetch.call_args.args[0], ['task-a', 'task-b'])
+        progress = {row['original_filename']: row['processing_progress'] for row in rows}
+        self.assertEqual(progress, {'a.po': 7, 'b.po': None, 'c.po': None})
+
+    def test_other_users_files_are_hidden(self):
+        create_file(create_user('bob'), name='bob.po')
+        create_file(self.user, name='alice.po')
+        rows, _queries = self.list_files()
+        self.assertEqual([row['original_filename'] for row in rows], ['alice.po'])
+
+
+class ReprocessTests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.translation_file = create_file(self.user, status='completed')
+        create_strings(self.translation_file, 5)
+        self.url = reverse('translationfile-reprocess', args=[self.translation_file.id])
+        patcher = mock.patch('files.tasks.process_translation_file.apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def reprocess(self, url):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url)
+
+    def test_full_by_default(self):
+        response = self.reprocess(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['mode'], 'full')
+        self.assertFalse(self.translation_file.strings.exists())
+        self.translation_file.refresh_from_db()
+        self.assertEqual(self.translation_file.total_strings, 0)
+        self.assertEqual(self.apply_async.call_args.kwargs['kwargs'], {'incremental': False})
+        self.assertEqual(self.apply_async.call_args.kwargs['task_id'], response.data['task_id'])
+
+    def test_incremental_is_opt_in(self):
+        response = self.reprocess(f'{self.url}?incremental=true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['mode'], 'incremental')
+        self.assertEqual(self.translation_file.strings.count(), 5)
+        self.assertEqual(self.apply_async.call_args.kwargs['kwargs'], {'incremental': True})
+
+    def test_other_users_cannot_reprocess(self):
+        self.client = self.client_for(create_user('bob'))
+        response = self.reprocess(self.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.translation_file.strings.count(), 5)
+        self.apply_async.assert_not_called()
+
+
+class UploadDeduplicationTests(FileAPITestCase):
+    content = b'msgid ""\nmsgstr ""\n\nmsgid "Bonjour"\nmsgstr ""\n'
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.tasks = {}
+        for name in ('process_translation_file', 'clone_translation_file'):
+            patcher = mock.patch(f'files.tasks.{name}.apply_async')
+            self.tasks[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def upload(self, name='messages.po'):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('translationfile-list'),
+                {'file': SimpleUploadedFile(name, self.content)}, format='multipart'
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        return TranslationFile.objects.get(id=response.data['data']['id'])
+
+    def test_identical_upload_shares_content_and_clones(self):
+        first = self.upload()
+        self.assertEqual(first.content_hash, hashlib.sha256(self.content).hexdigest())
+        self.tasks['process_translation_file'].assert_called_once()
+        TranslationFile.objects.filter(pk=first.pk).update(status='completed')
+
+        second = self.upload('copie.po')
+        self.assertEqual(second.file_path.name, first.file_path.name)
+        self.assertEqual(second.deduplicated_from_id, first.id)
+        self.assertEqual(
+            self.tasks['clone_translation_file'].call_args.kwargs['args'], [second.id, first.id]
+        )
+
+    def test_stored_file_is_read_only(self):
+        translation_file = self.upload()
+        stored = translation_file.file_path.name
+        response = self.client.patch(
+            reverse('translationfile-detail', args=[translation_file.id]),
+            {'file_path': 'translation_files/autre.po', 'content_hash': '0' * 64,
+             'original_filename': 'renomme.po'},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        translation_file.refresh_from_db()
+        self.assertEqual(translation_file.file_path.name, stored)
+        self.assertEqual(translation_file.content_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(translation_file.original_filename, 'renomme.po')
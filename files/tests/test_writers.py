@@ -0,0 +1,121 @@
+# =============================================================================
+# files/tests/test_writers.py
+# =============================================================================
+
+"""Écriture en masse des chaînes (files/writers.py)"""
+
+import uuid
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from files.models import TranslationString
+from files.writers import TranslationStringWriter, string_hash
+
+from .utils import create_file, create_user
+
+
+class TranslationStringWriterTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.file = create_file(self.user)
+
+    def string(self, key, **fields):
+        fields.setdefault('source_text', f'Source {key}')
+        return TranslationString(file=self.file, key=key, **fields)
+
+    def test_duplicates_removed_before_the_database(self):
+        with TranslationStringWriter(self.file) as writer:
+            self.assertTrue(writer.add(self.string('a')))
+            self.assertTrue(writer.add(self.string('b')))
+            self.assertFalse(writer.add(self.string('a', source_text='Autre')))
+        self.assertEqual((writer.created, writer.duplicates, writer.total), (2, 1, 2))
+        self.assertEqual(TranslationString.objects.get(key='a').source_text, 'Source a')
+
+    def test_replace_keeps_the_last_value(self):
+        with TranslationStringWriter(self.file, transaction_rows=2) as writer:
+            writer.add(self.string('a', line_number=1))
+            self.assertFalse(writer.replace(self.string('a', source_text='Pending', line_number=2)))
+            writer.add(self.string('b', line_number=3))
+            # 'a' déjà validée : la ligne en base est mise à jour
+            writer.replace(self.string('a', source_text='Flushed', is_fuzzy=True, line_number=4))
+            self.assertTrue(writer.replace(self.string('c', line_number=5)))
+        self.assertEqual((writer.created, writer.duplicates), (3, 2))
+        stored = TranslationString.objects.get(key='a')
+        self.assertEqual((stored.source_text, stored.line_number, stored.is_fuzzy), ('Flushed', 1, True))
+        self.assertEqual(stored.entry_hash, string_hash(stored))
+        self.file.refresh_from_db()
+        self.assertEqual((self.file.total_strings, self.file.fuzzy_count), (3, 1))
+
+    def test_keys_already_in_database_are_duplicates(self):
+        with TranslationStringWriter(self.file) as writer:
+            writer.add(self.string('a'))
+        with TranslationStringWriter(self.file) as writer:
+            writer.add(self.string('a'))
+            writer.add(self.string('b'))
+        self.assertEqual((writer.created, writer.duplicates, writer.existing, writer.total), (1, 1, 1, 2))
+        self.assertEqual(TranslationString.objects.filter(file=self.file).count(), 2)
+
+    def test_counters_follow_inserted_rows(self):
+        with TranslationStringWriter(self.file) as writer:
+            writer.add(self.string('a', is_translated=True, translated_text='A'))
+            writer.add(self.string('b', is_fuzzy=True))
+            writer.add(self.string('c', is_plural=True, is_translated=True))
+            writer.add(self.string('a'))
+        self.file.refresh_from_db()
+        self.assertEqual(
+            (self.file.total_strings, self.file.translated_count, self.file.fuzzy_count, self.file.plural_count),
+            (3, 2, 1, 1),
+        )
+
+    def test_values_prepared_like_save(self):
+        before = timezone.now()
+        obj = self.string('a', context='ctx', line_number=7)
+        with TranslationStringWriter(self.file) as writer:
+            writer.add(obj)
+        self.assertFalse(obj._state.adding)
+        stored = TranslationString.objects.get(pk=obj.pk)
+        self.assertIsInstance(stored.pk, uuid.UUID)
+        # auto_now_add renseigné par pre_save
+        self.assertIsNotNone(obj.created_at)
+        self.assertGreaterEqual(stored.created_at, before)
+        self.assertEqual(stored.created_at, obj.created_at)
+        self.assertEqual((stored.context, stored.line_number, stored.is_fuzzy), ('ctx', 7, False))
+        self.assertEqual(stored.entry_hash, string_hash(stored))
+
+    def test_transactions_and_checkpoints(self):
+        checkpoints = []
+        writer = TranslationStringWriter(
+            self.file, batch_size=2, transaction_rows=3,
+            checkpoint=lambda created, duplicates: checkpoints.append((created, duplicates)),
+        )
+        with writer:
+            for i in range(7):
+                writer.add(self.string(f'k{i}'))
+            writer.add(self.string('k0'))
+        self.assertEqual(writer.transactions, 3)
+        self.assertEqual(checkpoints, [(3, 0), (6, 0), (7, 1)])
+        self.assertEqual(TranslationString.objects.filter(file=self.file).count(), 7)
+
+    def test_concurrent_insert_is_counted_as_duplicate(self):
+        writer = TranslationStringWriter(self.file)
+        # Écrit par une autre tâche après le chargement des clés existantes
+        TranslationString.objects.create(file=self.file, key='b', source_text='Source b')
+        with self.assertLogs('files.writers', level='WARNING'):
+            with writer:
+                writer.add(self.string('a'))
+                writer.add(self.string('b'))
+                writer.add(self.string('c'))
+        self.assertEqual((writer.created, writer.duplicates), (2, 1))
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.total_strings, 3)
+
+    def test_default_batch_size_respects_backend_limit(self):
+        size = TranslationStringWriter.default_batch_size()
+        fields = len(TranslationString._meta.concrete_fields)
+        limit = connection.features.max_query_params
+        if limit:
+            self.assertLessEqual(size * fields, limit)
+        self.assertGreaterEqual(size, 1)
@@ -0,0 +1,33 @@
+# =============================================================================
+# files/tests/utils.py
+# =============================================================================
+
+"""Données communes aux tests de l'application files"""
+
+from django.contrib.auth import get_user_model
+
+from files.models import TranslationFile, TranslationString
+from files.writers import TranslationStringWriter
+
+
+def create_user(name='alice'):
+    # Sans mot de passe : pas de hachage coûteux à chaque test
+    return get_user_model().objects.create_user(username=name, email=f'{name}@example.com')
+
+
+def create_file(user, name='messages.po', file_type='po', **kwargs):
+    return TranslationFile.objects.create(
+        original_filename=name, file_path=f'translation_files/{name}', file_type=file_type,
+        file_size=kwargs.pop('file_size', 0), uploaded_by=user, **kwargs
+    )
+
+
+def create_strings(translation_file, count, **fields):
+    """``count`` chaînes ``key0``, ``key1``... écrites par le writer d'ingestion"""
+    with TranslationStringWriter(translation_file) as writer:
+        for i in range(count):
+            writer.add(TranslationString(
+                file=translation_file, key=f'key{i}', source_text=f'Source {i}', line_number=i + 1, **fields
+            ))
+    translation_file.refresh_from_db()
+    return writer
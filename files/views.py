@@ -9,14 +9,17 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Count, Q, Sum
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from django.conf import settings
 from django.db import transaction, IntegrityError
-from django.http import Http404
-from rest_framework.exceptions import PermissionDenied, ValidationError as DRFValidationError
+from django.http import Http404, StreamingHttpResponse
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError as DRFValidationError
 import logging
-from uuid import UUID
+import os
+from uuid import UUID, uuid4
+
+from translations.fuzzy import suggest
+from translations.models import Language
 
 from .models import TranslationFile, TranslationString
 from .serializers import (
@@ -24,13 +27,29 @@ from .serializers import (
     TranslationFileDetailSerializer,
     TranslationFileCreateSerializer,
     TranslationStringListSerializer,
-    TranslationStringDetailSerializer
+    TranslationStringDetailSerializer,
+    TranslationStringListValuesSerializer,
+    TranslationStringBulkUpdateItemSerializer,
+    requested_fields
+)
+from .etags import conditional_response, statistics_etag, weak_etag
+from .export import EXPORT_FORMATS, export_rows
+from .stats import cached_statistics, file_statistics, string_statistics
+from .storage import attach_hashing_handler
+from .filters import TranslationFileFilter, TranslationStringFilter, RankedOrderingFilter
+from .pagination import (
+    TranslationFilePagination,
+    TranslationStringPagination,
+    TranslationStringCursorPagination,
+    TranslationStringSearchPagination
 )
-from .filters import TranslationFileFilter, TranslationStringFilter
-from .pagination import TranslationFilePagination, TranslationStringPagination
+from .search import is_ordered_by_rank
 
 logger = logging.getLogger(__name__)
 
+# Lignes par UPDATE de la modification groupée des chaînes
+BULK_UPDATE_BATCH_SIZE = 500
+
 
 class TranslationFileViewSet(viewsets.ModelViewSet):
     """ViewSet pour la gestion des fichiers de traduction"""
@@ -63,6 +82,9 @@ class TranslationFileViewSet(viewsets.ModelViewSet):
             queryset = super().get_queryset()
             if not self.request.user.is_staff:
                 queryset = queryset.filter(uploaded_by=self.request.user)
+            if self.action in ('list', 'retrieve'):
+                # ?fields= / ?exclude= : seules les colonnes des champs demandés
+                queryset = self.get_serializer_class().restrict_queryset(queryset, self.request)
             return queryset
         except Exception as e:
             logger.error(f"Erreur lors de la récupération du queryset: {e}")
@@ -89,71 +111,26 @@ class TranslationFileViewSet(viewsets.ModelViewSet):
             logger.error(f"Erreur non gérée dans TranslationFileViewSet: {exc}")
             return super().handle_exception(exc)
 
-    @method_decorator(cache_page(60 * 5))  # Cache 5 minutes
+    def retrieve(self, request, *args, **kwargs):
+        """Détail d'un fichier ; 304 si ``If-None-Match`` correspond à sa version"""
+        try:
+            version = self.get_queryset().filter(pk=kwargs.get('pk')).values_list('version', flat=True).first()
+        except (ValidationError, ValueError):
+            version = None
+        # Fichier absent ou inaccessible : pas d'ETag, le détail répond 404
+        etag = weak_etag(request, 'file', version) if version is not None else None
+        render = super().retrieve
+        return conditional_response(request, etag, lambda: render(request, *args, **kwargs))
+
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        """Retourne les statistiques des fichiers"""
+        """Retourne les statistiques des fichiers (une requête, cache par utilisateur)"""
         try:
             queryset = self.get_queryset()
-            
-            # Vérifier que le queryset n'est pas vide
-            if not queryset.exists():
-                return Response({
-                    'total_files': 0,
-                    'by_status': {},
-                    'by_type': {},
-                    'total_size': 0,
-                    'total_strings': 0
-                })
-            
-            # Calculs avec gestion d'erreurs
-            total_files = queryset.count()
-            
-            # Statistiques par statut avec gestion des valeurs nulles
-            by_status = {}
-            try:
-                status_counts = queryset.values('status').annotate(count=Count('id'))
-                by_status = {item['status']: item['count'] for item in status_counts if item['status']}
-            except Exception as e:
-                logger.warning(f"Erreur lors du calcul des statistiques par statut: {e}")
-                by_status = {}
-            
-            # Statistiques par type avec gestion des valeurs nulles
-            by_type = {}
-            try:
-                type_counts = queryset.values('file_type').annotate(count=Count('id'))
-                by_type = {item['file_type']: item['count'] for item in type_counts if item['file_type']}
-            except Exception as e:
-                logger.warning(f"Erreur lors du calcul des statistiques par type: {e}")
-                by_type = {}
-            
-            # Taille totale avec gestion des valeurs nulles
-            total_size = 0
-            try:
-                size_aggregate = queryset.aggregate(total=Sum('file_size'))
-                total_size = size_aggregate['total'] or 0
-            except Exception as e:
-                logger.warning(f"Erreur lors du calcul de la taille totale: {e}")
-                total_size = 0
-            
-            # Nombre total de chaînes avec gestion des valeurs nulles
-            total_strings = 0
-            try:
-                strings_aggregate = queryset.aggregate(total=Sum('total_strings'))
-                total_strings = strings_aggregate['total'] or 0
-            except Exception as e:
-                logger.warning(f"Erreur lors du calcul du nombre total de chaînes: {e}")
-                total_strings = 0
-            
-            stats = {
-                'total_files': total_files,
-                'by_status': by_status,
-                'by_type': by_type,
-                'total_size': total_size,
-                'total_strings': total_strings
-            }
-            
-            return Response(stats)
+            return conditional_response(
+                request, statistics_etag(request, 'files'),
+                lambda: Response(cached_statistics('files', request.user, lambda: file_statistics(queryset)))
+            )
             
         except Exception as e:
             logger.error(f"Erreur lors du calcul des statistiques: {e}")
@@ -164,9 +141,17 @@ class TranslationFileViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     def reprocess(self, request, pk=None):
-        """Relance le traitement d'un fichier"""
+        """
+        Relance le traitement d'un fichier.
+        
+        Par défaut toutes les chaînes sont supprimées et le fichier réingéré.
+        Avec ``?incremental=true``, seules les entrées ajoutées, modifiées ou
+        supprimées sont écrites, les chaînes inchangées gardent leurs
+        traductions.
+        """
         try:
             file_obj = self.get_object()
+            full = request.query_params.get('incremental', 'false').lower() != 'true'
             
             # Vérifier les permissions
             if not request.user.is_staff and file_obj.uploaded_by != request.user:
@@ -187,22 +172,30 @@ class TranslationFileViewSet(viewsets.ModelViewSet):
             
             # Transaction pour assurer la cohérence
             with transaction.atomic():
-                # Supprimer les anciennes chaînes
-                try:
-                    deleted_count = file_obj.translationstring_set.all().delete()[0]
-                    logger.info(f"Suppression de {deleted_count} chaînes pour le fichier {file_obj.id}")
-                except Exception as e:
-                    logger.warning(f"Erreur lors de la suppression des chaînes: {e}")
+                # Supprimer les anciennes chaînes (retraitement complet seulement)
+                if full:
+                    try:
+                        deleted_count = file_obj.strings.all().delete()[0]
+                        logger.info(f"Suppression de {deleted_count} chaînes pour le fichier {file_obj.id}")
+                    except Exception as e:
+                        logger.warning(f"Erreur lors de la suppression des chaînes: {e}")
+                
+                # Un retraitement repart de zéro, pas du dernier point de reprise
+                file_obj.chunks.all().delete()
                 
                 # Relancer le traitement
                 try:
                     from .tasks import process_translation_file
-                    task = process_translation_file.delay(file_obj.id)
-                    file_obj.task_id = task.id
+                    # La tâche n'est envoyée qu'après validation : elle doit
+                    # trouver le statut 'processing' et son propre task_id
+                    task_id = str(uuid4())
+                    file_obj.task_id = task_id
                     file_obj.status = 'processing'
                     file_obj.error_message = ''
-                    file_obj.total_strings = 0
                     file_obj.save()
+                    transaction.on_commit(lambda: process_translation_file.apply_async(
+                        args=[file_obj.id], kwargs={'incremental': not full}, task_id=task_id
+                    ))
                     
                     logger.info(f"Retraitement lancé pour le fichier {file_obj.id}")
                     
@@ -215,10 +208,11 @@ class TranslationFileViewSet(viewsets.ModelViewSet):
             
             return Response({
                 'message': 'Retraitement lancé',
+                'mode': 'full' if full else 'incremental',
                 'task_id': file_obj.task_id
             })
             
-        except ObjectDoesNotExist:
+        except (ObjectDoesNotExist, Http404):
             return Response(
                 {'error': 'Fichier non trouvé'},
                 status=status.HTTP_404_NOT_FOUND
@@ -314,7 +308,8 @@ class TranslationFileViewSet(viewsets.ModelViewSet):
                 return Response({
                     'progress': progress_value,
                     'status': file_obj.status,
-                    'error_message': file_obj.error_message if file_obj.status == 'error' else None
+                    'error_message': file_obj.error_message if file_obj.status == 'error' else None,
+                    'last_diff': file_obj.last_diff or None
                 })
             
             if not hasattr(file_obj, 'task_id') or not file_obj.task_id:
@@ -389,9 +384,11 @@ class TranslationFileViewSet(viewsets.ModelViewSet):
             )
     def create(self, request, *args, **kwargs):
         """Upload d'un fichier avec réponse complète"""
+        # Empreinte SHA-256 calculée pendant la réception du fichier
+        hashing = attach_hashing_handler(request)
         serializer = TranslationFileCreateSerializer(
             data=request.data, 
-            context={'request': request}
+            context={'request': request, 'content_hashes': hashing.digests if hashing else {}}
         )
         
         if serializer.is_valid():
@@ -421,13 +418,27 @@ class TranslationStringViewSet(viewsets.ModelViewSet):
     
     queryset = TranslationString.objects.select_related('file', 'file__uploaded_by').all()
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # ?search= est traité par TranslationStringFilter (index plein texte, files/search.py)
+    filter_backends = [DjangoFilterBackend, RankedOrderingFilter]
     filterset_class = TranslationStringFilter
-    search_fields = ['key', 'source_text', 'context']
     ordering_fields = ['created_at', 'line_number', 'key', 'is_translated']
     ordering = ['line_number', 'key']
     pagination_class = TranslationStringPagination
 
+    @property
+    def paginator(self):
+        """Pagination par curseur sur demande (``?cursor=``), par numéro de page sinon"""
+        if not hasattr(self, '_paginator') and TranslationStringCursorPagination.is_requested(self.request):
+            self._paginator = TranslationStringCursorPagination()
+        return super().paginator
+
+    def paginate_queryset(self, queryset):
+        """Recherche classée par pertinence : page lue dans l'index, sans COUNT complet"""
+        if not hasattr(self, '_paginator') and is_ordered_by_rank(queryset) \
+                and not TranslationStringCursorPagination.is_requested(self.request):
+            self._paginator = TranslationStringSearchPagination()
+        return super().paginate_queryset(queryset)
+
     def get_serializer_class(self):
         """Retourne le serializer approprié selon l'action"""
         try:
@@ -438,12 +449,28 @@ class TranslationStringViewSet(viewsets.ModelViewSet):
             logger.error(f"Erreur lors de la sélection du serializer: {e}")
             return TranslationStringListSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Liste des chaînes, rendue depuis ``.values()`` (TranslationStringListValuesSerializer)"""
+        fields = self.get_list_fields()
+        queryset = TranslationStringListValuesSerializer.prepare(self.filter_queryset(self.get_queryset()), fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(TranslationStringListValuesSerializer(page, fields).data)
+        return Response(TranslationStringListValuesSerializer(queryset, fields).data)
+
+    def get_list_fields(self):
+        """Champs de la liste retenus par ``?fields=`` / ``?exclude=`` (None : tous)"""
+        return requested_fields(self.request, TranslationStringListValuesSerializer.fields)
+
     def get_queryset(self):
         """Filtre les chaînes par utilisateur si non admin"""
         try:
             queryset = super().get_queryset()
             if not self.request.user.is_staff:
                 queryset = queryset.filter(file__uploaded_by=self.request.user)
+            if self.action == 'retrieve':
+                # ?fields= / ?exclude= : seules les colonnes des champs demandés
+                queryset = self.get_serializer_class().restrict_queryset(queryset, self.request)
             return queryset
         except Exception as e:
             logger.error(f"Erreur lors de la récupération du queryset: {e}")
@@ -492,8 +519,8 @@ class TranslationStringViewSet(viewsets.ModelViewSet):
             
             # Vérifier que le fichier existe et que l'utilisateur y a accès
             try:
-                file_obj = TranslationFile.objects.get(id=file_id)
-                if not request.user.is_staff and file_obj.uploaded_by != request.user:
+                file_obj = TranslationFile.objects.only('id', 'uploaded_by_id', 'version').get(id=file_id)
+                if not request.user.is_staff and file_obj.uploaded_by_id != request.user.pk:
                     raise PermissionDenied("Vous n'avez pas accès à ce fichier")
             except TranslationFile.DoesNotExist:
                 return Response(
@@ -501,34 +528,9 @@ class TranslationStringViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            queryset = self.get_queryset().filter(file_id=file_id)
-            
-            # Appliquer les filtres avec gestion d'erreurs
-            try:
-                queryset = self.filter_queryset(queryset)
-            except Exception as e:
-                logger.warning(f"Erreur lors de l'application des filtres: {e}")
-                # Continuer avec le queryset non filtré
-            
-            # Paginer avec gestion d'erreurs
-            try:
-                page = self.paginate_queryset(queryset)
-                if page is not None:
-                    serializer = self.get_serializer(page, many=True)
-                    return self.get_paginated_response(serializer.data)
-            except Exception as e:
-                logger.error(f"Erreur lors de la pagination: {e}")
-                # Retourner les données sans pagination
-            
-            try:
-                serializer = self.get_serializer(queryset, many=True)
-                return Response(serializer.data)
-            except Exception as e:
-                logger.error(f"Erreur lors de la sérialisation: {e}")
-                return Response(
-                    {'error': 'Erreur lors de la récupération des données'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+            # Version du fichier (chaînes et traductions comprises) : 304 avant toute lecture des chaînes
+            etag = weak_etag(request, 'strings', file_obj.version)
+            return conditional_response(request, etag, lambda: self._file_strings(request, file_id))
                 
         except PermissionDenied as e:
             return Response(
@@ -542,85 +544,255 @@ class TranslationStringViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    @method_decorator(cache_page(60 * 2))  # Cache 2 minutes
-    @action(detail=False, methods=['get'])
-    def statistics(self, request):
-        """Retourne les statistiques des chaînes"""
+    def _file_strings(self, request, file_id):
+        """Page des chaînes du fichier ``file_id`` pour ``by_file``"""
+        queryset = self.get_queryset().filter(file_id=file_id)
+        
+        # Appliquer les filtres avec gestion d'erreurs
         try:
-            queryset = self.get_queryset()
+            queryset = self.filter_queryset(queryset)
+        except Exception as e:
+            logger.warning(f"Erreur lors de l'application des filtres: {e}")
+            # Continuer avec le queryset non filtré
+        
+        # Paginer avec gestion d'erreurs
+        fields = self.get_list_fields()
+        try:
+            page = self.paginate_queryset(TranslationStringListValuesSerializer.prepare(queryset, fields))
+            if page is not None:
+                return self.get_paginated_response(TranslationStringListValuesSerializer(page, fields).data)
+        except NotFound as e:
+            # Page ou curseur invalide : ne pas retomber sur la liste complète
+            return Response({'error': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.error(f"Erreur lors de la pagination: {e}")
+            # Retourner les données sans pagination
+        
+        try:
+            rows = TranslationStringListValuesSerializer.prepare(queryset, fields)
+            return Response(TranslationStringListValuesSerializer(rows, fields).data)
+        except Exception as e:
+            logger.error(f"Erreur lors de la sérialisation: {e}")
+            return Response(
+                {'error': 'Erreur lors de la récupération des données'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=True, methods=['get'])
+    def suggestions(self, request, pk=None):
+        """
+        Traductions de la mémoire pour la chaîne, exactes puis approchées,
+        sans appel au service : ``?language=fr`` (toutes les langues actives
+        sinon), ``?min_similarity=0.7``, ``?limit=5``, ``?source_language=``.
+        """
+        try:
+            string = self.get_object()
             
-            # Vérifier que le queryset n'est pas vide
-            if not queryset.exists():
-                return Response({
-                    'total_strings': 0,
-                    'translated': 0,
-                    'untranslated': 0,
-                    'fuzzy': 0,
-                    'plural': 0,
-                    'by_file': {},
-                    'progress_percentage': 0
-                })
+            languages = Language.objects.filter(is_active=True)
+            language_code = request.query_params.get('language')
+            if language_code:
+                languages = languages.filter(code=language_code)
+                if not languages:
+                    return Response(
+                        {'error': f'Langue inconnue : {language_code}'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            
+            try:
+                min_similarity = request.query_params.get('min_similarity')
+                min_similarity = float(min_similarity) if min_similarity else None
+                limit = min(max(int(request.query_params.get('limit', 5)), 1), 20)
+            except (ValueError, TypeError):
+                return Response(
+                    {'error': 'min_similarity doit être un nombre et limit un entier'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if min_similarity is not None and not 0 < min_similarity <= 1:
+                return Response(
+                    {'error': 'min_similarity doit être compris entre 0 et 1'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            return Response({
+                'string': string.id,
+                'source_text': string.source_text,
+                'suggestions': suggest(
+                    string.source_text, languages,
+                    source_language=request.query_params.get('source_language', ''),
+                    min_similarity=min_similarity, limit=limit
+                )
+            })
             
-            # Calculs avec gestion d'erreurs
-            total_strings = queryset.count()
+        except Http404:
+            return Response(
+                {'error': 'Chaîne non trouvée'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de la recherche de suggestions: {e}")
+            return Response(
+                {'error': 'Erreur interne du serveur'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['post'])
+    def bulk_update(self, request):
+        """
+        Applique une liste de modifications ``{id, translated_text,
+        is_translated, is_fuzzy}`` en une transaction : une requête pour
+        vérifier l'accès aux chaînes, ``bulk_update`` pour les écrire, les
+        compteurs des fichiers mis à jour une fois par fichier. Retourne le
+        résultat de chaque modification, dans l'ordre de la requête.
+        """
+        try:
+            items = request.data
+            if not isinstance(items, list) or not items:
+                return Response(
+                    {'error': 'Liste de modifications requise'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            max_items = getattr(settings, 'FILES_BULK_UPDATE_MAX_ITEMS', 1000)
+            if len(items) > max_items:
+                return Response(
+                    {'error': f'{max_items} modifications au plus par requête'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            # Compteurs avec gestion d'erreurs
-            translated = 0
-            untranslated = 0
-            fuzzy = 0
-            plural = 0
+            results = [None] * len(items)
+            changes = {}
+            for index, item in enumerate(items):
+                serializer = TranslationStringBulkUpdateItemSerializer(data=item)
+                if not serializer.is_valid():
+                    item_id = item.get('id') if isinstance(item, dict) else None
+                    results[index] = {'id': item_id, 'status': 'invalid', 'errors': serializer.errors}
+                    continue
+                data = serializer.validated_data
+                if data['id'] in changes:
+                    results[index] = {
+                        'id': str(data['id']), 'status': 'invalid',
+                        'errors': {'id': ['Chaîne déjà modifiée dans cette requête']}
+                    }
+                    continue
+                changes[data['id']] = (index, data)
+            
+            editable = TranslationStringBulkUpdateItemSerializer.EDITABLE_FIELDS
+            updated = []
+            with transaction.atomic():
+                # Une requête : les chaînes inaccessibles à l'utilisateur ne sont pas lues
+                strings = self.get_queryset().select_related(None).select_for_update(of=('self',)).filter(
+                    pk__in=list(changes)
+                ).only('id', 'file_id', *editable)
+                strings = {obj.pk: obj for obj in strings}
+                
+                fields = set()
+                for pk, (index, data) in changes.items():
+                    obj = strings.get(pk)
+                    if obj is None:
+                        results[index] = {'id': str(pk), 'status': 'not_found'}
+                        continue
+                    for field in editable:
+                        if field in data:
+                            setattr(obj, field, data[field])
+                            fields.add(field)
+                    updated.append(obj)
+                    results[index] = {'id': str(pk), 'status': 'updated'}
+                
+                if updated:
+                    # Deltas des compteurs calculés en mémoire, appliqués une fois par fichier
+                    TranslationString.objects.bulk_update(
+                        updated, [field for field in editable if field in fields],
+                        batch_size=BULK_UPDATE_BATCH_SIZE
+                    )
             
-            try:
-                translated = queryset.filter(is_translated=True).count()
-            except Exception as e:
-                logger.warning(f"Erreur lors du calcul des chaînes traduites: {e}")
+            return Response({
+                'updated': len(updated),
+                'failed': len(items) - len(updated),
+                'results': results
+            })
             
+        except Exception as e:
+            logger.error(f"Erreur lors de la modification groupée des chaînes: {e}")
+            return Response(
+                {'error': 'Erreur lors de la modification des chaînes'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporte en flux toutes les chaînes d'un fichier, filtres de la liste
+        compris : ``?file_id=<uuid>&export_format=ndjson|csv``.
+        """
+        try:
+            file_id = request.query_params.get('file_id')
+            if not file_id:
+                return Response(
+                    {'error': 'Paramètre file_id requis'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             try:
-                untranslated = queryset.filter(is_translated=False).count()
-            except Exception as e:
-                logger.warning(f"Erreur lors du calcul des chaînes non traduites: {e}")
+                file_id = UUID(file_id)
+            except (ValueError, TypeError):
+                return Response(
+                    {'error': 'file_id doit être un UUID valide'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            try:
-                fuzzy = queryset.filter(is_fuzzy=True).count()
-            except Exception as e:
-                logger.warning(f"Erreur lors du calcul des chaînes fuzzy: {e}")
+            export_format = request.query_params.get('export_format', 'ndjson')
+            if export_format not in EXPORT_FORMATS:
+                return Response(
+                    {'error': f"export_format doit être parmi : {', '.join(EXPORT_FORMATS)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
             try:
-                plural = queryset.filter(is_plural=True).count()
-            except Exception as e:
-                logger.warning(f"Erreur lors du calcul des chaînes plurielles: {e}")
+                file_obj = TranslationFile.objects.get(id=file_id)
+            except TranslationFile.DoesNotExist:
+                return Response(
+                    {'error': 'Fichier non trouvé'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            if not request.user.is_staff and file_obj.uploaded_by_id != request.user.pk:
+                raise PermissionDenied("Vous n'avez pas accès à ce fichier")
             
-            # Statistiques par fichier avec gestion d'erreurs
-            by_file = {}
-            try:
-                file_counts = queryset.values('file__original_filename').annotate(count=Count('id'))
-                by_file = {
-                    item['file__original_filename']: item['count'] 
-                    for item in file_counts 
-                    if item['file__original_filename']
-                }
-            except Exception as e:
-                logger.warning(f"Erreur lors du calcul des statistiques par fichier: {e}")
+            # Filtres et tri de la liste ; les erreurs de filtre remontent avant le flux
+            queryset = self.filter_queryset(self.get_queryset().filter(file_id=file_id))
             
-            # Calcul du pourcentage de progression
-            progress_percentage = 0
-            if total_strings > 0:
-                try:
-                    progress_percentage = round((translated / total_strings) * 100, 2)
-                except (ZeroDivisionError, TypeError):
-                    progress_percentage = 0
-            
-            stats = {
-                'total_strings': total_strings,
-                'translated': translated,
-                'untranslated': untranslated,
-                'fuzzy': fuzzy,
-                'plural': plural,
-                'by_file': by_file,
-                'progress_percentage': progress_percentage
-            }
-            
-            return Response(stats)
+            content_type, extension = EXPORT_FORMATS[export_format]
+            response = StreamingHttpResponse(export_rows(queryset, export_format), content_type=content_type)
+            stem = os.path.splitext(file_obj.original_filename)[0] or 'strings'
+            response['Content-Disposition'] = f'attachment; filename="{stem}.{extension}"'
+            return response
+            
+        except DRFValidationError as e:
+            return Response(
+                {'error': 'Filtres invalides', 'details': e.detail},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except PermissionDenied as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        except Exception as e:
+            logger.error(f"Erreur lors de l'export des chaînes: {e}")
+            return Response(
+                {'error': 'Erreur interne du serveur'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+    @action(detail=False, methods=['get'])
+    def statistics(self, request):
+        """Retourne les statistiques des chaînes (compteurs des fichiers, cache par utilisateur)"""
+        try:
+            # Même périmètre que get_queryset(), lu sur la table des fichiers
+            files = TranslationFile.objects.all()
+            if not request.user.is_staff:
+                files = files.filter(uploaded_by=request.user)
+            return conditional_response(
+                request, statistics_etag(request, 'strings'),
+                lambda: Response(cached_statistics('strings', request.user, lambda: string_statistics(files)))
+            )
             
         except Exception as e:
             logger.error(f"Erreur lors du calcul des statistiques des chaînes: {e}")
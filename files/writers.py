@@ -0,0 +1,416 @@
+# =============================================================================
+# files/writers.py
+# =============================================================================
+
+"""
+Écriture en masse des chaînes de traduction extraites par les parsers.
+
+Les doublons ``(file, key)`` sont écartés en mémoire avant tout accès à la
+base : plus besoin de ``ignore_conflicts`` et le nombre de lignes créées est
+exact, et ``bulk_create`` envoie des INSERT multi-lignes à la taille de lot
+permise par le backend.
+
+``replace()`` applique la règle de ``json.load`` aux clés répétées d'un
+catalogue JSON : la dernière valeur l'emporte, à la place de la première.
+
+``TranslationStringDiffWriter`` sert au retraitement incrémental : il compare
+les entrées du fichier aux lignes existantes par empreinte et n'écrit que
+la différence.
+"""
+
+import hashlib
+
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+
+from .counters import apply_counters, count_strings, string_counters, subtract
+
+logger = get_task_logger(__name__)
+
+
+# Plafond d'une requête INSERT quand le backend n'impose pas de limite (PostgreSQL)
+MAX_BATCH_SIZE = 2000
+
+# Nombre de lignes validées par transaction
+DEFAULT_TRANSACTION_ROWS = 10000
+
+
+def entry_hash(key, source_text, is_plural, context):
+    """Empreinte d'une entrée : ce qui, s'il change, rend ses traductions caduques"""
+    digest = hashlib.sha256()
+    for part in (key, source_text or '', '1' if is_plural else '0', context or ''):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def string_hash(translation_string):
+    return entry_hash(
+        translation_string.key, translation_string.source_text,
+        translation_string.is_plural, translation_string.context
+    )
+
+
+class TranslationStringWriter:
+    """
+    Accumule les ``TranslationString`` d'un fichier et les insère par lots.
+
+    - les clés déjà présentes en base pour ce fichier, ou déjà vues dans le
+      flux, sont comptées comme doublons et jamais envoyées à la base ;
+    - la taille des INSERT suit la limite de paramètres du backend ;
+    - une transaction couvre ``transaction_rows`` lignes : le fichier entier
+      tient en ``ceil(lignes / transaction_rows)`` transactions ;
+    - les compteurs du fichier (``total_strings``, ``translated_count``...)
+      sont incrémentés dans la transaction de chaque lot ;
+    - ``checkpoint(created, duplicates)``, s'il est fourni, est appelé dans
+      chaque transaction après l'insertion : un point de reprise enregistré
+      ainsi ne peut pas diverger des lignes réellement validées.
+
+        with TranslationStringWriter(translation_file) as writer:
+            for entry in entries:
+                writer.add(TranslationString(file=translation_file, ...))
+        writer.created, writer.duplicates
+    """
+
+    # Champs repris de la dernière entrée d'une clé répétée (replace)
+    REPLACED_FIELDS = [
+        'source_text', 'context', 'comment',
+        'is_translated', 'is_fuzzy', 'is_plural', 'entry_hash',
+    ]
+
+    def __init__(self, translation_file, batch_size=None, transaction_rows=None,
+                 created=0, duplicates=0, checkpoint=None):
+        from .models import TranslationString
+
+        self.model = TranslationString
+        self.translation_file = translation_file
+        self.using = router.db_for_write(TranslationString)
+        self.batch_size = batch_size or self.default_batch_size(self.using)
+        self.transaction_rows = transaction_rows or getattr(
+            settings, 'FILES_INGEST_TRANSACTION_ROWS', DEFAULT_TRANSACTION_ROWS
+        )
+
+        # Compteurs repris d'une exécution précédente (point de reprise)
+        self.created = created
+        self.duplicates = duplicates
+        self.transactions = 0
+        self.checkpoint = checkpoint
+        self._pending = []
+        # clé -> chaîne pas encore écrite, que replace() peut modifier
+        self._unflushed = {}
+        self._seen = self._load_existing()
+        self.existing = len(self._seen) - created
+
+    def _load_existing(self):
+        """Clés à considérer comme déjà vues avant la première entrée"""
+        # Un fichier retraité ou une tâche relancée peut déjà avoir des lignes
+        return set(
+            self.model.objects.using(self.using)
+            .filter(file=self.translation_file)
+            .values_list('key', flat=True)
+        )
+
+    @classmethod
+    def default_batch_size(cls, using='default'):
+        """Lignes par INSERT selon la limite de paramètres du backend"""
+        from .models import TranslationString
+
+        fields = TranslationString._meta.concrete_fields
+        connection = connections[using]
+        # bulk_batch_size() ne regarde que la longueur de la liste d'objets
+        size = connection.ops.bulk_batch_size(fields, [None] * MAX_BATCH_SIZE)
+        return max(1, min(size, MAX_BATCH_SIZE))
+
+    @property
+    def total(self):
+        """Nombre de chaînes du fichier en base, lignes déjà présentes comprises"""
+        return self.existing + self.created
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def add(self, translation_string):
+        """Ajoute une chaîne ; retourne False si sa clé est un doublon"""
+        key = translation_string.key
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(key)
+        if not translation_string.entry_hash:
+            translation_string.entry_hash = string_hash(translation_string)
+        self._pending.append(translation_string)
+        self._unflushed[key] = translation_string
+        if len(self._pending) >= self.transaction_rows:
+            self.flush()
+        return True
+
+    def replace(self, translation_string):
+        """
+        Comme ``add``, mais une clé déjà vue prend la valeur de cette entrée
+        (dernière paire gagnante, comme ``json.load``) ; retourne False
+        dans ce cas, l'entrée comptant toujours comme doublon.
+        """
+        key = translation_string.key
+        if key not in self._seen:
+            return self.add(translation_string)
+        self.duplicates += 1
+        translation_string.entry_hash = string_hash(translation_string)
+        current = self._unflushed.get(key)
+        if current is not None:
+            for field in self.REPLACED_FIELDS:
+                setattr(current, field, getattr(translation_string, field))
+        else:
+            self._replace_stored(translation_string)
+        return False
+
+    def _replace_stored(self, translation_string):
+        """Reporte ``replace()`` sur la ligne déjà écrite en base"""
+        # update() du QuerySet tient les compteurs si un drapeau change
+        return self.model.objects.using(self.using).filter(
+            file=self.translation_file, key=translation_string.key
+        ).update(**{field: getattr(translation_string, field) for field in self.REPLACED_FIELDS})
+
+    def finish(self):
+        """Termine l'écriture : insère les dernières chaînes"""
+        return self.flush()
+
+    def flush(self):
+        """Insère les chaînes en attente dans une seule transaction"""
+        self._unflushed = {}
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        try:
+            with transaction.atomic(using=self.using):
+                created = self._insert(pending)
+                apply_counters(string_counters(pending), using=self.using, instance=self.translation_file)
+                self._checkpoint(created, 0)
+        except IntegrityError as e:
+            # Écriture concurrente sur le même fichier (autre plage, autre
+            # tâche) : on ignore les conflits et on mesure l'écart réel sur
+            # les clés du lot, plutôt que de faire confiance au retour
+            logger.warning(f"Conflit lors de l'insertion en lot, reprise sans doublons: {e}")
+            manager = self.model.objects.using(self.using)
+            created = 0
+            with transaction.atomic(using=self.using):
+                for start in range(0, len(pending), self.batch_size):
+                    batch = pending[start:start + self.batch_size]
+                    queryset = manager.filter(
+                        file=self.translation_file, key__in=[obj.key for obj in batch]
+                    )
+                    before = count_strings(queryset)
+                    manager.bulk_create(batch, ignore_conflicts=True)
+                    deltas = subtract(count_strings(queryset), before)
+                    apply_counters(deltas, using=self.using, instance=self.translation_file)
+                    created += deltas.get(self.translation_file.pk, {}).get('total_strings', 0)
+                self._checkpoint(created, len(pending) - created)
+            self.duplicates += len(pending) - created
+        self.created += created
+        self.transactions += 1
+        return created
+
+    def _checkpoint(self, created, duplicates):
+        if self.checkpoint is not None:
+            self.checkpoint(self.created + created, self.duplicates + duplicates)
+
+    def _insert(self, objs):
+        """
+        INSERT multi-lignes de ``objs`` par paquets de ``batch_size``.
+
+        Chaque valeur passe par ``pre_save`` puis ``get_db_prep_save`` de son
+        champ, comme dans ``save()`` et ``bulk_create`` ; seul l'assemblage
+        de la requête, qui coûtait autant que la base, est fait ici.
+        """
+        connection = connections[self.using]
+        meta = self.model._meta
+        fields = meta.concrete_fields
+        quote = connection.ops.quote_name
+        insert = 'INSERT INTO {} ({}) VALUES '.format(
+            quote(meta.db_table), ', '.join(quote(field.column) for field in fields)
+        )
+        placeholder = '({})'.format(', '.join(['%s'] * len(fields)))
+
+        with connection.cursor() as cursor:
+            for start in range(0, len(objs), self.batch_size):
+                batch = objs[start:start + self.batch_size]
+                params = [
+                    field.get_db_prep_save(field.pre_save(obj, True), connection)
+                    for obj in batch for field in fields
+                ]
+                cursor.execute(insert + ', '.join([placeholder] * len(batch)), params)
+                for obj in batch:
+                    obj._state.adding = False
+                    obj._state.db = self.using
+        return len(objs)
+
+
+class TranslationStringDiffWriter(TranslationStringWriter):
+    """
+    Applique à un fichier déjà ingéré la différence avec sa nouvelle version.
+
+    Chaque entrée est comparée par ``entry_hash`` à la ligne de même clé :
+    - clé inconnue : insertion (INSERT multi-lignes du writer) ;
+    - empreinte différente : mise à jour de la ligne, dont les traductions
+      repassent à ``is_approved=False`` ;
+    - empreinte identique : ligne et traductions intactes, seul
+      ``line_number`` est corrigé si l'entrée a bougé ;
+    - clé absente du fichier : suppression par ``finish()``, traductions
+      comprises.
+
+    Le résultat est idempotent : une tâche relancée refait la comparaison
+    et ne trouve plus que des lignes inchangées.
+    """
+
+    UPDATE_FIELDS = [
+        'source_text', 'context', 'comment', 'line_number',
+        'is_translated', 'is_fuzzy', 'is_plural', 'entry_hash',
+    ]
+
+    def __init__(self, translation_file, batch_size=None, transaction_rows=None):
+        self.updated = 0
+        self.moved = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.invalidated = 0
+        self._changed = []
+        self._moved = []
+        super().__init__(translation_file, batch_size=batch_size, transaction_rows=transaction_rows)
+        self.existing = len(self._existing)
+
+    def _load_existing(self):
+        manager = self.model.objects.using(self.using).filter(file=self.translation_file)
+        # clé -> (id, empreinte, ligne)
+        self._existing = {
+            key: (pk, digest, line_number)
+            for pk, key, digest, line_number
+            in manager.values_list('id', 'key', 'entry_hash', 'line_number').iterator()
+        }
+        # Lignes antérieures aux empreintes : calculées depuis la base
+        for pk, key, source_text, is_plural, context in manager.filter(entry_hash='').values_list(
+                'id', 'key', 'source_text', 'is_plural', 'context').iterator():
+            self._existing[key] = (
+                pk, entry_hash(key, source_text, is_plural, context), self._existing[key][2]
+            )
+        # Seules les clés du nouveau flux comptent comme doublons
+        return set()
+
+    @property
+    def total(self):
+        return self.existing + self.created - self.deleted
+
+    @property
+    def summary(self):
+        """Résumé de la différence appliquée"""
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'moved': self.moved,  # Inchangées dont seule la ligne a bougé
+            'deleted': self.deleted,
+            'duplicates': self.duplicates,
+            'translations_invalidated': self.invalidated,
+        }
+
+    def add(self, translation_string):
+        key = translation_string.key
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen.add(key)
+        if not translation_string.entry_hash:
+            translation_string.entry_hash = string_hash(translation_string)
+
+        current = self._existing.get(key)
+        if current is None:
+            self._pending.append(translation_string)
+            self._unflushed[key] = translation_string
+        else:
+            pk, digest, line_number = current
+            if digest != translation_string.entry_hash:
+                translation_string.id = pk
+                self._changed.append(translation_string)
+                self._unflushed[key] = translation_string
+            else:
+                self.unchanged += 1
+                if line_number != translation_string.line_number:
+                    self._moved.append(self.model(id=pk, line_number=translation_string.line_number))
+
+        if len(self._pending) + len(self._changed) + len(self._moved) >= self.transaction_rows:
+            self.flush()
+        return True
+
+    def _replace_stored(self, translation_string):
+        """Ligne déjà écrite ou jugée inchangée : mise à jour et traductions invalidées"""
+        strings = self.model.objects.using(self.using).filter(
+            file=self.translation_file, key=translation_string.key
+        )
+        with transaction.atomic(using=self.using):
+            stored = strings.values_list('entry_hash', flat=True).first()
+            if stored == translation_string.entry_hash:
+                return 0
+            rows = super()._replace_stored(translation_string)
+            translations = self.model._meta.get_field('translations').related_model
+            self.invalidated += translations.objects.using(self.using).filter(
+                string__in=strings, is_approved=True
+            ).update(is_approved=False)
+        current = self._existing.get(translation_string.key)
+        if current is not None and stored in (current[1], ''):
+            # La première entrée de la clé avait été comptée inchangée
+            self.unchanged -= 1
+            self.updated += 1
+        return rows
+
+    def flush(self):
+        """Insère, met à jour et déplace les lignes en attente dans une transaction"""
+        if not self._changed and not self._moved:
+            return super().flush()
+
+        changed, self._changed = self._changed, []
+        moved, self._moved = self._moved, []
+        manager = self.model.objects.using(self.using)
+        with transaction.atomic(using=self.using):
+            created = super().flush()
+            if changed:
+                manager.bulk_update(changed, self.UPDATE_FIELDS)
+                translations = self.model._meta.get_field('translations').related_model
+                self.invalidated += translations.objects.using(self.using).filter(
+                    string__in=[obj.id for obj in changed], is_approved=True
+                ).update(is_approved=False)
+            if moved:
+                self._update_lines(moved)
+        self.updated += len(changed)
+        self.moved += len(moved)
+        return created
+
+    def _update_lines(self, objs):
+        """
+        Une requête préparée exécutée en série (``executemany``) : plus léger
+        que le ``CASE WHEN`` de ``bulk_update`` quand tout le fichier a bougé.
+        """
+        connection = connections[self.using]
+        meta = self.model._meta
+        quote = connection.ops.quote_name
+        sql = 'UPDATE {} SET {} = %s WHERE {} = %s'.format(
+            quote(meta.db_table), quote(meta.get_field('line_number').column), quote(meta.pk.column)
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                (obj.line_number, meta.pk.get_db_prep_value(obj.pk, connection)) for obj in objs
+            ])
+
+    def finish(self):
+        """Dernières écritures puis suppression des clés absentes du fichier"""
+        self.flush()
+        removed = [pk for key, (pk, _, _) in self._existing.items() if key not in self._seen]
+        manager = self.model.objects.using(self.using)
+        with transaction.atomic(using=self.using):
+            for start in range(0, len(removed), self.batch_size):
+                manager.filter(pk__in=removed[start:start + self.batch_size]).delete()
+        self.deleted = len(removed)
+        return self.deleted
@@ -0,0 +1,426 @@
+# =============================================================================
+# translations/engine.py
+# =============================================================================
+
+"""
+Exécution d'une ``TranslationTask`` : traduction automatique des chaînes
+d'un fichier vers les langues cibles de la tâche.
+
+- Les chaînes du fichier sont lues en flux, par paquets de
+  ``TRANSLATIONS_ENGINE_CHUNK_SIZE`` (``values_list().iterator()``), une
+  seule fois quel que soit le nombre de langues.
+- Par paquet, la mémoire de traduction (``translations/memory.py``) est
+  consultée en une requête pour toutes les langues ; seuls les textes
+  absents partent au service.
+- Si le service l'active (``config['fuzzy_prefill']``), un texte absent de
+  la mémoire mais proche d'un texte mémorisé (``translations/fuzzy.py``,
+  similarité au moins ``config['fuzzy_threshold']``) reçoit la traduction
+  de ce texte, marquée ``is_fuzzy`` pour relecture, sans appel au service.
+- Par langue, les chaînes restantes de même texte source normalisé (entrées
+  PO qui ne diffèrent que par le contexte...) sont regroupées : chaque texte
+  part une seule fois, sa traduction est reportée sur toutes les chaînes du
+  groupe (``deduplicated`` / ``dedup_ratio`` du résumé). D'un paquet à
+  l'autre, la mémoire joue ce rôle.
+- Les variables et le balisage (``%(name)s``, ``{count}``, ``<b>``, ICU...)
+  sont masqués par des sentinelles courtes avant l'envoi, sur tout le
+  paquet d'un coup (``translations/masking.py``), puis restaurés ; un texte
+  dont la traduction perd ses sentinelles est renvoyé sans masque, un texte
+  fait uniquement de variables n'est pas envoyé (``config['mask_placeholders']``,
+  ``TRANSLATIONS_MASK_PLACEHOLDERS``).
+- Ces textes sont regroupés en lots aux limites du service
+  (``pack_batches``, ``max_segments`` / ``max_chars`` de l'adaptateur) :
+  une requête au service par lot, pas par chaîne. Les traductions reçues
+  entrent dans la mémoire.
+- Les traductions sont écrites par ``bulk_create`` (mise à jour en cas de
+  conflit sur ``(string, target_language)``), puis ``progress``,
+  ``actual_word_count`` et les compteurs ``memory_*`` de la tâche sont mis
+  à jour, une fois par paquet.
+
+Les traductions approuvées ou manuelles ne sont jamais remplacées, et une
+tâche relancée ne retraduit pas ce que sa première exécution a déjà écrit
+(traductions du même service depuis ``started_at``). Une tâche passée à
+``cancelled`` s'arrête au paquet suivant.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from files.counters import touch_files
+from files.models import TranslationString
+
+from . import fuzzy, masking, memory
+from .models import Translation, TranslationTask
+from .providers import get_provider
+
+logger = logging.getLogger(__name__)
+
+
+# Chaînes lues par aller-retour en base, et écrites par transaction
+DEFAULT_CHUNK_SIZE = 2000
+
+# Lignes par INSERT des traductions
+WRITE_BATCH_SIZE = 500
+
+TRANSLATION_UPDATE_FIELDS = (
+    'translated_text', 'translation_method', 'service', 'confidence_score',
+    'updated_at', 'characters_count', 'words_count', 'is_fuzzy',
+)
+
+
+def pack_batches(rows, max_segments, max_chars):
+    """
+    Regroupe des ``(id, texte)`` en lots d'au plus ``max_segments`` textes
+    et ``max_chars`` caractères ; un texte plus long que ``max_chars`` part
+    seul dans son lot.
+    """
+    batch, size = [], 0
+    for row in rows:
+        length = len(row[1])
+        if batch and (len(batch) >= max_segments or size + length > max_chars):
+            yield batch
+            batch, size = [], 0
+        batch.append(row)
+        size += length
+    if batch:
+        yield batch
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def word_count(text):
+    return len(text.split())
+
+
+class TaskCancelled(Exception):
+    """La tâche a été annulée pendant son exécution"""
+
+
+class TranslationEngine:
+    """
+    Traduit les chaînes du fichier de ``task`` vers ses langues cibles.
+
+        engine = TranslationEngine(task)
+        engine.run()
+    """
+
+    def __init__(self, task, provider=None, chunk_size=None, fuzzy_prefill=None):
+        self.task = task
+        self.provider = provider or get_provider(task.service)
+        if chunk_size is None:
+            chunk_size = getattr(settings, 'TRANSLATIONS_ENGINE_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        self.chunk_size = chunk_size
+        self.languages = list(task.target_languages.all())
+        # Clé de langue source des entrées de la mémoire
+        self.source_language = self.provider.config.get('source_language', '')
+        # Pré-remplissage depuis les textes proches de la mémoire
+        if fuzzy_prefill is None:
+            fuzzy_prefill = self.provider.config.get(
+                'fuzzy_prefill', getattr(settings, 'TRANSLATIONS_FUZZY_PREFILL', False)
+            )
+        self.fuzzy_prefill = fuzzy_prefill
+        self.fuzzy_threshold = self.provider.config.get('fuzzy_threshold', fuzzy.threshold())
+        self.mask_placeholders = self.provider.config.get(
+            'mask_placeholders', getattr(settings, 'TRANSLATIONS_MASK_PLACEHOLDERS', True)
+        )
+        # Compteurs de l'exécution
+        self.translated = 0
+        self.skipped = 0
+        self.requests = 0
+        self.memory_hits = 0
+        self.fuzzy_hits = 0
+        self.sent = 0
+        self.deduplicated = 0
+        # Caractères des textes à traduire, et caractères réellement envoyés
+        self.characters = 0
+        self.characters_sent = 0
+        self.mask_fallbacks = 0
+
+    def strings(self):
+        """Chaînes à traduire du fichier, dans l'ordre du fichier"""
+        return TranslationString.objects.filter(file_id=self.task.file_id).exclude(source_text='')
+
+    def kept_translations(self, string_ids, language):
+        """
+        Chaînes de ``string_ids`` dont la traduction vers ``language`` est
+        conservée : approuvée, manuelle, ou déjà écrite par cette tâche.
+        """
+        keep = Q(is_approved=True) | Q(translation_method='manual')
+        if self.task.started_at:
+            keep |= Q(service=self.task.service_id, updated_at__gte=self.task.started_at)
+        return set(Translation.objects.filter(
+            keep, string_id__in=string_ids, target_language=language
+        ).values_list('string_id', flat=True))
+
+    def start(self):
+        """
+        Passe la tâche en cours. Une première exécution repart de zéro ; une
+        nouvelle tentative garde ``started_at`` et les compteurs déjà atteints.
+        """
+        task = self.task
+        changes = {'status': 'in_progress', 'error_message': ''}
+        if task.started_at is None:
+            changes.update(
+                started_at=timezone.now(), progress=0.0, actual_word_count=0,
+                memory_lookups=0, memory_hits=0, memory_saved_characters=0, memory_fuzzy_hits=0
+            )
+        TranslationTask.objects.filter(pk=task.pk).update(**changes)
+        for field, value in changes.items():
+            setattr(task, field, value)
+
+    def run(self):
+        """Exécute la tâche ; retourne le résumé de l'exécution"""
+        task = self.task
+        self.start()
+
+        total = self.strings().count() * len(self.languages)
+        done = 0
+        rows = self.strings().order_by('line_number', 'key', 'id').values_list(
+            'id', 'source_text'
+        ).iterator(chunk_size=self.chunk_size)
+
+        try:
+            for chunk in _chunks(rows, self.chunk_size):
+                self.check_cancelled()
+                string_ids = [string_id for string_id, _ in chunk]
+                hashes = {string_id: memory.source_hash(text) for string_id, text in chunk}
+                language_ids = [language.pk for language in self.languages]
+                remembered = memory.lookup(self.source_language, language_ids, hashes.values())
+                similar = self.similar(chunk, hashes, language_ids, remembered)
+                masks = {}
+                translations = []
+                learned = []
+                counters = dict.fromkeys(('words', 'lookups', 'hits', 'fuzzy', 'saved'), 0)
+                for language in self.languages:
+                    kept = self.kept_translations(string_ids, language)
+                    self.skipped += len(kept)
+                    pending = []
+                    for string_id, source_text in chunk:
+                        if string_id in kept:
+                            continue
+                        counters['lookups'] += 1
+                        counters['words'] += word_count(source_text)
+                        text = remembered.get((language.pk, hashes[string_id]))
+                        if text is not None:
+                            counters['hits'] += 1
+                            counters['saved'] += len(source_text)
+                            translations.append(self.build_translation(
+                                string_id, language, memory.apply_edges(source_text, text), method='memory'
+                            ))
+                            continue
+                        match = similar.get((hashes[string_id], language.pk))
+                        if match is None:
+                            pending.append((string_id, source_text))
+                            continue
+                        score, text = match
+                        counters['fuzzy'] += 1
+                        counters['saved'] += len(source_text)
+                        translations.append(self.build_translation(
+                            string_id, language, memory.apply_edges(source_text, text), method='memory',
+                            is_fuzzy=True, confidence_score=score
+                        ))
+                    groups = self.deduplicate(pending, hashes)
+                    self.sent += len(groups)
+                    self.deduplicated += len(pending) - len(groups)
+                    for (_, normalized, members), text in self.translate_groups(groups, language, masks):
+                        learned.append((language.pk, normalized, text))
+                        for string_id, source_text in members:
+                            translations.append(self.build_translation(
+                                string_id, language, memory.apply_edges(source_text, text)
+                            ))
+                    done += len(chunk)
+
+                self.write(translations, learned)
+                self.translated += len(translations)
+                self.memory_hits += counters['hits']
+                self.fuzzy_hits += counters['fuzzy']
+                task.progress = round(done / total * 100, 2) if total else 100.0
+                task.actual_word_count += counters['words']
+                task.memory_lookups += counters['lookups']
+                task.memory_hits += counters['hits']
+                task.memory_saved_characters += counters['saved']
+                task.memory_fuzzy_hits += counters['fuzzy']
+                TranslationTask.objects.filter(pk=task.pk).update(
+                    progress=task.progress,
+                    actual_word_count=F('actual_word_count') + counters['words'],
+                    memory_lookups=F('memory_lookups') + counters['lookups'],
+                    memory_hits=F('memory_hits') + counters['hits'],
+                    memory_saved_characters=F('memory_saved_characters') + counters['saved'],
+                    memory_fuzzy_hits=F('memory_fuzzy_hits') + counters['fuzzy'],
+                )
+        finally:
+            # Curseur de lecture fermé aussi quand le service échoue en cours de route
+            rows.close()
+
+        task.complete_task()
+        logger.info(
+            f"Tâche {task.pk}: {self.translated} traductions, {self.skipped} conservées, "
+            f"{self.requests} requêtes au service {task.service.name}, "
+            f"{self.memory_hits} trouvées en mémoire ({task.memory_hit_rate} %), "
+            f"{self.fuzzy_hits} pré-remplies depuis un texte proche, "
+            f"{self.deduplicated} reprises d'une chaîne de même texte ({self.dedup_ratio} %), "
+            f"{self.characters_sent} caractères envoyés ({self.masking_ratio} % masqués)"
+        )
+        return {
+            'status': 'success',
+            'translated': self.translated,
+            'skipped': self.skipped,
+            'requests': self.requests,
+            'actual_word_count': task.actual_word_count,
+            'memory_hits': self.memory_hits,
+            'memory_hit_rate': task.memory_hit_rate,
+            'memory_saved_characters': task.memory_saved_characters,
+            'memory_fuzzy_hits': self.fuzzy_hits,
+            'deduplicated': self.deduplicated,
+            'dedup_ratio': self.dedup_ratio,
+            'characters_sent': self.characters_sent,
+            'masking_ratio': self.masking_ratio,
+            'mask_fallbacks': self.mask_fallbacks,
+        }
+
+    @property
+    def dedup_ratio(self):
+        """Pourcentage des chaînes destinées au service couvertes par une autre chaîne de même texte"""
+        total = self.sent + self.deduplicated
+        if not total:
+            return 0
+        return round(self.deduplicated / total * 100, 2)
+
+    @property
+    def masking_ratio(self):
+        """Pourcentage des caractères à traduire non envoyés grâce au masquage"""
+        if not self.characters:
+            return 0
+        return round((self.characters - self.characters_sent) / self.characters * 100, 2)
+
+    def translate_groups(self, groups, language, masks):
+        """
+        Traductions par le service des textes de ``groups`` (voir
+        ``deduplicate``) : ``[(groupe, traduction)]``. ``masks`` garde les
+        textes masqués du paquet d'une langue à l'autre.
+        """
+        results = []
+        self.characters += sum(len(text) for _, text, _ in groups)
+        if self.mask_placeholders:
+            new = [group for group in groups if group[0] not in masks]
+            for group, masked in zip(new, masking.mask_batch([text for _, text, _ in new])):
+                masks[group[0]] = masked
+            rows = []
+            for group in groups:
+                text, tokens = masks[group[0]]
+                if masking.has_text(text):
+                    rows.append((group, text, tokens))
+                else:
+                    # Rien que des variables et du balisage : la source est sa propre traduction
+                    results.append((group, group[1]))
+        else:
+            rows = [(group, group[1], ()) for group in groups]
+
+        retry = []
+        for rows, check in ((rows, True), (retry, False)):
+            for batch in pack_batches(rows, self.provider.max_segments, self.provider.max_chars):
+                texts = self.provider.translate([text for _, text, _ in batch], language.code)
+                self.requests += 1
+                self.characters_sent += sum(len(text) for _, text, _ in batch)
+                for (group, _, tokens), text in zip(batch, texts):
+                    restored = masking.unmask(text, tokens)
+                    if restored is None and check:
+                        # Sentinelles perdues ou déplacées : texte renvoyé tel quel
+                        retry.append((group, group[1], ()))
+                        self.mask_fallbacks += 1
+                    else:
+                        results.append((group, text if restored is None else restored))
+        return results
+
+    @staticmethod
+    def deduplicate(pending, hashes):
+        """
+        Regroupe des ``(id, texte)`` par texte source normalisé :
+        ``[(empreinte, texte normalisé, [(id, texte)])]``, dans l'ordre de
+        première apparition. Le texte normalisé part au service, les espaces
+        de début et de fin de chaque chaîne sont reportés sur sa traduction.
+        """
+        groups = {}
+        for string_id, source_text in pending:
+            digest = hashes[string_id]
+            if digest not in groups:
+                groups[digest] = (digest, memory.normalize_source(source_text) or source_text, [])
+            groups[digest][2].append((string_id, source_text))
+        return list(groups.values())
+
+    def check_cancelled(self):
+        status = TranslationTask.objects.filter(pk=self.task.pk).values_list('status', flat=True).first()
+        if status == 'cancelled':
+            raise TaskCancelled(f"Tâche {self.task.pk} annulée")
+
+    def similar(self, chunk, hashes, language_ids, remembered):
+        """
+        Meilleure traduction proche de chaque texte absent de la mémoire,
+        cherchée une fois par texte : ``{(empreinte, language_id):
+        (similarité, traduction)}``, vide si le pré-remplissage n'est pas
+        activé.
+        """
+        if not self.fuzzy_prefill:
+            return {}
+        missing = {}
+        for string_id, source_text in chunk:
+            digest = hashes[string_id]
+            if digest not in missing and any(
+                (language_id, digest) not in remembered for language_id in language_ids
+            ):
+                missing[digest] = source_text
+        missing = list(missing.items())
+        found = fuzzy.find_similar(
+            self.source_language, [text for _, text in missing], language_ids,
+            min_similarity=self.fuzzy_threshold, limit=1
+        )
+        return {
+            (missing[index][0], language_id): (matches[0][0], matches[0][2])
+            for index, by_language in found.items()
+            for language_id, matches in by_language.items()
+        }
+
+    def build_translation(self, string_id, language, text, method=None, is_fuzzy=False, confidence_score=None):
+        # bulk_create n'appelle pas Translation.save() : compteurs calculés ici
+        return Translation(
+            string_id=string_id,
+            target_language=language,
+            translated_text=text,
+            translation_method=method or self.task.service.name,
+            service_id=self.task.service_id,
+            confidence_score=confidence_score,
+            is_fuzzy=is_fuzzy,
+            characters_count=len(text),
+            words_count=word_count(text),
+        )
+
+    def write(self, translations, learned=()):
+        """
+        Écrit les traductions d'un paquet, et les traductions reçues du
+        service dans la mémoire, en une transaction.
+        """
+        if not translations:
+            return
+        with transaction.atomic():
+            Translation.objects.bulk_create(
+                translations,
+                batch_size=WRITE_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['string', 'target_language'],
+                update_fields=list(TRANSLATION_UPDATE_FIELDS),
+            )
+            memory.remember(learned, source_language=self.source_language, service_id=self.task.service_id)
+            # Nombre de traductions des chaînes : ETag de strings/by_file
+            touch_files([self.task.file_id])
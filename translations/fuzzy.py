@@ -0,0 +1,404 @@
+# =============================================================================
+# translations/fuzzy.py
+# =============================================================================
+
+"""
+Index approché de la mémoire de traduction (MinHash-LSH).
+
+Deux textes source proches (« Delete file » / « Delete files ») partagent
+la plupart de leurs trigrammes de caractères. Chaque texte de la mémoire
+reçoit une signature MinHash de ``NUM_BANDS * BAND_ROWS`` valeurs, découpée
+en bandes ; chaque bande donne un seau (``TranslationMemoryBucket``). Les
+textes qui partagent des seaux avec le texte cherché sont candidats (au plus
+``MAX_CANDIDATES``, ceux qui en partagent le plus), puis la similarité de
+Jaccard exacte des trigrammes décide (``TRANSLATIONS_FUZZY_THRESHOLD``, 0,7
+par défaut).
+
+Avec 12 bandes de 3 lignes, deux textes de similarité 0,7 partagent un seau
+dans 99 % des cas, de similarité 0,5 dans 80 %, de similarité 0,3 dans 28 %.
+
+Les seaux d'un texte ne changent jamais : le processus garde en mémoire les
+seaux, les trigrammes et les traductions déjà lus (``FuzzyCache``), quelques
+minutes. Une recherche à cache chaud ne touche pas la base.
+"""
+
+import hashlib
+import heapq
+import struct
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Window
+from django.db.models.constants import OnConflict
+from django.db.models.functions import RowNumber
+
+from .memory import normalize_source, source_hash
+
+
+NGRAM = 3
+NUM_BANDS = 12
+BAND_ROWS = 3
+
+# Une valeur de hachage de 32 bits par ligne de signature, tirées d'un seul
+# condensé SHAKE-128 par trigramme (stable d'un processus à l'autre : les
+# seaux sont stockés en base)
+_SIGNATURE_SIZE = NUM_BANDS * BAND_ROWS
+_unpack = struct.Struct(f'<{_SIGNATURE_SIZE}I').unpack
+
+# Trigrammes dont les valeurs sont gardées en mémoire (peu nombreux en pratique)
+GRAM_CACHE_SIZE = 100000
+_gram_values = {}
+
+DEFAULT_THRESHOLD = 0.7
+
+# Textes lus par seau : des chaînes calquées sur un même modèle (« Fichier 1 »,
+# « Fichier 2 »...) remplissent les mêmes seaux, un seau encombré n'en garde
+# que les plus anciens
+BUCKET_LIMIT = 32
+
+# Candidats comparés par texte, ceux qui partagent le plus de seaux d'abord
+MAX_CANDIDATES = 24
+
+# Paramètres des requêtes IN, sous la limite historique de SQLite
+IN_BATCH_SIZE = 900
+
+
+def threshold():
+    return getattr(settings, 'TRANSLATIONS_FUZZY_THRESHOLD', DEFAULT_THRESHOLD)
+
+
+def shingles(text):
+    """Trigrammes de caractères du texte normalisé, en minuscules, espaces réduits à un"""
+    padded = f" {' '.join(normalize_source(text).lower().split())} "
+    if len(padded) <= NGRAM:
+        return frozenset([padded])
+    return frozenset(padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+
+
+def similarity(left, right):
+    """Similarité de Jaccard de deux ensembles de trigrammes"""
+    if not left or not right:
+        return 0.0
+    common = len(left & right)
+    return common / (len(left) + len(right) - common)
+
+
+def _gram_hashes(gram):
+    if len(_gram_values) >= GRAM_CACHE_SIZE:
+        _gram_values.clear()
+    values = _gram_values[gram] = _unpack(hashlib.shake_128(gram.encode('utf-8')).digest(4 * _SIGNATURE_SIZE))
+    return values
+
+
+def signature(grams):
+    """Signature MinHash d'un ensemble de trigrammes : minimum de chaque valeur de hachage"""
+    known = _gram_values
+    return list(map(min, zip(*[known.get(gram) or _gram_hashes(gram) for gram in grams])))
+
+
+_MASK = (1 << 64) - 1
+_SIGN = 1 << 63
+_MIX = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+
+
+def buckets(grams):
+    """Seaux LSH (entiers signés 64 bits, un par bande) d'un ensemble de trigrammes"""
+    values = signature(grams)
+    result = []
+    for band in range(NUM_BANDS):
+        key = (band + 1) * _MIX[0]
+        for row, value in enumerate(values[band * BAND_ROWS:(band + 1) * BAND_ROWS]):
+            key = ((key ^ value) * _MIX[1 + row % 2] + row) & _MASK
+        result.append(key - (1 << 64) if key & _SIGN else key)
+    return result
+
+
+class FuzzyCache:
+    """
+    Lectures de l'index gardées par processus, par table :
+
+        - ``buckets`` : seau -> empreintes des textes ;
+        - ``shingles`` : empreinte -> trigrammes du texte ;
+        - ``translations`` : empreinte -> ``{language_id: (texte source,
+          traduction, origine)}``.
+
+    ``max_items`` entrées au plus par table, relues en base après ``ttl``
+    secondes. Les écritures du processus sont reportées sur les entrées déjà
+    en cache (``update``) ; celles des autres processus sont vues au plus
+    tard après ``ttl``.
+    """
+    TABLES = ('buckets', 'shingles', 'translations')
+
+    def __init__(self, max_items=200000, ttl=300, clock=time.monotonic):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self._tables = {name: OrderedDict() for name in self.TABLES}
+        self._lock = threading.Lock()
+
+    def get(self, table, source_language, keys):
+        """``({clé: valeur}, clés absentes ou expirées)``"""
+        entries = self._tables[table]
+        now = self.clock()
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                item = entries.get((source_language, key))
+                if item is None or item[0] < now:
+                    missing.append(key)
+                else:
+                    found[key] = item[1]
+        return found, missing
+
+    def set(self, table, source_language, mapping):
+        entries = self._tables[table]
+        expires = self.clock() + self.ttl
+        with self._lock:
+            for key, value in mapping.items():
+                entries[(source_language, key)] = (expires, value)
+                entries.move_to_end((source_language, key))
+            while len(entries) > self.max_items:
+                entries.popitem(last=False)
+
+    def update(self, table, source_language, mapping, merge):
+        """Reporte ``merge(valeur en cache, valeur écrite)`` sur les clés déjà en cache"""
+        entries = self._tables[table]
+        with self._lock:
+            for key, value in mapping.items():
+                item = entries.get((source_language, key))
+                if item is not None:
+                    merge(item[1], value)
+
+    def clear(self):
+        with self._lock:
+            for entries in self._tables.values():
+                entries.clear()
+
+
+cache = FuzzyCache(
+    max_items=getattr(settings, 'TRANSLATIONS_FUZZY_CACHE_ITEMS', 200000),
+    ttl=getattr(settings, 'TRANSLATIONS_FUZZY_CACHE_TTL', 300),
+)
+
+
+def _batches(values, size=IN_BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def index_sources(source_language, sources, using='default'):
+    """
+    Ajoute à l'index les textes ``{empreinte: texte normalisé}`` de la
+    mémoire (entrées déjà présentes ignorées). INSERT multi-lignes construits
+    directement, comme ``files/writers.py`` : douze lignes par texte, la
+    préparation de ``bulk_create`` coûtait plus que la base.
+    """
+    from .models import TranslationMemoryBucket
+
+    params = []
+    added = defaultdict(set)
+    grams_by_hash = {}
+    for digest, text in sources.items():
+        grams = shingles(text)
+        grams_by_hash[digest] = grams
+        for bucket in buckets(grams):
+            params.append((source_language, bucket, digest))
+            added[bucket].add(digest)
+    if not params:
+        return 0
+
+    connection = connections[using]
+    meta = TranslationMemoryBucket._meta
+    fields = [meta.get_field(name) for name in ('source_language', 'bucket', 'source_hash')]
+    quote = connection.ops.quote_name
+    insert = '{} {} ({}) VALUES '.format(
+        connection.ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        quote(meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+    )
+    suffix = connection.ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None)
+    rows_per_insert = IN_BATCH_SIZE // len(fields)
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for batch in _batches(params, rows_per_insert):
+            cursor.execute(
+                insert + ', '.join(['(%s, %s, %s)'] * len(batch)) + (f' {suffix}' if suffix else ''),
+                [value for row in batch for value in row]
+            )
+    cache.update('buckets', source_language, added, _add_members)
+    cache.set('shingles', source_language, grams_by_hash)
+    return len(params)
+
+
+def _add_members(cached, new):
+    for digest in new:
+        if len(cached) >= BUCKET_LIMIT:
+            break
+        cached.add(digest)
+
+
+def learn(source_language, entries, replace=False):
+    """
+    Nouvelles entrées de la mémoire (``TranslationMemory``, voir
+    ``memory.remember``) : textes ajoutés à l'index, traductions reportées
+    sur le cache ; ``replace`` si elles remplacent les entrées existantes.
+    """
+    index_sources(source_language, {entry.source_hash: entry.source_text for entry in entries})
+    written = defaultdict(dict)
+    for entry in entries:
+        written[entry.source_hash][entry.target_language_id] = (
+            entry.source_text, entry.translated_text, entry.origin
+        )
+
+    def merge(cached, new):
+        for language_id, value in new.items():
+            if replace or language_id not in cached:
+                cached[language_id] = value
+
+    cache.update('translations', source_language, written, merge)
+
+
+def _resolve(table, source_language, keys, load):
+    """Valeurs de ``keys`` : cache, puis ``load(clés absentes)`` pour le reste"""
+    found, missing = cache.get(table, source_language, keys)
+    if missing:
+        loaded = {}
+        for batch in _batches(missing):
+            loaded.update(load(batch))
+        cache.set(table, source_language, loaded)
+        found.update(loaded)
+    return found
+
+
+def _load_buckets(source_language, keys):
+    from .models import TranslationMemoryBucket
+
+    # Seaux vides compris : un texte sans voisin ne coûte plus de requête
+    loaded = {key: set() for key in keys}
+    for bucket, digest in TranslationMemoryBucket.objects.filter(
+        source_language=source_language, bucket__in=keys
+    ).annotate(
+        rank=Window(RowNumber(), partition_by=F('bucket'), order_by=F('id').asc())
+    ).filter(rank__lte=BUCKET_LIMIT).values_list('bucket', 'source_hash'):
+        loaded[bucket].add(digest)
+    return loaded
+
+
+def _load_shingles(source_language, hashes):
+    from .models import TranslationMemory
+
+    return {
+        digest: shingles(text)
+        for digest, text in TranslationMemory.objects.filter(
+            source_language=source_language, source_hash__in=hashes
+        ).values_list('source_hash', 'source_text').distinct()
+    }
+
+
+def _load_translations(source_language, hashes):
+    from .models import TranslationMemory
+
+    loaded = {digest: {} for digest in hashes}
+    for digest, language_id, source_text, translated_text, origin in TranslationMemory.objects.filter(
+        source_language=source_language, source_hash__in=hashes
+    ).values_list('source_hash', 'target_language_id', 'source_text', 'translated_text', 'origin'):
+        loaded[digest][language_id] = (source_text, translated_text, origin)
+    return loaded
+
+
+def find_similar(source_language, texts, language_ids, min_similarity=None, limit=5):
+    """
+    Traductions mémorisées des textes proches de chaque texte de ``texts``,
+    vers les langues ``language_ids`` : ``{indice du texte: {language_id:
+    [(similarité, texte source, traduction, origine)]}}``, au plus ``limit``
+    par langue, les plus proches d'abord. Les correspondances exactes sont
+    exclues (voir ``memory.lookup``).
+    """
+    if min_similarity is None:
+        min_similarity = threshold()
+    queries = []
+    for text in texts:
+        grams = shingles(text)
+        queries.append((source_hash(text), grams, buckets(grams)))
+
+    members = _resolve(
+        'buckets', source_language, {key for _, _, keys in queries for key in keys},
+        lambda keys: _load_buckets(source_language, keys)
+    )
+    candidates = []
+    for digest, _, keys in queries:
+        shared = defaultdict(float)
+        for key in keys:
+            found = members.get(key, ())
+            # Un seau plein (tronqué) est partagé par tout un modèle de chaînes : il compte peu
+            weight = 1.0 if len(found) < BUCKET_LIMIT else 1.0 / BUCKET_LIMIT
+            for candidate in found:
+                shared[candidate] += weight
+        shared.pop(digest, None)
+        candidates.append(heapq.nlargest(MAX_CANDIDATES, shared, key=shared.get))
+    known = _resolve(
+        'shingles', source_language, set().union(*candidates),
+        lambda hashes: _load_shingles(source_language, hashes)
+    )
+
+    scored = []
+    for (_, grams, _), hashes in zip(queries, candidates):
+        matches = []
+        for candidate in hashes:
+            score = similarity(grams, known.get(candidate))
+            if score >= min_similarity:
+                matches.append((score, candidate))
+        matches.sort(reverse=True)
+        scored.append(matches)
+
+    translations = _resolve(
+        'translations', source_language, {digest for matches in scored for _, digest in matches},
+        lambda hashes: _load_translations(source_language, hashes)
+    )
+    language_ids = set(language_ids)
+
+    results = {}
+    for index, matches in enumerate(scored):
+        by_language = defaultdict(list)
+        for score, digest in matches:
+            for language_id, (source_text, translated_text, origin) in translations.get(digest, {}).items():
+                found = by_language[language_id] if language_id in language_ids else None
+                if found is not None and len(found) < limit:
+                    found.append((round(score, 4), source_text, translated_text, origin))
+        if by_language:
+            results[index] = dict(by_language)
+    return results
+
+
+def suggest(source_text, languages, source_language='', min_similarity=None, limit=5):
+    """
+    Suggestions de la mémoire pour un texte source, sans appel au service :
+    la correspondance exacte puis les textes proches, par langue de
+    ``languages`` (``Language``).
+    """
+    from .memory import apply_edges, lookup
+
+    by_id = {language.pk: language for language in languages}
+    exact = lookup(source_language, by_id, [source_hash(source_text)])
+    similar = find_similar(source_language, [source_text], by_id, min_similarity, limit).get(0, {})
+    suggestions = []
+    for language_id, language in by_id.items():
+        found = []
+        for (exact_language_id, _), text in exact.items():
+            if exact_language_id == language_id:
+                found.append({
+                    'match': 'exact', 'similarity': 1.0, 'source_text': normalize_source(source_text),
+                    'translated_text': apply_edges(source_text, text),
+                })
+        for score, candidate, text, origin in similar.get(language_id, ()):
+            found.append({
+                'match': 'fuzzy', 'similarity': score, 'source_text': candidate,
+                'translated_text': apply_edges(source_text, text), 'origin': origin,
+            })
+        for suggestion in found[:limit]:
+            suggestion['language_code'] = language.code
+            suggestions.append(suggestion)
+    return suggestions
@@ -0,0 +1,107 @@
+# =============================================================================
+# translations/management/commands/benchmark_masking.py
+# =============================================================================
+
+"""
+Benchmark du masquage des variables et du balisage (``translations/masking.py``)
+sur de vrais catalogues : caractères envoyés au service avec et sans masque,
+et débit de l'analyse par paquet (``mask_batch``) face à une analyse texte
+par texte.
+
+Usage :
+    python manage.py benchmark_masking media/translation_files/django.po locales/fr.json
+    python manage.py benchmark_masking --file-id 12
+    python manage.py benchmark_masking --limit 50000
+
+Sans fichier, les textes source des chaînes en base sont mesurés (ceux d'un
+fichier avec ``--file-id``). Ne modifie pas la base.
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Mesure la réduction des caractères envoyés au service par le masquage des variables et du balisage"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help="Catalogues .po ou .json à mesurer")
+        parser.add_argument('--file-id', type=int, help="Textes source d'un fichier en base")
+        parser.add_argument('--limit', type=int, default=100000, help="Textes lus en base au plus (défaut 100 000)")
+        parser.add_argument(
+            '--chunk-size', type=int, default=getattr(settings, 'TRANSLATIONS_ENGINE_CHUNK_SIZE', 2000),
+            help="Textes analysés par paquet, comme le moteur (défaut TRANSLATIONS_ENGINE_CHUNK_SIZE)"
+        )
+
+    def handle(self, *args, **options):
+        catalogs = []
+        for path in options['paths']:
+            try:
+                catalogs.append((os.path.basename(path), self.read_catalog(path)))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Lecture de {path} impossible: {e}")
+        if not catalogs:
+            catalogs.append(self.read_database(options['file_id'], options['limit']))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Masquage des variables ({options['chunk_size']:,} textes par paquet)"
+        ))
+        for label, texts in catalogs:
+            self.measure(label, texts, max(options['chunk_size'], 1))
+
+    def read_catalog(self, path):
+        from files.parsers import JSONStreamFlattener, iter_po_entries, open_text_stream
+
+        with open_text_stream(path, 'utf-8') as stream:
+            if path.endswith('.json'):
+                return [value for _key, value in JSONStreamFlattener(stream) if isinstance(value, str) and value]
+            texts = []
+            for entry in iter_po_entries(stream):
+                texts.extend(text for text in (entry.msgid, entry.msgid_plural) if text)
+            return texts
+
+    def read_database(self, file_id, limit):
+        from files.models import TranslationString
+
+        strings = TranslationString.objects.order_by('id')
+        label = 'chaînes en base'
+        if file_id is not None:
+            strings = strings.filter(file_id=file_id)
+            label = f'fichier {file_id}'
+        texts = [text for text in strings.values_list('source_text', flat=True)[:limit] if text]
+        if not texts:
+            raise CommandError("Aucun texte à mesurer : indiquer des catalogues ou importer des fichiers")
+        return label, texts
+
+    def measure(self, label, texts, chunk_size):
+        from translations import masking
+
+        chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+        start = time.perf_counter()
+        masked = [item for chunk in chunks for item in masking.mask_batch(chunk)]
+        batch_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for text in texts:
+            masking.mask(text)
+        single_elapsed = time.perf_counter() - start
+
+        # Un texte fait uniquement de variables n'est pas envoyé au service
+        original = sum(len(text) for text in texts)
+        sent = sum(len(text) for text, _tokens in masked if masking.has_text(text))
+        with_tokens = sum(1 for _text, tokens in masked if tokens)
+        skipped = sum(1 for text, _tokens in masked if not masking.has_text(text))
+        reduction = (original - sent) / original * 100 if original else 0
+
+        self.stdout.write(
+            f"  {label:<28} {len(texts):8,} textes  {with_tokens:7,} avec jetons  {skipped:6,} non envoyés  "
+            f"{original:10,} → {sent:10,} caractères ({reduction:5.1f} % en moins)"
+        )
+        self.stdout.write(
+            f"  {'':<28} par paquet {len(texts) / max(batch_elapsed, 1e-9):11,.0f} textes/s  "
+            f"texte par texte {len(texts) / max(single_elapsed, 1e-9):11,.0f} textes/s"
+        )
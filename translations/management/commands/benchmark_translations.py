@@ -0,0 +1,169 @@
+# =============================================================================
+# translations/management/commands/benchmark_translations.py
+# =============================================================================
+
+"""
+Benchmark du moteur de traduction automatique (``translations/engine.py``)
+avec l'adaptateur local ``fake``, dont ``--latency-ms`` simule l'aller-retour
+réseau de chaque requête au service.
+
+Usage :
+    python manage.py benchmark_translations --sizes 1000,5000 --languages 2 --latency-ms 5
+
+La première mesure traduit un fichier dont chaque texte figure quatre fois
+(un texte distinct envoyé une fois). La dernière traduit un second fichier
+aux textes proches des premiers (« ... à traduire. ») avec le
+pré-remplissage approché (``fuzzy_prefill``), puis une recherche de
+suggestions par chaîne est mesurée, cache chaud.
+
+Écrit réellement dans la base configurée : à lancer avec des réglages
+pointant vers une base jetable. Les lignes créées sont supprimées à la fin.
+"""
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ("Mesure le moteur de traduction : une chaîne par requête, des lots aux limites du service, "
+            "puis la mémoire de traduction exacte et approchée")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1000,5000',
+            help="Nombres de chaînes du fichier traduit, séparés par des virgules (défaut 1000,5000)"
+        )
+        parser.add_argument('--languages', type=int, default=2, help="Langues cibles de la tâche (défaut 2)")
+        parser.add_argument(
+            '--latency-ms', type=float, default=5,
+            help="Durée simulée d'une requête au service, en millisecondes (défaut 5)"
+        )
+
+    def handle(self, *args, **options):
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+        from files.models import TranslationFile, TranslationString
+        from files.writers import TranslationStringWriter
+        from translations import fuzzy
+        from translations.engine import TranslationEngine
+        from translations.memory import source_hash
+        from translations.models import (
+            Language, Translation, TranslationMemory, TranslationMemoryBucket, TranslationService, TranslationTask
+        )
+
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size]
+        except ValueError:
+            raise CommandError("--sizes doit être une liste d'entiers")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Moteur de traduction ({connection.vendor}, {options['latency_ms']:g} ms par requête, "
+            f"{options['languages']} langue(s))"
+        ))
+
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create(
+            username=f'benchmark-{suffix}', email=f'benchmark-{suffix}@example.com'
+        )
+        languages = [
+            Language.objects.create(code=f'b{i}{suffix}'[:10], name=f'Benchmark {i}', native_name=f'Benchmark {i}')
+            for i in range(options['languages'])
+        ]
+        existing = set(TranslationService.objects.values_list('name', flat=True))
+        name = next((value for value, _label in TranslationService.SERVICE_TYPES if value not in existing), None)
+        if name is None:
+            raise CommandError("Aucun nom de service libre pour le service de benchmark")
+        service = TranslationService.objects.create(
+            name=name, display_name='Benchmark',
+            config={'provider': 'fake', 'latency_ms': options['latency_ms']}
+        )
+        source_texts = set()
+
+        def make_file(size, template, repeat=1):
+            translation_file = TranslationFile.objects.create(
+                original_filename='benchmark.po', file_path='benchmark.po',
+                file_type='po', file_size=0, uploaded_by=user
+            )
+            with TranslationStringWriter(translation_file) as writer:
+                for i in range(size):
+                    source_texts.add(template.format(i // repeat))
+                    writer.add(TranslationString(
+                        file=translation_file, key=f'module.key{i}',
+                        source_text=template.format(i // repeat), line_number=i + 1
+                    ))
+            return translation_file
+
+        def forget():
+            TranslationMemory.objects.filter(target_language__in=languages).delete()
+            hashes = [source_hash(text) for text in source_texts]
+            for start in range(0, len(hashes), fuzzy.IN_BATCH_SIZE):
+                TranslationMemoryBucket.objects.filter(
+                    source_language='', source_hash__in=hashes[start:start + fuzzy.IN_BATCH_SIZE]
+                ).delete()
+            fuzzy.cache.clear()
+
+        try:
+            for size in sizes:
+                translation_file = make_file(size, 'Texte source numéro {} à traduire')
+                similar_file = make_file(size, 'Texte source numéro {} à traduire.')
+                # Chaque texte quatre fois, comme des entrées PO qui ne diffèrent que par le contexte
+                duplicate_file = make_file(size, 'Texte source en double {} à traduire', repeat=4)
+                self.stdout.write(f"{size:,} chaînes")
+
+                # Mémoire vide, sauf pour les dernières mesures qui relisent ce que la précédente a appris
+                for label, limits, warm, target in (
+                    ('lots, sources en double (x4)', {}, False, duplicate_file),
+                    ('une chaîne par requête', {'max_segments': 1}, False, translation_file),
+                    ('lots (100 textes)', {}, False, translation_file),
+                    ('lots, mémoire remplie', {}, True, translation_file),
+                    ('lots, textes proches', {'fuzzy_prefill': True}, True, similar_file),
+                ):
+                    Translation.objects.filter(string__file=target).delete()
+                    if not warm:
+                        forget()
+                    service.config = {'provider': 'fake', 'latency_ms': options['latency_ms'], **limits}
+                    service.save(update_fields=['config'])
+                    task = TranslationTask.objects.create(file=target, user=user, service=service)
+                    task.target_languages.set(languages)
+
+                    queries = []
+
+                    def count_query(execute, sql, params, many, context):
+                        queries.append(sql)
+                        return execute(sql, params, many, context)
+
+                    start = time.perf_counter()
+                    with connection.execute_wrapper(count_query):
+                        result = TranslationEngine(task).run()
+                    elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f"  {label:<28} {elapsed * 1000:9.1f} ms  {result['translated'] / elapsed:9,.0f} traductions/s  "
+                        f"{result['requests']:6d} requêtes au service  {len(queries):5d} requêtes SQL  "
+                        f"{result['memory_hit_rate']:5.1f} % en mémoire  "
+                        f"{result['memory_fuzzy_hits']:6d} pré-remplies  "
+                        f"{result['dedup_ratio']:5.1f} % en double"
+                    )
+
+                # Suggestions une chaîne à la fois, comme l'action strings/{id}/suggestions/
+                texts = [f'Texte source n° {i} à traduire' for i in range(min(size, 1000))]
+                language_ids = [language.pk for language in languages]
+                fuzzy.find_similar('', texts, language_ids)
+                start = time.perf_counter()
+                found = sum(bool(fuzzy.find_similar('', [text], language_ids)) for text in texts)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"  {'suggestions, cache chaud':<28} {elapsed / len(texts) * 1000:9.3f} ms par chaîne  "
+                    f"{found:,}/{len(texts):,} avec un texte proche"
+                )
+                translation_file.delete()
+                similar_file.delete()
+                duplicate_file.delete()
+        finally:
+            forget()
+            TranslationFile.objects.filter(uploaded_by=user).delete()
+            service.delete()
+            for language in languages:
+                language.delete()
+            user.delete()
@@ -0,0 +1,83 @@
+# =============================================================================
+# translations/management/commands/build_translation_memory.py
+# =============================================================================
+
+"""
+Alimente la mémoire de traduction depuis les traductions déjà en base :
+traductions automatiques d'abord (sans écraser une entrée existante), puis
+traductions approuvées (qui remplacent l'entrée). Toutes les entrées sont
+ensuite ajoutées à l'index approché (translations/fuzzy.py), y compris
+celles créées avant lui.
+
+Usage :
+    python manage.py build_translation_memory
+"""
+
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+
+# Traductions lues par aller-retour en base
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Alimente la mémoire de traduction depuis les traductions approuvées et automatiques"
+
+    def handle(self, *args, **options):
+        from django.db.models import Q
+        from translations.fuzzy import index_sources
+        from translations.memory import remember
+        from translations.models import Translation, TranslationMemory, TranslationService
+
+        source_languages = {
+            service_id: (config or {}).get('source_language', '')
+            for service_id, config in TranslationService.objects.values_list('id', 'config')
+        }
+
+        passes = (
+            ('automatiques', False, Q(is_approved=False) & ~Q(translation_method__in=['manual', 'memory'])),
+            ('approuvées', True, Q(is_approved=True)),
+        )
+        for label, approved, condition in passes:
+            rows = Translation.objects.filter(condition).values_list(
+                'target_language_id', 'string__source_text', 'translated_text', 'service_id'
+            ).iterator(chunk_size=CHUNK_SIZE)
+            written = 0
+            chunk = defaultdict(list)
+            for count, (language_id, source_text, translated_text, service_id) in enumerate(rows, 1):
+                chunk[source_languages.get(service_id, '')].append((language_id, source_text, translated_text))
+                if count % CHUNK_SIZE == 0:
+                    written += self.flush(remember, chunk, approved)
+            written += self.flush(remember, chunk, approved)
+            self.stdout.write(f"  traductions {label:<12} {written:,} entrées")
+
+        rows = TranslationMemory.objects.order_by().values_list(
+            'source_language', 'source_hash', 'source_text'
+        ).distinct().iterator(chunk_size=CHUNK_SIZE)
+        indexed = 0
+        sources = defaultdict(dict)
+        for count, (source_language, digest, source_text) in enumerate(rows, 1):
+            sources[source_language][digest] = source_text
+            if count % CHUNK_SIZE == 0:
+                indexed += self.index(index_sources, sources)
+        indexed += self.index(index_sources, sources)
+        self.stdout.write(f"  {'index approché':<25} {indexed:,} textes")
+
+        self.stdout.write(self.style.SUCCESS(f"{TranslationMemory.objects.count():,} entrées en mémoire"))
+
+    def flush(self, remember, chunk, approved):
+        written = 0
+        for source_language, entries in chunk.items():
+            written += remember(entries, source_language=source_language, approved=approved)
+        chunk.clear()
+        return written
+
+    def index(self, index_sources, sources):
+        indexed = 0
+        for source_language, texts in sources.items():
+            index_sources(source_language, texts)
+            indexed += len(texts)
+        sources.clear()
+        return indexed
@@ -0,0 +1,166 @@
+# =============================================================================
+# translations/masking.py
+# =============================================================================
+
+"""
+Masquage des variables et du balisage avant l'envoi au service.
+
+``%(name)s``, ``{count}``, ``{{var}}``, ``<b>`` ou la syntaxe ICU ne se
+traduisent pas : envoyés tels quels, ils sont facturés au caractère et le
+service les abîme parfois (« % (name) s », « {compte} »). Chaque suite de
+jetons (séparés au plus par des espaces) est remplacée par une sentinelle
+``{0}``, ``{1}``... puis restaurée dans la traduction :
+
+    masked = mask_batch(['Supprimer <b>%(count)s</b> fichiers'])
+    # [('Supprimer {0} fichiers', (('<b>%(count)s</b>', False),))]
+    unmask('Delete {0} files', masked[0][1])
+    # 'Delete <b>%(count)s</b> files'
+
+Un seul analyseur précompilé (``SCANNER``) reconnaît :
+
+    - gettext / printf : ``%s``, ``%d``, ``%(name)s``, ``%1$s``, ``%.2f``, ``%%`` ;
+    - i18next : ``{{var}}``, ``{{val, number}}``, ``$t(key)`` ;
+    - vue-i18n et format Python : ``{name}``, ``{0}``, ``{0:.2f}``, ``@:key``,
+      ``@.lower:key`` ;
+    - ICU : ``{n, number}``, ``{count, plural, one {# fichier} other {# fichiers}}``
+      (en-tête, sélecteurs, accolades fermantes et ``#`` masqués, textes des
+      branches traduits) ;
+    - balises HTML / XML et entités (``&nbsp;``).
+
+``mask_batch`` analyse un paquet entier en une passe (textes joints par
+``\\x00``) : un texte sans jeton ne coûte aucun traitement propre. Une
+traduction dont les sentinelles ne correspondent plus (perdue, dupliquée,
+structure ICU réordonnée) est refusée par ``unmask`` : le moteur renvoie
+alors le texte non masqué au service.
+"""
+
+import re
+from bisect import bisect_right
+
+
+SEPARATOR = '\x00'
+
+SCANNER = re.compile(r'''
+    (?P<icu>\{\s*[\w.]+\s*,\s*(?:plural|selectordinal|select)\s*,(?:\s*offset:\s*\d+)?)
+  | (?P<selector>(?<=[,}\d])\s*(?:=\d+|[^\W\d]\w*)\s*\{)
+  | (?P<i18next>\{\{[^{}\x00]*\}\}|\$t\([^()\x00]*\))
+  | (?P<brace>\{\s*[\w.$-]*\s*(?:[:!,][^{}\x00]*)?\})
+  | (?P<printf>%(?:\(\w+\)|\d+\$)?[-+\#0]*(?:\d+|\*)?(?:\.\d+)?[hlL]?[diouxXeEfFgGcrsa%])
+  | (?P<linked>@(?:\.\w+)?:(?:\([\w.-]+\)|[\w-]+(?:\.[\w-]+)*))
+  | (?P<tag></?[A-Za-z][\w:.-]*(?:\s[^<>\x00]*)?/?>|&(?:[A-Za-z]\w*|\#\d+|\#x[0-9A-Fa-f]+);)
+  | (?P<close>\})
+  | (?P<hash>\#)
+''', re.VERBOSE)
+
+SENTINEL = re.compile(r'\{\s*(\d+)\s*\}')
+
+# Lettres restant hors sentinelles : sinon le texte n'a rien à traduire
+_LETTER = re.compile(r'[^\W\d_]')
+
+
+def mask_batch(texts):
+    """
+    Textes masqués d'un paquet, dans l'ordre : ``[(texte masqué, jetons)]``,
+    ``jetons`` étant un tuple de ``(texte d'origine, structurel)`` par
+    sentinelle (``()`` si le texte n'a rien à masquer). Les jetons
+    structurels (ICU) doivent garder leur ordre dans la traduction.
+    """
+    texts = list(texts)
+    results = [(text, ()) for text in texts]
+    if not texts:
+        return results
+    joined = SEPARATOR.join(texts)
+    starts = [0]
+    for text in texts[:-1]:
+        starts.append(starts[-1] + len(text) + 1)
+
+    spans = {}
+    stack = []
+    current = -1
+    pos = 0
+    search = SCANNER.search
+    while True:
+        match = search(joined, pos)
+        if match is None:
+            break
+        start, end = match.span()
+        index = bisect_right(starts, start) - 1
+        if index != current:
+            # Nouveau texte : un ICU mal fermé ne déborde pas sur le suivant
+            current, stack = index, []
+        kind = match.lastgroup
+        structural = kind in ('icu', 'selector', 'close')
+        if kind == 'selector':
+            if not stack or stack[-1] != 'icu':
+                # « Bonjour, monde {nom} » : mot ordinaire, l'accolade est relue seule
+                pos = end - 1
+                continue
+            stack.append('branch')
+        elif kind == 'icu':
+            stack.append('icu')
+        elif kind == 'close':
+            if not stack:
+                pos = end
+                continue
+            stack.pop()
+        elif kind == 'hash' and (not stack or stack[-1] != 'branch'):
+            pos = end
+            continue
+
+        found = spans.setdefault(index, [])
+        if found and not joined[found[-1][1]:start].strip():
+            # Jetons contigus ou séparés par des espaces : une seule sentinelle
+            found[-1][1] = end
+            found[-1][2] = found[-1][2] or structural
+        else:
+            found.append([start, end, structural])
+        pos = end
+
+    for index, found in spans.items():
+        text = texts[index]
+        offset = starts[index]
+        found = [(start - offset, end - offset, structural) for start, end, structural in found]
+        # Un jeton plus court que sa sentinelle (« %s », « %% ») reste en place,
+        # sauf dans un texte fait uniquement de jetons, qui ne sera pas envoyé
+        bounds = [0] + [bound for start, end, _ in found for bound in (start, end)] + [len(text)]
+        shrink = any(_LETTER.search(text, bounds[i], bounds[i + 1]) for i in range(0, len(bounds), 2))
+        parts = []
+        tokens = []
+        last = 0
+        for start, end, structural in found:
+            sentinel = f'{{{len(tokens)}}}'
+            if shrink and not structural and end - start < len(sentinel):
+                continue
+            parts.append(text[last:start])
+            parts.append(sentinel)
+            tokens.append((text[start:end], structural))
+            last = end
+        parts.append(text[last:])
+        results[index] = (''.join(parts), tuple(tokens))
+    return results
+
+
+def mask(text):
+    return mask_batch([text])[0]
+
+
+def has_text(masked):
+    """Le texte masqué contient-il encore quelque chose à traduire ?"""
+    return bool(_LETTER.search(SENTINEL.sub('', masked)))
+
+
+def unmask(translated, tokens):
+    """
+    Traduction avec ses jetons d'origine, ou None si ses sentinelles ne
+    correspondent pas à ``tokens`` (chacune exactement une fois, jetons
+    structurels dans l'ordre).
+    """
+    if not tokens:
+        return translated
+    found = [int(number) for number in SENTINEL.findall(translated)]
+    if sorted(found) != list(range(len(tokens))):
+        return None
+    structural = [number for number in found if tokens[number][1]]
+    if structural != sorted(structural):
+        return None
+    return SENTINEL.sub(lambda match: tokens[int(match.group(1))][0], translated)
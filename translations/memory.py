@@ -0,0 +1,105 @@
+# =============================================================================
+# translations/memory.py
+# =============================================================================
+
+"""
+Mémoire de traduction partagée entre utilisateurs (``TranslationMemory``).
+
+Une entrée associe un texte source normalisé (Unicode NFC, sans les espaces
+de début et de fin), repéré par son empreinte SHA-256, à sa traduction dans
+une langue cible. Le moteur (``translations/engine.py``) la consulte en une
+requête par paquet de chaînes, avant tout appel au service : « Save »,
+« Cancel »... ne sont payés qu'une fois, tous fichiers confondus.
+
+Alimentation :
+
+    - traductions automatiques écrites par le moteur (``machine``), sans
+      écraser une entrée existante ;
+    - traductions approuvées (``Translation.save``), qui remplacent
+      l'entrée ;
+    - ``build_translation_memory`` pour les traductions déjà en base.
+
+Chaque texte ajouté entre aussi dans l'index approché
+(``translations/fuzzy.py``), qui retrouve les textes proches.
+
+Les fichiers ne portent pas de langue source : les entrées sont rangées sous
+``config['source_language']`` du service, vide par défaut.
+"""
+
+import hashlib
+import unicodedata
+
+
+def normalize_source(text):
+    """Forme normalisée d'un texte source, celle dont l'empreinte sert de clé"""
+    return unicodedata.normalize('NFC', text).strip()
+
+
+def source_hash(text):
+    return hashlib.sha256(normalize_source(text).encode('utf-8')).hexdigest()
+
+
+def apply_edges(source, translated):
+    """Reporte les espaces de début et de fin de ``source`` sur la traduction mémorisée"""
+    if not source.strip():
+        return translated
+    start = len(source) - len(source.lstrip())
+    end = len(source.rstrip())
+    return source[:start] + translated + source[end:]
+
+
+def lookup(source_language, language_ids, hashes):
+    """
+    Traductions mémorisées des empreintes ``hashes`` vers les langues
+    ``language_ids``, en une requête : ``{(language_id, empreinte): texte}``.
+    """
+    from .models import TranslationMemory
+
+    if not hashes or not language_ids:
+        return {}
+    rows = TranslationMemory.objects.filter(
+        source_language=source_language,
+        target_language_id__in=list(language_ids),
+        source_hash__in=list(set(hashes)),
+    ).values_list('target_language_id', 'source_hash', 'translated_text')
+    return {(language_id, digest): text for language_id, digest, text in rows}
+
+
+def remember(entries, source_language='', approved=False, service_id=None):
+    """
+    Enregistre des ``(language_id, texte source, traduction)``. Une entrée
+    approuvée remplace l'existante ; une entrée automatique n'est ajoutée
+    que si la clé est libre.
+    """
+    from . import fuzzy
+    from .models import TranslationMemory
+
+    unique = {}
+    for language_id, source_text, translated_text in entries:
+        normalized = normalize_source(source_text)
+        translated_text = translated_text.strip()
+        if not normalized or not translated_text:
+            continue
+        digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        # Une clé par INSERT : ON CONFLICT ne touche pas deux fois la même ligne
+        unique[(language_id, digest)] = TranslationMemory(
+            source_language=source_language,
+            target_language_id=language_id,
+            source_hash=digest,
+            source_text=normalized,
+            translated_text=translated_text,
+            origin='approved' if approved else 'machine',
+            service_id=service_id,
+        )
+    if not unique:
+        return 0
+    if approved:
+        TranslationMemory.objects.bulk_create(
+            unique.values(), batch_size=500, update_conflicts=True,
+            unique_fields=['source_language', 'target_language', 'source_hash'],
+            update_fields=['translated_text', 'origin', 'service', 'updated_at'],
+        )
+    else:
+        TranslationMemory.objects.bulk_create(unique.values(), batch_size=500, ignore_conflicts=True)
+    fuzzy.learn(source_language, list(unique.values()), replace=approved)
+    return len(unique)
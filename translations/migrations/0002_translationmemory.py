@@ -0,0 +1,52 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('translations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translationtask',
+            name='memory_hits',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='translationtask',
+            name='memory_lookups',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='translationtask',
+            name='memory_saved_characters',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='translation',
+            name='translation_method',
+            field=models.CharField(choices=[('google', 'Google Translate'), ('deepl', 'DeepL'), ('azure', 'Azure Translator'), ('argos', 'Argos Translate'), ('manual', 'Manual Translation'), ('memory', 'Translation Memory')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='TranslationMemory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_language', models.CharField(blank=True, max_length=10)),
+                ('source_hash', models.CharField(max_length=64)),
+                ('source_text', models.TextField()),
+                ('translated_text', models.TextField()),
+                ('origin', models.CharField(choices=[('approved', 'Approved'), ('machine', 'Machine')], default='machine', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='translations.translationservice')),
+                ('target_language', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='translations.language')),
+            ],
+            options={
+                'unique_together': {('source_language', 'target_language', 'source_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('translations', '0002_translationmemory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='translation',
+            name='is_fuzzy',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='translationtask',
+            name='memory_fuzzy_hits',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='TranslationMemoryBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_language', models.CharField(blank=True, max_length=10)),
+                ('bucket', models.BigIntegerField()),
+                ('source_hash', models.CharField(max_length=64)),
+            ],
+            options={
+                'unique_together': {('source_language', 'bucket', 'source_hash')},
+            },
+        ),
+    ]
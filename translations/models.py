@@ -3,10 +3,15 @@
 # =============================================================================
 
 # translations/models.py
-from django.db import models
+from django.db import models, router
 from django.conf import settings
+from django.utils import timezone
 import json
 
+from files.counters import touch_string_files
+
+from .memory import remember
+
 class Language(models.Model):
     """Langues disponibles"""
     code = models.CharField(max_length=10, unique=True)  # fr, en, es, etc.
@@ -61,6 +66,7 @@ class Translation(models.Model):
         ('azure', 'Azure Translator'),
         ('argos', 'Argos Translate'),
         ('manual', 'Manual Translation'),
+        ('memory', 'Translation Memory'),
     ]
     
     string = models.ForeignKey('files.TranslationString', on_delete=models.CASCADE, related_name='translations')
@@ -72,6 +78,8 @@ class Translation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_approved = models.BooleanField(default=False)
+    # Pré-remplie depuis un texte proche de la mémoire (translations/fuzzy.py), à relire
+    is_fuzzy = models.BooleanField(default=False)
     
     # Métadonnées
     characters_count = models.IntegerField(default=0)
@@ -82,7 +90,25 @@ class Translation(models.Model):
         if self.translated_text:
             self.characters_count = len(self.translated_text)
             self.words_count = len(self.translated_text.split())
+        if self.is_approved:
+            # Relue et validée : n'est plus une traduction approchée
+            self.is_fuzzy = False
         super().save(*args, **kwargs)
+        # Le nombre de traductions figure dans la liste des chaînes (ETag de by_file)
+        touch_string_files([self.string_id], using=self._state.db)
+        if self.is_approved and self.translated_text:
+            # Traduction validée : elle remplace l'entrée de la mémoire de traduction
+            source_language = (self.service.config or {}).get('source_language', '') if self.service_id else ''
+            remember(
+                [(self.target_language_id, self.string.source_text, self.translated_text)],
+                source_language=source_language, approved=True, service_id=self.service_id
+            )
+    
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(Translation, instance=self)
+        result = super().delete(*args, **kwargs)
+        touch_string_files([self.string_id], using=using)
+        return result
     
     def __str__(self):
         return f"{self.string.key} -> {self.target_language.code}"
@@ -120,6 +146,20 @@ class TranslationTask(models.Model):
     error_message = models.TextField(blank=True)
     retry_count = models.IntegerField(default=0)
     
+    # Mémoire de traduction : textes cherchés, trouvés, et caractères non envoyés au service
+    memory_lookups = models.IntegerField(default=0)
+    memory_hits = models.IntegerField(default=0)
+    memory_saved_characters = models.IntegerField(default=0)
+    # Traductions pré-remplies depuis un texte proche (is_fuzzy)
+    memory_fuzzy_hits = models.IntegerField(default=0)
+    
+    @property
+    def memory_hit_rate(self):
+        """Pourcentage des textes trouvés dans la mémoire de traduction"""
+        if not self.memory_lookups:
+            return 0
+        return round(self.memory_hits / self.memory_lookups * 100, 2)
+    
     def update_progress(self, progress_value):
         """Met à jour la progression"""
         self.progress = min(100.0, max(0.0, progress_value))
@@ -132,8 +172,52 @@ class TranslationTask(models.Model):
         self.progress = 100.0
         self.save()
     
+    def fail(self, message):
+        """Marque la tâche comme échouée"""
+        self.status = 'failed'
+        self.error_message = message
+        self.completed_at = timezone.now()
+        self.save(update_fields=['status', 'error_message', 'completed_at'])
+    
     def __str__(self):
         return f"Task {self.id} - {self.file.original_filename}"
     
     class Meta:
         ordering = ['-created_at']
+
+
+class TranslationMemory(models.Model):
+    """Traduction réutilisable d'un texte source normalisé (translations/memory.py)"""
+    ORIGINS = [
+        ('approved', 'Approved'),
+        ('machine', 'Machine'),
+    ]
+    
+    source_language = models.CharField(max_length=10, blank=True)  # Vide : langue source non renseignée
+    target_language = models.ForeignKey(Language, on_delete=models.CASCADE)
+    source_hash = models.CharField(max_length=64)  # SHA-256 du texte source normalisé
+    source_text = models.TextField()
+    translated_text = models.TextField()
+    origin = models.CharField(max_length=20, choices=ORIGINS, default='machine')
+    service = models.ForeignKey(TranslationService, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.source_text[:50]} -> {self.target_language.code}"
+    
+    class Meta:
+        unique_together = ['source_language', 'target_language', 'source_hash']
+
+
+class TranslationMemoryBucket(models.Model):
+    """Seau LSH d'un texte source de la mémoire (translations/fuzzy.py)"""
+    source_language = models.CharField(max_length=10, blank=True)
+    bucket = models.BigIntegerField()  # Empreinte d'une bande de la signature MinHash
+    source_hash = models.CharField(max_length=64)  # TranslationMemory.source_hash
+    
+    def __str__(self):
+        return f"{self.bucket} -> {self.source_hash[:12]}"
+    
+    class Meta:
+        unique_together = ['source_language', 'bucket', 'source_hash']
@@ -0,0 +1,225 @@
+# =============================================================================
+# translations/providers.py
+# =============================================================================
+
+"""
+Adaptateurs des services de traduction automatique.
+
+Un adaptateur traduit une liste de textes en un appel et retourne les
+traductions dans le même ordre. Le moteur (``translations/engine.py``)
+regroupe les chaînes dans les limites de chaque service, lues dans
+``TranslationService.config`` :
+
+    - ``max_segments`` : textes par requête ;
+    - ``max_chars`` : caractères par requête (un texte plus long part seul) ;
+    - ``timeout`` : délai d'un appel HTTP, en secondes.
+
+L'adaptateur est choisi par ``config['provider']``, sinon par le nom du
+service. Les applications tierces en ajoutent sans modifier ce module :
+
+    from translations.providers import register_provider
+
+    register_provider('custom', CustomProvider)
+
+ou par le réglage ``TRANSLATION_PROVIDERS = {'custom': 'app.module.Classe'}``.
+L'adaptateur ``fake`` traduit localement, sans réseau (tests, benchmarks).
+"""
+
+import time
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ProviderError(Exception):
+    """Échec d'un appel au service ; ``retryable`` si une nouvelle tentative peut réussir"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class TranslationProvider:
+    """Adaptateur de base : limites du service et appel groupé"""
+    max_segments = 50
+    max_chars = 5000
+    timeout = 30
+
+    def __init__(self, service):
+        self.service = service
+        self.config = service.config or {}
+        self.max_segments = max(int(self.config.get('max_segments', self.max_segments)), 1)
+        self.max_chars = max(int(self.config.get('max_chars', self.max_chars)), 1)
+        self.timeout = self.config.get('timeout', self.timeout)
+
+    def translate(self, texts, target_language, source_language=None):
+        """
+        Traductions de ``texts`` vers ``target_language`` (``Language.code``),
+        dans l'ordre ; ``source_language`` None laisse le service détecter.
+        """
+        translations = self.translate_batch(list(texts), target_language, source_language)
+        if len(translations) != len(texts):
+            raise ProviderError(
+                f"{self.service.name}: {len(translations)} traductions reçues pour {len(texts)} textes"
+            )
+        return translations
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        raise NotImplementedError
+
+
+class HTTPProvider(TranslationProvider):
+    """Adaptateur d'une API HTTP, connexion réutilisée d'un lot à l'autre"""
+    default_url = None
+
+    def __init__(self, service):
+        super().__init__(service)
+        self.url = service.base_url or self.default_url
+        self.session = requests.Session()
+
+    def post(self, **kwargs):
+        try:
+            response = self.session.post(self.url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise ProviderError(f"{self.service.name}: {e}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ProviderError(f"{self.service.name}: HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise ProviderError(
+                f"{self.service.name}: HTTP {response.status_code} {response.text[:200]}", retryable=False
+            )
+        try:
+            return response.json()
+        except ValueError:
+            raise ProviderError(f"{self.service.name}: réponse JSON invalide")
+
+
+class GoogleProvider(HTTPProvider):
+    """Google Cloud Translation v2 : 128 textes par requête, 5 000 caractères conseillés"""
+    default_url = 'https://translation.googleapis.com/language/translate/v2'
+    max_segments = 128
+    max_chars = 5000
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        payload = {'q': texts, 'target': target_language, 'format': 'text'}
+        if source_language:
+            payload['source'] = source_language
+        data = self.post(params={'key': self.service.api_key}, json=payload)
+        try:
+            return [item['translatedText'] for item in data['data']['translations']]
+        except (KeyError, TypeError):
+            raise ProviderError(f"{self.service.name}: réponse inattendue")
+
+
+class DeepLProvider(HTTPProvider):
+    """DeepL v2 : 50 textes par requête, corps limité à 128 Kio"""
+    max_segments = 50
+    max_chars = 30000
+
+    @property
+    def default_url(self):
+        # Les clés gratuites finissent par ":fx" et ont leur propre domaine
+        if self.service.api_key.endswith(':fx'):
+            return 'https://api-free.deepl.com/v2/translate'
+        return 'https://api.deepl.com/v2/translate'
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        payload = {'text': texts, 'target_lang': target_language.upper()}
+        if source_language:
+            payload['source_lang'] = source_language.upper()
+        data = self.post(headers={'Authorization': f'DeepL-Auth-Key {self.service.api_key}'}, json=payload)
+        try:
+            return [item['text'] for item in data['translations']]
+        except (KeyError, TypeError):
+            raise ProviderError(f"{self.service.name}: réponse inattendue")
+
+
+class AzureProvider(HTTPProvider):
+    """Azure Translator v3 : 1 000 textes et 50 000 caractères par requête"""
+    default_url = 'https://api.cognitive.microsofttranslator.com/translate'
+    max_segments = 1000
+    max_chars = 50000
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        params = {'api-version': '3.0', 'to': target_language}
+        if source_language:
+            params['from'] = source_language
+        headers = {'Ocp-Apim-Subscription-Key': self.service.api_key}
+        if self.config.get('region'):
+            headers['Ocp-Apim-Subscription-Region'] = self.config['region']
+        data = self.post(params=params, headers=headers, json=[{'Text': text} for text in texts])
+        try:
+            return [item['translations'][0]['text'] for item in data]
+        except (KeyError, IndexError, TypeError):
+            raise ProviderError(f"{self.service.name}: réponse inattendue")
+
+
+class ArgosProvider(HTTPProvider):
+    """
+    Argos Translate : serveur LibreTranslate si ``base_url`` est renseigné,
+    paquet ``argostranslate`` local sinon (langue source ``config['source_language']``,
+    ``en`` par défaut).
+    """
+    max_segments = 100
+    max_chars = 20000
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        source_language = source_language or self.config.get('source_language', 'en')
+        if self.url:
+            payload = {'q': texts, 'source': source_language, 'target': target_language, 'format': 'text'}
+            if self.service.api_key:
+                payload['api_key'] = self.service.api_key
+            data = self.post(json=payload)
+            try:
+                return list(data['translatedText'])
+            except (KeyError, TypeError):
+                raise ProviderError(f"{self.service.name}: réponse inattendue")
+
+        try:
+            from argostranslate import translate as argos
+        except ImportError:
+            raise ProviderError("argostranslate n'est pas installé et base_url est vide", retryable=False)
+        return [argos.translate(text, source_language, target_language) for text in texts]
+
+
+class FakeProvider(TranslationProvider):
+    """
+    Traduction locale déterministe (``[fr] texte``), sans réseau.
+    ``config['latency_ms']`` simule la durée d'un aller-retour par requête.
+    """
+    max_segments = 100
+    max_chars = 20000
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        latency = self.config.get('latency_ms', 0)
+        if latency:
+            time.sleep(latency / 1000)
+        return [f'[{target_language}] {text}' for text in texts]
+
+
+PROVIDERS = {
+    'google': GoogleProvider,
+    'deepl': DeepLProvider,
+    'azure': AzureProvider,
+    'argos': ArgosProvider,
+    'fake': FakeProvider,
+}
+
+
+def register_provider(name, provider_class):
+    """Enregistre (ou remplace) l'adaptateur ``name``"""
+    PROVIDERS[name] = provider_class
+
+
+def get_provider(service):
+    """Adaptateur du service ``service`` (``TranslationService``)"""
+    name = (service.config or {}).get('provider') or service.name
+    configured = getattr(settings, 'TRANSLATION_PROVIDERS', {})
+    if name in configured:
+        provider_class = import_string(configured[name])
+    else:
+        provider_class = PROVIDERS.get(name)
+    if provider_class is None:
+        raise ProviderError(f"Aucun adaptateur pour le service {name}", retryable=False)
+    return provider_class(service)
@@ -43,7 +43,7 @@ class TranslationSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'string', 'target_language', 'language_name', 'language_code',
             'translated_text', 'translation_method', 'service', 'service_name',
-            'confidence_score', 'created_at', 'updated_at', 'is_approved',
+            'confidence_score', 'created_at', 'updated_at', 'is_approved', 'is_fuzzy',
             'characters_count', 'words_count'
         )
         read_only_fields = (
@@ -66,6 +66,7 @@ class TranslationTaskSerializer(serializers.ModelSerializer):
     service_name = serializers.CharField(source='service.display_name', read_only=True)
     target_languages_names = serializers.SerializerMethodField()
     duration = serializers.SerializerMethodField()
+    memory_hit_rate = serializers.FloatField(read_only=True)
 
     class Meta:
         model = TranslationTask
@@ -74,12 +75,14 @@ class TranslationTaskSerializer(serializers.ModelSerializer):
             'target_languages_names', 'service', 'service_name', 'status',
             'progress', 'estimated_word_count', 'actual_word_count',
             'created_at', 'started_at', 'completed_at', 'error_message',
-            'retry_count', 'duration'
+            'retry_count', 'duration', 'memory_lookups', 'memory_hits',
+            'memory_hit_rate', 'memory_saved_characters', 'memory_fuzzy_hits'
         )
         read_only_fields = (
             'id', 'file_name', 'user_email', 'service_name', 'target_languages_names',
             'status', 'progress', 'actual_word_count', 'created_at',
-            'started_at', 'completed_at', 'duration'
+            'started_at', 'completed_at', 'duration', 'memory_lookups', 'memory_hits',
+            'memory_hit_rate', 'memory_saved_characters', 'memory_fuzzy_hits'
         )
 
     def get_target_languages_names(self, obj):
@@ -0,0 +1,64 @@
+# =============================================================================
+# translations/tasks.py (Tâches Celery)
+# =============================================================================
+
+"""
+Exécution asynchrone des tâches de traduction automatique
+(``translations/engine.py``).
+"""
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from .engine import TaskCancelled, TranslationEngine
+from .models import TranslationTask
+from .providers import ProviderError
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def run_translation_task(self, task_id):
+    """
+    Traduit le fichier d'une ``TranslationTask`` vers ses langues cibles.
+    
+    Une erreur temporaire du service (réseau, quota, HTTP 5xx) relance la
+    tâche, qui reprend sans retraduire les chaînes déjà écrites ; une erreur
+    définitive, ou les tentatives épuisées, passe la tâche en ``failed``.
+    """
+    try:
+        task = TranslationTask.objects.select_related('service', 'file').get(pk=task_id)
+    except TranslationTask.DoesNotExist:
+        logger.error(f"Tâche de traduction {task_id} introuvable")
+        return {'status': 'error', 'message': 'Tâche introuvable'}
+    
+    if task.status in ('completed', 'cancelled'):
+        logger.info(f"Tâche de traduction {task_id} déjà {task.status}")
+        return {'status': task.status}
+    
+    try:
+        return TranslationEngine(task).run()
+    
+    except TaskCancelled as e:
+        logger.info(str(e))
+        return {'status': 'cancelled'}
+    
+    except ProviderError as e:
+        error_msg = f'Erreur du service {task.service.name}: {str(e)}'
+        logger.error(error_msg)
+        if e.retryable and self.request.retries < self.max_retries:
+            task.retry_count += 1
+            task.error_message = error_msg
+            TranslationTask.objects.filter(pk=task.pk).update(
+                retry_count=task.retry_count, error_message=error_msg
+            )
+            logger.info(f"Tentative {self.request.retries + 1}/{self.max_retries + 1} pour la tâche {task_id}")
+            raise self.retry(countdown=30 * 2 ** self.request.retries)
+        task.fail(error_msg)
+        return {'status': 'error', 'message': error_msg}
+    
+    except Exception as e:
+        error_msg = f'Erreur lors de la traduction: {str(e)}'
+        logger.error(error_msg)
+        task.fail(error_msg)
+        return {'status': 'error', 'message': error_msg}
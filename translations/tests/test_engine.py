@@ -0,0 +1,181 @@
+# =============================================================================
+# translations/tests/test_engine.py
+# =============================================================================
+
+"""Moteur de traduction automatique (translations/engine.py, translations/tasks.py)"""
+
+from unittest import mock
+
+from celery.exceptions import Retry
+from django.test import SimpleTestCase, TestCase
+
+from files.models import TranslationFile, TranslationString
+from files.tests.utils import create_file, create_strings, create_user
+from translations import fuzzy, memory
+from translations.engine import TaskCancelled, TranslationEngine, pack_batches
+from translations.models import Translation, TranslationTask
+from translations.providers import ProviderError
+from translations.tasks import run_translation_task
+
+from .utils import RecordingProvider, create_languages, create_service, create_task
+
+
+class PackBatchesTests(SimpleTestCase):
+
+    def test_limits(self):
+        rows = [(i, 'x' * size) for i, size in enumerate([4, 4, 4, 9, 1, 1, 1])]
+        batches = [[i for i, _ in batch] for batch in pack_batches(rows, max_segments=3, max_chars=8)]
+        # Un texte plus long que max_chars part seul
+        self.assertEqual(batches, [[0, 1], [2], [3], [4, 5, 6]])
+        self.assertEqual(list(pack_batches([], 3, 8)), [])
+
+
+class EngineTestCase(TestCase):
+
+    def setUp(self):
+        fuzzy.cache.clear()
+        self.addCleanup(fuzzy.cache.clear)
+        self.translation_file = create_file(create_user())
+        create_strings(self.translation_file, 7)
+        self.service = create_service(max_segments=3)
+
+    def run_engine(self, task, **kwargs):
+        provider = RecordingProvider(task.service, **kwargs.pop('provider_options', {}))
+        engine = TranslationEngine(task, provider=provider, **kwargs)
+        return engine.run(), provider
+
+    def translations(self, task, code='fr'):
+        return dict(Translation.objects.filter(
+            string__file=task.file, target_language__code=code
+        ).values_list('string__key', 'translated_text'))
+
+
+class TranslationEngineTests(EngineTestCase):
+
+    def test_batches_every_string_for_every_language(self):
+        version = self.translation_file.version
+        task = create_task(self.translation_file, self.service, languages=('fr', 'de'))
+        result, provider = self.run_engine(task)
+
+        self.assertEqual(result['translated'], 14)
+        # Trois lots de trois chaînes au plus, par langue
+        self.assertEqual([len(texts) for texts, _ in provider.calls], [3, 3, 1, 3, 3, 1])
+        self.assertEqual(result['requests'], 6)
+        self.assertEqual(self.translations(task, 'de')['key4'], '[de] Source 4')
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.progress, task.actual_word_count), ('completed', 100.0, 28))
+        self.assertGreater(TranslationFile.objects.get(pk=self.translation_file.pk).version, version)
+
+    def test_chunks_give_the_same_result(self):
+        task = create_task(self.translation_file, self.service)
+        result, _provider = self.run_engine(task, chunk_size=2)
+        self.assertEqual(result['translated'], 7)
+        self.assertEqual(self.translations(task), {f'key{i}': f'[fr] Source {i}' for i in range(7)})
+
+    def test_approved_and_manual_translations_are_kept(self):
+        french, = create_languages('fr')
+        strings = {string.key: string for string in self.translation_file.strings.all()}
+        Translation.objects.create(
+            string=strings['key1'], target_language=french, translated_text='Validée',
+            translation_method='google', is_approved=True
+        )
+        Translation.objects.create(
+            string=strings['key2'], target_language=french, translated_text='Saisie', translation_method='manual'
+        )
+        Translation.objects.create(
+            string=strings['key3'], target_language=french, translated_text='Ancienne', translation_method='google'
+        )
+        task = create_task(self.translation_file, self.service)
+        result, provider = self.run_engine(task)
+
+        self.assertEqual((result['translated'], result['skipped']), (5, 2))
+        self.assertNotIn('Source 1', provider.texts)
+        translations = self.translations(task)
+        self.assertEqual((translations['key1'], translations['key2']), ('Validée', 'Saisie'))
+        self.assertEqual(translations['key3'], '[fr] Source 3')
+
+    def test_retry_resumes_without_translating_twice(self):
+        task = create_task(self.translation_file, self.service)
+        with self.assertRaises(ProviderError):
+            self.run_engine(task, chunk_size=3, provider_options={'fail_at': 2})
+        task.refresh_from_db()
+        started_at = task.started_at
+        self.assertEqual(len(self.translations(task)), 3)
+
+        result, provider = self.run_engine(task, chunk_size=3)
+        self.assertEqual(provider.texts, [f'Source {i}' for i in range(3, 7)])
+        self.assertEqual((result['translated'], result['skipped']), (4, 3))
+        task.refresh_from_db()
+        self.assertEqual(task.started_at, started_at)
+        self.assertEqual(task.actual_word_count, 14)
+
+    def test_cancelled_task_stops_at_the_next_chunk(self):
+        task = create_task(self.translation_file, self.service)
+
+        def cancel(text, language):
+            TranslationTask.objects.filter(pk=task.pk).update(status='cancelled')
+            return text.upper()
+
+        with self.assertRaises(TaskCancelled):
+            self.run_engine(task, chunk_size=3, provider_options={'reply': cancel})
+        self.assertEqual(len(self.translations(task)), 3)
+
+
+class RunTranslationTaskTests(EngineTestCase):
+
+    def run_task(self, task, **provider_options):
+        provider = RecordingProvider(task.service, **provider_options)
+        with mock.patch('translations.engine.get_provider', return_value=provider):
+            return run_translation_task.apply(args=(task.pk,))
+
+    def test_success(self):
+        task = create_task(self.translation_file, self.service)
+        self.assertEqual(self.run_task(task).get()['translated'], 7)
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'completed')
+        self.assertEqual(self.run_task(task).get(), {'status': 'completed'})
+
+    def test_permanent_error_fails_the_task(self):
+        task = create_task(self.translation_file, self.service)
+        result = self.run_task(task, fail_at=1, retryable=False).get()
+        self.assertEqual(result['status'], 'error')
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'failed')
+        self.assertIn('HTTP 503', task.error_message)
+
+    def test_retryable_error_retries_the_task(self):
+        task = create_task(self.translation_file, self.service)
+        with mock.patch.object(run_translation_task, 'retry', side_effect=Retry()) as retry:
+            self.run_task(task, fail_at=1)
+        self.assertEqual(retry.call_args.kwargs, {'countdown': 30})
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.retry_count), ('in_progress', 1))
+
+
+class DeduplicationTests(EngineTestCase):
+
+    def test_deduplicate_groups_by_normalized_source(self):
+        pending = [(1, 'Save'), (2, ' Save\n'), (3, 'Open'), (4, 'Save')]
+        hashes = {string_id: memory.source_hash(text) for string_id, text in pending}
+        groups = TranslationEngine.deduplicate(pending, hashes)
+        self.assertEqual([(text, [string_id for string_id, _ in members]) for _, text, members in groups], [
+            ('Save', [1, 2, 4]), ('Open', [3]),
+        ])
+
+    def test_identical_sources_are_sent_once(self):
+        translation_file = create_file(self.translation_file.uploaded_by, name='contexts.po')
+        sources = [('menu', 'Open'), ('button', ' Open '), ('', 'Close'), ('toolbar', 'Open')]
+        for i, (context, text) in enumerate(sources):
+            TranslationString.objects.create(
+                file=translation_file, key=f'open{i}', context=context, source_text=text, line_number=i
+            )
+        task = create_task(translation_file, self.service, languages=('fr', 'de'))
+        result, provider = self.run_engine(task)
+
+        self.assertCountEqual(provider.calls, [(['Open', 'Close'], 'fr'), (['Open', 'Close'], 'de')])
+        self.assertEqual((result['translated'], result['deduplicated']), (8, 4))
+        self.assertEqual(result['dedup_ratio'], 50.0)
+        self.assertEqual(
+            sorted(self.translations(task, 'de').values()),
+            [' [de] Open ', '[de] Close', '[de] Open', '[de] Open']
+        )
@@ -0,0 +1,148 @@
+# =============================================================================
+# translations/tests/test_fuzzy.py
+# =============================================================================
+
+"""Index approché de la mémoire de traduction (translations/fuzzy.py)"""
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from files.models import TranslationString
+from files.tests.test_views import FileAPITestCase
+from files.tests.utils import create_file, create_user
+from translations import fuzzy, memory
+from translations.engine import TranslationEngine
+from translations.models import Translation, TranslationMemoryBucket
+
+from .utils import RecordingProvider, create_languages, create_service, create_task
+
+
+class SignatureTests(SimpleTestCase):
+
+    def test_shingles_and_similarity(self):
+        self.assertEqual(fuzzy.shingles('  Ab\t C '), frozenset({' ab', 'ab ', 'b c', ' c '}))
+        self.assertEqual(fuzzy.shingles('a'), frozenset({' a '}))
+        self.assertEqual(fuzzy.similarity(fuzzy.shingles('Delete'), fuzzy.shingles('delete')), 1.0)
+        self.assertGreater(fuzzy.similarity(fuzzy.shingles('Delete file'), fuzzy.shingles('Delete files')), 0.7)
+        self.assertEqual(fuzzy.similarity(frozenset(), fuzzy.shingles('x')), 0.0)
+
+    def test_buckets_are_stable_and_shared_by_close_texts(self):
+        grams = fuzzy.shingles('Delete the selected file')
+        keys = fuzzy.buckets(grams)
+        self.assertEqual(len(keys), fuzzy.NUM_BANDS)
+        self.assertEqual(keys, fuzzy.buckets(fuzzy.shingles('delete  the selected FILE')))
+        self.assertTrue(all(-2 ** 63 <= key < 2 ** 63 for key in keys))
+        self.assertTrue(set(keys) & set(fuzzy.buckets(fuzzy.shingles('Delete the selected files'))))
+
+    def test_cache_expiry(self):
+        now = [0]
+        cache = fuzzy.FuzzyCache(max_items=2, ttl=10, clock=lambda: now[0])
+        cache.set('shingles', '', {'a': 1, 'b': 2})
+        self.assertEqual(cache.get('shingles', '', ['a', 'c']), ({'a': 1}, ['c']))
+        cache.set('shingles', '', {'c': 3})
+        # Au plus max_items entrées : la plus ancienne sort
+        self.assertEqual(cache.get('shingles', '', ['a', 'b', 'c']), ({'b': 2, 'c': 3}, ['a']))
+        now[0] = 11
+        self.assertEqual(cache.get('shingles', '', ['b']), ({}, ['b']))
+
+
+class FuzzyIndexTests(TestCase):
+
+    def setUp(self):
+        fuzzy.cache.clear()
+        self.addCleanup(fuzzy.cache.clear)
+        self.french, self.german = create_languages('fr', 'de')
+        memory.remember([
+            (self.french.pk, 'Delete files', 'Supprimer les fichiers'),
+            (self.german.pk, 'Delete files', 'Dateien löschen'),
+            (self.french.pk, 'Rename folder', 'Renommer le dossier'),
+        ])
+
+    def find(self, *texts, **kwargs):
+        return fuzzy.find_similar('', texts, [self.french.pk, self.german.pk], **kwargs)
+
+    def test_close_texts_are_found(self):
+        found = self.find('Delete file', 'Open settings', 'Delete files')
+        self.assertEqual(set(found), {0})
+        score, source, translated, origin = found[0][self.french.pk][0]
+        self.assertGreaterEqual(score, 0.7)
+        self.assertEqual((source, translated, origin), ('Delete files', 'Supprimer les fichiers', 'machine'))
+        self.assertEqual(found[0][self.german.pk][0][2], 'Dateien löschen')
+        # Sous le seuil demandé : rien
+        self.assertEqual(self.find('Delete file', min_similarity=0.99), {})
+
+    def test_buckets_are_written_once(self):
+        count = TranslationMemoryBucket.objects.count()
+        self.assertEqual(count, 2 * fuzzy.NUM_BANDS)
+        memory.remember([(self.german.pk, 'Rename folder', 'Ordner umbenennen')])
+        self.assertEqual(TranslationMemoryBucket.objects.count(), count)
+
+    def test_warm_lookup_does_not_query(self):
+        self.find('Delete file')
+        with CaptureQueriesContext(connection) as queries:
+            found = self.find('Delete file')
+        self.assertEqual(len(queries), 0)
+        self.assertIn(0, found)
+
+    def test_writes_update_the_warm_cache(self):
+        self.find('Rename folders')
+        memory.remember([(self.german.pk, 'Rename folder', 'Ordner umbenennen')])
+        memory.remember([(self.french.pk, 'Rename folder', 'Renommer ce dossier')], approved=True)
+        with CaptureQueriesContext(connection) as queries:
+            found = self.find('Rename folders')[0]
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(found[self.german.pk][0][2], 'Ordner umbenennen')
+        self.assertEqual(found[self.french.pk][0][2:], ('Renommer ce dossier', 'approved'))
+
+    def test_suggest_lists_exact_then_fuzzy(self):
+        memory.remember([(self.french.pk, 'Delete file', 'Supprimer le fichier')])
+        suggestions = fuzzy.suggest(' Delete file', [self.french])
+        self.assertEqual([(s['match'], s['translated_text']) for s in suggestions], [
+            ('exact', ' Supprimer le fichier'), ('fuzzy', ' Supprimer les fichiers'),
+        ])
+
+    def test_engine_prefill_marks_translations_fuzzy(self):
+        translation_file = create_file(create_user())
+        for i, text in enumerate(['Delete file', 'Open settings']):
+            TranslationString.objects.create(file=translation_file, key=f'key{i}', source_text=text, line_number=i)
+        service = create_service(fuzzy_prefill=True)
+        provider = RecordingProvider(service)
+        result = TranslationEngine(create_task(translation_file, service), provider=provider).run()
+
+        self.assertEqual(provider.texts, ['Open settings'])
+        self.assertEqual(result['memory_fuzzy_hits'], 1)
+        prefilled = Translation.objects.get(string__key='key0')
+        self.assertTrue(prefilled.is_fuzzy)
+        self.assertEqual(prefilled.translated_text, 'Supprimer les fichiers')
+        self.assertGreaterEqual(prefilled.confidence_score, 0.7)
+
+
+class SuggestionsAPITests(FileAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        fuzzy.cache.clear()
+        self.addCleanup(fuzzy.cache.clear)
+        french, = create_languages('fr')
+        memory.remember([(french.pk, 'Delete files', 'Supprimer les fichiers')])
+        self.string = TranslationString.objects.create(
+            file=create_file(self.user), key='delete', source_text='Delete file', line_number=1
+        )
+        self.url = reverse('translationstring-suggestions', args=[self.string.id])
+
+    def test_suggestions(self):
+        response = self.client.get(self.url, {'language': 'fr'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['suggestions'][0]['language_code'], 'fr')
+        self.assertEqual(response.data['suggestions'][0]['match'], 'fuzzy')
+        response = self.client.get(self.url, {'min_similarity': '0.99'})
+        self.assertEqual(response.data['suggestions'], [])
+
+    def test_invalid_parameters(self):
+        for params in ({'language': 'xx'}, {'min_similarity': '2'}, {'limit': 'beaucoup'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        other = self.client_for(create_user('bob'))
+        self.assertEqual(other.get(self.url).status_code, 404)
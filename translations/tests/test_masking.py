@@ -0,0 +1,110 @@
+# =============================================================================
+# translations/tests/test_masking.py
+# =============================================================================
+
+"""Masquage des variables et du balisage (translations/masking.py)"""
+
+from django.test import SimpleTestCase
+
+from files.models import TranslationString
+from files.tests.utils import create_file
+from translations.engine import TranslationEngine
+from translations.masking import has_text, mask, mask_batch, unmask
+from translations.models import Translation
+
+from .test_engine import EngineTestCase
+from .utils import RecordingProvider, create_service, create_task
+
+PLURAL = 'You have {count, plural, =0 {no file} one {# file} other {# files}}.'
+
+SAMPLES = [
+    ('Supprimer <b>%(count)s</b> fichiers', 'Supprimer {0} fichiers'),
+    ('Valeur %1$s sur %2$d', 'Valeur {0} sur {1}'),
+    ('Open {{count}} $t(common.files)', 'Open {0}'),
+    ('Bonjour {name}, total {0:.2f}', 'Bonjour {0}, total {1}'),
+    ('Voir @:app.title ou @.lower:menu.open', 'Voir {0} ou {1}'),
+    ('Copier&nbsp;<br/>coller', 'Copier{0}coller'),
+    ('Hello %s and 100%%', 'Hello %s and 100%%'),
+    ('Bonjour, monde {nom}', 'Bonjour, monde {0}'),
+    (PLURAL, 'You have {0}no file{1} file{2} files{3}.'),
+    ('{gender, select, female {She} male {He} other {They}} replied', '{0}She{1}He{2}They{3} replied'),
+    ('{n, selectordinal, offset: 1 one {#st} other {#th}} place', '{0}st{1}th{2} place'),
+    ('Rien à masquer', 'Rien à masquer'),
+]
+
+
+class MaskBatchTests(SimpleTestCase):
+
+    def test_masked_texts_round_trip(self):
+        masked = mask_batch([source for source, _ in SAMPLES])
+        for (source, expected), (text, tokens) in zip(SAMPLES, masked):
+            with self.subTest(source=source):
+                self.assertEqual(text, expected)
+                self.assertEqual(unmask(text, tokens), source)
+                self.assertEqual(mask(source), (text, tokens))
+
+    def test_translated_plural_branches(self):
+        text, tokens = mask(PLURAL)
+        self.assertTrue(all(structural for _, structural in tokens))
+        translated = unmask('Vous avez {0}aucun fichier{1} fichier{2} fichiers{3}.', tokens)
+        self.assertEqual(
+            translated, 'Vous avez {count, plural, =0 {aucun fichier} one {# fichier} other {# fichiers}}.'
+        )
+
+    def test_sentinels_must_match(self):
+        _text, tokens = mask('Supprimer <b>%(count)s</b> fichiers de {folder}')
+        self.assertEqual(unmask('Delete {1}: {0} files', tokens), 'Delete {folder}: <b>%(count)s</b> files')
+        for translated in ('Delete {0} files', 'Delete {0} {0} files {1}', 'Delete {0} files {2}'):
+            with self.subTest(translated=translated):
+                self.assertIsNone(unmask(translated, tokens))
+
+        # Structure ICU réordonnée : refusée
+        _text, tokens = mask(PLURAL)
+        self.assertIsNone(unmask('{0}aucun{2} fichiers{1} fichier{3}', tokens))
+
+    def test_each_text_is_scanned_on_its_own(self):
+        masked = mask_batch(['Non fermé {n, plural, one {# a', 'b} suite', '#1 {x}'])
+        self.assertEqual([text for text, _ in masked], ['Non fermé {0} a', 'b} suite', '#1 {0}'])
+        self.assertEqual(mask_batch([]), [])
+
+    def test_text_made_of_placeholders(self):
+        text, tokens = mask('%(name)s %s')
+        self.assertEqual((text, tokens), ('{0}', (('%(name)s %s', False),)))
+        self.assertFalse(has_text(text))
+        self.assertTrue(has_text('Bonjour {0}'))
+
+
+class EngineMaskingTests(EngineTestCase):
+
+    def translate(self, texts, reply=None, **config):
+        translation_file = create_file(self.translation_file.uploaded_by, name='masking.po')
+        for i, text in enumerate(texts):
+            TranslationString.objects.create(file=translation_file, key=f'm{i}', source_text=text, line_number=i)
+        service = create_service('deepl', **config)
+        provider = RecordingProvider(service, reply=reply)
+        result = TranslationEngine(create_task(translation_file, service), provider=provider).run()
+        translations = dict(Translation.objects.filter(string__file=translation_file).values_list(
+            'string__source_text', 'translated_text'
+        ))
+        return result, provider, translations
+
+    def test_tokens_are_masked_and_restored(self):
+        result, provider, translations = self.translate([PLURAL, '%(name)s', 'Supprimer <b>%(count)s</b>'])
+        self.assertEqual(provider.texts, ['You have {0}no file{1} file{2} files{3}.', 'Supprimer {0}'])
+        self.assertEqual(translations[PLURAL], f'[fr] {PLURAL}')
+        # Rien que des variables : non envoyé, la source sert de traduction
+        self.assertEqual(translations['%(name)s'], '%(name)s')
+        self.assertGreater(result['masking_ratio'], 0)
+
+    def test_lost_sentinels_resend_the_text_unmasked(self):
+        def reply(text, language):
+            return text.replace('{0}', '')
+
+        result, provider, translations = self.translate(['Supprimer <b>%(count)s</b>'], reply=reply)
+        self.assertEqual(provider.texts, ['Supprimer {0}', 'Supprimer <b>%(count)s</b>'])
+        self.assertEqual(result['mask_fallbacks'], 1)
+        self.assertEqual(translations['Supprimer <b>%(count)s</b>'], 'Supprimer <b>%(count)s</b>')
+
+    def test_masking_can_be_disabled(self):
+        _result, provider, _translations = self.translate(['Supprimer <b>%(count)s</b>'], mask_placeholders=False)
+        self.assertEqual(provider.texts, ['Supprimer <b>%(count)s</b>'])
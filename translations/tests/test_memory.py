@@ -0,0 +1,134 @@
+# =============================================================================
+# translations/tests/test_memory.py
+# =============================================================================
+
+"""Mémoire de traduction exacte (translations/memory.py)"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from files.models import TranslationString
+from files.tests.utils import create_file, create_user
+from translations import fuzzy, memory
+from translations.engine import TranslationEngine
+from translations.models import Translation, TranslationMemory
+
+from .utils import RecordingProvider, create_languages, create_service, create_task
+
+
+def create_source_strings(translation_file, texts):
+    return [
+        TranslationString.objects.create(file=translation_file, key=f'key{i}', source_text=text, line_number=i + 1)
+        for i, text in enumerate(texts)
+    ]
+
+
+class NormalizationTests(SimpleTestCase):
+
+    def test_hash_ignores_edges_and_unicode_form(self):
+        composed, decomposed = '\u00e9diter', 'e\u0301diter'
+        self.assertEqual(memory.source_hash(f'  {decomposed}\n'), memory.source_hash(composed))
+        self.assertNotEqual(memory.source_hash('Save'), memory.source_hash('save'))
+
+    def test_apply_edges(self):
+        self.assertEqual(memory.apply_edges('  Save\n', 'Enregistrer'), '  Enregistrer\n')
+        self.assertEqual(memory.apply_edges(' Save ', 'Enregistrer'), ' Enregistrer ')
+        self.assertEqual(memory.apply_edges('   ', 'x'), 'x')
+
+
+class TranslationMemoryTests(TestCase):
+
+    def setUp(self):
+        fuzzy.cache.clear()
+        self.addCleanup(fuzzy.cache.clear)
+        self.french, self.german = create_languages('fr', 'de')
+
+    def lookup(self, *texts, languages=None):
+        languages = languages or [self.french.pk]
+        return memory.lookup('', languages, [memory.source_hash(text) for text in texts])
+
+    def test_machine_entries_never_overwrite(self):
+        self.assertEqual(memory.remember([(self.french.pk, 'Save', 'Sauver')]), 1)
+        memory.remember([(self.french.pk, ' Save ', 'Enregistrer'), (self.german.pk, 'Save', 'Speichern')])
+        with CaptureQueriesContext(connection) as queries:
+            found = self.lookup('Save', languages=[self.french.pk, self.german.pk])
+        self.assertEqual(len(queries), 1)
+        digest = memory.source_hash('Save')
+        self.assertEqual(found, {(self.french.pk, digest): 'Sauver', (self.german.pk, digest): 'Speichern'})
+
+    def test_approved_entries_replace(self):
+        memory.remember([(self.french.pk, 'Save', 'Sauver')])
+        memory.remember([(self.french.pk, 'Save', 'Enregistrer')], approved=True)
+        entry = TranslationMemory.objects.get()
+        self.assertEqual((entry.translated_text, entry.origin), ('Enregistrer', 'approved'))
+        self.assertEqual(memory.remember([(self.french.pk, '  ', 'x'), (self.french.pk, 'Open', ' ')]), 0)
+
+    def test_approving_a_translation_remembers_it(self):
+        string, = create_source_strings(create_file(create_user()), ['Delete'])
+        translation = Translation.objects.create(
+            string=string, target_language=self.french, translated_text='Supprimer', translation_method='manual'
+        )
+        self.assertEqual(self.lookup('Delete'), {})
+        translation.is_approved = True
+        translation.save()
+        self.assertEqual(list(self.lookup('Delete').values()), ['Supprimer'])
+
+    def test_build_translation_memory(self):
+        strings = create_source_strings(create_file(create_user()), ['Open', 'Close', 'Quit'])
+        for string, text, method, approved in zip(
+            strings, ['Ouvrir', 'Fermer', 'Quitter'], ['google', 'google', 'manual'], [False, True, False]
+        ):
+            # update() : pas de Translation.save(), la mémoire reste vide
+            Translation.objects.create(
+                string=string, target_language=self.french, translated_text='-', translation_method=method
+            )
+            Translation.objects.filter(string=string).update(translated_text=text, is_approved=approved)
+        self.assertFalse(TranslationMemory.objects.exists())
+
+        call_command('build_translation_memory', stdout=StringIO())
+        self.assertEqual(
+            dict(TranslationMemory.objects.values_list('source_text', 'origin')),
+            {'Open': 'machine', 'Close': 'approved'}
+        )
+        # Sources indexées pour la recherche approchée
+        self.assertTrue(fuzzy.find_similar('', ['Close!'], [self.french.pk], min_similarity=0.5))
+
+
+class EngineMemoryTests(TestCase):
+
+    def setUp(self):
+        fuzzy.cache.clear()
+        self.addCleanup(fuzzy.cache.clear)
+        self.user = create_user()
+        self.service = create_service()
+
+    def translate(self, texts):
+        translation_file = create_file(self.user, name=f'file{TranslationString.objects.count()}.po')
+        create_source_strings(translation_file, texts)
+        task = create_task(translation_file, self.service)
+        provider = RecordingProvider(self.service)
+        result = TranslationEngine(task, provider=provider).run()
+        task.refresh_from_db()
+        translations = dict(Translation.objects.filter(string__file=translation_file).values_list(
+            'string__source_text', 'translated_text'
+        ))
+        return result, task, provider, translations
+
+    def test_second_file_is_served_from_memory(self):
+        self.translate(['Save', 'Cancel', 'Open file'])
+        result, task, provider, translations = self.translate(['  Save', 'Cancel\n', 'Close'])
+
+        self.assertEqual(provider.texts, ['Close'])
+        self.assertEqual(translations, {'  Save': '  [fr] Save', 'Cancel\n': '[fr] Cancel\n', 'Close': '[fr] Close'})
+        self.assertEqual(result['memory_hits'], 2)
+        self.assertEqual((task.memory_lookups, task.memory_hits), (3, 2))
+        self.assertEqual(task.memory_saved_characters, len('  Save') + len('Cancel\n'))
+        self.assertEqual(task.memory_hit_rate, 66.67)
+        self.assertEqual(
+            set(Translation.objects.filter(translation_method='memory').values_list('string__source_text', flat=True)),
+            {'  Save', 'Cancel\n'}
+        )
@@ -0,0 +1,59 @@
+# =============================================================================
+# translations/tests/utils.py
+# =============================================================================
+
+"""Données communes aux tests de l'application translations"""
+
+from files.tests.utils import create_file, create_user
+from translations.models import Language, TranslationService, TranslationTask
+from translations.providers import FakeProvider, ProviderError
+
+
+def create_languages(*codes):
+    return [
+        Language.objects.get_or_create(code=code, defaults={'name': code, 'native_name': code})[0]
+        for code in codes
+    ]
+
+
+def create_service(name='google', **config):
+    # Adaptateur local : aucun appel réseau
+    return TranslationService.objects.create(
+        name=name, display_name=name, config={'provider': 'fake', **config}
+    )
+
+
+def create_task(translation_file=None, service=None, languages=('fr',), **fields):
+    if translation_file is None:
+        translation_file = create_file(create_user())
+    task = TranslationTask.objects.create(
+        file=translation_file, user=translation_file.uploaded_by, service=service or create_service(), **fields
+    )
+    task.target_languages.set(create_languages(*languages))
+    return task
+
+
+class RecordingProvider(FakeProvider):
+    """
+    ``FakeProvider`` qui garde les lots reçus (``calls``) ; ``fail_at`` fait
+    échouer le n-ième appel, ``reply`` remplace la traduction d'un texte.
+    """
+
+    def __init__(self, service, fail_at=None, retryable=True, reply=None):
+        super().__init__(service)
+        self.calls = []
+        self.fail_at = fail_at
+        self.retryable = retryable
+        self.reply = reply
+
+    @property
+    def texts(self):
+        return [text for texts, _language in self.calls for text in texts]
+
+    def translate_batch(self, texts, target_language, source_language=None):
+        self.calls.append((list(texts), target_language))
+        if len(self.calls) == self.fail_at:
+            raise ProviderError('HTTP 503', retryable=self.retryable)
+        if self.reply is not None:
+            return [self.reply(text, target_language) for text in texts]
+        return super().translate_batch(texts, target_language, source_language)